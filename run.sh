@@ -76,6 +76,11 @@ function run-py {
     uvicorn files_api.main:create_app --reload --factory
 }
 
+# benchmark the throughput and latency of every route, e.g. `./run.sh benchmark --target moto-server --sizes 1KB,1GB`
+function benchmark {
+    python "$THIS_DIR/scripts/benchmark.py" "$@"
+}
+
 # run linting, formatting, and other static code quality tools
 function lint {
     pre-commit run --all-files
@@ -0,0 +1,512 @@
+"""
+Load and latency benchmarks of the files API.
+
+Each object size and concurrency level is one scenario, in which files are uploaded (PUT), then
+read (HEAD, GET), listed and deleted, with ``concurrency`` requests in flight at a time. For each
+route, the requests per second, p50/p95/p99 latencies, the app's peak RSS and the S3 calls made
+per request (from the ``X-S3-Call-Count`` header) are reported as JSON.
+
+Targets:
+- ``moto-server``: the app is run with uvicorn against a local moto server, like ``run.sh run-mock``,
+  and driven over HTTP. Use it for large objects and for realistic memory numbers.
+- ``in-process``: the app is driven through httpx's ASGI transport, with S3 mocked in-process.
+  Request and response bodies are buffered, and the peak RSS includes moto and the load generator.
+- ``local``: like ``in-process``, with files stored in a temporary directory instead of S3.
+
+Since a local mock answers far faster than S3 does, ``--s3-latency-ms`` adds a delay to every S3
+request, through the app's ``s3_injected_latency_seconds`` setting.
+
+Pass ``--baseline`` with the output of an earlier run to exit non-zero if any scenario regressed
+by more than ``--max-regression``: fewer requests per second, a higher p95 latency, or more S3 calls
+per request.
+
+Typical runs:
+    python scripts/benchmark.py --target in-process --sizes 1KB,1MB --concurrency 1,16
+    python scripts/benchmark.py --target moto-server --sizes 1KB,100MB,1GB --s3-latency-ms 20 --output results.json
+    python scripts/benchmark.py --baseline results.json --max-regression 0.15
+"""
+
+# pylint: disable=invalid-name
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import (
+    asdict,
+    dataclass,
+)
+from pathlib import Path
+from typing import (
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    MutableMapping,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
+
+import boto3
+import httpx
+from moto import mock_aws
+
+from files_api.main import create_app
+from files_api.middleware import S3_CALL_COUNT_HEADER
+from files_api.settings import Settings
+
+BUCKET_NAME = "benchmark-bucket"
+OPERATIONS = ["PUT", "HEAD", "GET", "LIST", "DELETE"]
+SIZE_UNITS = {"B": 1, "KB": 1024, "MB": 1024**2, "GB": 1024**3}
+# payloads larger than this are streamed from a temporary file rather than held in memory
+IN_MEMORY_PAYLOAD_MAX_BYTES = 8 * 1024**2
+RSS_SAMPLE_INTERVAL_SECONDS = 0.02
+STARTUP_TIMEOUT_SECONDS = 30.0
+
+
+class Args(NamedTuple):
+    """CLI arguments for the script."""
+
+    target: str
+    sizes: List[int]
+    concurrency: List[int]
+    requests: int
+    max_bytes_per_scenario: int
+    s3_latency_ms: float
+    output: Optional[Path]
+    baseline: Optional[Path]
+    max_regression: float
+
+
+@dataclass
+class ScenarioResult:  # pylint: disable=too-many-instance-attributes
+    """Measurements of one route at one object size and concurrency level."""
+
+    operation: str
+    size_bytes: int
+    concurrency: int
+    requests: int
+    errors: int
+    requests_per_second: float
+    latency_ms: Dict[str, float]
+    peak_rss_bytes: Optional[int]
+    s3_calls_per_request: float
+
+
+@dataclass
+class Target:
+    """A running app to benchmark: a client sending requests to it, and the ID of the process serving them."""
+
+    client: httpx.AsyncClient
+    pid: int
+
+
+def main() -> None:
+    """Run the script."""
+    args = parse_args()
+    report = asyncio.run(run_benchmarks(args))
+
+    report_json = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(report_json)
+        print(f"✅ Wrote benchmark results to {args.output}.", file=sys.stderr)
+    else:
+        print(report_json)
+
+    if args.baseline:
+        baseline_report = json.loads(args.baseline.read_text())
+        for setting in ("target", "s3_latency_ms"):
+            if baseline_report["config"][setting] != report["config"][setting]:
+                print(
+                    f"❌ The baseline was run with a different {setting}; results are not comparable.", file=sys.stderr
+                )
+                sys.exit(2)
+        regressions = find_regressions(
+            results=report["results"], baseline_results=baseline_report["results"], max_regression=args.max_regression
+        )
+        if regressions:
+            print("❌ Performance regressed compared to the baseline:\n", file=sys.stderr)
+            for regression in regressions:
+                print(f"  - {regression}", file=sys.stderr)
+            sys.exit(1)
+        print("✅ No regressions compared to the baseline.", file=sys.stderr)
+
+
+def parse_args() -> Args:
+    """
+    Parse command-line arguments.
+
+    :return: Parsed command-line arguments as a NamedTuple.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the throughput and latency of the files API")
+    parser.add_argument("--target", choices=["in-process", "moto-server", "local"], default="in-process")
+    parser.add_argument(
+        "--sizes", default="1KB,1MB", help="Comma-separated object sizes, e.g. 1KB,1MB,100MB,1GB (default: 1KB,1MB)"
+    )
+    parser.add_argument("--concurrency", default="1,8", help="Comma-separated concurrency levels (default: 1,8)")
+    parser.add_argument("--requests", type=int, default=100, help="Requests per route and scenario (default: 100)")
+    parser.add_argument(
+        "--max-bytes-per-scenario",
+        default="1GB",
+        help="Send fewer requests for large sizes, so that each route transfers at most this much (default: 1GB)",
+    )
+    parser.add_argument("--s3-latency-ms", type=float, default=0.0, help="Latency added to every S3 request")
+    parser.add_argument("--output", type=Path, help="Path to write the JSON results to, instead of stdout")
+    parser.add_argument("--baseline", type=Path, help="Path to the JSON results of an earlier run to compare to")
+    parser.add_argument(
+        "--max-regression",
+        type=float,
+        default=0.1,
+        help="Fraction by which a scenario may be slower than the baseline (default: 0.1)",
+    )
+
+    args = parser.parse_args()
+    return Args(
+        target=args.target,
+        sizes=[parse_size(size) for size in args.sizes.split(",")],
+        concurrency=[int(concurrency) for concurrency in args.concurrency.split(",")],
+        requests=args.requests,
+        max_bytes_per_scenario=parse_size(args.max_bytes_per_scenario),
+        s3_latency_ms=args.s3_latency_ms,
+        output=args.output,
+        baseline=args.baseline,
+        max_regression=args.max_regression,
+    )
+
+
+def parse_size(size: str) -> int:
+    """
+    Parse a size such as ``1KB``, ``100MB`` or ``1GB`` into bytes; units are powers of 1024.
+
+    :param size: The size to parse.
+    :return: The size in bytes.
+    """
+    match = re.fullmatch(r"\s*(\d+)\s*([KMG]?B)?\s*", size.upper())
+    if match is None:
+        raise argparse.ArgumentTypeError(f"Invalid size: {size}")
+    return int(match.group(1)) * SIZE_UNITS[match.group(2) or "B"]
+
+
+async def run_benchmarks(args: Args) -> dict:
+    """
+    Run every scenario against the chosen target.
+
+    :param args: The benchmark configuration.
+    :return: The configuration and the results, ready to be dumped as JSON.
+    """
+    results: List[ScenarioResult] = []
+    async with start_target(args.target, s3_latency_seconds=args.s3_latency_ms / 1000) as target:
+        for size in args.sizes:
+            with payload_for_size(size) as open_payload:
+                for concurrency in args.concurrency:
+                    num_requests = min(args.requests, max(concurrency, args.max_bytes_per_scenario // size))
+                    results += await run_scenario(target, size, concurrency, num_requests, open_payload)
+    return {
+        "config": {
+            "target": args.target,
+            "sizes": args.sizes,
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "s3_latency_ms": args.s3_latency_ms,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "results": [asdict(result) for result in results],
+    }
+
+
+async def run_scenario(
+    target: Target, size: int, concurrency: int, num_requests: int, open_payload: Callable
+) -> List[ScenarioResult]:
+    """
+    Upload, read, list and delete ``num_requests`` files of ``size`` bytes, measuring each route separately.
+
+    :return: One result per route, in the order of :data:`OPERATIONS`.
+    """
+    client = target.client
+    prefix = f"benchmark/{size}/{concurrency}/"
+    file_paths = [f"{prefix}{index:06d}.bin" for index in range(num_requests)]
+
+    async def _put(file_path: str) -> httpx.Response:
+        with open_payload() as payload:
+            files = {"file_content": (file_path, payload, "application/octet-stream")}
+            return await client.put(f"/v1/files/{file_path}", files=files)
+
+    async def _get(file_path: str) -> httpx.Response:
+        async with client.stream("GET", f"/v1/files/{file_path}") as response:
+            async for _ in response.aiter_raw():
+                pass
+        return response
+
+    requests_by_operation: Dict[str, Callable[[str], Awaitable[httpx.Response]]] = {
+        "PUT": _put,
+        "HEAD": lambda file_path: client.head(f"/v1/files/{file_path}"),
+        "GET": _get,
+        "LIST": lambda _: client.get("/v1/files", params={"directory": prefix, "page_size": 100}),
+        "DELETE": lambda file_path: client.delete(f"/v1/files/{file_path}"),
+    }
+    results = []
+    for operation in OPERATIONS:
+        result = await measure(target, requests_by_operation[operation], file_paths, concurrency)
+        results.append(ScenarioResult(operation=operation, size_bytes=size, concurrency=concurrency, **result))
+        print(
+            f"{operation:>6} {size:>12} B x{concurrency:<4} {result['requests_per_second']:10.1f} req/s",
+            file=sys.stderr,
+        )
+    return results
+
+
+async def measure(
+    target: Target,
+    send_request: Callable[[str], Awaitable[httpx.Response]],
+    file_paths: List[str],
+    concurrency: int,
+) -> dict:
+    """
+    Send one request per file path, ``concurrency`` at a time, and summarize their latencies.
+
+    :return: The fields of a :class:`ScenarioResult` measured here.
+    """
+    latencies: List[float] = []
+    s3_call_counts: List[int] = []
+    errors = 0
+    pending_file_paths = iter(file_paths)
+
+    async def _worker() -> None:
+        nonlocal errors
+        for file_path in pending_file_paths:
+            started_at = time.perf_counter()
+            try:
+                response = await send_request(file_path)
+            except httpx.HTTPError:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - started_at)
+            s3_call_counts.append(int(response.headers.get(S3_CALL_COUNT_HEADER, 0)))
+            errors += int(response.status_code >= 400)
+
+    async with sample_peak_rss(target.pid) as peak_rss:
+        started_at = time.perf_counter()
+        await asyncio.gather(*(_worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started_at
+
+    latencies.sort()
+    return {
+        "requests": len(file_paths),
+        "errors": errors,
+        "requests_per_second": round(len(file_paths) / elapsed, 2),
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50) * 1000, 3),
+            "p95": round(percentile(latencies, 95) * 1000, 3),
+            "p99": round(percentile(latencies, 99) * 1000, 3),
+            "max": round(latencies[-1] * 1000, 3) if latencies else 0.0,
+        },
+        "peak_rss_bytes": peak_rss[0],
+        "s3_calls_per_request": round(sum(s3_call_counts) / len(s3_call_counts), 3) if s3_call_counts else 0.0,
+    }
+
+
+def percentile(sorted_values: List[float], percent: float) -> float:
+    """Return the nearest-rank percentile of already sorted values, or 0 if there are none."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * percent // 100))  # ceil without floats
+    return sorted_values[int(rank) - 1]
+
+
+def find_regressions(results: List[dict], baseline_results: List[dict], max_regression: float) -> List[str]:
+    """
+    Compare results to a baseline, scenario by scenario; scenarios missing from either are skipped.
+
+    :param results: Results of the current run.
+    :param baseline_results: Results of the baseline run.
+    :param max_regression: Fraction by which throughput may drop, or p95 latency and S3 calls may grow.
+    :return: A description of each regression found.
+    """
+
+    def _key(result: dict) -> Tuple[str, int, int]:
+        return result["operation"], result["size_bytes"], result["concurrency"]
+
+    baseline_by_key = {_key(result): result for result in baseline_results}
+    regressions = []
+    for result in results:
+        baseline = baseline_by_key.get(_key(result))
+        if baseline is None:
+            continue
+        scenario = "{} {} B x{}".format(*_key(result))  # pylint: disable=consider-using-f-string
+        if result["requests_per_second"] < baseline["requests_per_second"] * (1 - max_regression):
+            regressions.append(
+                f"{scenario}: {result['requests_per_second']} req/s, was {baseline['requests_per_second']}"
+            )
+        if result["latency_ms"]["p95"] > baseline["latency_ms"]["p95"] * (1 + max_regression):
+            regressions.append(
+                f"{scenario}: p95 latency {result['latency_ms']['p95']} ms, was {baseline['latency_ms']['p95']}"
+            )
+        # S3 calls are mostly deterministic, but cached metadata and listings expire with time
+        if result["s3_calls_per_request"] > baseline["s3_calls_per_request"] * (1 + max_regression):
+            regressions.append(
+                f"{scenario}: {result['s3_calls_per_request']} S3 calls per request,"
+                f" was {baseline['s3_calls_per_request']}"
+            )
+        if result["errors"] > baseline["errors"]:
+            regressions.append(f"{scenario}: {result['errors']} errors, was {baseline['errors']}")
+    return regressions
+
+
+@contextlib.contextmanager
+def payload_for_size(size: int) -> Iterator[Callable]:
+    """
+    Yield a function opening a new readable stream of ``size`` random bytes, one per upload.
+
+    Large payloads are written to a temporary file once, and streamed from it by every upload.
+    """
+    if size <= IN_MEMORY_PAYLOAD_MAX_BYTES:
+        content = os.urandom(size)
+        yield lambda: contextlib.nullcontext(content)
+        return
+
+    chunk = os.urandom(1024**2)
+    with tempfile.NamedTemporaryFile(prefix="files-api-benchmark-") as file:
+        for offset in range(0, size, len(chunk)):
+            file.write(chunk[: size - offset])
+        file.flush()
+        yield lambda: open(file.name, "rb")  # pylint: disable=consider-using-with
+
+
+@contextlib.asynccontextmanager
+async def sample_peak_rss(pid: int) -> AsyncIterator[List[Optional[int]]]:
+    """
+    Sample the resident set size of process ``pid`` while the context is active.
+
+    Yields a one-item list, set to the peak RSS in bytes once the context exits, or None if the
+    RSS cannot be read, e.g. on systems without ``/proc``.
+    """
+    peak_rss: List[Optional[int]] = [read_rss_bytes(pid)]
+
+    async def _sample() -> None:
+        while True:
+            rss = read_rss_bytes(pid)
+            if rss is not None:
+                peak_rss[0] = max(peak_rss[0] or 0, rss)
+            await asyncio.sleep(RSS_SAMPLE_INTERVAL_SECONDS)
+
+    sampler = asyncio.ensure_future(_sample())
+    try:
+        yield peak_rss
+    finally:
+        sampler.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await sampler
+
+
+def read_rss_bytes(pid: int) -> Optional[int]:
+    """Return the current resident set size of process ``pid``, from ``/proc``; None if unavailable."""
+    try:
+        with open(f"/proc/{pid}/status", encoding="utf-8") as status_file:
+            for line in status_file:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+@contextlib.asynccontextmanager
+async def start_target(target: str, s3_latency_seconds: float) -> AsyncIterator[Target]:
+    """Start the app as ``target`` describes, and stop it, and any mock it started, on exit."""
+    if target == "moto-server":
+        async with start_moto_server_target(s3_latency_seconds) as moto_server_target:
+            yield moto_server_target
+        return
+
+    with contextlib.ExitStack() as stack:
+        if target == "local":
+            storage_directory = stack.enter_context(tempfile.TemporaryDirectory(prefix="files-api-benchmark-"))
+            settings = Settings(storage_backend="local", local_storage_directory=storage_directory)
+        else:
+            stack.enter_context(mock_aws())
+            _point_away_from_aws(os.environ)
+            boto3.client("s3").create_bucket(Bucket=BUCKET_NAME)
+            settings = Settings(s3_bucket_name=BUCKET_NAME, s3_injected_latency_seconds=s3_latency_seconds)
+        app = create_app(settings)
+        transport = httpx.ASGITransport(app=app)  # type: ignore[arg-type]
+        async with app.router.lifespan_context(app), httpx.AsyncClient(
+            transport=transport, base_url="http://benchmark", timeout=None
+        ) as client:
+            yield Target(client=client, pid=os.getpid())
+
+
+@contextlib.asynccontextmanager
+async def start_moto_server_target(s3_latency_seconds: float) -> AsyncIterator[Target]:
+    """Run a moto server and the app with uvicorn, each in its own process, like ``run.sh run-mock``."""
+    moto_port, app_port = _find_free_port(), _find_free_port()
+    env = _point_away_from_aws(dict(os.environ))
+    env.update(
+        AWS_ENDPOINT_URL=f"http://127.0.0.1:{moto_port}",
+        S3_BUCKET_NAME=BUCKET_NAME,
+        S3_INJECTED_LATENCY_SECONDS=str(s3_latency_seconds),
+    )
+    moto_command = [sys.executable, "-m", "moto.server", "-p", str(moto_port)]
+    app_command = [sys.executable, "-m", "uvicorn", "files_api.main:create_app", "--factory"]
+    app_command += ["--host", "127.0.0.1", "--port", str(app_port), "--log-level", "warning"]
+    with subprocess.Popen(moto_command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL) as moto_server:
+        try:
+            s3_client = boto3.client(
+                "s3",
+                endpoint_url=env["AWS_ENDPOINT_URL"],
+                region_name=env["AWS_DEFAULT_REGION"],
+                aws_access_key_id=env["AWS_ACCESS_KEY_ID"],
+                aws_secret_access_key=env["AWS_SECRET_ACCESS_KEY"],
+            )
+            await _wait_until_ready(lambda: s3_client.create_bucket(Bucket=BUCKET_NAME))
+            with subprocess.Popen(app_command, env=env) as app_server:
+                try:
+                    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{app_port}", timeout=None) as client:
+                        await _wait_until_ready(lambda: httpx.get(f"http://127.0.0.1:{app_port}/openapi.json"))
+                        yield Target(client=client, pid=app_server.pid)
+                finally:
+                    app_server.terminate()
+        finally:
+            moto_server.terminate()
+
+
+async def _wait_until_ready(probe: Callable) -> None:
+    """Call ``probe`` until it stops raising, e.g. while a server starts up."""
+    deadline = time.monotonic() + STARTUP_TIMEOUT_SECONDS
+    while True:
+        try:
+            probe()
+            return
+        except Exception:  # pylint: disable=broad-except
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.1)
+
+
+def _find_free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _point_away_from_aws(env: MutableMapping[str, str]) -> MutableMapping[str, str]:
+    """Use dummy credentials, so that nothing reaches real AWS, as the test fixtures do."""
+    env.update(AWS_ACCESS_KEY_ID="mock", AWS_SECRET_ACCESS_KEY="mock", AWS_DEFAULT_REGION="us-east-1")
+    env.pop("AWS_PROFILE", None)
+    env.pop("AWS_SESSION_TOKEN", None)
+    return env
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+Micro-benchmark of building and serializing ``GET /v1/files`` responses, in listed entries per second.
+
+Two paths are compared on the same synthetic listing pages:
+- ``validated``: each entry is validated into a ``FileMetadata``, and the ``GetFilesResponse`` is
+  validated against the route's response model and serialized by FastAPI, as a route returning
+  a model is.
+- ``trusted``: the response is built with ``model_construct`` and rendered by ``FastJSONResponse``,
+  as ``list_files`` does with the entries listed by the storage backend.
+
+Both paths must produce the same JSON. No S3 calls are made, so the numbers are pure CPU.
+
+Typical runs:
+    python scripts/benchmark_list_serialization.py
+    python scripts/benchmark_list_serialization.py --page-sizes 100,1000 --seconds 2
+"""
+
+# pylint: disable=invalid-name
+
+import argparse
+import asyncio
+import json
+import time
+from datetime import (
+    datetime,
+    timedelta,
+    timezone,
+)
+from functools import partial
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    NamedTuple,
+)
+
+from fastapi.routing import (
+    APIRoute,
+    serialize_response,
+)
+
+from files_api.responses import FastJSONResponse
+from files_api.routes import ROUTER
+from files_api.schemas import (
+    FileMetadata,
+    GetFilesResponse,
+)
+from files_api.storage.base import ObjectInfo
+
+LIST_FILES_PATH = "/v1/files"
+
+
+class Args(NamedTuple):
+    """CLI arguments for the script."""
+
+    page_sizes: List[int]
+    seconds: float
+
+
+def main() -> None:
+    """Run the script."""
+    args = parse_args()
+    results = [asyncio.run(benchmark_page_size(page_size, args.seconds)) for page_size in args.page_sizes]
+    print(json.dumps({"results": results}, indent=2))
+
+
+def parse_args() -> Args:
+    """
+    Parse command-line arguments.
+
+    :return: Parsed command-line arguments as a NamedTuple.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the serialization of GET /v1/files responses")
+    parser.add_argument(
+        "--page-sizes", default="10,100,1000", help="Comma-separated entries per page (default: 10,100,1000)"
+    )
+    parser.add_argument("--seconds", type=float, default=1.0, help="Time spent on each path and page size")
+    args = parser.parse_args()
+    return Args(page_sizes=[int(page_size) for page_size in args.page_sizes.split(",")], seconds=args.seconds)
+
+
+async def benchmark_page_size(page_size: int, seconds: float) -> Dict[str, float]:
+    """Measure the entries per second of both paths on a page of ``page_size`` entries, and their speedup."""
+    entries = make_entries(page_size)
+    # FastAPI's view of the route's response model, as used to validate and serialize what the route returns
+    render_validated = partial(render_validated_with, _list_files_route().response_field)
+    validated_body, trusted_body = await render_validated(entries), await render_trusted(entries)
+    if json.loads(validated_body) != json.loads(trusted_body):
+        raise AssertionError("The validated and trusted paths serialized the page differently")
+
+    validated = await measure_entries_per_second(render_validated, entries, seconds)
+    trusted = await measure_entries_per_second(render_trusted, entries, seconds)
+    return {
+        "page_size": page_size,
+        "validated_entries_per_second": round(validated),
+        "trusted_entries_per_second": round(trusted),
+        "speedup": round(trusted / validated, 2),
+    }
+
+
+def make_entries(count: int) -> List[ObjectInfo]:
+    """Make ``count`` entries like those listed by the storage backend, with realistic keys."""
+    last_modified = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    return [
+        ObjectInfo(
+            key=f"projects/project-{index // 100:04d}/data/file-{index:08d}.csv",
+            size=index * 1024,
+            etag=f'"{index:032x}"',
+            last_modified=last_modified + timedelta(seconds=index),
+        )
+        for index in range(count)
+    ]
+
+
+async def render_validated_with(response_field: Any, entries: List[ObjectInfo]) -> bytes:
+    """Build and serialize a page as a route returning a ``GetFilesResponse`` model would."""
+    response = GetFilesResponse(
+        files=[
+            FileMetadata(file_path=info.key, last_modified=info.last_modified, size_bytes=info.size)
+            for info in entries
+        ],
+        next_page_token="next-page-token",
+        directories=[],
+    )
+    return await serialize_response(field=response_field, response_content=response, is_coroutine=True, dump_json=True)
+
+
+async def render_trusted(entries: List[ObjectInfo]) -> bytes:
+    """Build and serialize a page as ``list_files`` does."""
+    response = GetFilesResponse.model_construct(
+        files=[
+            FileMetadata.model_construct(file_path=info.key, last_modified=info.last_modified, size_bytes=info.size)
+            for info in entries
+        ],
+        next_page_token="next-page-token",
+        directories=[],
+    )
+    return FastJSONResponse(response).body
+
+
+async def measure_entries_per_second(
+    render: Callable[[List[ObjectInfo]], Awaitable[bytes]], entries: List[ObjectInfo], seconds: float
+) -> float:
+    """Render ``entries`` repeatedly for about ``seconds``, and return how many entries were rendered per second."""
+    rendered_pages = 0
+    started_at = time.perf_counter()
+    deadline = started_at + seconds
+    while time.perf_counter() < deadline:
+        await render(entries)
+        rendered_pages += 1
+    return rendered_pages * len(entries) / (time.perf_counter() - started_at)
+
+
+def _list_files_route() -> APIRoute:
+    return next(
+        route
+        for route in ROUTER.routes
+        if isinstance(route, APIRoute) and route.path == LIST_FILES_PATH and "GET" in route.methods
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+"""Reading files out of archives uploaded to, and streaming archives of files served by, the files API."""
+
+import mimetypes
+import queue
+import shutil
+import tarfile
+import tempfile
+import threading
+import zipfile
+from contextlib import closing
+from contextvars import copy_context
+from dataclasses import dataclass
+from datetime import datetime
+from typing import (
+    BinaryIO,
+    Iterable,
+    Iterator,
+    Literal,
+    Optional,
+    Union,
+)
+
+from files_api.compression import CONTENT_ENCODING_FILE_EXTENSIONS
+from files_api.s3.read_objects import (
+    DEFAULT_PREFETCH_COUNT,
+    DEFAULT_PREFETCH_MAX_OBJECT_BYTES,
+    iter_s3_object_bodies,
+    iter_s3_objects,
+)
+from files_api.s3.write_objects import ObjectToUpload
+
+try:
+    from mypy_boto3_s3 import S3Client
+except ImportError:  # pragma: no cover
+    ...
+
+ArchiveFormat = Literal["tar", "tar.gz", "zip"]
+
+ARCHIVE_MEDIA_TYPES: dict[str, str] = {
+    "tar": "application/x-tar",
+    "tar.gz": "application/gzip",
+    "zip": "application/zip",
+}
+ARCHIVE_COPY_CHUNK_SIZE_BYTES = 64 * 1024
+DEFAULT_MAX_BUFFERED_ARCHIVE_CHUNKS = 16
+DEFAULT_ARCHIVE_MEMBER_SPOOL_MAX_MEMORY_BYTES = 1024 * 1024
+# zip timestamps cannot represent dates before 1980
+_MIN_ZIP_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+
+
+@dataclass(frozen=True)
+class ArchiveMember:
+    """A file to write into an archive; ``content`` must hold exactly ``size`` bytes and is closed once written."""
+
+    name: str
+    size: int
+    last_modified: datetime
+    content: BinaryIO
+
+
+def iter_tar_archive(
+    archive: BinaryIO,
+    directory: str = "",
+    spool_max_memory_bytes: int = DEFAULT_ARCHIVE_MEMBER_SPOOL_MAX_MEMORY_BYTES,
+) -> Iterator[ObjectToUpload]:
+    """
+    Yield each regular file in a (possibly compressed) tar archive as an :class:`ObjectToUpload`.
+
+    The archive is read as a stream, one member at a time. A streamed archive cannot be read
+    out of order, so each member is copied into a temporary file as it is reached, held in memory
+    up to ``spool_max_memory_bytes`` and written to disk beyond. Memory use is therefore bounded
+    whatever the size of the members, even when the consumer keeps several of them at once, as
+    :func:`files_api.s3.write_objects.upload_s3_objects` does. Each temporary file is deleted once
+    closed or no longer referenced. Directories, links and other special members are skipped.
+
+    :param archive: A binary stream positioned at the start of a tar, tar.gz, tar.bz2 or tar.xz archive.
+    :param directory: A prefix prepended to each member's path to form its object key.
+    :param spool_max_memory_bytes: Size above which a member is spooled to disk rather than kept in memory.
+
+    :raises tarfile.TarError: If the stream is not a valid tar archive.
+    """
+    with tarfile.open(fileobj=archive, mode="r|*") as tar:
+        for member in tar:
+            if not member.isfile():
+                continue
+            member_file = tar.extractfile(member)
+            if member_file is None:  # pragma: no cover
+                continue
+            file_path = member.name.removeprefix("./").lstrip("/")
+            # closed by whoever consumes the upload, or once it is dropped
+            # pylint: disable-next=consider-using-with
+            spooled_file = tempfile.SpooledTemporaryFile(max_size=spool_max_memory_bytes)
+            shutil.copyfileobj(member_file, spooled_file, ARCHIVE_COPY_CHUNK_SIZE_BYTES)
+            spooled_file.seek(0)
+            yield ObjectToUpload(
+                object_key=f"{directory}{file_path}",
+                file_content=spooled_file,  # type: ignore[arg-type]
+                content_type=mimetypes.guess_type(file_path)[0],
+            )
+
+
+def iter_archive_chunks(
+    members: Iterable[ArchiveMember],
+    archive_format: ArchiveFormat,
+    max_buffered_chunks: int = DEFAULT_MAX_BUFFERED_ARCHIVE_CHUNKS,
+) -> Iterator[bytes]:
+    """
+    Stream an archive of ``members`` as it is written, without ever holding the whole archive in memory.
+
+    The archive is written on a separate thread, which also consumes ``members``, into a queue of
+    at most ``max_buffered_chunks`` chunks. The writer therefore pauses whenever the consumer falls
+    behind, and stops if the consumer closes this generator early, e.g. because a client disconnected.
+
+    :param members: The files to archive, consumed lazily.
+    :param archive_format: "tar", "tar.gz" or "zip".
+    :param max_buffered_chunks: Maximum number of written chunks waiting to be consumed.
+
+    :return: Chunks of the archive, in order.
+    """
+    output = _ChunkQueue(max_chunks=max_buffered_chunks)
+
+    def _write_archive() -> None:
+        try:
+            _write_archive_to(output, members, archive_format)
+            output.put(None)
+        except BaseException as error:  # pylint: disable=broad-except
+            output.put(error)
+        finally:
+            # release whatever the members generator holds, e.g. prefetched bodies, if writing stopped early
+            if close_members := getattr(members, "close", None):
+                close_members()
+
+    writer = threading.Thread(target=copy_context().run, args=(_write_archive,), daemon=True)
+    writer.start()
+    try:
+        while (chunk := output.get()) is not None:
+            if isinstance(chunk, BaseException):
+                raise chunk
+            yield chunk
+    finally:
+        output.cancel()
+        writer.join()
+
+
+def iter_s3_directory_archive(  # pylint: disable=too-many-arguments
+    bucket_name: str,
+    directory: str,
+    archive_format: ArchiveFormat,
+    s3_client: Optional["S3Client"] = None,
+    prefetch_count: int = DEFAULT_PREFETCH_COUNT,
+    prefetch_max_object_bytes: int = DEFAULT_PREFETCH_MAX_OBJECT_BYTES,
+) -> Iterator[bytes]:
+    """
+    Stream an archive of every object under ``directory``, listing and fetching objects ahead of the writer.
+
+    Members are named by their key relative to the last "/" of ``directory``, so archiving
+    "photos/2024/" yields members like "trip/beach.jpg" rather than "photos/2024/trip/beach.jpg".
+    Objects stored with a gzip or zstd ``Content-Encoding`` are archived without decompressing
+    them, as e.g. "logs/app.log.gz".
+
+    :param bucket_name: Name of the S3 bucket.
+    :param directory: Prefix of the objects to archive.
+    :param archive_format: "tar", "tar.gz" or "zip".
+    :param s3_client: Optional S3 client to use.
+    :param prefetch_count: Maximum number of objects fetched ahead of the one being written.
+    :param prefetch_max_object_bytes: Size up to which prefetched objects are read into memory.
+
+    :return: Chunks of the archive, in order.
+    """
+    base_path = directory[: directory.rfind("/") + 1]
+
+    def _iter_members() -> Iterator[ArchiveMember]:
+        fetched_objects = iter_s3_object_bodies(
+            bucket_name,
+            iter_s3_objects(bucket_name, prefix=directory, s3_client=s3_client),
+            s3_client=s3_client,
+            prefetch_count=prefetch_count,
+            prefetch_max_object_bytes=prefetch_max_object_bytes,
+        )
+        with closing(fetched_objects):
+            for s3_object, body, content_encoding in fetched_objects:
+                # files stored compressed are archived as stored, under their compressed file name
+                name_suffix = CONTENT_ENCODING_FILE_EXTENSIONS.get(content_encoding or "", "")
+                yield ArchiveMember(
+                    name=s3_object["Key"].removeprefix(base_path) + name_suffix,
+                    size=s3_object["Size"],
+                    last_modified=s3_object["LastModified"],
+                    content=body,
+                )
+
+    return iter_archive_chunks(_iter_members(), archive_format)
+
+
+def _write_archive_to(output: "_ChunkQueue", members: Iterable[ArchiveMember], archive_format: ArchiveFormat) -> None:
+    """Write every member into an archive of the given format, sending its bytes to ``output``."""
+    if archive_format == "zip":
+        with zipfile.ZipFile(output, mode="w", compression=zipfile.ZIP_DEFLATED) as zip_file:  # type: ignore[arg-type]
+            for member in members:
+                zip_info = zipfile.ZipInfo(
+                    member.name, date_time=max(member.last_modified.timetuple()[:6], _MIN_ZIP_DATE_TIME)
+                )
+                zip_info.compress_type = zipfile.ZIP_DEFLATED
+                with member.content, zip_file.open(
+                    zip_info, mode="w", force_zip64=member.size >= zipfile.ZIP64_LIMIT
+                ) as zip_entry:
+                    shutil.copyfileobj(member.content, zip_entry, ARCHIVE_COPY_CHUNK_SIZE_BYTES)
+        return
+
+    mode = "w|gz" if archive_format == "tar.gz" else "w|"
+    with tarfile.open(fileobj=output, mode=mode, format=tarfile.PAX_FORMAT) as tar:  # type: ignore[call-overload]
+        for member in members:
+            tar_info = tarfile.TarInfo(member.name)
+            tar_info.size = member.size
+            tar_info.mtime = int(member.last_modified.timestamp())
+            with member.content:
+                tar.addfile(tar_info, member.content)
+
+
+class _ArchiveCancelled(Exception):
+    """Raised in the archive writer when the consumer stopped reading."""
+
+
+class _ChunkQueue:
+    """A write-only file object that hands each written chunk to a bounded queue."""
+
+    def __init__(self, max_chunks: int):
+        self._chunks: "queue.Queue[Union[bytes, BaseException, None]]" = queue.Queue(maxsize=max_chunks)
+        self._cancelled = threading.Event()
+
+    def write(self, data: bytes) -> int:
+        """Queue a copy of ``data``, waiting while the queue is full."""
+        if data:
+            self.put(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        """Do nothing; chunks are queued as soon as they are written."""
+
+    def put(self, item: Union[bytes, BaseException, None]) -> None:
+        """Queue an item for the consumer, giving up if the consumer has stopped reading."""
+        while not self._cancelled.is_set():
+            try:
+                self._chunks.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+        if isinstance(item, bytes):
+            raise _ArchiveCancelled()
+
+    def get(self) -> Optional[Union[bytes, BaseException]]:
+        """Return the next queued item, waiting until one is available."""
+        return self._chunks.get()
+
+    def cancel(self) -> None:
+        """Tell the writer to stop, e.g. because the consumer is gone."""
+        self._cancelled.set()
@@ -0,0 +1,8 @@
+"""
+Async Python API for interacting with AWS S3.
+
+Mirrors ``files_api.s3`` function-for-function. Each coroutine runs its blocking
+counterpart on a worker thread so that S3 round trips never stall the event loop.
+boto3 clients are thread-safe, so the app's single pooled client is shared by all
+worker threads.
+"""
@@ -0,0 +1,140 @@
+"""Async functions for copying and moving objects within an S3 bucket, without downloading them."""
+
+from typing import Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from files_api.s3 import copy_objects
+from files_api.s3.copy_objects import (
+    DEFAULT_BULK_COPY_MAX_CONCURRENCY,
+    DEFAULT_COPY_PART_MAX_CONCURRENCY,
+    DEFAULT_COPY_PART_SIZE_BYTES,
+    MAX_COPY_OBJECT_SIZE_BYTES,
+    BulkCopyResult,
+)
+from files_api.s3.metadata_cache import S3MetadataCache
+
+try:
+    from mypy_boto3_s3 import S3Client
+except ImportError:  # pragma: no cover
+    ...
+
+
+async def copy_s3_object(  # pylint: disable=too-many-arguments
+    bucket_name: str,
+    source_key: str,
+    destination_key: str,
+    s3_client: Optional["S3Client"] = None,
+    metadata_cache: Optional[S3MetadataCache] = None,
+    source_etag: Optional[str] = None,
+    source_size: Optional[int] = None,
+    multipart_threshold: int = MAX_COPY_OBJECT_SIZE_BYTES,
+    part_size: int = DEFAULT_COPY_PART_SIZE_BYTES,
+    max_concurrency: int = DEFAULT_COPY_PART_MAX_CONCURRENCY,
+) -> bool:
+    """
+    Copy an object within the bucket without blocking the event loop.
+
+    See :func:`files_api.s3.copy_objects.copy_s3_object`.
+    """
+    return await run_in_threadpool(
+        copy_objects.copy_s3_object,
+        bucket_name=bucket_name,
+        source_key=source_key,
+        destination_key=destination_key,
+        s3_client=s3_client,
+        metadata_cache=metadata_cache,
+        source_etag=source_etag,
+        source_size=source_size,
+        multipart_threshold=multipart_threshold,
+        part_size=part_size,
+        max_concurrency=max_concurrency,
+    )
+
+
+async def move_s3_object(  # pylint: disable=too-many-arguments
+    bucket_name: str,
+    source_key: str,
+    destination_key: str,
+    s3_client: Optional["S3Client"] = None,
+    metadata_cache: Optional[S3MetadataCache] = None,
+    source_etag: Optional[str] = None,
+    source_size: Optional[int] = None,
+    multipart_threshold: int = MAX_COPY_OBJECT_SIZE_BYTES,
+    part_size: int = DEFAULT_COPY_PART_SIZE_BYTES,
+    max_concurrency: int = DEFAULT_COPY_PART_MAX_CONCURRENCY,
+) -> bool:
+    """
+    Move an object within the bucket without blocking the event loop.
+
+    See :func:`files_api.s3.copy_objects.move_s3_object`.
+    """
+    return await run_in_threadpool(
+        copy_objects.move_s3_object,
+        bucket_name=bucket_name,
+        source_key=source_key,
+        destination_key=destination_key,
+        s3_client=s3_client,
+        metadata_cache=metadata_cache,
+        source_etag=source_etag,
+        source_size=source_size,
+        multipart_threshold=multipart_threshold,
+        part_size=part_size,
+        max_concurrency=max_concurrency,
+    )
+
+
+async def copy_s3_objects_by_prefix(  # pylint: disable=too-many-arguments
+    bucket_name: str,
+    source_prefix: str,
+    destination_prefix: str,
+    s3_client: Optional["S3Client"] = None,
+    metadata_cache: Optional[S3MetadataCache] = None,
+    max_concurrency: int = DEFAULT_BULK_COPY_MAX_CONCURRENCY,
+    part_size: int = DEFAULT_COPY_PART_SIZE_BYTES,
+    part_max_concurrency: int = DEFAULT_COPY_PART_MAX_CONCURRENCY,
+) -> BulkCopyResult:
+    """
+    Copy every object under ``source_prefix`` without blocking the event loop.
+
+    See :func:`files_api.s3.copy_objects.copy_s3_objects_by_prefix`.
+    """
+    return await run_in_threadpool(
+        copy_objects.copy_s3_objects_by_prefix,
+        bucket_name=bucket_name,
+        source_prefix=source_prefix,
+        destination_prefix=destination_prefix,
+        s3_client=s3_client,
+        metadata_cache=metadata_cache,
+        max_concurrency=max_concurrency,
+        part_size=part_size,
+        part_max_concurrency=part_max_concurrency,
+    )
+
+
+async def move_s3_objects_by_prefix(  # pylint: disable=too-many-arguments
+    bucket_name: str,
+    source_prefix: str,
+    destination_prefix: str,
+    s3_client: Optional["S3Client"] = None,
+    metadata_cache: Optional[S3MetadataCache] = None,
+    max_concurrency: int = DEFAULT_BULK_COPY_MAX_CONCURRENCY,
+    part_size: int = DEFAULT_COPY_PART_SIZE_BYTES,
+    part_max_concurrency: int = DEFAULT_COPY_PART_MAX_CONCURRENCY,
+) -> BulkCopyResult:
+    """
+    Move every object under ``source_prefix`` without blocking the event loop.
+
+    See :func:`files_api.s3.copy_objects.move_s3_objects_by_prefix`.
+    """
+    return await run_in_threadpool(
+        copy_objects.move_s3_objects_by_prefix,
+        bucket_name=bucket_name,
+        source_prefix=source_prefix,
+        destination_prefix=destination_prefix,
+        s3_client=s3_client,
+        metadata_cache=metadata_cache,
+        max_concurrency=max_concurrency,
+        part_size=part_size,
+        part_max_concurrency=part_max_concurrency,
+    )
@@ -0,0 +1,86 @@
+"""Async functions for deleting objects from an S3 bucket--the "D" in CRUD."""
+
+from typing import (
+    Iterable,
+    Optional,
+)
+
+from starlette.concurrency import run_in_threadpool
+
+from files_api.s3 import delete_objects
+from files_api.s3.delete_objects import (
+    DEFAULT_BULK_DELETE_MAX_CONCURRENCY,
+    BulkDeleteResult,
+)
+from files_api.s3.metadata_cache import S3MetadataCache
+
+try:
+    from mypy_boto3_s3 import S3Client
+except ImportError:  # pragma: no cover
+    ...
+
+
+async def delete_s3_object(
+    bucket_name: str,
+    object_key: str,
+    s3_client: Optional["S3Client"] = None,
+    metadata_cache: Optional[S3MetadataCache] = None,
+    if_match: Optional[str] = None,
+) -> None:
+    """
+    Delete an object from the S3 bucket without blocking the event loop.
+
+    See :func:`files_api.s3.delete_objects.delete_s3_object`.
+    """
+    await run_in_threadpool(
+        delete_objects.delete_s3_object,
+        bucket_name=bucket_name,
+        object_key=object_key,
+        s3_client=s3_client,
+        metadata_cache=metadata_cache,
+        if_match=if_match,
+    )
+
+
+async def delete_s3_objects(
+    bucket_name: str,
+    object_keys: Iterable[str],
+    s3_client: Optional["S3Client"] = None,
+    metadata_cache: Optional[S3MetadataCache] = None,
+    max_concurrency: int = DEFAULT_BULK_DELETE_MAX_CONCURRENCY,
+) -> BulkDeleteResult:
+    """
+    Delete many objects in batches without blocking the event loop.
+
+    See :func:`files_api.s3.delete_objects.delete_s3_objects`.
+    """
+    return await run_in_threadpool(
+        delete_objects.delete_s3_objects,
+        bucket_name=bucket_name,
+        object_keys=object_keys,
+        s3_client=s3_client,
+        metadata_cache=metadata_cache,
+        max_concurrency=max_concurrency,
+    )
+
+
+async def delete_s3_objects_by_prefix(
+    bucket_name: str,
+    prefix: str,
+    s3_client: Optional["S3Client"] = None,
+    metadata_cache: Optional[S3MetadataCache] = None,
+    max_concurrency: int = DEFAULT_BULK_DELETE_MAX_CONCURRENCY,
+) -> BulkDeleteResult:
+    """
+    Delete every object under ``prefix`` without blocking the event loop.
+
+    See :func:`files_api.s3.delete_objects.delete_s3_objects_by_prefix`.
+    """
+    return await run_in_threadpool(
+        delete_objects.delete_s3_objects_by_prefix,
+        bucket_name=bucket_name,
+        prefix=prefix,
+        s3_client=s3_client,
+        metadata_cache=metadata_cache,
+        max_concurrency=max_concurrency,
+    )
@@ -0,0 +1,85 @@
+"""Async functions for presigning URLs that let clients transfer object bodies directly to and from S3."""
+
+from typing import Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from files_api.s3 import presigned_urls
+from files_api.s3.presigned_urls import (
+    DEFAULT_PRESIGNED_URL_EXPIRATION_SECONDS,
+    PresignedMultipartUpload,
+)
+from files_api.s3.write_objects import DEFAULT_MULTIPART_PART_SIZE_BYTES
+
+try:
+    from mypy_boto3_s3 import S3Client
+except ImportError:  # pragma: no cover
+    ...
+
+
+async def generate_presigned_download_url(
+    bucket_name: str,
+    object_key: str,
+    s3_client: Optional["S3Client"] = None,
+    expires_in: int = DEFAULT_PRESIGNED_URL_EXPIRATION_SECONDS,
+) -> str:
+    """
+    Generate a presigned download URL without blocking the event loop, e.g. while credentials are refreshed.
+
+    See :func:`files_api.s3.presigned_urls.generate_presigned_download_url`.
+    """
+    return await run_in_threadpool(
+        presigned_urls.generate_presigned_download_url,
+        bucket_name=bucket_name,
+        object_key=object_key,
+        s3_client=s3_client,
+        expires_in=expires_in,
+    )
+
+
+async def generate_presigned_upload_url(
+    bucket_name: str,
+    object_key: str,
+    content_type: Optional[str] = None,
+    s3_client: Optional["S3Client"] = None,
+    expires_in: int = DEFAULT_PRESIGNED_URL_EXPIRATION_SECONDS,
+) -> str:
+    """
+    Generate a presigned upload URL without blocking the event loop.
+
+    See :func:`files_api.s3.presigned_urls.generate_presigned_upload_url`.
+    """
+    return await run_in_threadpool(
+        presigned_urls.generate_presigned_upload_url,
+        bucket_name=bucket_name,
+        object_key=object_key,
+        content_type=content_type,
+        s3_client=s3_client,
+        expires_in=expires_in,
+    )
+
+
+async def create_presigned_multipart_upload(  # pylint: disable=too-many-arguments
+    bucket_name: str,
+    object_key: str,
+    size_bytes: int,
+    content_type: Optional[str] = None,
+    part_size: int = DEFAULT_MULTIPART_PART_SIZE_BYTES,
+    s3_client: Optional["S3Client"] = None,
+    expires_in: int = DEFAULT_PRESIGNED_URL_EXPIRATION_SECONDS,
+) -> PresignedMultipartUpload:
+    """
+    Start a multipart upload and presign its part URLs without blocking the event loop.
+
+    See :func:`files_api.s3.presigned_urls.create_presigned_multipart_upload`.
+    """
+    return await run_in_threadpool(
+        presigned_urls.create_presigned_multipart_upload,
+        bucket_name=bucket_name,
+        object_key=object_key,
+        size_bytes=size_bytes,
+        content_type=content_type,
+        part_size=part_size,
+        s3_client=s3_client,
+        expires_in=expires_in,
+    )
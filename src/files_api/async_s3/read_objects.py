@@ -0,0 +1,266 @@
+"""Async functions for reading objects from an S3 bucket--the "R" in CRUD."""
+
+from datetime import datetime
+from typing import (
+    AsyncIterator,
+    Iterable,
+    Optional,
+)
+
+from botocore.response import StreamingBody
+from starlette.concurrency import (
+    iterate_in_threadpool,
+    run_in_threadpool,
+)
+
+from files_api.s3 import read_objects
+from files_api.s3.body_cache import (
+    CachedObject,
+    ObjectBodyCache,
+)
+from files_api.s3.metadata_cache import S3MetadataCache
+from files_api.s3.read_objects import (
+    DEFAULT_BODY_CACHE_PREWARM_MAX_CONCURRENCY,
+    DEFAULT_MAX_KEYS,
+    DEFAULT_METADATA_LOOKUP_MAX_CONCURRENCY,
+    DEFAULT_MIN_KEYS_PER_LISTING_PAGE,
+)
+
+try:
+    from mypy_boto3_s3 import S3Client
+    from mypy_boto3_s3.type_defs import (
+        GetObjectOutputTypeDef,
+        HeadObjectOutputTypeDef,
+        ObjectTypeDef,
+    )
+except ImportError:  # pragma: no cover
+    ...
+
+DEFAULT_BODY_CHUNK_SIZE_BYTES = 64 * 1024
+
+
+async def object_exists_in_s3(
+    bucket_name: str,
+    object_key: str,
+    s3_client: Optional["S3Client"] = None,
+    metadata_cache: Optional[S3MetadataCache] = None,
+) -> bool:
+    """
+    Check if an object exists in the S3 bucket without blocking the event loop.
+
+    See :func:`files_api.s3.read_objects.object_exists_in_s3`.
+    """
+    return await run_in_threadpool(
+        read_objects.object_exists_in_s3,
+        bucket_name=bucket_name,
+        object_key=object_key,
+        s3_client=s3_client,
+        metadata_cache=metadata_cache,
+    )
+
+
+async def fetch_s3_object_metadata(
+    bucket_name: str,
+    object_key: str,
+    s3_client: Optional["S3Client"] = None,
+    metadata_cache: Optional[S3MetadataCache] = None,
+) -> Optional["HeadObjectOutputTypeDef"]:
+    """
+    Fetch metadata of an object in the S3 bucket without blocking the event loop.
+
+    See :func:`files_api.s3.read_objects.fetch_s3_object_metadata`.
+    """
+    return await run_in_threadpool(
+        read_objects.fetch_s3_object_metadata,
+        bucket_name=bucket_name,
+        object_key=object_key,
+        s3_client=s3_client,
+        metadata_cache=metadata_cache,
+    )
+
+
+async def fetch_s3_object(  # pylint: disable=too-many-arguments
+    bucket_name: str,
+    object_key: str,
+    s3_client: Optional["S3Client"] = None,
+    byte_range: Optional[str] = None,
+    if_match: Optional[str] = None,
+    if_unmodified_since: Optional[datetime] = None,
+    if_none_match: Optional[str] = None,
+    if_modified_since: Optional[datetime] = None,
+) -> "GetObjectOutputTypeDef":
+    """
+    Fetch an object in the S3 bucket without blocking the event loop.
+
+    The returned ``Body`` is still a blocking stream; consume it with :func:`iter_s3_object_body`.
+
+    See :func:`files_api.s3.read_objects.fetch_s3_object`.
+    """
+    return await run_in_threadpool(
+        read_objects.fetch_s3_object,
+        bucket_name=bucket_name,
+        object_key=object_key,
+        s3_client=s3_client,
+        byte_range=byte_range,
+        if_match=if_match,
+        if_unmodified_since=if_unmodified_since,
+        if_none_match=if_none_match,
+        if_modified_since=if_modified_since,
+    )
+
+
+async def fetch_s3_object_through_cache(
+    bucket_name: str,
+    object_key: str,
+    body_cache: ObjectBodyCache,
+    s3_client: Optional["S3Client"] = None,
+    metadata_cache: Optional[S3MetadataCache] = None,
+) -> tuple[Optional[CachedObject], Optional["GetObjectOutputTypeDef"]]:
+    """
+    Fetch a whole object through a body cache without blocking the event loop.
+
+    See :func:`files_api.s3.read_objects.fetch_s3_object_through_cache`.
+    """
+    return await run_in_threadpool(
+        read_objects.fetch_s3_object_through_cache,
+        bucket_name=bucket_name,
+        object_key=object_key,
+        body_cache=body_cache,
+        s3_client=s3_client,
+        metadata_cache=metadata_cache,
+    )
+
+
+async def prewarm_s3_object_bodies(
+    bucket_name: str,
+    prefix: str,
+    body_cache: ObjectBodyCache,
+    s3_client: Optional["S3Client"] = None,
+    max_concurrency: int = DEFAULT_BODY_CACHE_PREWARM_MAX_CONCURRENCY,
+) -> tuple[int, int]:
+    """
+    Load the bodies of the objects under ``prefix`` into a body cache without blocking the event loop.
+
+    See :func:`files_api.s3.read_objects.prewarm_s3_object_bodies`.
+    """
+    return await run_in_threadpool(
+        read_objects.prewarm_s3_object_bodies,
+        bucket_name=bucket_name,
+        prefix=prefix,
+        body_cache=body_cache,
+        s3_client=s3_client,
+        max_concurrency=max_concurrency,
+    )
+
+
+async def iter_s3_object_body(
+    body: StreamingBody, chunk_size: int = DEFAULT_BODY_CHUNK_SIZE_BYTES
+) -> AsyncIterator[bytes]:
+    """
+    Iterate over the body of a fetched S3 object, reading each chunk on a worker thread.
+
+    The body is closed once it is exhausted or the consumer stops iterating early,
+    e.g. because the HTTP client disconnected.
+
+    :param body: The ``Body`` of a ``get_object`` response.
+    :param chunk_size: Number of bytes to read from S3 per chunk.
+    """
+    try:
+        async for chunk in iterate_in_threadpool(body.iter_chunks(chunk_size=chunk_size)):
+            yield chunk
+    finally:
+        body.close()
+
+
+async def fetch_s3_objects_using_page_token(
+    bucket_name: str,
+    continuation_token: str,
+    max_keys: Optional[int] = None,
+    s3_client: Optional["S3Client"] = None,
+    metadata_cache: Optional[S3MetadataCache] = None,
+) -> tuple[list["ObjectTypeDef"], Optional[str]]:
+    """
+    Fetch a page of object metadata using a continuation token without blocking the event loop.
+
+    See :func:`files_api.s3.read_objects.fetch_s3_objects_using_page_token`.
+    """
+    return await run_in_threadpool(
+        read_objects.fetch_s3_objects_using_page_token,
+        bucket_name=bucket_name,
+        continuation_token=continuation_token,
+        max_keys=max_keys,
+        s3_client=s3_client,
+        metadata_cache=metadata_cache,
+    )
+
+
+async def fetch_s3_objects_metadata(
+    bucket_name: str,
+    prefix: str = "",
+    max_keys: Optional[int] = DEFAULT_MAX_KEYS,
+    s3_client: Optional["S3Client"] = None,
+    metadata_cache: Optional[S3MetadataCache] = None,
+) -> tuple[list["ObjectTypeDef"], Optional[str]]:
+    """
+    Fetch a page of object metadata under a prefix without blocking the event loop.
+
+    See :func:`files_api.s3.read_objects.fetch_s3_objects_metadata`.
+    """
+    return await run_in_threadpool(
+        read_objects.fetch_s3_objects_metadata,
+        bucket_name=bucket_name,
+        prefix=prefix,
+        max_keys=max_keys,
+        s3_client=s3_client,
+        metadata_cache=metadata_cache,
+    )
+
+
+async def fetch_s3_objects_metadata_by_key(  # pylint: disable=too-many-arguments
+    bucket_name: str,
+    object_keys: Iterable[str],
+    s3_client: Optional["S3Client"] = None,
+    metadata_cache: Optional[S3MetadataCache] = None,
+    max_concurrency: int = DEFAULT_METADATA_LOOKUP_MAX_CONCURRENCY,
+    min_keys_per_listing_page: int = DEFAULT_MIN_KEYS_PER_LISTING_PAGE,
+) -> dict[str, Optional["ObjectTypeDef"]]:
+    """
+    Fetch metadata of many specific objects without blocking the event loop.
+
+    See :func:`files_api.s3.read_objects.fetch_s3_objects_metadata_by_key`.
+    """
+    return await run_in_threadpool(
+        read_objects.fetch_s3_objects_metadata_by_key,
+        bucket_name=bucket_name,
+        object_keys=object_keys,
+        s3_client=s3_client,
+        metadata_cache=metadata_cache,
+        max_concurrency=max_concurrency,
+        min_keys_per_listing_page=min_keys_per_listing_page,
+    )
+
+
+async def fetch_s3_directory_listing(  # pylint: disable=too-many-arguments
+    bucket_name: str,
+    prefix: str = "",
+    continuation_token: Optional[str] = None,
+    max_keys: int = DEFAULT_MAX_KEYS,
+    delimiter: str = "/",
+    s3_client: Optional["S3Client"] = None,
+    metadata_cache: Optional[S3MetadataCache] = None,
+) -> tuple[list["ObjectTypeDef"], list[str], Optional[str]]:
+    """
+    Fetch one page of a non-recursive directory listing without blocking the event loop.
+
+    See :func:`files_api.s3.read_objects.fetch_s3_directory_listing`.
+    """
+    return await run_in_threadpool(
+        read_objects.fetch_s3_directory_listing,
+        bucket_name=bucket_name,
+        prefix=prefix,
+        continuation_token=continuation_token,
+        max_keys=max_keys,
+        delimiter=delimiter,
+        s3_client=s3_client,
+        metadata_cache=metadata_cache,
+    )
@@ -0,0 +1,131 @@
+"""Async functions for writing objects to an S3 bucket--the "C" and "U" in CRUD."""
+
+from typing import (
+    BinaryIO,
+    Iterable,
+    Optional,
+    Union,
+)
+
+from starlette.concurrency import run_in_threadpool
+
+from files_api.s3 import write_objects
+from files_api.s3.metadata_cache import S3MetadataCache
+from files_api.s3.write_objects import (
+    DEFAULT_BATCH_UPLOAD_MAX_CONCURRENCY,
+    DEFAULT_MULTIPART_MAX_CONCURRENCY,
+    DEFAULT_MULTIPART_PART_SIZE_BYTES,
+    DEFAULT_MULTIPART_THRESHOLD_BYTES,
+    ObjectToUpload,
+    UploadResult,
+)
+
+try:
+    from mypy_boto3_s3 import S3Client
+    from mypy_boto3_s3.type_defs import CompletedPartTypeDef
+except ImportError:  # pragma: no cover
+    ...
+
+
+async def upload_s3_object(  # pylint: disable=too-many-arguments
+    bucket_name: str,
+    object_key: str,
+    file_content: Union[bytes, BinaryIO],
+    content_type: Optional[str] = None,
+    s3_client: Optional["S3Client"] = None,
+    multipart_threshold: int = DEFAULT_MULTIPART_THRESHOLD_BYTES,
+    part_size: int = DEFAULT_MULTIPART_PART_SIZE_BYTES,
+    max_concurrency: int = DEFAULT_MULTIPART_MAX_CONCURRENCY,
+    metadata_cache: Optional[S3MetadataCache] = None,
+    if_match: Optional[str] = None,
+    content_encoding: Optional[str] = None,
+) -> bool:
+    """
+    Upload a file to an S3 bucket without blocking the event loop.
+
+    Streams are read on the worker thread, so blocking file objects are fine to pass.
+
+    See :func:`files_api.s3.write_objects.upload_s3_object`.
+    """
+    return await run_in_threadpool(
+        write_objects.upload_s3_object,
+        bucket_name=bucket_name,
+        object_key=object_key,
+        file_content=file_content,
+        content_type=content_type,
+        s3_client=s3_client,
+        multipart_threshold=multipart_threshold,
+        part_size=part_size,
+        max_concurrency=max_concurrency,
+        metadata_cache=metadata_cache,
+        if_match=if_match,
+        content_encoding=content_encoding,
+    )
+
+
+async def upload_s3_objects(
+    bucket_name: str,
+    objects: Iterable[ObjectToUpload],
+    s3_client: Optional["S3Client"] = None,
+    metadata_cache: Optional[S3MetadataCache] = None,
+    max_concurrency: int = DEFAULT_BATCH_UPLOAD_MAX_CONCURRENCY,
+) -> list[UploadResult]:
+    """
+    Upload many files concurrently without blocking the event loop.
+
+    ``objects`` is iterated on a worker thread, so it may read from blocking streams.
+
+    See :func:`files_api.s3.write_objects.upload_s3_objects`.
+    """
+    return await run_in_threadpool(
+        write_objects.upload_s3_objects,
+        bucket_name=bucket_name,
+        objects=objects,
+        s3_client=s3_client,
+        metadata_cache=metadata_cache,
+        max_concurrency=max_concurrency,
+    )
+
+
+async def complete_s3_multipart_upload(  # pylint: disable=too-many-arguments
+    bucket_name: str,
+    object_key: str,
+    upload_id: str,
+    parts: list["CompletedPartTypeDef"],
+    s3_client: Optional["S3Client"] = None,
+    metadata_cache: Optional[S3MetadataCache] = None,
+) -> bool:
+    """
+    Complete a client-driven multipart upload without blocking the event loop.
+
+    See :func:`files_api.s3.write_objects.complete_s3_multipart_upload`.
+    """
+    return await run_in_threadpool(
+        write_objects.complete_s3_multipart_upload,
+        bucket_name=bucket_name,
+        object_key=object_key,
+        upload_id=upload_id,
+        parts=parts,
+        s3_client=s3_client,
+        metadata_cache=metadata_cache,
+    )
+
+
+async def abort_s3_multipart_upload(
+    bucket_name: str,
+    object_key: str,
+    upload_id: str,
+    s3_client: Optional["S3Client"] = None,
+) -> None:
+    """
+    Abort a multipart upload without blocking the event loop.
+
+    See :func:`files_api.s3.write_objects.abort_s3_multipart_upload`.
+    """
+    await run_in_threadpool(
+        write_objects.abort_s3_multipart_upload,
+        bucket_name=bucket_name,
+        object_key=object_key,
+        upload_id=upload_id,
+        s3_client=s3_client,
+    )
@@ -0,0 +1,157 @@
+"""Streaming of one body to several readers, each at its own pace, through a bounded buffer."""
+
+import asyncio
+from collections import deque
+from contextlib import aclosing
+from typing import (
+    AsyncIterator,
+    Callable,
+)
+
+DEFAULT_BROADCAST_CAPACITY_BYTES = 8 * 1024 * 1024
+
+
+class BroadcastReader:
+    """One reader of a :class:`BroadcastBody`; iterate over :attr:`chunks`, then :meth:`close` it."""
+
+    def __init__(self, broadcast: "BroadcastBody"):
+        self._broadcast = broadcast
+        # index of the next chunk to read, and number of bytes read so far
+        self.index = 0
+        self.offset = 0
+        # set once the reader fell too far behind and must fetch the rest of the body itself
+        self.detached = False
+        self.closed = False
+        self.chunks: AsyncIterator[bytes] = broadcast.iter_chunks(self)
+
+    def close(self) -> None:
+        """Stop reading, letting the buffer drop the chunks only this reader still needed; idempotent."""
+        self._broadcast.close_reader(self)
+
+
+class BroadcastBody:  # pylint: disable=too-many-instance-attributes
+    """
+    One stream of bytes read by several readers, buffering at most about ``capacity_bytes`` of it.
+
+    The source is read at the pace of the fastest reader, and each chunk is buffered until every
+    reader has read it. When the fastest reader needs a new chunk while the buffer is full, the
+    readers holding its oldest chunk are detached from it: they read the rest of the body from
+    ``fetch_rest``, e.g. a ranged GET, instead. Memory thus stays bounded, and slow clients do not
+    hold back fast ones. If the source fails mid-way, readers still needing it detach the same way.
+
+    ``close_source`` releases the source, e.g. its HTTP connection, once no reader needs it. The
+    ``num_readers`` readers, in :attr:`readers`, are opened when the broadcast is created, before
+    any reads, so that none of them misses the first chunks. They must be iterated and closed on
+    the event loop.
+    """
+
+    def __init__(
+        self,
+        source: AsyncIterator[bytes],
+        close_source: Callable[[], None],
+        fetch_rest: Callable[[int], AsyncIterator[bytes]],
+        num_readers: int,
+        capacity_bytes: int = DEFAULT_BROADCAST_CAPACITY_BYTES,
+    ):
+        self._source = source
+        self._close_source = close_source
+        self._fetch_rest = fetch_rest
+        self._capacity_bytes = capacity_bytes
+        self._chunks: deque[bytes] = deque()
+        self._first_index = 0
+        self._buffered_bytes = 0
+        self._is_pulling = False
+        self._is_exhausted = False
+        self._is_broken = False
+        self._changed = asyncio.Event()
+        self.readers = [BroadcastReader(self) for _ in range(num_readers)]
+        # readers still reading from the buffer
+        self._attached = set(self.readers)
+
+    async def iter_chunks(self, reader: BroadcastReader) -> AsyncIterator[bytes]:
+        """Yield the body's chunks to ``reader``, from the buffer, the source or, once detached, ``fetch_rest``."""
+        while not reader.detached:
+            if reader.index < self._first_index + len(self._chunks):
+                chunk = self._chunks[reader.index - self._first_index]
+                reader.index += 1
+                reader.offset += len(chunk)
+                self._trim()
+                yield chunk
+            elif self._is_exhausted:
+                return
+            elif self._is_broken:
+                self._detach(reader)
+            elif self._is_pulling:
+                await self._wait_for_change()
+            else:
+                self._detach_laggards(puller=reader)
+                await self._pull()
+
+        if reader.closed:
+            return
+        async with aclosing(self._fetch_rest(reader.offset)) as rest:
+            async for chunk in rest:
+                reader.offset += len(chunk)
+                yield chunk
+
+    def close_reader(self, reader: BroadcastReader) -> None:
+        """Detach ``reader`` for good, releasing the source once no reader is left on the buffer."""
+        reader.closed = True
+        self._detach(reader)
+        if not self._attached and not self._is_exhausted and not self._is_broken:
+            self._is_broken = True
+            self._close_source()
+
+    async def _pull(self) -> None:
+        """Append the next chunk of the source to the buffer."""
+        self._is_pulling = True
+        try:
+            chunk = await self._source.__anext__()
+        except StopAsyncIteration:
+            self._is_exhausted = True
+        except Exception:  # pylint: disable=broad-exception-caught
+            # e.g. a dropped connection: every reader, this one included, fetches the rest itself
+            self._is_broken = True
+        except BaseException:
+            # e.g. the pulling reader's client disconnected mid-read, cancelling it
+            self._is_broken = True
+            raise
+        else:
+            self._chunks.append(chunk)
+            self._buffered_bytes += len(chunk)
+        finally:
+            self._is_pulling = False
+            self._notify()
+
+    def _detach_laggards(self, puller: BroadcastReader) -> None:
+        """Detach the readers holding the oldest chunk, for as long as the buffer is full."""
+        while self._buffered_bytes >= self._capacity_bytes:
+            laggards = [
+                reader for reader in self._attached if reader.index == self._first_index and reader is not puller
+            ]
+            if not laggards:
+                return
+            for reader in laggards:
+                self._detach(reader)
+
+    def _detach(self, reader: BroadcastReader) -> None:
+        if reader in self._attached:
+            reader.detached = True
+            self._attached.discard(reader)
+            self._trim()
+
+    def _trim(self) -> None:
+        """Drop the chunks every attached reader has read."""
+        first_needed_index = min(
+            (reader.index for reader in self._attached), default=self._first_index + len(self._chunks)
+        )
+        while self._first_index < first_needed_index:
+            self._buffered_bytes -= len(self._chunks.popleft())
+            self._first_index += 1
+
+    async def _wait_for_change(self) -> None:
+        await self._changed.wait()
+
+    def _notify(self) -> None:
+        self._changed.set()
+        self._changed = asyncio.Event()
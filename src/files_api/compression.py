@@ -0,0 +1,179 @@
+"""Streaming gzip/zstd compression and ``Accept-Encoding`` negotiation (RFC 9110, section 12.5.3)."""
+
+import io
+import zlib
+from typing import (
+    AsyncIterable,
+    AsyncIterator,
+    BinaryIO,
+    Optional,
+    Protocol,
+)
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+GZIP = "gzip"
+ZSTD = "zstd"
+# codings this server can produce and decode, in order of preference when a client accepts several equally
+SUPPORTED_CONTENT_ENCODINGS: tuple[str, ...] = (ZSTD, GZIP) if zstandard is not None else (GZIP,)
+# file name extensions of files holding data stored with a content coding, e.g. in archives
+CONTENT_ENCODING_FILE_EXTENSIONS = {GZIP: ".gz", ZSTD: ".zst"}
+
+DEFAULT_GZIP_LEVEL = 6
+DEFAULT_ZSTD_LEVEL = 3
+DEFAULT_COMPRESSION_MIN_SIZE_BYTES = 1024
+COMPRESSION_READ_CHUNK_SIZE_BYTES = 64 * 1024
+
+# media types that are worth compressing; everything else, e.g. images and archives, usually already is
+_COMPRESSIBLE_MEDIA_TYPE_PREFIXES = ("text/",)
+_COMPRESSIBLE_MEDIA_TYPES = frozenset(
+    {
+        "application/json",
+        "application/x-ndjson",
+        "application/jsonl",
+        "application/csv",
+        "application/xml",
+        "application/javascript",
+        "application/x-yaml",
+        "application/yaml",
+        "image/svg+xml",
+    }
+)
+
+
+class Compressor(Protocol):
+    """The incremental interface shared by ``zlib`` and ``zstandard`` compression and decompression objects."""
+
+    def compress(self, data: bytes) -> bytes:  # pragma: no cover
+        """Feed ``data`` in, returning whatever output is ready."""
+
+    def flush(self) -> bytes:  # pragma: no cover
+        """Return the remaining output, ending the stream."""
+
+
+class Decompressor(Protocol):
+    """The incremental decompression interface shared by ``zlib`` and ``zstandard``."""
+
+    def decompress(self, data: bytes) -> bytes:  # pragma: no cover
+        """Feed ``data`` in, returning whatever output is ready."""
+
+
+def is_compressible(media_type: Optional[str]) -> bool:
+    """Whether content of ``media_type``, e.g. "text/csv; charset=utf-8", is worth compressing."""
+    if not media_type:
+        return False
+    media_type = media_type.split(";", 1)[0].strip().lower()
+    return media_type.startswith(_COMPRESSIBLE_MEDIA_TYPE_PREFIXES) or media_type in _COMPRESSIBLE_MEDIA_TYPES
+
+
+def parse_accept_encoding(accept_encoding: Optional[str]) -> dict[str, float]:
+    """
+    Parse an ``Accept-Encoding`` header into a mapping of lower-cased codings to their q-values.
+
+    Malformed q-values count as 0, i.e. "not acceptable".
+    """
+    qvalues: dict[str, float] = {}
+    for item in (accept_encoding or "").split(","):
+        coding, *params = (part.strip() for part in item.split(";"))
+        if not coding:
+            continue
+        qvalue = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    qvalue = float(value)
+                except ValueError:
+                    qvalue = 0.0
+        qvalues[coding.lower()] = qvalue
+    return qvalues
+
+
+def accepts_content_encoding(accept_encoding: Optional[str], coding: str) -> bool:
+    """Whether a client sending ``accept_encoding`` can decode a response with ``Content-Encoding: coding``."""
+    qvalues = parse_accept_encoding(accept_encoding)
+    return qvalues.get(coding.lower(), qvalues.get("*", 0.0)) > 0
+
+
+def negotiate_content_encoding(
+    accept_encoding: Optional[str], supported: tuple[str, ...] = SUPPORTED_CONTENT_ENCODINGS
+) -> Optional[str]:
+    """
+    Pick the coding to compress a response with, given the request's ``Accept-Encoding`` header.
+
+    :param accept_encoding: The raw ``Accept-Encoding`` header value, if any.
+    :param supported: Codings the server can produce, most preferred first; ties in q-value go to the earlier one.
+
+    :return: The chosen coding, or None to send the response uncompressed.
+    """
+    qvalues = parse_accept_encoding(accept_encoding)
+    best_coding, best_qvalue = None, 0.0
+    for coding in supported:
+        qvalue = qvalues.get(coding, qvalues.get("*", 0.0))
+        if qvalue > best_qvalue:
+            best_coding, best_qvalue = coding, qvalue
+    return best_coding
+
+
+def new_compressor(coding: str) -> Compressor:
+    """Create an incremental compressor producing a complete ``coding`` stream once flushed."""
+    if coding == GZIP:
+        return zlib.compressobj(DEFAULT_GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    if coding == ZSTD and zstandard is not None:
+        return zstandard.ZstdCompressor(level=DEFAULT_ZSTD_LEVEL).compressobj()
+    raise ValueError(f"Unsupported content coding: {coding}")
+
+
+def new_decompressor(coding: str) -> Decompressor:
+    """Create an incremental decompressor for a ``coding`` stream."""
+    if coding == GZIP:
+        return zlib.decompressobj(16 + zlib.MAX_WBITS)
+    if coding == ZSTD and zstandard is not None:
+        return zstandard.ZstdDecompressor().decompressobj()
+    raise ValueError(f"Unsupported content coding: {coding}")
+
+
+async def iter_decompressed(chunks: AsyncIterable[bytes], coding: str) -> AsyncIterator[bytes]:
+    """Decode a stream of ``coding`` chunks chunk by chunk, e.g. to serve a compressed object to a client that can't."""
+    decompressor = new_decompressor(coding)
+    async for chunk in chunks:
+        if data := decompressor.decompress(chunk):
+            yield data
+
+
+class CompressingReader(io.RawIOBase):
+    """
+    A readable stream of the ``coding``-compressed bytes of another stream, compressed as they are read.
+
+    Only about one read's worth of input and output is held in memory, so arbitrarily large
+    uploads can be compressed on their way to S3.
+    """
+
+    def __init__(self, stream: BinaryIO, coding: str, chunk_size: int = COMPRESSION_READ_CHUNK_SIZE_BYTES):
+        super().__init__()
+        self._stream = stream
+        self._compressor = new_compressor(coding)
+        self._chunk_size = chunk_size
+        self._buffer = bytearray()
+        self._exhausted = False
+
+    def readable(self) -> bool:
+        """Return True; the stream can always be read."""
+        return True
+
+    def readinto(self, buffer) -> int:  # type: ignore[no-untyped-def]
+        """Fill ``buffer`` with compressed bytes, returning how many were written; 0 means the end of the stream."""
+        while len(self._buffer) < len(buffer) and not self._exhausted:
+            chunk = self._stream.read(self._chunk_size)
+            if chunk:
+                self._buffer += self._compressor.compress(chunk)
+            else:
+                self._buffer += self._compressor.flush()
+                self._exhausted = True
+        num_bytes = min(len(buffer), len(self._buffer))
+        buffer[:num_bytes] = self._buffer[:num_bytes]
+        del self._buffer[:num_bytes]
+        return num_bytes
@@ -0,0 +1,74 @@
+"""Helpers for HTTP validators (``ETag``, ``Last-Modified``) and conditional request headers."""
+
+from datetime import (
+    datetime,
+    timezone,
+)
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+HTTP_DATE_FORMAT = "%a, %d %b %Y %H:%M:%S GMT"
+
+
+def format_http_date(value: datetime) -> str:
+    """Format a datetime as an HTTP date, e.g. "Thu, 01 Jan 2022 00:00:00 GMT"."""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return value.strftime(HTTP_DATE_FORMAT)
+
+
+def parse_http_date(value: Optional[str]) -> Optional[datetime]:
+    """Parse an HTTP date header value, returning None if it is absent or malformed."""
+    if not value:
+        return None
+    try:
+        parsed = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return parsed if parsed.tzinfo is not None else parsed.replace(tzinfo=timezone.utc)
+
+
+def etag_matches(header_value: Optional[str], etag: str) -> bool:
+    """
+    Check an ``If-None-Match`` style list of ETags against ``etag`` using weak comparison.
+
+    :param header_value: A comma-separated list of (possibly weak) ETags, or "*" to match any ETag.
+    :param etag: The current ETag of the file.
+    """
+    if not header_value:
+        return False
+    if header_value.strip() == "*":
+        return True
+    opaque_etag = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque_etag for candidate in header_value.split(","))
+
+
+def strip_weak_etag_prefixes(header_value: Optional[str]) -> Optional[str]:
+    """
+    Drop the "W/" prefix from each ETag of an ``If-None-Match`` style list, e.g. to forward it to S3.
+
+    ``If-None-Match`` uses weak comparison, so this does not change which ETags match; it lets clients
+    revalidate with the weak ETags of compressed responses. Applied to ``If-Match``, it makes S3's
+    strong comparison a weak one, so that clients can also send those ETags back with writes.
+    """
+    if not header_value:
+        return header_value
+    return ", ".join(candidate.strip().removeprefix("W/") for candidate in header_value.split(","))
+
+
+def is_not_modified(
+    etag: str,
+    last_modified: datetime,
+    if_none_match: Optional[str],
+    if_modified_since: Optional[datetime],
+) -> bool:
+    """
+    Decide whether a GET or HEAD request can be answered with 304 Not Modified.
+
+    As required by RFC 9110, ``If-Modified-Since`` is only considered when ``If-None-Match`` is absent.
+    """
+    if if_none_match:
+        return etag_matches(if_none_match, etag)
+    if if_modified_since:
+        return last_modified.replace(microsecond=0) <= if_modified_since
+    return False
@@ -0,0 +1,198 @@
+"""Background prefetching of the next pages of listings, so that clients paging through them need not wait for S3."""
+
+import asyncio
+import contextvars
+import time
+from collections import OrderedDict
+from dataclasses import (
+    asdict,
+    dataclass,
+)
+from typing import (
+    Awaitable,
+    Callable,
+    Hashable,
+    Optional,
+)
+
+from files_api.storage.base import ObjectListing
+
+DEFAULT_LIST_PREFETCH_CAPACITY_BYTES = 16 * 1024 * 1024
+DEFAULT_LIST_PREFETCH_TTL_SECONDS = 10.0
+# rough size in memory of a listed object or directory besides its key: the ObjectInfo, its datetime and strings
+_ENTRY_OVERHEAD_BYTES = 250
+
+
+@dataclass
+class ListPrefetchStats:
+    """Counters describing how a :class:`ListPrefetcher` has been used since it was created."""
+
+    # pages fetched ahead of being asked for
+    prefetches: int = 0
+    # pages asked for that had been prefetched, or were being prefetched
+    hits: int = 0
+    # prefetched pages dropped before being asked for: expired, evicted, or invalidated by a write
+    wasted: int = 0
+
+    def as_dict(self) -> dict[str, int]:
+        """Return the counters as a plain dict, e.g. for exporting as metrics."""
+        return asdict(self)
+
+
+@dataclass
+class _PrefetchedPage:
+    """A page being prefetched, then kept once fetched, until it is taken or dropped."""
+
+    task: "asyncio.Task[ObjectListing]"
+    generation: int
+    # set once the page is fetched
+    expires_at: Optional[float] = None
+    weight: int = 0
+
+
+def estimate_listing_bytes(listing: ObjectListing) -> int:
+    """Estimate the memory held by a listing page, from the length of its keys."""
+    return sum(len(info.key) + _ENTRY_OVERHEAD_BYTES for info in listing.objects) + sum(
+        len(directory) + _ENTRY_OVERHEAD_BYTES for directory in listing.directories
+    )
+
+
+class ListPrefetcher:
+    """
+    Fetch the next ``depth`` pages of a listing in the background once a page is served, until taken or expired.
+
+    Pages are keyed by the parameters of the request that would ask for them, and are taken at
+    most once: a client paging through a listing asks for each page once, so a taken page is
+    dropped. A page still being prefetched when asked for is awaited rather than fetched again.
+
+    Fetched pages are kept ``ttl_seconds``, and at most about ``capacity_bytes`` of them, going
+    by :func:`estimate_listing_bytes`; the oldest ones are evicted first. Prefetching stops while
+    the pages kept are over capacity. Continuation tokens are opaque, so any write may change any
+    prefetched page: :meth:`invalidate` drops them all, and pages being prefetched then are not kept.
+
+    Prefetches run in tasks of their own, in an empty context, so that they are not counted,
+    timed or traced as S3 calls of the request that started them, which has returned by then.
+    """
+
+    def __init__(
+        self,
+        depth: int,
+        capacity_bytes: int = DEFAULT_LIST_PREFETCH_CAPACITY_BYTES,
+        ttl_seconds: float = DEFAULT_LIST_PREFETCH_TTL_SECONDS,
+    ):
+        self.depth = depth
+        self.capacity_bytes = capacity_bytes
+        self.ttl_seconds = ttl_seconds
+        self.stats = ListPrefetchStats()
+        self.weight = 0
+        self._generation = 0
+        self._pages: "OrderedDict[Hashable, _PrefetchedPage]" = OrderedDict()
+        # referenced here so that the event loop, which only keeps weak references to tasks, cannot drop them
+        self._walks: set[asyncio.Task] = set()
+
+    async def take(self, key: Hashable) -> Optional[ObjectListing]:
+        """Return the page prefetched under ``key``, waiting for it if it is being prefetched, or None if there is none."""
+        self._drop_expired()
+        page = self._pages.pop(key, None)
+        if page is None:
+            return None
+        self.weight -= page.weight
+        try:
+            # shielded, as the walk prefetching the next pages waits for this one too
+            listing = await asyncio.shield(page.task)
+        except Exception:  # pylint: disable=broad-exception-caught
+            # e.g. a throttled request: the caller lists the page itself, and gets the error if it persists
+            return None
+        self.stats.hits += 1
+        return listing
+
+    def prefetch(
+        self, key_of: Callable[[str], Hashable], list_page: Callable[[str], Awaitable[ObjectListing]], page_token: str
+    ) -> None:
+        """
+        Prefetch the page at ``page_token`` and the ``depth - 1`` pages after it, in the background.
+
+        :param key_of: Returns the key of the page at a page token, as :meth:`take` is asked for it.
+        :param list_page: Lists the page at a page token.
+        :param page_token: The next page token of the page just served.
+        """
+        if self.depth <= 0:
+            return
+        walk = contextvars.Context().run(
+            asyncio.get_running_loop().create_task, self._walk(key_of, list_page, page_token)
+        )
+        self._walks.add(walk)
+        walk.add_done_callback(self._walks.discard)
+
+    def invalidate(self) -> None:
+        """Drop every prefetched page, e.g. because a file was written or deleted."""
+        self._generation += 1
+        self.stats.wasted += len(self._pages)
+        self._pages.clear()
+        self.weight = 0
+
+    def close(self) -> None:
+        """Cancel the prefetches in progress and drop every prefetched page."""
+        for walk in list(self._walks):
+            walk.cancel()
+        for page in self._pages.values():
+            page.task.cancel()
+        self._pages.clear()
+        self.weight = 0
+
+    async def _walk(
+        self, key_of: Callable[[str], Hashable], list_page: Callable[[str], Awaitable[ObjectListing]], page_token: str
+    ) -> None:
+        """Prefetch the pages from ``page_token`` on, reusing those already prefetched, until ``depth`` of them."""
+        generation = self._generation
+        next_page_token: Optional[str] = page_token
+        for _ in range(self.depth):
+            if next_page_token is None or generation != self._generation:
+                return
+            self._drop_expired()
+            key = key_of(next_page_token)
+            page = self._pages.get(key)
+            if page is None:
+                if self.weight >= self.capacity_bytes:
+                    return
+                page = self._pages[key] = _PrefetchedPage(
+                    task=asyncio.ensure_future(list_page(next_page_token)), generation=generation
+                )
+                self.stats.prefetches += 1
+                page.task.add_done_callback(lambda _, key=key, page=page: self._keep(key, page))
+            try:
+                listing = await asyncio.shield(page.task)
+            except Exception:  # pylint: disable=broad-exception-caught
+                return
+            next_page_token = listing.next_page_token
+
+    def _keep(self, key: Hashable, page: _PrefetchedPage) -> None:
+        """Keep a page once prefetched, unless it was taken or invalidated meanwhile, or failed."""
+        if self._pages.get(key) is not page:
+            return
+        if page.task.cancelled() or page.task.exception() is not None or page.generation != self._generation:
+            del self._pages[key]
+            return
+        page.expires_at = time.monotonic() + self.ttl_seconds
+        page.weight = estimate_listing_bytes(page.task.result())
+        self.weight += page.weight
+        while self.weight > self.capacity_bytes:
+            evicted_key = next(
+                (kept_key for kept_key, kept in self._pages.items() if kept.expires_at is not None), None
+            )
+            if evicted_key is None:
+                return
+            self._drop(evicted_key)
+
+    def _drop_expired(self) -> None:
+        now = time.monotonic()
+        expired_keys = [
+            key for key, page in self._pages.items() if page.expires_at is not None and page.expires_at <= now
+        ]
+        for key in expired_keys:
+            self._drop(key)
+
+    def _drop(self, key: Hashable) -> None:
+        """Drop a prefetched page that was never taken."""
+        self.weight -= self._pages.pop(key).weight
+        self.stats.wasted += 1
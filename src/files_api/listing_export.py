@@ -0,0 +1,89 @@
+"""Streaming of whole listings as newline-delimited JSON, paging through the storage backend at its largest page size."""
+
+import asyncio
+import json
+from typing import (
+    AsyncIterator,
+    Optional,
+)
+
+from files_api.page_tokens import (
+    ExportCursor,
+    encode_export_cursor,
+)
+from files_api.schemas import FileMetadata
+from files_api.storage.base import (
+    DEFAULT_LIST_MAX_KEYS,
+    ObjectListing,
+    StorageBackend,
+)
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+async def list_export_page(
+    storage: StorageBackend, cursor: ExportCursor, page_size: int = DEFAULT_LIST_MAX_KEYS
+) -> ObjectListing:
+    """List the page of an export at ``cursor``, whose page token is empty for the first page."""
+    return await storage.list(
+        prefix=cursor.directory,
+        page_token=cursor.page_token or None,
+        max_keys=page_size,
+        delimiter=None if cursor.recursive else "/",
+    )
+
+
+async def iter_listing_ndjson(
+    storage: StorageBackend,
+    cursor: ExportCursor,
+    first_page: ObjectListing,
+    page_size: int = DEFAULT_LIST_MAX_KEYS,
+) -> AsyncIterator[bytes]:
+    """
+    Yield every entry of a listing as a line of JSON, one chunk per page, starting from ``first_page`` at ``cursor``.
+
+    Files are written as ``{"file_path": ..., "last_modified": ..., "size_bytes": ...}``, as in
+    ``GET /v1/files``, and, in non-recursive listings, subdirectories as ``{"directory": ...}``.
+    Each page ends with a ``{"cursor": ...}`` line, from which an interrupted export can resume
+    without repeating the entries written before it. The last one is ``{"cursor": null}``, so an
+    export that ends without it was cut short, e.g. by an S3 error once the response had started.
+
+    The next page is listed while the current one is sent, and at most those two pages are held:
+    the response is only read as fast as the client receives it.
+
+    :param storage: The storage backend to list.
+    :param cursor: Where the export resumes, with the listing's directory and recursiveness.
+    :param first_page: The page at ``cursor``, listed beforehand so that invalid requests fail before streaming.
+    :param page_size: The number of entries listed per page; the most S3 returns per call by default.
+    """
+    page = first_page
+    next_page: Optional["asyncio.Future[ObjectListing]"] = None
+    try:
+        while True:
+            next_cursor = None
+            if page.next_page_token:
+                next_cursor = ExportCursor(
+                    page_token=page.next_page_token, directory=cursor.directory, recursive=cursor.recursive
+                )
+                next_page = asyncio.ensure_future(list_export_page(storage, next_cursor, page_size))
+            yield _format_page(page, next_cursor)
+            if next_page is None:
+                return
+            page, next_page = await next_page, None
+    finally:
+        # e.g. the client disconnected while a page was being sent
+        if next_page is not None:
+            next_page.cancel()
+
+
+def _format_page(page: ObjectListing, next_cursor: Optional[ExportCursor]) -> bytes:
+    lines = [
+        # listed entries are trusted, so they are serialized without being validated again
+        FileMetadata.model_construct(
+            file_path=info.key, last_modified=info.last_modified, size_bytes=info.size
+        ).model_dump_json()
+        for info in page.objects
+    ]
+    lines.extend(json.dumps({"directory": directory}) for directory in page.directories)
+    lines.append(json.dumps({"cursor": encode_export_cursor(next_cursor) if next_cursor else None}))
+    return ("\n".join(lines) + "\n").encode()
@@ -1,15 +1,57 @@
 """Main module for the files API."""
 
+import logging
+from contextlib import asynccontextmanager
+from typing import (
+    AsyncIterator,
+    Optional,
+)
+
+import anyio.to_thread
 import pydantic
 from fastapi import FastAPI
 from fastapi.routing import APIRoute
+from starlette.concurrency import run_in_threadpool
 
 from files_api.errors import (
     handle_broad_exceptions,
     handle_pydantic_validation_errors,
 )
-from files_api.routes import ROUTER
+from files_api.metrics import (
+    METRICS_PATH,
+    Metrics,
+    MetricsMiddleware,
+    is_metrics_supported,
+    register_s3_metrics,
+    serve_metrics,
+)
+from files_api.middleware import (
+    CompressionMiddleware,
+    add_s3_call_count_header,
+)
+from files_api.routes import (
+    ADMIN_ROUTER,
+    ROUTER,
+)
+from files_api.s3.body_cache import ObjectBodyCache
+from files_api.s3.client import (
+    create_s3_client,
+    prewarm_s3_connections,
+)
+from files_api.s3.latency_injection import register_s3_latency_injection
+from files_api.s3.metadata_cache import S3MetadataCache
+from files_api.server_timing import ServerTimingMiddleware
 from files_api.settings import Settings
+from files_api.storage.local import LocalStorageBackend
+from files_api.storage.s3 import S3StorageBackend
+from files_api.tracing import (
+    Tracing,
+    TracingMiddleware,
+    is_tracing_supported,
+    register_s3_tracing,
+)
+
+LOGGER = logging.getLogger(__name__)
 
 
 def custom_generate_unique_id(route: APIRoute):
@@ -17,8 +59,92 @@ def custom_generate_unique_id(route: APIRoute):
     return f"{route.tags[0]}-{route.name}"
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """Create the storage backend, with the shared S3 client and caches if on S3, and clean up on shutdown."""
+    settings: Settings = app.state.settings
+    app.state.s3_client = None
+    app.state.metadata_cache = None
+    app.state.body_cache = None
+
+    if settings.storage_backend == "local":
+        app.state.storage = LocalStorageBackend(root_directory=settings.local_storage_directory)
+    else:
+        app.state.storage = await create_s3_storage_backend(app, settings)
+
+    yield
+
+    app.state.storage.close()
+    if app.state.tracing is not None:
+        app.state.tracing.shutdown()
+
+
+async def create_s3_storage_backend(app: FastAPI, settings: Settings) -> S3StorageBackend:
+    """Create the shared S3 client and caches, keeping them on ``app.state`` for S3-only routes, and warm the pool."""
+    # async S3 calls run on anyio worker threads; allow as many in flight as the pool has connections
+    thread_limiter = anyio.to_thread.current_default_thread_limiter()
+    thread_limiter.total_tokens = max(thread_limiter.total_tokens, settings.s3_max_pool_connections)
+
+    s3_client = create_s3_client(
+        max_pool_connections=settings.s3_max_pool_connections,
+        connect_timeout=settings.s3_connect_timeout_seconds,
+        read_timeout=settings.s3_read_timeout_seconds,
+        max_retry_attempts=settings.s3_max_retry_attempts,
+        retry_mode=settings.s3_retry_mode,
+        tcp_keepalive=settings.s3_tcp_keepalive,
+    )
+    register_s3_latency_injection(s3_client, settings.s3_injected_latency_seconds)
+    if app.state.metrics is not None:
+        register_s3_metrics(s3_client, app.state.metrics)
+    if app.state.tracing is not None:
+        register_s3_tracing(s3_client, app.state.tracing)
+    await run_in_threadpool(
+        prewarm_s3_connections,
+        s3_client=s3_client,
+        bucket_name=settings.s3_bucket_name,
+        num_connections=min(settings.s3_prewarm_connections, settings.s3_max_pool_connections),
+    )
+    app.state.s3_client = s3_client
+    app.state.metadata_cache = S3MetadataCache(
+        capacity=settings.metadata_cache_capacity,
+        ttl_seconds=settings.metadata_cache_ttl_seconds,
+        negative_ttl_seconds=settings.metadata_cache_negative_ttl_seconds,
+    )
+    app.state.body_cache = create_body_cache(settings)
+    if app.state.body_cache is not None:
+        app.state.metadata_cache.add_invalidation_listener(app.state.body_cache.invalidate_objects)
+    return S3StorageBackend(
+        bucket_name=settings.s3_bucket_name,
+        s3_client=s3_client,
+        metadata_cache=app.state.metadata_cache,
+        body_cache=app.state.body_cache,
+        multipart_threshold=settings.s3_multipart_threshold_bytes,
+        part_size=settings.s3_multipart_part_size_bytes,
+        max_concurrency=settings.s3_multipart_max_concurrency,
+        coalesce_reads=settings.coalesce_reads,
+        coalesced_body_fanout_max_bytes=settings.coalesced_body_fanout_max_bytes,
+        coalesced_body_buffer_bytes=settings.coalesced_body_buffer_bytes,
+        list_prefetch_depth=settings.list_prefetch_depth,
+        list_prefetch_capacity_bytes=settings.list_prefetch_capacity_bytes,
+        list_prefetch_ttl_seconds=settings.list_prefetch_ttl_seconds,
+    )
+
+
+def create_body_cache(settings: Settings) -> Optional[ObjectBodyCache]:
+    """Create the cache of file bodies described by ``settings``, or return None if both of its tiers are disabled."""
+    if settings.body_cache_memory_capacity_bytes == 0 and settings.body_cache_disk_directory is None:
+        return None
+    return ObjectBodyCache(
+        memory_capacity_bytes=settings.body_cache_memory_capacity_bytes,
+        memory_max_object_bytes=settings.body_cache_memory_max_object_bytes,
+        disk_directory=settings.body_cache_disk_directory,
+        disk_capacity_bytes=settings.body_cache_disk_capacity_bytes,
+        disk_max_object_bytes=settings.body_cache_disk_max_object_bytes,
+    )
+
+
 def create_app(settings: Settings | None = None) -> FastAPI:
-    """Create a FastAPI application with the specified S3 bucket name."""
+    """Create a FastAPI application storing files as configured by ``settings``."""
     settings = settings or Settings()
 
     app = FastAPI(
@@ -26,15 +152,44 @@ def create_app(settings: Settings | None = None) -> FastAPI:
         description="An API to upload and retrieve files.",
         generate_unique_id_function=custom_generate_unique_id,
         version="0.0.1",
+        lifespan=lifespan,
     )
     app.state.settings = settings
 
     app.include_router(ROUTER)
+    app.include_router(ADMIN_ROUTER)
     app.add_exception_handler(
         exc_class_or_status_code=pydantic.ValidationError,
         handler=handle_pydantic_validation_errors,
     )
     app.middleware("http")(handle_broad_exceptions)
+    if settings.server_timing_enabled:
+        # within add_s3_call_count_header, whose log of S3 calls it reads
+        app.add_middleware(ServerTimingMiddleware, trusted_networks=settings.server_timing_trusted_networks)
+    app.middleware("http")(add_s3_call_count_header)
+    if settings.compress_responses:
+        app.add_middleware(CompressionMiddleware, minimum_size=settings.compression_min_size_bytes)
+
+    app.state.tracing = None
+    if settings.tracing_enabled and is_tracing_supported():
+        app.state.tracing = Tracing(
+            sampler=settings.tracing_sampler,
+            sampler_ratio=settings.tracing_sampler_ratio,
+            exporter=settings.tracing_exporter,
+        )
+        # within the metrics middleware, which is added last so that it also measures this one
+        app.add_middleware(TracingMiddleware, tracing=app.state.tracing)
+    elif settings.tracing_enabled:
+        LOGGER.warning("Tracing is disabled: install opentelemetry-sdk to trace requests")
+
+    app.state.metrics = None
+    if settings.metrics_enabled and is_metrics_supported():
+        # added last, so that it wraps every other middleware and measures the whole request
+        app.state.metrics = Metrics(app)
+        app.add_middleware(MetricsMiddleware, metrics=app.state.metrics)
+        app.add_route(METRICS_PATH, serve_metrics, include_in_schema=False)
+    elif settings.metrics_enabled:
+        LOGGER.warning("Metrics are disabled: install prometheus-client to serve them at %s", METRICS_PATH)
 
     return app
 
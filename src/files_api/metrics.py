@@ -0,0 +1,255 @@
+"""
+Prometheus metrics of the files API, served at ``/metrics``.
+
+Everything measured is instrumented here: HTTP requests by :class:`MetricsMiddleware`, S3 calls by
+botocore event hooks registered with :func:`register_s3_metrics`, and caches by a collector that
+reads their counters at scrape time, so the hot paths only pay for a few histogram observations.
+
+Requires the optional ``prometheus-client`` package, e.g. ``pip install s3-files-api[metrics]``.
+"""
+
+import time
+from typing import (
+    Any,
+    Iterator,
+    Optional,
+)
+
+from botocore import xform_name
+from fastapi import (
+    FastAPI,
+    Request,
+    Response,
+)
+from starlette.datastructures import Headers
+from starlette.types import (
+    ASGIApp,
+    Message,
+    Receive,
+    Scope,
+    Send,
+)
+
+try:
+    from prometheus_client import (
+        CONTENT_TYPE_LATEST,
+        CollectorRegistry,
+        Counter,
+        Gauge,
+        Histogram,
+        generate_latest,
+    )
+    from prometheus_client.core import (
+        CounterMetricFamily,
+        GaugeMetricFamily,
+        Metric,
+    )
+    from prometheus_client.registry import Collector
+except ImportError:  # pragma: no cover
+    CollectorRegistry = None  # type: ignore[assignment,misc]
+    Collector = object  # type: ignore[assignment,misc]
+
+try:
+    from mypy_boto3_s3 import S3Client
+except ImportError:  # pragma: no cover
+    ...
+
+METRICS_PATH = "/metrics"
+# requests that matched no route share one label value, so scanners cannot blow up the label cardinality
+UNMATCHED_ROUTE = "<unmatched>"
+HTTP_LATENCY_BUCKETS_SECONDS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+S3_LATENCY_BUCKETS_SECONDS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# key under which a call's operation and start time are kept in botocore's per-call context
+_S3_CALL_CONTEXT_KEY = "files_api_metrics"
+
+
+def is_metrics_supported() -> bool:
+    """Whether the optional ``prometheus-client`` package is installed."""
+    return CollectorRegistry is not None
+
+
+class Metrics:  # pylint: disable=too-many-instance-attributes
+    """
+    The metrics of one app, in a registry of their own so that several apps can live in one process, e.g. in tests.
+
+    Cache counters are read from ``app.state`` when scraped; see :class:`_CacheCollector`.
+    """
+
+    def __init__(self, app: FastAPI):
+        self.registry = CollectorRegistry()
+        self.http_request_duration = Histogram(
+            "files_api_http_request_duration_seconds",
+            "Time to answer HTTP requests, until the last byte of the response is sent.",
+            ["method", "route", "status"],
+            buckets=HTTP_LATENCY_BUCKETS_SECONDS,
+            registry=self.registry,
+        )
+        self.http_requests_in_flight = Gauge(
+            "files_api_http_requests_in_flight", "HTTP requests being answered.", registry=self.registry
+        )
+        self.http_request_bytes = Counter(
+            "files_api_http_request_bytes", "Bytes received in HTTP request bodies.", ["route"], registry=self.registry
+        )
+        self.http_response_bytes = Counter(
+            "files_api_http_response_bytes", "Bytes sent in HTTP response bodies.", ["route"], registry=self.registry
+        )
+        self.s3_request_duration = Histogram(
+            "files_api_s3_request_duration_seconds",
+            "Time taken by S3 API calls, retries included; status is the HTTP status, or 'error' if there was none.",
+            ["operation", "status"],
+            buckets=S3_LATENCY_BUCKETS_SECONDS,
+            registry=self.registry,
+        )
+        self.s3_request_retries = Counter(
+            "files_api_s3_request_retries",
+            "Attempts of S3 API calls beyond the first.",
+            ["operation"],
+            registry=self.registry,
+        )
+        self.registry.register(_CacheCollector(app))
+
+    def render(self) -> bytes:
+        """Return every metric in the Prometheus text format."""
+        return generate_latest(self.registry)
+
+
+class _CacheCollector(Collector):  # pylint: disable=too-few-public-methods
+    """Exports the counters of the app's caches, read coalescing and listing prefetch, those enabled, at scrape time."""
+
+    def __init__(self, app: FastAPI):
+        self._app = app
+
+    def collect(self) -> Iterator["Metric"]:
+        """Yield the current cache counters and sizes."""
+        metadata_cache = getattr(self._app.state, "metadata_cache", None)
+        if metadata_cache is not None:
+            yield from _counter_families(
+                "files_api_metadata_cache", "S3 metadata cache", metadata_cache.stats.as_dict()
+            )
+            yield GaugeMetricFamily(
+                "files_api_metadata_cache_entries",
+                "Entries in the S3 metadata cache.",
+                value=metadata_cache.entry_count,
+            )
+        body_cache = getattr(self._app.state, "body_cache", None)
+        if body_cache is not None:
+            body_cache_stats = body_cache.stats.as_dict()
+            body_cache_stats.pop("hit_rate")  # derived from the counters, as rate() queries should be
+            yield from _counter_families("files_api_body_cache", "file body cache", body_cache_stats)
+            size_family = GaugeMetricFamily(
+                "files_api_body_cache_size_bytes", "Bytes held by the file body cache, by tier.", labels=["tier"]
+            )
+            size_family.add_metric(["memory"], body_cache.memory_bytes)
+            size_family.add_metric(["disk"], body_cache.disk_bytes)
+            yield size_family
+        storage = getattr(self._app.state, "storage", None)
+        read_coalescer = getattr(storage, "read_coalescer", None)
+        if read_coalescer is not None:
+            yield from _counter_families(
+                "files_api_read_coalescing", "coalescing of identical S3 reads", read_coalescer.stats.as_dict()
+            )
+        list_prefetcher = getattr(storage, "list_prefetcher", None)
+        if list_prefetcher is not None:
+            yield from _counter_families(
+                "files_api_list_prefetch", "prefetch of listing pages", list_prefetcher.stats.as_dict()
+            )
+            yield GaugeMetricFamily(
+                "files_api_list_prefetch_size_bytes",
+                "Estimated bytes held by prefetched listing pages.",
+                value=list_prefetcher.weight,
+            )
+
+
+def _counter_families(prefix: str, description: str, counters: dict) -> Iterator["Metric"]:
+    for name, value in counters.items():
+        yield CounterMetricFamily(
+            f"{prefix}_{name}", f"{name.replace('_', ' ').capitalize()} of the {description}.", value
+        )
+
+
+class MetricsMiddleware:  # pylint: disable=too-few-public-methods
+    """
+    Measure the latency, status, body sizes and concurrency of HTTP requests, by route.
+
+    Latencies run until the last byte of the response is sent, so that streamed downloads count
+    in full. Routes are labelled by their path template, e.g. ``/v1/files/{file_path:path}``.
+    """
+
+    def __init__(self, app: ASGIApp, metrics: Metrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Run the app, recording metrics about the request once the response is sent."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started_at = time.perf_counter()
+        status_code = 500
+        request_bytes = response_bytes = 0
+        response_content_length = 0
+
+        async def _receive() -> Message:
+            nonlocal request_bytes
+            message = await receive()
+            request_bytes += len(message.get("body", b""))
+            return message
+
+        async def _send(message: Message) -> None:
+            nonlocal status_code, response_bytes, response_content_length
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                response_content_length = int(Headers(raw=message["headers"]).get("Content-Length", 0))
+            elif message["type"] == "http.response.body":
+                response_bytes += len(message.get("body", b""))
+            elif message["type"] == "http.response.pathsend":
+                # the server sends the file itself, so its size is only known from the headers
+                response_bytes += response_content_length
+            await send(message)
+
+        self.metrics.http_requests_in_flight.inc()
+        try:
+            await self.app(scope, _receive, _send)
+        finally:
+            self.metrics.http_requests_in_flight.dec()
+            route = scope.get("route")
+            route_label = getattr(route, "path", UNMATCHED_ROUTE)
+            self.metrics.http_request_duration.labels(scope["method"], route_label, str(status_code)).observe(
+                time.perf_counter() - started_at
+            )
+            self.metrics.http_request_bytes.labels(route_label).inc(request_bytes)
+            self.metrics.http_response_bytes.labels(route_label).inc(response_bytes)
+
+
+def register_s3_metrics(s3_client: "S3Client", metrics: Metrics) -> None:
+    """
+    Time every API call made by ``s3_client``, and count its retries, with botocore event hooks.
+
+    Hooking the client rather than ``files_api.s3`` functions covers every call, including those
+    made by batch, copy and archive helpers, and times each call once however many retries it took.
+    """
+
+    def _before_call(model: Any, context: dict, **_: Any) -> None:
+        context[_S3_CALL_CONTEXT_KEY] = (xform_name(model.name), time.perf_counter())
+
+    def _after_call(context: dict, parsed: Optional[dict] = None, **_: Any) -> None:
+        operation_and_start = context.get(_S3_CALL_CONTEXT_KEY)
+        if operation_and_start is None:
+            return
+        operation, started_at = operation_and_start
+        status = parsed.get("ResponseMetadata", {}).get("HTTPStatusCode") if parsed else None
+        metrics.s3_request_duration.labels(operation, str(status or "error")).observe(time.perf_counter() - started_at)
+        retries = context.get("retries", {}).get("attempt", 1) - 1
+        if retries > 0:
+            metrics.s3_request_retries.labels(operation).inc(retries)
+
+    s3_client.meta.events.register("before-call.s3", _before_call)
+    s3_client.meta.events.register("after-call.s3", _after_call)
+    s3_client.meta.events.register("after-call-error.s3", _after_call)
+
+
+async def serve_metrics(request: Request) -> Response:
+    """Answer a Prometheus scrape with the app's metrics."""
+    metrics: Metrics = request.app.state.metrics
+    return Response(content=metrics.render(), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,132 @@
+"""HTTP middlewares for the files API."""
+
+from typing import Optional
+
+from fastapi import Request
+from starlette.datastructures import (
+    Headers,
+    MutableHeaders,
+)
+from starlette.types import (
+    ASGIApp,
+    Message,
+    Receive,
+    Scope,
+    Send,
+)
+
+from files_api.compression import (
+    DEFAULT_COMPRESSION_MIN_SIZE_BYTES,
+    Compressor,
+    is_compressible,
+    negotiate_content_encoding,
+    new_compressor,
+)
+from files_api.s3.call_tracking import track_s3_calls
+
+S3_CALL_COUNT_HEADER = "X-S3-Call-Count"
+# responses with these statuses have no body, or a body that is a slice of the full representation
+_UNCOMPRESSIBLE_STATUSES = frozenset({204, 206, 304})
+
+
+# fastapi docs on middlewares: https://fastapi.tiangolo.com/tutorial/middleware/
+async def add_s3_call_count_header(request: Request, call_next):
+    """
+    Report how many S3 calls the route made in the ``X-S3-Call-Count`` response header.
+
+    Only calls made before the response starts are counted, i.e. not those made while a
+    streaming body is being sent.
+    """
+    with track_s3_calls() as s3_call_log:
+        response = await call_next(request)
+    response.headers[S3_CALL_COUNT_HEADER] = str(s3_call_log.count)
+    return response
+
+
+class CompressionMiddleware:  # pylint: disable=too-few-public-methods
+    """
+    Compress response bodies with the gzip or zstd coding negotiated from ``Accept-Encoding``.
+
+    Bodies are compressed chunk by chunk as they are sent, so streamed downloads stay streamed.
+    Only compressible media types (text, JSON, CSV, ...) are compressed, and responses that already
+    have a ``Content-Encoding``, e.g. files stored compressed, are passed through untouched.
+    Bodies known to be smaller than ``minimum_size`` bytes are not worth compressing and are sent as-is.
+
+    Starlette's ``GZipMiddleware`` only speaks gzip, hence this middleware.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = DEFAULT_COMPRESSION_MIN_SIZE_BYTES):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Run the app, compressing its response if the client and the response allow it."""
+        # a HEAD response has no body to compress, and its headers must match an uncompressed GET's
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        coding = negotiate_content_encoding(Headers(scope=scope).get("Accept-Encoding"))
+        await self.app(scope, receive, _CompressingSender(send, coding, self.minimum_size))
+
+
+class _CompressingSender:  # pylint: disable=too-few-public-methods
+    """The ``send`` callable of one response; holds back the response start until the first body chunk."""
+
+    def __init__(self, send: Send, coding: Optional[str], minimum_size: int):
+        self._send = send
+        self._coding = coding
+        self._minimum_size = minimum_size
+        self._start_message: Optional[Message] = None
+        self._compressor: Optional[Compressor] = None
+
+    async def __call__(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self._start_message = message
+            return
+        if message["type"] != "http.response.body":
+            # e.g. a file sent with the pathsend extension, which cannot be compressed on its way
+            if self._start_message is not None:
+                await self._send(self._start_message)
+                self._start_message = None
+            await self._send(message)
+            return
+
+        body: bytes = message.get("body", b"")
+        more_body: bool = message.get("more_body", False)
+        start_message, self._start_message = self._start_message, None
+        if start_message is not None:
+            self._compressor = self._start(start_message, body, more_body)
+
+        if self._compressor is not None:
+            body = self._compressor.compress(body)
+            if not more_body:
+                body += self._compressor.flush()
+                if start_message is not None:
+                    # the whole body came in one message, so its compressed length is known
+                    MutableHeaders(raw=start_message["headers"])["Content-Length"] = str(len(body))
+        if start_message is not None:
+            await self._send(start_message)
+        await self._send({"type": "http.response.body", "body": body, "more_body": more_body})
+
+    def _start(self, start_message: Message, body: bytes, more_body: bool) -> Optional[Compressor]:
+        """Rewrite the headers of ``start_message`` if the response will be compressed, returning its compressor."""
+        headers = MutableHeaders(raw=start_message["headers"])
+        if (
+            start_message["status"] in _UNCOMPRESSIBLE_STATUSES
+            or "Content-Encoding" in headers
+            or not is_compressible(headers.get("Content-Type"))
+        ):
+            return None
+        headers.add_vary_header("Accept-Encoding")
+        content_length = int(headers.get("Content-Length", -1)) if more_body else len(body)
+        if self._coding is None or 0 <= content_length < self._minimum_size:
+            return None
+
+        headers["Content-Encoding"] = self._coding
+        if "Content-Length" in headers:
+            del headers["Content-Length"]
+        # the compressed bytes are a different representation, so only a weak validator still applies;
+        # If-Match on writes is compared weakly by the routes, so these ETags can still be sent back
+        if (etag := headers.get("ETag")) and not etag.startswith("W/"):
+            headers["ETag"] = f"W/{etag}"
+        return new_compressor(self._coding)
@@ -0,0 +1,106 @@
+"""Page tokens for listings that must carry more state between pages than S3's continuation token."""
+
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+from typing import (
+    Any,
+    Optional,
+)
+
+from files_api.schemas import (
+    DEFAULT_GET_FILES_MAX_PAGE_SIZE,
+    DEFAULT_GET_FILES_MIN_PAGE_SIZE,
+    is_valid_path,
+)
+
+# distinguishes our tokens from raw S3 continuation tokens, which are base64 and never contain "."
+DIRECTORY_PAGE_TOKEN_PREFIX = "dir1."
+EXPORT_CURSOR_PREFIX = "exp1."
+
+
+@dataclass(frozen=True)
+class DirectoryPageToken:
+    """Where to resume a non-recursive listing: S3's continuation token plus the listing's parameters."""
+
+    continuation_token: str
+    directory: str
+    page_size: int
+
+
+@dataclass(frozen=True)
+class ExportCursor:
+    """Where to resume an export of a listing: the storage backend's page token plus the listing's parameters."""
+
+    page_token: str
+    directory: str
+    recursive: bool
+
+
+def encode_directory_page_token(page_token: DirectoryPageToken) -> str:
+    """Encode a :class:`DirectoryPageToken` as an opaque, URL-safe string."""
+    return _encode(
+        DIRECTORY_PAGE_TOKEN_PREFIX,
+        {"t": page_token.continuation_token, "d": page_token.directory, "n": page_token.page_size},
+    )
+
+
+def decode_directory_page_token(value: str) -> Optional[DirectoryPageToken]:
+    """
+    Decode a token made by :func:`encode_directory_page_token`.
+
+    Tokens are not signed, so the page size and directory they carry are checked like a client's.
+
+    :return: The decoded token, or None if ``value`` is not a valid one of ours: it is malformed, is a
+        raw S3 continuation token, or asks for a page size or directory ``GET /v1/files`` would not accept.
+    """
+    payload = _decode(DIRECTORY_PAGE_TOKEN_PREFIX, value)
+    try:
+        page_token = DirectoryPageToken(
+            continuation_token=str(payload["t"]), directory=str(payload["d"]), page_size=int(payload["n"])
+        )
+    except (ValueError, KeyError, TypeError):
+        return None
+    if not DEFAULT_GET_FILES_MIN_PAGE_SIZE <= page_token.page_size <= DEFAULT_GET_FILES_MAX_PAGE_SIZE:
+        return None
+    if page_token.directory and not _is_valid_directory(page_token.directory):
+        return None
+    return page_token
+
+
+def encode_export_cursor(cursor: ExportCursor) -> str:
+    """Encode an :class:`ExportCursor` as an opaque, URL-safe string."""
+    return _encode(EXPORT_CURSOR_PREFIX, {"t": cursor.page_token, "d": cursor.directory, "r": cursor.recursive})
+
+
+def decode_export_cursor(value: str) -> Optional[ExportCursor]:
+    """
+    Decode a cursor made by :func:`encode_export_cursor`.
+
+    :return: The decoded cursor, or None if ``value`` is not one.
+    """
+    payload = _decode(EXPORT_CURSOR_PREFIX, value)
+    try:
+        return ExportCursor(page_token=str(payload["t"]), directory=str(payload["d"]), recursive=bool(payload["r"]))
+    except (ValueError, KeyError, TypeError):
+        return None
+
+
+def _encode(prefix: str, payload: dict) -> str:
+    return prefix + base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode()).decode()
+
+
+def _decode(prefix: str, value: str) -> Any:
+    """Return the payload encoded by :func:`_encode` with ``prefix``, or None if ``value`` is not one."""
+    if not value.startswith(prefix):
+        return None
+    try:
+        return json.loads(base64.urlsafe_b64decode(value.removeprefix(prefix)))
+    except (binascii.Error, ValueError):
+        return None
+
+
+def _is_valid_directory(directory: str) -> bool:
+    """Check a directory like a file path, also rejecting "." and ".." segments, which no listing can produce."""
+    return is_valid_path(directory) and not any(segment in (".", "..") for segment in directory.split("/"))
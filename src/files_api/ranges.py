@@ -0,0 +1,91 @@
+"""Parsing of HTTP ``Range`` and ``If-Range`` request headers for partial-content responses."""
+
+import re
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+from files_api.conditional import parse_http_date
+
+# a single "bytes=<start>-<end>", "bytes=<start>-" or suffix "bytes=-<length>" range
+SINGLE_BYTE_RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+@dataclass(frozen=True)
+class ByteRange:
+    """A single byte range requested by a client; see https://www.rfc-editor.org/rfc/rfc9110#section-14.1.2."""
+
+    start: Optional[int]
+    end: Optional[int]
+
+    def to_header(self) -> str:
+        """Render the range in the ``Range`` header format that S3 ``get_object`` accepts."""
+        start = "" if self.start is None else str(self.start)
+        end = "" if self.end is None else str(self.end)
+        return f"bytes={start}-{end}"
+
+    def resolve(self, size: int) -> Optional[tuple[int, int]]:
+        """
+        Resolve the range against a representation of ``size`` bytes, as S3 does.
+
+        :return: The first and last byte positions, inclusive, or None if the range is not satisfiable.
+        """
+        if self.start is None:
+            suffix_length = min(self.end or 0, size)
+            return (size - suffix_length, size - 1) if suffix_length > 0 else None
+        if self.start >= size:
+            return None
+        return self.start, size - 1 if self.end is None else min(self.end, size - 1)
+
+
+@dataclass(frozen=True)
+class IfRangeCondition:
+    """The validator sent in an ``If-Range`` header: either a strong ETag or an HTTP date."""
+
+    etag: Optional[str] = None
+    last_modified: Optional[datetime] = None
+
+
+def parse_range_header(value: Optional[str]) -> Optional[ByteRange]:
+    """
+    Parse a ``Range`` header holding a single byte range.
+
+    Per RFC 9110, servers may ignore ``Range`` headers they do not support, so multi-range,
+    non-byte and malformed values return None and the full representation is served.
+
+    :param value: The raw ``Range`` header value, if any.
+
+    :return: The requested range, or None if the header should be ignored.
+    """
+    if not value:
+        return None
+    match = SINGLE_BYTE_RANGE_PATTERN.match(value.strip())
+    if not match:
+        return None
+
+    start, end = (int(group) if group else None for group in match.groups())
+    if start is None and end is None:
+        return None
+    if start is not None and end is not None and start > end:
+        return None
+    return ByteRange(start=start, end=end)
+
+
+def parse_if_range_header(value: Optional[str]) -> Optional[IfRangeCondition]:
+    """
+    Parse an ``If-Range`` header.
+
+    :param value: The raw ``If-Range`` header value, if any.
+
+    :return: The parsed validator, None if the header is absent, or an empty condition if the
+        header can never match (weak ETags and unparseable dates), meaning the full representation
+        must be served.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.startswith('"'):
+        return IfRangeCondition(etag=value)
+    if value.startswith("W/"):
+        return IfRangeCondition()
+    return IfRangeCondition(last_modified=parse_http_date(value))
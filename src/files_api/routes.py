@@ -1,34 +1,176 @@
 """API routes for the files API."""
 
+import dataclasses
+import io
+import itertools
+import tarfile
+from datetime import (
+    datetime,
+    timedelta,
+    timezone,
+)
+from typing import (
+    Iterator,
+    List,
+    NoReturn,
+    Optional,
+)
 
+from botocore.exceptions import ClientError
 from fastapi import (
     APIRouter,
     Depends,
+    File,
+    Form,
+    Header,
     HTTPException,
+    Query,
     Request,
     Response,
     UploadFile,
     status,
 )
-from fastapi.responses import StreamingResponse
+from fastapi.responses import (
+    FileResponse,
+    RedirectResponse,
+    StreamingResponse,
+)
+from starlette.background import BackgroundTask
 
-from files_api.s3.delete_objects import delete_s3_object
-from files_api.s3.read_objects import (
-    fetch_s3_object,
-    fetch_s3_objects_metadata,
-    fetch_s3_objects_using_page_token,
-    object_exists_in_s3,
+from files_api.archives import (
+    ARCHIVE_MEDIA_TYPES,
+    ArchiveFormat,
+    iter_s3_directory_archive,
+    iter_tar_archive,
+)
+from files_api.async_s3.copy_objects import (
+    copy_s3_object,
+    copy_s3_objects_by_prefix,
+    move_s3_object,
+    move_s3_objects_by_prefix,
+)
+from files_api.async_s3.delete_objects import (
+    delete_s3_objects,
+    delete_s3_objects_by_prefix,
+)
+from files_api.async_s3.presigned_urls import (
+    create_presigned_multipart_upload,
+    generate_presigned_download_url,
+    generate_presigned_upload_url,
+)
+from files_api.async_s3.read_objects import (
+    fetch_s3_objects_metadata_by_key,
+    prewarm_s3_object_bodies,
+)
+from files_api.async_s3.write_objects import (
+    abort_s3_multipart_upload,
+    complete_s3_multipart_upload,
+    upload_s3_objects,
+)
+from files_api.compression import (
+    SUPPORTED_CONTENT_ENCODINGS,
+    CompressingReader,
+    accepts_content_encoding,
+    is_compressible,
+    iter_decompressed,
+)
+from files_api.conditional import (
+    format_http_date,
+    is_not_modified,
+    parse_http_date,
+    strip_weak_etag_prefixes,
+)
+from files_api.listing_export import (
+    NDJSON_MEDIA_TYPE,
+    iter_listing_ndjson,
+    list_export_page,
+)
+from files_api.page_tokens import (
+    DIRECTORY_PAGE_TOKEN_PREFIX,
+    DirectoryPageToken,
+    ExportCursor,
+    decode_directory_page_token,
+    decode_export_cursor,
+    encode_directory_page_token,
+)
+from files_api.ranges import (
+    parse_if_range_header,
+    parse_range_header,
+)
+from files_api.responses import FastJSONResponse
+from files_api.s3.body_cache import (
+    ObjectBodyCache,
+)
+from files_api.s3.copy_objects import BulkCopyResult
+from files_api.s3.metadata_cache import S3MetadataCache
+from files_api.s3.write_objects import (
+    ObjectToUpload,
+    UploadResult,
 )
-from files_api.s3.write_objects import upload_s3_object
 from files_api.schemas import (
+    DEFAULT_GET_FILES_DIRECTORY,
+    DEFAULT_GET_FILES_PAGE_SIZE,
+    AbortUploadRequest,
+    BodyCacheStatsResponse,
+    CompleteUploadRequest,
+    CopyFileError,
+    CopyFilesRequest,
+    CopyFilesResponse,
+    DeleteFileError,
+    DeleteFilesRequest,
+    DeleteFilesResponse,
+    ExportFilesQueryParams,
     FileMetadata,
+    GetFilesMetadataRequest,
+    GetFilesMetadataResponse,
     GetFilesQueryParams,
     GetFilesResponse,
+    MoveFilesResponse,
+    PresignedPart,
+    PresignFileRequest,
+    PresignFileResponse,
+    PrewarmBodyCacheRequest,
+    PrewarmBodyCacheResponse,
     PutFileResponse,
+    UploadFileResult,
+    UploadFilesResponse,
+    directory_prefix,
+    is_valid_path,
 )
+from files_api.server_timing import ServerTimingRoute
 from files_api.settings import Settings
+from files_api.storage.base import (
+    DEFAULT_CONTENT_TYPE,
+    InvalidRequestError,
+    NotModifiedError,
+    ObjectNotFoundError,
+    PreconditionFailedError,
+    RangeNotSatisfiableError,
+    StorageBackend,
+    StorageError,
+    StoredObject,
+)
+from files_api.storage.s3 import S3StorageBackend
+
+try:
+    from mypy_boto3_s3 import S3Client
+except ImportError:  # pragma: no cover
+    ...
+
+ROUTER = APIRouter(tags=["Files"], route_class=ServerTimingRoute)
+ADMIN_ROUTER = APIRouter(tags=["Admin"], route_class=ServerTimingRoute)
 
-ROUTER = APIRouter(tags=["Files"])
+
+def require_s3_storage(request: Request) -> None:
+    """Answer 501 for routes built on S3 features when the app stores files elsewhere."""
+    if not isinstance(request.app.state.storage, S3StorageBackend):
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED, detail="Not supported by the configured storage backend"
+        )
+
+
+# routes built on S3 features, e.g. batch operations and presigned URLs
+S3_ONLY_DEPENDENCIES = [Depends(require_s3_storage)]
 
 
 @ROUTER.put(
@@ -36,71 +178,551 @@ ROUTER = APIRouter(tags=["Files"])
     responses={
         status.HTTP_200_OK: {"model": PutFileResponse},
         status.HTTP_201_CREATED: {"model": PutFileResponse},
+        status.HTTP_412_PRECONDITION_FAILED: {
+            "description": "The file does not exist or its ETag does not match `If-Match`.",
+        },
     },
 )
 async def upload_file(
-    request: Request, file_path: str, file_content: UploadFile, response: Response
+    request: Request,
+    file_path: str,
+    file_content: UploadFile,
+    response: Response,
+    if_match: Optional[str] = Header(default=None, alias="If-Match"),
 ) -> PutFileResponse:
-    """Upload or update a file."""
+    """
+    Upload or update a file.
+
+    Send `If-Match` with the file's current `ETag` to only overwrite the version you last read,
+    or `If-Match: *` to only overwrite an existing file. `If-Match` is compared weakly, so the weak
+    `ETag` of a compressed download matches too.
+
+    If compressed storage is enabled, text-like files are compressed on their way to S3.
+    """
     settings: Settings = request.app.state.settings
-    object_already_exists = object_exists_in_s3(
-        bucket_name=settings.s3_bucket_name, object_key=file_path
-    )  # noqa: F821
+    storage: StorageBackend = request.app.state.storage
 
-    if object_already_exists:
-        response_message = f"File already exists at path: /{file_path}"
-        response.status_code = status.HTTP_200_OK
-    else:
+    # compressed downloads carry the weak form of the stored file's ETag, which S3 compares strongly
+    if_match = strip_weak_etag_prefixes(if_match)
+    if if_match and if_match.strip() == "*":
+        await _raise_if_missing(
+            request, file_path, status_code=status.HTTP_412_PRECONDITION_FAILED, detail="Precondition failed"
+        )
+        if_match = None
+
+    # stream the spooled upload to storage rather than reading it all into memory
+    object_to_upload = _compress_for_storage(
+        settings,
+        ObjectToUpload(object_key=file_path, file_content=file_content.file, content_type=file_content.content_type),
+    )
+    try:
+        object_created = await storage.put(
+            file_path,
+            content=object_to_upload.file_content,  # type: ignore[arg-type]
+            content_type=object_to_upload.content_type,
+            content_encoding=object_to_upload.content_encoding,
+            if_match=if_match,
+        )
+    except StorageError as error:
+        _raise_for_storage_error(error)
+
+    if object_created:
         response_message = f"File uploaded successfully at path: /{file_path}"
         response.status_code = status.HTTP_201_CREATED
+    else:
+        response_message = f"File already exists at path: /{file_path}"
+        response.status_code = status.HTTP_200_OK
+    return PutFileResponse(file_path=file_path, message=response_message)
+
+
+@ROUTER.post(
+    "/v1/files:upload",
+    dependencies=S3_ONLY_DEPENDENCIES,
+    responses={
+        status.HTTP_400_BAD_REQUEST: {
+            "description": "No files were sent, or only an `archive` that is not a valid tar archive.",
+        },
+    },
+)
+async def upload_files(
+    request: Request,
+    files: List[UploadFile] = File(default=[]),
+    archive: Optional[UploadFile] = File(default=None),
+    directory: str = Form(default=""),
+) -> UploadFilesResponse:
+    """
+    Upload or update many files at once.
+
+    Send the files as multipart parts named `files`, each with its path as the part's filename,
+    and/or as a tar archive (optionally gzip, bzip2 or xz compressed) in a part named `archive`.
+    Paths are relative to `directory`, if given. Files are uploaded concurrently, and each file's
+    result is reported separately, so one failed file does not fail the whole batch.
+
+    Uploads are not atomic: if `archive` turns out to be corrupt or truncated partway through,
+    the files read out of it before are still uploaded and reported, followed by a failed result
+    for the archive itself, named after its filename.
+
+    Multipart requests are limited to 1000 parts; send larger batches as an archive.
+    """
+    settings: Settings = request.app.state.settings
+    s3_client: "S3Client" = request.app.state.s3_client
+    metadata_cache: S3MetadataCache = request.app.state.metadata_cache
+
+    if not files and archive is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No files to upload")
+
+    invalid_file_paths: list[str] = []
+    invalid_archive_results: list[UploadFileResult] = []
+    # so that files sent to "batch" land in "batch/", not next to it
+    prefix = directory_prefix(directory) if directory else ""
+
+    def _iter_archive_objects(archive_file: UploadFile) -> Iterator[ObjectToUpload]:
+        try:
+            yield from iter_tar_archive(archive_file.file, directory=prefix)
+        except tarfile.TarError:
+            # the files read out of the archive so far are still uploaded, so the batch must not fail as a whole
+            invalid_archive_results.append(
+                UploadFileResult(
+                    file_path=archive_file.filename or "archive", status="failed", error="Invalid tar archive"
+                )
+            )
+
+    def _iter_objects_to_upload() -> Iterator[ObjectToUpload]:
+        objects_to_upload: Iterator[ObjectToUpload] = (
+            ObjectToUpload(
+                object_key=f"{prefix}{file.filename or ''}", file_content=file.file, content_type=file.content_type
+            )
+            for file in files
+        )
+        if archive is not None:
+            objects_to_upload = itertools.chain(objects_to_upload, _iter_archive_objects(archive))
+        for object_to_upload in objects_to_upload:
+            if is_valid_path(object_to_upload.object_key):
+                yield _compress_for_storage(settings, object_to_upload)
+            else:
+                invalid_file_paths.append(object_to_upload.object_key)
+
+    upload_results = await upload_s3_objects(
+        bucket_name=settings.s3_bucket_name,
+        objects=_iter_objects_to_upload(),
+        s3_client=s3_client,
+        metadata_cache=metadata_cache,
+        max_concurrency=settings.s3_batch_upload_max_concurrency,
+    )
+    if invalid_archive_results and not upload_results and not invalid_file_paths:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid tar archive")
+
+    return UploadFilesResponse(
+        files=[_to_upload_file_result(upload_result) for upload_result in upload_results]
+        + [
+            UploadFileResult(file_path=file_path, status="failed", error="Invalid file path")
+            for file_path in invalid_file_paths
+        ]
+        + invalid_archive_results
+    )
+
+
+def _compress_for_storage(settings: Settings, object_to_upload: ObjectToUpload) -> ObjectToUpload:
+    """Compress a file as it is uploaded if compressed storage is enabled and the file is worth compressing."""
+    content_encoding = settings.upload_content_encoding
+    if content_encoding is None or not is_compressible(object_to_upload.content_type):
+        return object_to_upload
+    file_content = object_to_upload.file_content
+    stream = io.BytesIO(file_content) if isinstance(file_content, bytes) else file_content
+    return dataclasses.replace(
+        object_to_upload,
+        file_content=CompressingReader(stream, content_encoding),  # type: ignore[arg-type]
+        content_encoding=content_encoding,
+    )
+
+
+def _to_upload_file_result(upload_result: UploadResult) -> UploadFileResult:
+    """Convert the outcome of an S3 upload into its API representation."""
+    if upload_result.created is None:
+        return UploadFileResult(file_path=upload_result.object_key, status="failed", error=upload_result.error_code)
+    return UploadFileResult(
+        file_path=upload_result.object_key, status="created" if upload_result.created else "overwritten"
+    )
+
+
+@ROUTER.post(
+    "/v1/files:presign",
+    dependencies=S3_ONLY_DEPENDENCIES,
+    responses={
+        status.HTTP_404_NOT_FOUND: {
+            "description": "File not found for the given `file_path` when presigning a download.",
+        },
+    },
+)
+async def presign_file(request: Request, presign_file_request: PresignFileRequest) -> PresignFileResponse:
+    """
+    Presign URLs with which a client transfers a file directly to or from S3, bypassing the API.
+
+    For uploads at or above the multipart threshold, pass `size_bytes` to get a URL per part, then
+    call `POST /v1/files:complete-upload` (or `POST /v1/files:abort-upload`) once the parts are sent.
+    Single-request uploads are complete as soon as the `PUT` to `url` succeeds, though `HEAD` and list
+    responses may not reflect them until the metadata cache expires.
+    """
+    settings: Settings = request.app.state.settings
+    s3_client: "S3Client" = request.app.state.s3_client
+    file_path = presign_file_request.file_path
+    expires_in = settings.presigned_url_expiration_seconds
+    expires_at = datetime.now(timezone.utc) + timedelta(seconds=expires_in)
+
+    if presign_file_request.operation == "download":
+        await _raise_if_missing(request, file_path, status_code=status.HTTP_404_NOT_FOUND, detail="File not found")
+        url = await generate_presigned_download_url(
+            bucket_name=settings.s3_bucket_name, object_key=file_path, s3_client=s3_client, expires_in=expires_in
+        )
+        return PresignFileResponse(file_path=file_path, method="GET", expires_at=expires_at, url=url)
 
-    file_contents: bytes = await file_content.read()
+    size_bytes = presign_file_request.size_bytes
+    if size_bytes is None or size_bytes < settings.s3_multipart_threshold_bytes:
+        url = await generate_presigned_upload_url(
+            bucket_name=settings.s3_bucket_name,
+            object_key=file_path,
+            content_type=presign_file_request.content_type,
+            s3_client=s3_client,
+            expires_in=expires_in,
+        )
+        return PresignFileResponse(file_path=file_path, method="PUT", expires_at=expires_at, url=url)
 
-    upload_s3_object(
+    multipart_upload = await create_presigned_multipart_upload(
         bucket_name=settings.s3_bucket_name,
         object_key=file_path,
-        file_content=file_contents,
-        content_type=file_content.content_type,
+        size_bytes=size_bytes,
+        content_type=presign_file_request.content_type,
+        part_size=settings.s3_multipart_part_size_bytes,
+        s3_client=s3_client,
+        expires_in=expires_in,
+    )
+    return PresignFileResponse(
+        file_path=file_path,
+        method="PUT",
+        expires_at=expires_at,
+        upload_id=multipart_upload.upload_id,
+        part_size_bytes=multipart_upload.part_size,
+        parts=[
+            PresignedPart(part_number=part_number, url=part_url)
+            for part_number, part_url in enumerate(multipart_upload.part_urls, start=1)
+        ],
     )
-    return PutFileResponse(file_path=file_path, message=response_message)
 
 
-@ROUTER.get(
-    "/v1/files",
+@ROUTER.post(
+    "/v1/files:complete-upload",
+    dependencies=S3_ONLY_DEPENDENCIES,
+    responses={
+        status.HTTP_200_OK: {"model": PutFileResponse},
+        status.HTTP_201_CREATED: {"model": PutFileResponse},
+        status.HTTP_400_BAD_REQUEST: {
+            "description": "A part is missing, too small, or its `ETag` does not match the uploaded part.",
+        },
+        status.HTTP_404_NOT_FOUND: {
+            "description": "No multipart upload with the given `upload_id` is in progress.",
+        },
+    },
 )
-async def list_files(
-    request: Request,
-    query_params: GetFilesQueryParams = Depends(),
-) -> GetFilesResponse:
-    """List files with pagination."""
+async def complete_upload(
+    request: Request, complete_upload_request: CompleteUploadRequest, response: Response
+) -> PutFileResponse:
+    """Complete a multipart upload whose parts were sent to presigned URLs."""
     settings: Settings = request.app.state.settings
-    if query_params.page_token:
-        files, next_page_token = fetch_s3_objects_using_page_token(
+    file_path = complete_upload_request.file_path
+
+    try:
+        object_created = await complete_s3_multipart_upload(
             bucket_name=settings.s3_bucket_name,
-            continuation_token=query_params.page_token,
-            max_keys=query_params.page_size,
+            object_key=file_path,
+            upload_id=complete_upload_request.upload_id,
+            parts=[{"PartNumber": part.part_number, "ETag": part.etag} for part in complete_upload_request.parts],
+            s3_client=request.app.state.s3_client,
+            metadata_cache=request.app.state.metadata_cache,
         )
+    except ClientError as error:
+        _raise_for_multipart_upload_error(error)
+
+    if object_created:
+        response_message = f"File uploaded successfully at path: /{file_path}"
+        response.status_code = status.HTTP_201_CREATED
     else:
-        files, next_page_token = fetch_s3_objects_metadata(
+        response_message = f"File already exists at path: /{file_path}"
+        response.status_code = status.HTTP_200_OK
+    return PutFileResponse(file_path=file_path, message=response_message)
+
+
+@ROUTER.post(
+    "/v1/files:abort-upload",
+    dependencies=S3_ONLY_DEPENDENCIES,
+    responses={
+        status.HTTP_404_NOT_FOUND: {
+            "description": "No multipart upload with the given `upload_id` is in progress.",
+        },
+    },
+)
+async def abort_upload(request: Request, abort_upload_request: AbortUploadRequest, response: Response) -> Response:
+    """
+    Abort a multipart upload started with `POST /v1/files:presign`, discarding any parts already sent.
+
+    NOTE: this request does not return a body in the response.
+    """
+    settings: Settings = request.app.state.settings
+    try:
+        await abort_s3_multipart_upload(
             bucket_name=settings.s3_bucket_name,
-            prefix=query_params.directory,
-            max_keys=query_params.page_size,
+            object_key=abort_upload_request.file_path,
+            upload_id=abort_upload_request.upload_id,
+            s3_client=request.app.state.s3_client,
         )
+    except ClientError as error:
+        _raise_for_multipart_upload_error(error)
+    response.status_code = status.HTTP_200_OK
+    return response
+
+
+def _raise_for_multipart_upload_error(error: ClientError) -> NoReturn:
+    """Translate an error completing or aborting a multipart upload into an HTTP response, re-raising unexpected errors."""
+    error_code = error.response["Error"]["Code"]
+    if error_code == "NoSuchUpload":
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload not found") from error
+    if error_code in ("InvalidPart", "InvalidPartOrder", "EntityTooSmall"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=error.response["Error"].get("Message", error_code)
+        ) from error
+    raise error
+
+
+def parse_get_files_query_params(request: Request) -> GetFilesQueryParams:
+    """
+    Validate the query parameters of `GET /v1/files` from only the parameters the client actually sent.
+
+    FastAPI fills in defaults for omitted query parameters, which would make every `page_token`
+    request look like it also set `page_size` and `directory`.
+    """
+    return GetFilesQueryParams.model_validate(dict(request.query_params))
 
+
+@ROUTER.get(
+    "/v1/files",
+    response_model=GetFilesResponse,
+    responses={
+        status.HTTP_400_BAD_REQUEST: {
+            "description": "`page_token` is not a page token returned by this endpoint.",
+        },
+        status.HTTP_422_UNPROCESSABLE_ENTITY: {
+            "description": "Invalid query parameters, e.g. `page_token` combined with `page_size`.",
+        },
+    },
+    openapi_extra={
+        "parameters": [
+            {"name": name, "in": "query", "required": False, "schema": schema}
+            for name, schema in GetFilesQueryParams.model_json_schema()["properties"].items()
+        ]
+    },
+)
+async def list_files(
+    request: Request,
+    query_params: GetFilesQueryParams = Depends(parse_get_files_query_params),
+) -> FastJSONResponse:
+    """
+    List files with pagination.
+
+    By default every file under `directory` is listed. With `recursive=false`, only the files directly
+    in `directory` are listed, and its subdirectories are returned separately in `directories`.
+    """
+    storage: StorageBackend = request.app.state.storage
+    directory_page_token = None
+    if query_params.page_token and query_params.page_token.startswith(DIRECTORY_PAGE_TOKEN_PREFIX):
+        # never forwarded to S3 as a continuation token, which S3 would reject with an unexpected error
+        directory_page_token = decode_directory_page_token(query_params.page_token)
+        if directory_page_token is None:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid page token")
+
+    try:
+        if directory_page_token or not query_params.recursive:
+            # continuation tokens need not remember the prefix and delimiter, so our page token carries them
+            directory_page_token = directory_page_token or DirectoryPageToken(
+                continuation_token="", directory=query_params.directory, page_size=query_params.page_size
+            )
+            listing = await storage.list(
+                prefix=directory_page_token.directory,
+                page_token=directory_page_token.continuation_token or None,
+                max_keys=directory_page_token.page_size,
+                delimiter="/",
+            )
+            next_page_token = (
+                encode_directory_page_token(
+                    dataclasses.replace(directory_page_token, continuation_token=listing.next_page_token)
+                )
+                if listing.next_page_token
+                else None
+            )
+        else:
+            # later pages cannot set page_size, so they are asked for with the default one
+            listing = await storage.list(
+                prefix=query_params.directory,
+                page_token=query_params.page_token,
+                max_keys=query_params.page_size,
+                next_page_max_keys=DEFAULT_GET_FILES_PAGE_SIZE,
+            )
+            next_page_token = listing.next_page_token
+    except InvalidRequestError as error:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(error)) from error
+
+    # listed entries are trusted, so the response is built and serialized without being validated again
     file_metadata_objs = [
-        FileMetadata(
-            file_path=f"{item['Key']}",
-            last_modified=item["LastModified"],
-            size_bytes=item["Size"],
+        FileMetadata.model_construct(
+            file_path=object_info.key,
+            last_modified=object_info.last_modified,
+            size_bytes=object_info.size,
         )
-        for item in files
+        for object_info in listing.objects
     ]
-    return GetFilesResponse(files=file_metadata_objs, next_page_token=next_page_token if next_page_token else None)
+    return FastJSONResponse(
+        GetFilesResponse.model_construct(
+            files=file_metadata_objs,
+            next_page_token=next_page_token if next_page_token else None,
+            directories=listing.directories,
+        )
+    )
+
+
+def parse_export_files_query_params(request: Request) -> ExportFilesQueryParams:
+    """Validate the query parameters of `GET /v1/files:export` from only the parameters the client actually sent."""
+    return ExportFilesQueryParams.model_validate(dict(request.query_params))
+
+
+@ROUTER.get(
+    "/v1/files:export",
+    response_class=StreamingResponse,
+    responses={
+        status.HTTP_200_OK: {
+            "description": "Every file under `directory`, as one JSON object per line, with resumable cursors.",
+            "content": {NDJSON_MEDIA_TYPE: {}},
+        },
+        status.HTTP_400_BAD_REQUEST: {"description": "Invalid `cursor`."},
+        status.HTTP_422_UNPROCESSABLE_ENTITY: {
+            "description": "Invalid query parameters, e.g. `cursor` combined with `directory`.",
+        },
+    },
+    openapi_extra={
+        "parameters": [
+            {"name": name, "in": "query", "required": False, "schema": schema}
+            for name, schema in ExportFilesQueryParams.model_json_schema()["properties"].items()
+        ]
+    },
+)
+async def export_files(
+    request: Request,
+    query_params: ExportFilesQueryParams = Depends(parse_export_files_query_params),
+) -> StreamingResponse:
+    """
+    Stream every file under `directory` as newline-delimited JSON, however many there are.
+
+    Lines are files, as in `GET /v1/files`, or, with `recursive=false`, subdirectories as
+    `{"directory": ...}`. Files are listed 1000 at a time, each batch followed by a
+    `{"cursor": ...}` line: pass its value as `cursor` to resume an interrupted export after it.
+    The last line is `{"cursor": null}`.
+    """
+    storage: StorageBackend = request.app.state.storage
+    if query_params.cursor:
+        cursor = decode_export_cursor(query_params.cursor)
+        if cursor is None:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    else:
+        cursor = ExportCursor(page_token="", directory=query_params.directory, recursive=query_params.recursive)
+
+    try:
+        first_page = await list_export_page(storage, cursor)
+    except InvalidRequestError as error:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(error)) from error
+    return StreamingResponse(
+        content=iter_listing_ndjson(storage, cursor, first_page=first_page), media_type=NDJSON_MEDIA_TYPE
+    )
+
+
+@ROUTER.post("/v1/files:metadata", dependencies=S3_ONLY_DEPENDENCIES)
+async def get_files_metadata(
+    request: Request, get_files_metadata_request: GetFilesMetadataRequest
+) -> GetFilesMetadataResponse:
+    """
+    Retrieve the metadata of many files at once.
+
+    Found files are returned in `files`, in the order requested; paths of missing files are returned in `not_found`.
+    """
+    settings: Settings = request.app.state.settings
+    s3_client: "S3Client" = request.app.state.s3_client
+    metadata_cache: S3MetadataCache = request.app.state.metadata_cache
+
+    found = await fetch_s3_objects_metadata_by_key(
+        bucket_name=settings.s3_bucket_name,
+        object_keys=get_files_metadata_request.file_paths,
+        s3_client=s3_client,
+        metadata_cache=metadata_cache,
+        max_concurrency=settings.s3_batch_metadata_max_concurrency,
+    )
+
+    files: list[FileMetadata] = []
+    not_found: list[str] = []
+    for file_path in dict.fromkeys(get_files_metadata_request.file_paths):
+        item = found[file_path]
+        if item is None:
+            not_found.append(file_path)
+        else:
+            files.append(
+                FileMetadata(file_path=item["Key"], last_modified=item["LastModified"], size_bytes=item["Size"])
+            )
+    return GetFilesMetadataResponse(files=files, not_found=not_found)
+
+
+@ROUTER.get(
+    "/v1/files:archive",
+    dependencies=S3_ONLY_DEPENDENCIES,
+    response_class=StreamingResponse,
+    responses={
+        status.HTTP_200_OK: {
+            "description": "An archive of every file under `directory`.",
+            "content": {media_type: {} for media_type in ARCHIVE_MEDIA_TYPES.values()},
+        },
+    },
+)
+async def get_files_archive(
+    request: Request,
+    directory: str = DEFAULT_GET_FILES_DIRECTORY,
+    archive_format: ArchiveFormat = Query(default="tar", alias="format"),
+) -> StreamingResponse:
+    """
+    Download every file under `directory` as a single tar, gzipped tar or zip archive.
+
+    The archive is streamed as it is built, so downloads start immediately and the server never
+    holds the whole archive in memory. Files are named relative to `directory`.
+    """
+    settings: Settings = request.app.state.settings
+    s3_client: "S3Client" = request.app.state.s3_client
+
+    parent_directory = directory[: directory.rfind("/") + 1].rstrip("/")
+    archive_name = parent_directory.rsplit("/", 1)[-1].replace('"', "") or "files"
+    # StreamingResponse reads sync iterators on worker threads, so the archive is built off the event loop
+    return StreamingResponse(
+        content=iter_s3_directory_archive(
+            bucket_name=settings.s3_bucket_name,
+            directory=directory,
+            archive_format=archive_format,
+            s3_client=s3_client,
+            prefetch_count=settings.archive_prefetch_count,
+            prefetch_max_object_bytes=settings.archive_prefetch_max_object_bytes,
+        ),
+        media_type=ARCHIVE_MEDIA_TYPES[archive_format],
+        headers={"Content-Disposition": f'attachment; filename="{archive_name}.{archive_format}"'},
+    )
 
 
 @ROUTER.head(
     "/v1/files/{file_path:path}",
     responses={
+        status.HTTP_304_NOT_MODIFIED: {
+            "description": "The file matches `If-None-Match`, or is unchanged since `If-Modified-Since`.",
+        },
         status.HTTP_404_NOT_FOUND: {
             "description": "File not found for the given `file_path`.",
         },
@@ -121,66 +743,451 @@ async def list_files(
                     "example": "Thu, 01 Jan 2022 00:00:00 GMT",
                     "schema": {"type": "string", "format": "date-time"},
                 },
+                "Accept-Ranges": {
+                    "description": "Advertises that `GET` supports single byte-range requests.",
+                    "example": "bytes",
+                    "schema": {"type": "string"},
+                },
+                "ETag": {
+                    "description": "The entity tag of the file, for use with conditional request headers.",
+                    "example": '"d41d8cd98f00b204e9800998ecf8427e"',
+                    "schema": {"type": "string"},
+                },
             }
         },
     },
 )
-async def get_file_metadata(request: Request, file_path: str, response: Response) -> Response:
+async def get_file_metadata(  # pylint: disable=too-many-arguments
+    request: Request,
+    file_path: str,
+    response: Response,
+    if_none_match: Optional[str] = Header(default=None, alias="If-None-Match"),
+    if_modified_since: Optional[str] = Header(default=None, alias="If-Modified-Since"),
+    accept_encoding: Optional[str] = Header(default=None, alias="Accept-Encoding"),
+) -> Response:
     """
     Retrieve file metadata.
 
+    Supports `If-None-Match` and `If-Modified-Since`, answering 304 if the file is unchanged.
+
     Note: by convention, HEAD requests MUST NOT return a body in the response.
     """
-    settings: Settings = request.app.state.settings
+    storage: StorageBackend = request.app.state.storage
 
-    object_exists = object_exists_in_s3(bucket_name=settings.s3_bucket_name, object_key=file_path)
-    if not object_exists:
+    object_info = await storage.head(file_path)
+    if object_info is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found")
 
-    get_object_response = fetch_s3_object(settings.s3_bucket_name, object_key=file_path)
-    response.headers["Content-Type"] = get_object_response["ContentType"]
-    response.headers["Content-Length"] = str(get_object_response["ContentLength"])
-    response.headers["Last-Modified"] = get_object_response["LastModified"].strftime("%a, %d %b %Y %H:%M:%S GMT")
+    validators = {
+        "ETag": object_info.etag,
+        "Last-Modified": format_http_date(object_info.last_modified),
+    }
+    if is_not_modified(
+        etag=object_info.etag,
+        last_modified=object_info.last_modified,
+        if_none_match=if_none_match,
+        if_modified_since=parse_http_date(if_modified_since),
+    ):
+        raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=validators)
+
+    response.headers["Content-Type"] = object_info.content_type or DEFAULT_CONTENT_TYPE
+    response.headers["Content-Length"] = str(object_info.size)
+    if content_encoding := object_info.content_encoding:
+        response.headers["Vary"] = "Accept-Encoding"
+        if _decodes_stored_encoding(content_encoding, accept_encoding):
+            # the file would be sent decompressed, whose size is unknown until it is decompressed
+            del response.headers["Content-Length"]
+            validators["ETag"] = f"W/{validators['ETag']}"
+        else:
+            response.headers["Content-Encoding"] = content_encoding
+    response.headers.update(validators)
+    response.headers["Accept-Ranges"] = "bytes"
     response.status_code = status.HTTP_200_OK
     return response
 
 
-@ROUTER.get("/v1/files/{file_path:path}")
-async def get_file(
+@ROUTER.get(
+    "/v1/files/{file_path:path}",
+    responses={
+        status.HTTP_206_PARTIAL_CONTENT: {
+            "description": "The byte range requested with the `Range` header.",
+            "headers": {
+                "Content-Range": {
+                    "description": "The range of bytes returned and the full size of the file.",
+                    "example": "bytes 0-1023/4096",
+                    "schema": {"type": "string"},
+                },
+            },
+        },
+        status.HTTP_304_NOT_MODIFIED: {
+            "description": "The file matches `If-None-Match`, or is unchanged since `If-Modified-Since`.",
+        },
+        status.HTTP_307_TEMPORARY_REDIRECT: {
+            "description": "The file is large enough to be downloaded directly from S3, using the presigned URL in `Location`.",
+        },
+        status.HTTP_404_NOT_FOUND: {
+            "description": "File not found for the given `file_path`.",
+        },
+        status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE: {
+            "description": "The `Range` header lies outside of the file.",
+        },
+    },
+)
+async def get_file(  # pylint: disable=too-many-arguments
     request: Request,
     file_path: str,
-) -> StreamingResponse:
-    """Retrieve a file."""
+    range_header: Optional[str] = Header(default=None, alias="Range"),
+    if_range_header: Optional[str] = Header(default=None, alias="If-Range"),
+    if_none_match: Optional[str] = Header(default=None, alias="If-None-Match"),
+    if_modified_since: Optional[str] = Header(default=None, alias="If-Modified-Since"),
+    accept_encoding: Optional[str] = Header(default=None, alias="Accept-Encoding"),
+) -> Response:
+    """
+    Retrieve a file.
+
+    A single byte range may be requested with the `Range` header, e.g. `bytes=0-1023` or the
+    suffix range `bytes=-1024`, optionally guarded by `If-Range`. Multi-range requests are
+    answered with the full file.
+
+    Supports `If-None-Match` and `If-Modified-Since`, answering 304 without a body if the file is unchanged.
+
+    Text-like files are compressed with gzip or zstd if the client sends a matching `Accept-Encoding`.
+    Files stored compressed are sent as stored to clients that accept their encoding, and decompressed
+    on the fly for other clients, which are then always sent the whole file.
+
+    If enabled on S3 storage, files at or above a size threshold are redirected to a presigned S3 URL, which honors the
+    same headers, so that their bytes do not pass through the API.
+
+    If the file body cache is enabled, whole-file requests are served from it once the cached copy's ETag
+    has been checked against S3; requests with a `Range` header always go to S3.
+    """
     settings: Settings = request.app.state.settings
+    storage: StorageBackend = request.app.state.storage
+
+    if settings.presigned_redirect_threshold_bytes is not None and isinstance(storage, S3StorageBackend):
+        object_info = await storage.head(file_path)
+        if object_info is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found")
+        if object_info.size >= settings.presigned_redirect_threshold_bytes:
+            presigned_url = await generate_presigned_download_url(
+                bucket_name=storage.bucket_name,
+                object_key=file_path,
+                s3_client=storage.s3_client,
+                expires_in=settings.presigned_url_expiration_seconds,
+            )
+            return RedirectResponse(url=presigned_url, status_code=status.HTTP_307_TEMPORARY_REDIRECT)
+
+    byte_range = parse_range_header(range_header)
+    if_range = parse_if_range_header(if_range_header) if byte_range else None
+    if if_range and not (if_range.etag or if_range.last_modified):
+        byte_range = None
+
+    conditions = {"if_none_match": if_none_match, "if_modified_since": parse_http_date(if_modified_since)}
+    try:
+        stored_object = await storage.get(file_path, byte_range=byte_range, if_range=if_range, **conditions)
+        decode = _decodes_stored_encoding(stored_object.info.content_encoding, accept_encoding)
+        if decode and stored_object.content_range is not None:
+            # a slice of a compressed file cannot be decompressed on its own, so send the whole file
+            stored_object.close()
+            stored_object = await storage.get(file_path, **conditions)
+    except StorageError as error:
+        _raise_for_storage_error(error)
+    return _stored_object_response(stored_object, decode=decode, send_file=range_header is None)
 
-    object_exists = object_exists_in_s3(bucket_name=settings.s3_bucket_name, object_key=file_path)
-    if not object_exists:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found")
 
-    get_object_response = fetch_s3_object(bucket_name=settings.s3_bucket_name, object_key=file_path)
+def _stored_object_response(stored_object: StoredObject, decode: bool, send_file: bool) -> Response:
+    """
+    Answer a GET with a file fetched from storage, releasing it once it is sent.
+
+    Files held on local disk are sent with a ``FileResponse``, which the server can send with
+    ``sendfile`` (the ASGI pathsend extension), without copying them through Python. That is only
+    done if ``send_file``, as ``FileResponse`` would also answer the request's ``Range`` header itself.
+    """
+    object_info = stored_object.info
+    media_type = object_info.content_type or DEFAULT_CONTENT_TYPE
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Content-Length": str(stored_object.content_length),
+        "ETag": object_info.etag,
+        "Last-Modified": format_http_date(object_info.last_modified),
+    }
+    status_code = status.HTTP_200_OK
+    if stored_object.content_range is not None:
+        headers["Content-Range"] = stored_object.content_range
+        status_code = status.HTTP_206_PARTIAL_CONTENT
+
+    if content_encoding := object_info.content_encoding:
+        headers["Vary"] = "Accept-Encoding"
+        if decode:
+            del headers["Content-Length"]
+            headers["ETag"] = f"W/{headers['ETag']}"
+            return StreamingResponse(
+                content=iter_decompressed(stored_object.iter_bytes(), content_encoding),
+                status_code=status_code,
+                media_type=media_type,
+                headers=headers,
+            )
+        headers["Content-Encoding"] = content_encoding
+
+    release = BackgroundTask(stored_object.close)
+    if stored_object.path is not None and stored_object.content_range is None and send_file:
+        del headers["Content-Length"]  # set by FileResponse from the file's size
+        return FileResponse(stored_object.path, media_type=media_type, headers=headers, background=release)
+    if stored_object.content is not None:
+        return Response(
+            content=stored_object.content,
+            status_code=status_code,
+            media_type=media_type,
+            headers=headers,
+            background=release,
+        )
     return StreamingResponse(
-        content=get_object_response["Body"],
-        media_type=get_object_response["ContentType"],
+        content=stored_object.iter_bytes(), status_code=status_code, media_type=media_type, headers=headers
     )
 
 
-@ROUTER.delete("/v1/files/{file_path:path}")
+def _decodes_stored_encoding(content_encoding: Optional[str], accept_encoding: Optional[str]) -> bool:
+    """Whether a file stored with ``content_encoding`` must be decompressed for a client sending ``accept_encoding``."""
+    return content_encoding in SUPPORTED_CONTENT_ENCODINGS and not accepts_content_encoding(
+        accept_encoding, content_encoding
+    )  # type: ignore[arg-type]
+
+
+def _raise_for_storage_error(error: StorageError) -> NoReturn:
+    """Translate an expected storage failure into the matching HTTP response."""
+    if isinstance(error, ObjectNotFoundError):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found") from error
+    if isinstance(error, PreconditionFailedError):
+        raise HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail="Precondition failed") from error
+    if isinstance(error, NotModifiedError):
+        validators = {"ETag": error.etag, "Last-Modified": error.last_modified}
+        raise HTTPException(
+            status_code=status.HTTP_304_NOT_MODIFIED,
+            headers={name: value for name, value in validators.items() if value},
+        ) from error
+    if isinstance(error, RangeNotSatisfiableError):
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{error.size if error.size is not None else '*'}"},
+        ) from error
+    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(error)) from error
+
+
+@ROUTER.delete(
+    "/v1/files/{file_path:path}",
+    responses={
+        status.HTTP_404_NOT_FOUND: {
+            "description": "File not found for the given `file_path`.",
+        },
+        status.HTTP_412_PRECONDITION_FAILED: {
+            "description": "The file does not exist or its ETag does not match `If-Match`.",
+        },
+    },
+)
 async def delete_file(
     request: Request,
     file_path: str,
     response: Response,
+    if_match: Optional[str] = Header(default=None, alias="If-Match"),
 ) -> Response:
     """
     Delete a file.
 
+    Send `If-Match` with the file's current `ETag` to only delete the version you last read.
+    `If-Match` is compared weakly, so the weak `ETag` of a compressed download matches too.
+
     NOTE: DELETE requests MUST NOT return a body in the response.
     """
-    settings: Settings = request.app.state.settings
+    storage: StorageBackend = request.app.state.storage
 
-    object_exists = object_exists_in_s3(bucket_name=settings.s3_bucket_name, object_key=file_path)
-    if not object_exists:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found")
+    # compressed downloads carry the weak form of the stored file's ETag, which S3 compares strongly
+    if_match = strip_weak_etag_prefixes(if_match)
 
-    delete_s3_object(bucket_name=settings.s3_bucket_name, object_key=file_path)
+    try:
+        if if_match and if_match.strip() != "*":
+            # a conditional delete fails by itself if the file is missing, so no existence probe is needed
+            await storage.delete(file_path, if_match=if_match)
+        else:
+            # deletes succeed whether or not the file exists, so existence must be probed first
+            if if_match:
+                await _raise_if_missing(
+                    request, file_path, status_code=status.HTTP_412_PRECONDITION_FAILED, detail="Precondition failed"
+                )
+            else:
+                await _raise_if_missing(
+                    request, file_path, status_code=status.HTTP_404_NOT_FOUND, detail="File not found"
+                )
+            await storage.delete(file_path)
+    except StorageError as error:
+        _raise_for_storage_error(error)
     response.status_code = status.HTTP_200_OK
     return response
+
+
+@ROUTER.post("/v1/files:delete", dependencies=S3_ONLY_DEPENDENCIES)
+async def delete_files(request: Request, delete_files_request: DeleteFilesRequest) -> DeleteFilesResponse:
+    """
+    Delete many files at once.
+
+    Pass either `file_paths`, a list of files to delete, or `directory`, to delete every file under it.
+    Files that do not exist count as deleted; files that could not be deleted are listed in `errors`.
+    """
+    settings: Settings = request.app.state.settings
+    s3_client: "S3Client" = request.app.state.s3_client
+    metadata_cache: S3MetadataCache = request.app.state.metadata_cache
+
+    if delete_files_request.directory is not None:
+        result = await delete_s3_objects_by_prefix(
+            bucket_name=settings.s3_bucket_name,
+            prefix=delete_files_request.directory,
+            s3_client=s3_client,
+            metadata_cache=metadata_cache,
+            max_concurrency=settings.s3_bulk_delete_max_concurrency,
+        )
+    else:
+        result = await delete_s3_objects(
+            bucket_name=settings.s3_bucket_name,
+            object_keys=delete_files_request.file_paths or [],
+            s3_client=s3_client,
+            metadata_cache=metadata_cache,
+            max_concurrency=settings.s3_bulk_delete_max_concurrency,
+        )
+
+    return DeleteFilesResponse(
+        deleted_count=result.deleted_count,
+        errors=[
+            DeleteFileError(file_path=failure.object_key, code=failure.code, message=failure.message)
+            for failure in result.failures
+        ],
+    )
+
+
+_COPY_RESPONSES: dict = {
+    status.HTTP_404_NOT_FOUND: {
+        "description": "File not found for the given `source`.",
+    },
+    status.HTTP_409_CONFLICT: {
+        "description": "The source file was overwritten while it was being copied.",
+    },
+}
+
+
+@ROUTER.post("/v1/files:copy", responses=_COPY_RESPONSES, dependencies=S3_ONLY_DEPENDENCIES)
+async def copy_files(request: Request, copy_files_request: CopyFilesRequest) -> CopyFilesResponse:
+    """
+    Copy a file, or with `recursive` every file under a directory, to a new path.
+
+    Files are copied by S3 itself, so their bytes never pass through the API, however large they are.
+    Existing files at the destination are overwritten. When copying a directory, files that could not
+    be copied are listed in `errors`.
+    """
+    result = await _copy_or_move(request, copy_files_request, delete_source=False)
+    return CopyFilesResponse(copied_count=result.copied_count, errors=_to_copy_file_errors(result))
+
+
+@ROUTER.post("/v1/files:move", responses=_COPY_RESPONSES, dependencies=S3_ONLY_DEPENDENCIES)
+async def move_files(request: Request, move_files_request: CopyFilesRequest) -> MoveFilesResponse:
+    """
+    Move a file, or with `recursive` every file under a directory, to a new path.
+
+    A move is a server-side copy followed by deleting the source; see `POST /v1/files:copy`.
+    A source overwritten during its move is kept rather than deleted.
+    """
+    result = await _copy_or_move(request, move_files_request, delete_source=True)
+    return MoveFilesResponse(moved_count=result.copied_count, errors=_to_copy_file_errors(result))
+
+
+async def _copy_or_move(request: Request, copy_files_request: CopyFilesRequest, delete_source: bool) -> BulkCopyResult:
+    """Copy or move the file or directory named in ``copy_files_request``, raising HTTP errors for a single file."""
+    settings: Settings = request.app.state.settings
+    s3_client: "S3Client" = request.app.state.s3_client
+    metadata_cache: S3MetadataCache = request.app.state.metadata_cache
+
+    if copy_files_request.recursive:
+        copy_directory = move_s3_objects_by_prefix if delete_source else copy_s3_objects_by_prefix
+        return await copy_directory(
+            bucket_name=settings.s3_bucket_name,
+            source_prefix=copy_files_request.source,
+            destination_prefix=copy_files_request.destination,
+            s3_client=s3_client,
+            metadata_cache=metadata_cache,
+            max_concurrency=settings.s3_bulk_copy_max_concurrency,
+            part_size=settings.s3_copy_part_size_bytes,
+            part_max_concurrency=settings.s3_copy_part_max_concurrency,
+        )
+
+    copy_file = move_s3_object if delete_source else copy_s3_object
+    try:
+        await copy_file(
+            bucket_name=settings.s3_bucket_name,
+            source_key=copy_files_request.source,
+            destination_key=copy_files_request.destination,
+            s3_client=s3_client,
+            metadata_cache=metadata_cache,
+            part_size=settings.s3_copy_part_size_bytes,
+            max_concurrency=settings.s3_copy_part_max_concurrency,
+        )
+    except ClientError as error:
+        error_code = error.response["Error"]["Code"]
+        if error_code in ("404", "NoSuchKey"):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found") from error
+        if error_code in ("PreconditionFailed", "412"):
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT, detail="The source file changed during the copy"
+            ) from error
+        raise
+    return BulkCopyResult(copied_count=1)
+
+
+def _to_copy_file_errors(result: BulkCopyResult) -> list[CopyFileError]:
+    """Describe the files that could not be copied, by their source path."""
+    return [
+        CopyFileError(file_path=failure.object_key, code=failure.code, message=failure.message)
+        for failure in result.failures
+    ]
+
+
+async def _raise_if_missing(request: Request, file_path: str, status_code: int, detail: str) -> None:
+    """Raise an HTTP error with ``status_code`` unless the file exists."""
+    storage: StorageBackend = request.app.state.storage
+    if not await storage.exists(file_path):
+        raise HTTPException(status_code=status_code, detail=detail)
+
+
+_BODY_CACHE_RESPONSES: dict = {
+    status.HTTP_404_NOT_FOUND: {"description": "The file body cache is not enabled."},
+}
+
+
+@ADMIN_ROUTER.post("/v1/admin/body-cache:prewarm", responses=_BODY_CACHE_RESPONSES)
+async def prewarm_body_cache(request: Request, prewarm_request: PrewarmBodyCacheRequest) -> PrewarmBodyCacheResponse:
+    """
+    Load every file under a directory into the file body cache, e.g. ahead of expected traffic.
+
+    Files too large for the cache, or already cached with their current ETag, are skipped.
+    """
+    settings: Settings = request.app.state.settings
+    body_cache = _get_body_cache(request)
+    cached_count, cached_bytes = await prewarm_s3_object_bodies(
+        bucket_name=settings.s3_bucket_name,
+        prefix=prewarm_request.directory,
+        body_cache=body_cache,
+        s3_client=request.app.state.s3_client,
+        max_concurrency=settings.body_cache_prewarm_max_concurrency,
+    )
+    return PrewarmBodyCacheResponse(cached_count=cached_count, cached_bytes=cached_bytes)
+
+
+@ADMIN_ROUTER.get("/v1/admin/body-cache", responses=_BODY_CACHE_RESPONSES)
+async def get_body_cache_stats(request: Request) -> BodyCacheStatsResponse:
+    """Report the file body cache's hit rate, bytes saved and other usage counters since the server started."""
+    return BodyCacheStatsResponse(**_get_body_cache(request).stats.as_dict())
+
+
+def _get_body_cache(request: Request) -> ObjectBodyCache:
+    """Return the app's file body cache, answering 404 if it is disabled."""
+    body_cache: Optional[ObjectBodyCache] = request.app.state.body_cache
+    if body_cache is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="The file body cache is not enabled")
+    return body_cache
@@ -0,0 +1,266 @@
+"""Two-tier, in-memory and on-disk, LRU cache of S3 object bodies."""
+
+import math
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+from collections import OrderedDict
+from dataclasses import (
+    asdict,
+    dataclass,
+)
+from datetime import datetime
+from typing import (
+    Any,
+    BinaryIO,
+    Collection,
+    Optional,
+)
+
+from files_api.s3.metadata_cache import LRUCache
+
+MIB = 1024 * 1024
+DEFAULT_BODY_CACHE_MEMORY_CAPACITY_BYTES = 64 * MIB
+DEFAULT_BODY_CACHE_MEMORY_MAX_OBJECT_BYTES = 256 * 1024
+DEFAULT_BODY_CACHE_DISK_CAPACITY_BYTES = 1024 * MIB
+DEFAULT_BODY_CACHE_DISK_MAX_OBJECT_BYTES = 64 * MIB
+BODY_CACHE_COPY_CHUNK_SIZE_BYTES = 1024 * 1024
+
+
+@dataclass(frozen=True)
+class CachedObject:
+    """
+    An object body held by an :class:`ObjectBodyCache`, with the metadata needed to serve it.
+
+    The body is either in memory, in ``content``, or in a file at ``path``. A file stays in place
+    until the object is released with :meth:`ObjectBodyCache.release`, even if it is evicted meanwhile.
+    """
+
+    etag: str
+    last_modified: datetime
+    content_type: str
+    content_length: int
+    content_encoding: Optional[str] = None
+    content: Optional[bytes] = None
+    path: Optional[str] = None
+
+
+@dataclass
+class BodyCacheStats:
+    """Counters describing how an :class:`ObjectBodyCache` has been used since it was created."""
+
+    memory_hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    # hits whose ETag was confirmed by a conditional get_object answered with 304 Not Modified
+    revalidations: int = 0
+    # bytes served from the cache rather than downloaded from S3
+    bytes_saved: int = 0
+    # files dropped from the disk tier to make room for newer ones
+    evictions: int = 0
+    # bodies dropped because their object was written or deleted through this API
+    invalidations: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of lookups answered from the cache, or 0.0 before the first lookup."""
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0
+
+    def as_dict(self) -> dict[str, float]:
+        """Return the counters and hit rate as a plain dict, e.g. for exporting as metrics."""
+        return {**asdict(self), "hit_rate": self.hit_rate}
+
+
+@dataclass
+class _DiskEntry:
+    """A cached body in a file; ``readers`` counts the responses still sending it."""
+
+    cached_object: CachedObject
+    readers: int = 0
+    evicted: bool = False
+
+
+class ObjectBodyCache:
+    """
+    Read-through cache of object bodies: small objects in a memory LRU, larger ones in a disk LRU.
+
+    Bodies of at most ``memory_max_object_bytes`` are kept in memory, up to ``memory_capacity_bytes``
+    in total. Bodies of at most ``disk_max_object_bytes`` are written to files under a private
+    directory created inside ``disk_directory``, up to ``disk_capacity_bytes`` in total, so they can
+    be sent with ``sendfile``. Either tier is disabled by a capacity of 0; the disk tier also by
+    leaving ``disk_directory`` as None.
+
+    The cache trusts nothing: callers validate a cached object's ETag against S3 (or a fresh
+    ``head_object``) before serving it. Writes through ``files_api.s3`` should still invalidate
+    cached bodies, via :meth:`invalidate_objects`, to free space early.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        memory_capacity_bytes: int = DEFAULT_BODY_CACHE_MEMORY_CAPACITY_BYTES,
+        memory_max_object_bytes: int = DEFAULT_BODY_CACHE_MEMORY_MAX_OBJECT_BYTES,
+        disk_directory: Optional[str] = None,
+        disk_capacity_bytes: int = DEFAULT_BODY_CACHE_DISK_CAPACITY_BYTES,
+        disk_max_object_bytes: int = DEFAULT_BODY_CACHE_DISK_MAX_OBJECT_BYTES,
+    ):
+        self.stats = BodyCacheStats()
+        self.memory_max_object_bytes = min(memory_max_object_bytes, memory_capacity_bytes)
+        self._memory = LRUCache(capacity=memory_capacity_bytes, weigh=lambda cached: cached.content_length)
+
+        self.disk_max_object_bytes = min(disk_max_object_bytes, disk_capacity_bytes)
+        self.disk_capacity_bytes = disk_capacity_bytes
+        self.disk_bytes = 0
+        self._disk_directory: Optional[str] = None
+        if disk_directory is not None and self.disk_max_object_bytes > 0:
+            os.makedirs(disk_directory, exist_ok=True)
+            self._disk_directory = tempfile.mkdtemp(prefix="body-cache-", dir=disk_directory)
+        self._disk_entries: "OrderedDict[tuple[str, str], _DiskEntry]" = OrderedDict()
+        # every file still on disk, by path, including evicted ones that are still being sent
+        self._disk_files: dict[str, _DiskEntry] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def memory_bytes(self) -> int:
+        """Total size of the bodies held in memory."""
+        return self._memory.weight
+
+    @property
+    def max_object_bytes(self) -> int:
+        """Size of the largest body that can be cached, in either tier."""
+        disk_max_object_bytes = self.disk_max_object_bytes if self._disk_directory is not None else 0
+        return max(self.memory_max_object_bytes, disk_max_object_bytes)
+
+    def get(self, bucket_name: str, object_key: str) -> Optional[CachedObject]:
+        """
+        Look up the cached body of an object, without validating it.
+
+        A found object must be passed to :meth:`release` once it has been served or discarded.
+        """
+        found, cached_object = self._memory.get((bucket_name, object_key))
+        if found:
+            return cached_object
+        with self._lock:
+            entry = self._disk_entries.get((bucket_name, object_key))
+            if entry is None:
+                return None
+            self._disk_entries.move_to_end((bucket_name, object_key))
+            entry.readers += 1
+            return entry.cached_object
+
+    def retain(self, cached_object: CachedObject) -> None:
+        """Mark a cached object returned by :meth:`get` or :meth:`put`, and not released yet, as used once more."""
+        if cached_object.path is None:
+            return
+        with self._lock:
+            self._disk_files[cached_object.path].readers += 1
+
+    def release(self, cached_object: CachedObject) -> None:
+        """Mark a cached object returned by :meth:`get` or :meth:`put`, or retained, as no longer in use."""
+        if cached_object.path is None:
+            return
+        with self._lock:
+            entry = self._disk_files.get(cached_object.path)
+            if entry is None:
+                return
+            entry.readers -= 1
+            if entry.evicted and entry.readers == 0:
+                self._remove_disk_file(entry)
+
+    def put(self, bucket_name: str, object_key: str, get_object_response: Any) -> Optional[CachedObject]:
+        """
+        Read the body of a ``get_object`` response into the cache, closing it.
+
+        :return: The cached object, to be released like one returned by :meth:`get`, or None if
+            the body is too large for either tier, in which case it is left unread.
+        """
+        content_length: int = get_object_response["ContentLength"]
+        metadata = {
+            "etag": get_object_response["ETag"],
+            "last_modified": get_object_response["LastModified"],
+            "content_type": get_object_response["ContentType"],
+            "content_length": content_length,
+            "content_encoding": get_object_response.get("ContentEncoding"),
+        }
+        body: BinaryIO = get_object_response["Body"]
+        if content_length <= self.memory_max_object_bytes:
+            with body:
+                cached_object = CachedObject(**metadata, content=body.read())
+            self._memory.set((bucket_name, object_key), cached_object, ttl_seconds=math.inf)
+            return cached_object
+        if self._disk_directory is None or content_length > self.disk_max_object_bytes:
+            return None
+
+        # files are only indexed once complete, so a reader never sees a partly written one
+        path = os.path.join(self._disk_directory, uuid.uuid4().hex)
+        try:
+            with body, open(path, "wb") as file:
+                shutil.copyfileobj(body, file, BODY_CACHE_COPY_CHUNK_SIZE_BYTES)
+        except BaseException:
+            _remove_file(path)
+            raise
+        cached_object = CachedObject(**metadata, path=path)
+        entry = _DiskEntry(cached_object=cached_object, readers=1)
+        with self._lock:
+            if (replaced_entry := self._disk_entries.pop((bucket_name, object_key), None)) is not None:
+                self._evict(replaced_entry)
+            self._disk_entries[(bucket_name, object_key)] = entry
+            self._disk_files[path] = entry
+            self.disk_bytes += content_length
+            while self.disk_bytes > self.disk_capacity_bytes:
+                self._evict(self._disk_entries.popitem(last=False)[1])
+                self.stats.evictions += 1
+        return cached_object
+
+    def record_hit(self, cached_object: CachedObject, revalidated: bool = False) -> None:
+        """Count a lookup served by ``cached_object``; ``revalidated`` if S3 confirmed it with a 304."""
+        with self._lock:
+            if cached_object.path is None:
+                self.stats.memory_hits += 1
+            else:
+                self.stats.disk_hits += 1
+            self.stats.revalidations += revalidated
+            self.stats.bytes_saved += cached_object.content_length
+
+    def record_miss(self) -> None:
+        """Count a lookup that had to download the object."""
+        with self._lock:
+            self.stats.misses += 1
+
+    def invalidate_objects(self, bucket_name: str, object_keys: Collection[str]) -> None:
+        """Drop the cached bodies of ``object_keys``; files still being sent are removed once released."""
+        invalidations = sum(self._memory.delete((bucket_name, object_key)) for object_key in object_keys)
+        with self._lock:
+            for object_key in object_keys:
+                if (entry := self._disk_entries.pop((bucket_name, object_key), None)) is not None:
+                    self._evict(entry)
+                    invalidations += 1
+            self.stats.invalidations += invalidations
+
+    def close(self) -> None:
+        """Remove the disk tier's directory and every file in it."""
+        if self._disk_directory is not None:
+            shutil.rmtree(self._disk_directory, ignore_errors=True)
+
+    def _evict(self, entry: _DiskEntry) -> None:
+        """Forget a file removed from the index, deleting it unless it is being sent; the lock must be held."""
+        self.disk_bytes -= entry.cached_object.content_length
+        entry.evicted = True
+        if entry.readers == 0:
+            self._remove_disk_file(entry)
+
+    def _remove_disk_file(self, entry: _DiskEntry) -> None:
+        """Delete an evicted file nobody is reading any more; the lock must be held."""
+        path: str = entry.cached_object.path  # type: ignore[assignment]
+        self._disk_files.pop(path, None)
+        _remove_file(path)
+
+
+def _remove_file(path: str) -> None:
+    """Delete a file, ignoring one that is already gone."""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
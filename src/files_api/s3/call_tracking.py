@@ -0,0 +1,78 @@
+"""Per-request tracking of the S3 API calls made through the shared client."""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import (
+    Any,
+    Iterator,
+    Optional,
+)
+
+try:
+    from mypy_boto3_s3 import S3Client
+except ImportError:  # pragma: no cover
+    ...
+
+
+class S3CallLog:
+    """
+    Names of the S3 operations made while a log is active, e.g. ``["HeadObject", "GetObject"]``.
+
+    The log is shared by reference, so calls made from worker threads that run with a copy of
+    the request's context (``run_in_threadpool``, ``contextvars.copy_context().run``) land in it too.
+    """
+
+    def __init__(self) -> None:
+        self.operations: list[str] = []
+        # (operation, seconds) of each call that completed, retries included, in order of completion
+        self.durations: list[tuple[str, float]] = []
+
+    @property
+    def count(self) -> int:
+        """Total number of S3 calls made."""
+        return len(self.operations)
+
+
+_CURRENT_S3_CALL_LOG: ContextVar[Optional[S3CallLog]] = ContextVar("current_s3_call_log", default=None)
+# key under which a call's log, operation and start time are kept in botocore's per-call context
+_CALL_CONTEXT_KEY = "files_api_call_log"
+
+
+@contextmanager
+def track_s3_calls() -> Iterator[S3CallLog]:
+    """Record every S3 call made within this context, e.g. for the duration of an HTTP request."""
+    call_log = S3CallLog()
+    token = _CURRENT_S3_CALL_LOG.set(call_log)
+    try:
+        yield call_log
+    finally:
+        _CURRENT_S3_CALL_LOG.reset(token)
+
+
+def current_s3_call_log() -> Optional[S3CallLog]:
+    """Return the log of the innermost active :func:`track_s3_calls`, if any."""
+    return _CURRENT_S3_CALL_LOG.get()
+
+
+def _record_s3_call(model: Any, context: dict, **_: Any) -> None:
+    """Append the operation to the active call log; a botocore ``before-call`` event handler."""
+    call_log = _CURRENT_S3_CALL_LOG.get()
+    if call_log is not None:
+        call_log.operations.append(model.name)
+        context[_CALL_CONTEXT_KEY] = (call_log, model.name, time.perf_counter())
+
+
+def _record_s3_call_duration(context: dict, **_: Any) -> None:
+    """Append the duration of the call to the log it was made in; a botocore ``after-call(-error)`` event handler."""
+    call = context.pop(_CALL_CONTEXT_KEY, None)
+    if call is not None:
+        call_log, operation, started_at = call
+        call_log.durations.append((operation, time.perf_counter() - started_at))
+
+
+def register_s3_call_tracking(s3_client: "S3Client") -> None:
+    """Make ``s3_client`` report each API call it makes, and its duration, to the active :func:`track_s3_calls` log."""
+    s3_client.meta.events.register("before-call.s3", _record_s3_call)
+    s3_client.meta.events.register("after-call.s3", _record_s3_call_duration)
+    s3_client.meta.events.register("after-call-error.s3", _record_s3_call_duration)
@@ -0,0 +1,90 @@
+"""Construction of the long-lived, connection-pooled S3 client shared by the app."""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import boto3
+from botocore.config import Config
+from botocore.exceptions import (
+    BotoCoreError,
+    ClientError,
+)
+
+from files_api.s3.call_tracking import register_s3_call_tracking
+
+try:
+    from mypy_boto3_s3 import S3Client
+except ImportError:  # pragma: no cover
+    ...
+
+LOGGER = logging.getLogger(__name__)
+
+DEFAULT_MAX_POOL_CONNECTIONS = 50
+DEFAULT_CONNECT_TIMEOUT_SECONDS = 5.0
+DEFAULT_READ_TIMEOUT_SECONDS = 60.0
+DEFAULT_MAX_RETRY_ATTEMPTS = 3
+DEFAULT_RETRY_MODE = "standard"
+
+
+def create_s3_client(
+    max_pool_connections: int = DEFAULT_MAX_POOL_CONNECTIONS,
+    connect_timeout: float = DEFAULT_CONNECT_TIMEOUT_SECONDS,
+    read_timeout: float = DEFAULT_READ_TIMEOUT_SECONDS,
+    max_retry_attempts: int = DEFAULT_MAX_RETRY_ATTEMPTS,
+    retry_mode: str = DEFAULT_RETRY_MODE,
+    tcp_keepalive: bool = True,
+) -> "S3Client":
+    """
+    Create an S3 client backed by a tunable urllib3 connection pool.
+
+    boto3 clients are thread-safe, so a single client created here is meant to be
+    shared by every request for the lifetime of the app. This avoids re-resolving
+    credentials and endpoints, and re-doing TCP/TLS handshakes, on every call.
+    Calls made through the client are reported to :func:`files_api.s3.call_tracking.track_s3_calls`.
+
+    :param max_pool_connections: Maximum number of connections kept in the pool.
+    :param connect_timeout: Seconds to wait when establishing a connection.
+    :param read_timeout: Seconds to wait for data on an established connection.
+    :param max_retry_attempts: Maximum number of retries for a failed call.
+    :param retry_mode: botocore retry mode, e.g. "standard" or "adaptive".
+    :param tcp_keepalive: Whether to enable TCP keep-alive on pooled sockets.
+
+    :return: A configured S3 client.
+    """
+    config = Config(
+        max_pool_connections=max_pool_connections,
+        connect_timeout=connect_timeout,
+        read_timeout=read_timeout,
+        retries={"max_attempts": max_retry_attempts, "mode": retry_mode},
+        tcp_keepalive=tcp_keepalive,
+    )
+    s3_client = boto3.session.Session().client("s3", config=config)
+    register_s3_call_tracking(s3_client)
+    return s3_client
+
+
+def prewarm_s3_connections(s3_client: "S3Client", bucket_name: str, num_connections: int) -> int:
+    """
+    Open pooled connections ahead of the first request by issuing concurrent ``head_bucket`` calls.
+
+    Failures are logged and swallowed: a cold pool is slower, not broken.
+
+    :param s3_client: The shared S3 client whose pool should be warmed.
+    :param bucket_name: Name of the S3 bucket to probe.
+    :param num_connections: Number of concurrent probes, i.e. connections to open.
+
+    :return: Number of probes that succeeded.
+    """
+    if num_connections <= 0:
+        return 0
+
+    def _probe(_: int) -> bool:
+        try:
+            s3_client.head_bucket(Bucket=bucket_name)
+            return True
+        except (BotoCoreError, ClientError) as error:
+            LOGGER.warning("Failed to pre-warm S3 connection: %s", error)
+            return False
+
+    with ThreadPoolExecutor(max_workers=num_connections) as executor:
+        return sum(executor.map(_probe, range(num_connections)))
@@ -0,0 +1,354 @@
+"""Functions for copying and moving objects within an S3 bucket, without downloading them."""
+
+import math
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ThreadPoolExecutor,
+    wait,
+)
+from contextvars import copy_context
+from dataclasses import (
+    dataclass,
+    field,
+)
+from typing import Optional
+
+import boto3
+from botocore.exceptions import ClientError
+
+from files_api.s3.delete_objects import delete_s3_object
+from files_api.s3.metadata_cache import S3MetadataCache
+from files_api.s3.read_objects import iter_s3_objects
+from files_api.s3.write_objects import (
+    MAX_MULTIPART_PARTS,
+    MIB,
+    MIN_MULTIPART_PART_SIZE_BYTES,
+    write_conditionally,
+)
+
+try:
+    from mypy_boto3_s3 import S3Client
+    from mypy_boto3_s3.type_defs import (
+        CompletedPartTypeDef,
+        CopySourceTypeDef,
+    )
+except ImportError:  # pragma: no cover
+    ...
+
+# S3 rejects copy_object calls for objects larger than this; bigger objects must be copied in parts
+MAX_COPY_OBJECT_SIZE_BYTES = 5 * 1024 * MIB
+DEFAULT_COPY_PART_SIZE_BYTES = 512 * MIB
+DEFAULT_COPY_PART_MAX_CONCURRENCY = 8
+DEFAULT_BULK_COPY_MAX_CONCURRENCY = 16
+
+
+@dataclass(frozen=True)
+class CopyFailure:
+    """An object that could not be copied or moved, with the error code and message S3 reported."""
+
+    object_key: str
+    code: str
+    message: str
+
+
+@dataclass
+class BulkCopyResult:
+    """Outcome of copying or moving every object under a prefix: how many succeeded and which ones failed."""
+
+    copied_count: int = 0
+    failures: list[CopyFailure] = field(default_factory=list)
+
+
+def copy_s3_object(  # pylint: disable=too-many-arguments
+    bucket_name: str,
+    source_key: str,
+    destination_key: str,
+    s3_client: Optional["S3Client"] = None,
+    metadata_cache: Optional[S3MetadataCache] = None,
+    source_etag: Optional[str] = None,
+    source_size: Optional[int] = None,
+    multipart_threshold: int = MAX_COPY_OBJECT_SIZE_BYTES,
+    part_size: int = DEFAULT_COPY_PART_SIZE_BYTES,
+    max_concurrency: int = DEFAULT_COPY_PART_MAX_CONCURRENCY,
+) -> bool:
+    """
+    Copy an object within the bucket; the bytes are copied by S3 and never pass through this process.
+
+    Objects below ``multipart_threshold`` are copied with a single ``copy_object`` call, which keeps
+    the source's content type and metadata. Larger objects, which ``copy_object`` rejects, are copied
+    with a multipart upload whose parts are ``upload_part_copy`` calls for byte ranges of the source,
+    at most ``max_concurrency`` at a time. Every call is made with ``CopySourceIfMatch``, so a source
+    overwritten mid-copy fails the copy with a 412 instead of producing a mix of two versions.
+
+    Like :func:`files_api.s3.write_objects.upload_s3_object`, the destination is first written
+    conditionally, so creating a new object costs no extra request.
+
+    :param bucket_name: Name of the S3 bucket.
+    :param source_key: Key of the object to copy.
+    :param destination_key: Key to copy the object to.
+    :param s3_client: Optional S3 client to use. If not provided, a new client will be created.
+    :param metadata_cache: Optional metadata cache in which to invalidate the destination once written.
+    :param source_etag: ETag of the source, e.g. from a listing. If it or ``source_size`` is
+        missing, the source is looked up with ``head_object`` first.
+    :param source_size: Size of the source in bytes.
+    :param multipart_threshold: Size in bytes at or above which the object is copied in parts.
+    :param part_size: Size in bytes of each copied part (all but the last).
+    :param max_concurrency: Maximum number of ``upload_part_copy`` calls in flight at once.
+
+    :return: True if a new object was created, False if an existing object was overwritten.
+    """
+    s3_client = s3_client or boto3.client("s3")
+    head = None
+    if source_etag is None or source_size is None:
+        head = s3_client.head_object(Bucket=bucket_name, Key=source_key)
+        source_etag, source_size = head["ETag"], head["ContentLength"]
+    copy_source: "CopySourceTypeDef" = {"Bucket": bucket_name, "Key": source_key}
+
+    try:
+        if source_size < multipart_threshold:
+            return write_conditionally(
+                lambda **condition: s3_client.copy_object(
+                    Bucket=bucket_name,
+                    Key=destination_key,
+                    CopySource=copy_source,
+                    CopySourceIfMatch=source_etag,
+                    **condition,
+                ),
+                if_match=None,
+            )
+
+        if head is None:
+            # a multipart upload does not inherit the source's content type and encoding, so they must be looked up
+            head = s3_client.head_object(Bucket=bucket_name, Key=source_key, IfMatch=source_etag)
+        object_attributes = {"ContentType": head["ContentType"]}
+        if "ContentEncoding" in head:
+            object_attributes["ContentEncoding"] = head["ContentEncoding"]
+        return _copy_s3_object_in_parts(
+            s3_client=s3_client,
+            bucket_name=bucket_name,
+            copy_source=copy_source,
+            source_etag=source_etag,
+            source_size=source_size,
+            destination_key=destination_key,
+            object_attributes=object_attributes,
+            part_size=max(part_size, MIN_MULTIPART_PART_SIZE_BYTES, math.ceil(source_size / MAX_MULTIPART_PARTS)),
+            max_concurrency=max_concurrency,
+        )
+    finally:
+        if metadata_cache:
+            metadata_cache.invalidate_object(bucket_name, destination_key)
+
+
+def move_s3_object(  # pylint: disable=too-many-arguments
+    bucket_name: str,
+    source_key: str,
+    destination_key: str,
+    s3_client: Optional["S3Client"] = None,
+    metadata_cache: Optional[S3MetadataCache] = None,
+    source_etag: Optional[str] = None,
+    source_size: Optional[int] = None,
+    multipart_threshold: int = MAX_COPY_OBJECT_SIZE_BYTES,
+    part_size: int = DEFAULT_COPY_PART_SIZE_BYTES,
+    max_concurrency: int = DEFAULT_COPY_PART_MAX_CONCURRENCY,
+) -> bool:
+    """
+    Move an object within the bucket by copying it with :func:`copy_s3_object` and deleting the source.
+
+    S3 has no rename, so a move costs a copy plus a ``delete_object``. The delete is made with
+    ``IfMatch`` set to the copied version's ETag, so a source overwritten after the copy is kept
+    and the delete fails with a 412. Parameters are those of :func:`copy_s3_object`.
+
+    :return: True if a new object was created at ``destination_key``, False if one was overwritten.
+    """
+    s3_client = s3_client or boto3.client("s3")
+    if source_etag is None or source_size is None:
+        head = s3_client.head_object(Bucket=bucket_name, Key=source_key)
+        source_etag, source_size = head["ETag"], head["ContentLength"]
+
+    created = copy_s3_object(
+        bucket_name=bucket_name,
+        source_key=source_key,
+        destination_key=destination_key,
+        s3_client=s3_client,
+        metadata_cache=metadata_cache,
+        source_etag=source_etag,
+        source_size=source_size,
+        multipart_threshold=multipart_threshold,
+        part_size=part_size,
+        max_concurrency=max_concurrency,
+    )
+    delete_s3_object(
+        bucket_name=bucket_name,
+        object_key=source_key,
+        s3_client=s3_client,
+        metadata_cache=metadata_cache,
+        if_match=source_etag,
+    )
+    return created
+
+
+def copy_s3_objects_by_prefix(  # pylint: disable=too-many-arguments
+    bucket_name: str,
+    source_prefix: str,
+    destination_prefix: str,
+    s3_client: Optional["S3Client"] = None,
+    metadata_cache: Optional[S3MetadataCache] = None,
+    max_concurrency: int = DEFAULT_BULK_COPY_MAX_CONCURRENCY,
+    delete_source: bool = False,
+    part_size: int = DEFAULT_COPY_PART_SIZE_BYTES,
+    part_max_concurrency: int = DEFAULT_COPY_PART_MAX_CONCURRENCY,
+) -> BulkCopyResult:
+    """
+    Copy, or move, every object under ``source_prefix`` to the same relative key under ``destination_prefix``.
+
+    The listing is streamed into at most ``max_concurrency`` concurrent :func:`copy_s3_object`
+    (or :func:`move_s3_object`) calls, so at most one listing page plus ``max_concurrency`` keys are
+    held in memory. The size and ETag of each object come from the listing, so objects below the
+    multipart threshold cost a single ``copy_object`` call (plus a ``delete_object`` call to move).
+
+    The prefixes must not overlap, otherwise the listing could pick up the objects being written.
+
+    :param bucket_name: Name of the S3 bucket.
+    :param source_prefix: Prefix of the objects to copy.
+    :param destination_prefix: Prefix that replaces ``source_prefix`` in the copied objects' keys.
+    :param s3_client: Optional S3 client to use. If not provided, a new client will be created.
+    :param metadata_cache: Optional metadata cache in which to invalidate the written and deleted objects.
+    :param max_concurrency: Maximum number of objects copied at once.
+    :param delete_source: Whether to delete each source object once copied, i.e. move it.
+    :param part_size: Size in bytes of each copied part of objects large enough to be copied in parts.
+    :param part_max_concurrency: Maximum number of ``upload_part_copy`` calls in flight at once per object.
+
+    :return: The number of objects copied (or moved) and the ones that failed, keyed by source key.
+        A failed object is reported rather than raised, so it does not abort the rest of the prefix.
+    """
+    if source_prefix.startswith(destination_prefix) or destination_prefix.startswith(source_prefix):
+        raise ValueError("source_prefix and destination_prefix must not overlap")
+    s3_client = s3_client or boto3.client("s3")
+    transfer = move_s3_object if delete_source else copy_s3_object
+    result = BulkCopyResult()
+
+    def _transfer(source_key: str, source_etag: str, source_size: int) -> Optional[CopyFailure]:
+        try:
+            transfer(
+                bucket_name=bucket_name,
+                source_key=source_key,
+                destination_key=destination_prefix + source_key.removeprefix(source_prefix),
+                s3_client=s3_client,
+                source_etag=source_etag,
+                source_size=source_size,
+                part_size=part_size,
+                max_concurrency=part_max_concurrency,
+            )
+        except ClientError as error:
+            return CopyFailure(object_key=source_key, code=error.response["Error"]["Code"], message=str(error))
+        return None
+
+    def _collect(done: set[Future]) -> None:
+        written_keys: list[str] = []
+        for transfer_future in done:
+            source_key = in_flight.pop(transfer_future)
+            failure = transfer_future.result()
+            if failure:
+                result.failures.append(failure)
+            else:
+                result.copied_count += 1
+            written_keys.append(destination_prefix + source_key.removeprefix(source_prefix))
+            if delete_source:
+                written_keys.append(source_key)
+        # invalidate once per batch of finished copies rather than once per object
+        if metadata_cache:
+            metadata_cache.invalidate_objects(bucket_name, written_keys)
+
+    in_flight: dict[Future, str] = {}
+    with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        for s3_object in iter_s3_objects(bucket_name, prefix=source_prefix, s3_client=s3_client):
+            # wait for a slot before listing further so at most `max_concurrency` objects are pending
+            while len(in_flight) >= max_concurrency:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                _collect(done)
+            transfer_future = executor.submit(
+                copy_context().run, _transfer, s3_object["Key"], s3_object["ETag"], s3_object["Size"]
+            )
+            in_flight[transfer_future] = s3_object["Key"]
+        _collect(wait(in_flight).done)
+    return result
+
+
+def move_s3_objects_by_prefix(  # pylint: disable=too-many-arguments
+    bucket_name: str,
+    source_prefix: str,
+    destination_prefix: str,
+    s3_client: Optional["S3Client"] = None,
+    metadata_cache: Optional[S3MetadataCache] = None,
+    max_concurrency: int = DEFAULT_BULK_COPY_MAX_CONCURRENCY,
+    part_size: int = DEFAULT_COPY_PART_SIZE_BYTES,
+    part_max_concurrency: int = DEFAULT_COPY_PART_MAX_CONCURRENCY,
+) -> BulkCopyResult:
+    """Move every object under ``source_prefix`` to ``destination_prefix``; see :func:`copy_s3_objects_by_prefix`."""
+    return copy_s3_objects_by_prefix(
+        bucket_name=bucket_name,
+        source_prefix=source_prefix,
+        destination_prefix=destination_prefix,
+        s3_client=s3_client,
+        metadata_cache=metadata_cache,
+        max_concurrency=max_concurrency,
+        delete_source=True,
+        part_size=part_size,
+        part_max_concurrency=part_max_concurrency,
+    )
+
+
+def _copy_s3_object_in_parts(  # pylint: disable=too-many-arguments
+    s3_client: "S3Client",
+    bucket_name: str,
+    copy_source: "CopySourceTypeDef",
+    source_etag: str,
+    source_size: int,
+    destination_key: str,
+    object_attributes: dict[str, str],
+    part_size: int,
+    max_concurrency: int,
+) -> bool:
+    """Copy the source in ``part_size`` byte ranges with bounded concurrency, aborting the upload on any failure."""
+    upload_id = s3_client.create_multipart_upload(Bucket=bucket_name, Key=destination_key, **object_attributes)[
+        "UploadId"
+    ]
+
+    def _copy_part(part_number: int, first_byte: int) -> "CompletedPartTypeDef":
+        last_byte = min(first_byte + part_size, source_size) - 1
+        response = s3_client.upload_part_copy(
+            Bucket=bucket_name,
+            Key=destination_key,
+            UploadId=upload_id,
+            PartNumber=part_number,
+            CopySource=copy_source,
+            CopySourceIfMatch=source_etag,
+            CopySourceRange=f"bytes={first_byte}-{last_byte}",
+        )
+        return {"PartNumber": part_number, "ETag": response["CopyPartResult"]["ETag"]}
+
+    executor = ThreadPoolExecutor(max_workers=max_concurrency)
+    try:
+        # no data is buffered here, so every part can be queued up front; the pool bounds the concurrency
+        part_futures = [
+            executor.submit(copy_context().run, _copy_part, part_number, first_byte)
+            for part_number, first_byte in enumerate(range(0, source_size, part_size), start=1)
+        ]
+        completed_parts = [part_future.result() for part_future in part_futures]
+        return write_conditionally(
+            lambda **condition: s3_client.complete_multipart_upload(
+                Bucket=bucket_name,
+                Key=destination_key,
+                UploadId=upload_id,
+                MultipartUpload={"Parts": completed_parts},
+                **condition,
+            ),
+            if_match=None,
+        )
+    except BaseException:
+        executor.shutdown(wait=True, cancel_futures=True)
+        s3_client.abort_multipart_upload(Bucket=bucket_name, Key=destination_key, UploadId=upload_id)
+        raise
+    finally:
+        executor.shutdown(wait=True)
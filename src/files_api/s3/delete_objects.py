@@ -1,22 +1,173 @@
 """Functions for deleting objects from an S3 bucket--the "D" in CRUD."""
 
-from typing import Optional
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ThreadPoolExecutor,
+    wait,
+)
+from contextvars import copy_context
+from dataclasses import (
+    dataclass,
+    field,
+)
+from itertools import islice
+from typing import (
+    Iterable,
+    Optional,
+)
 
 import boto3
+from botocore.exceptions import ClientError
+
+from files_api.s3.metadata_cache import S3MetadataCache
+from files_api.s3.read_objects import iter_s3_object_keys
 
 try:
     from mypy_boto3_s3 import S3Client
 except ImportError:  # pragma: no cover
     ...
 
+# S3 rejects DeleteObjects requests with more keys than this
+MAX_KEYS_PER_DELETE_OBJECTS_CALL = 1_000
+DEFAULT_BULK_DELETE_MAX_CONCURRENCY = 8
+
+
+@dataclass(frozen=True)
+class DeleteFailure:
+    """An object that S3 could not delete, with the error code and message it reported."""
+
+    object_key: str
+    code: str
+    message: str
+
+
+@dataclass
+class BulkDeleteResult:
+    """Outcome of a bulk delete: how many objects were deleted and which ones failed."""
+
+    deleted_count: int = 0
+    failures: list[DeleteFailure] = field(default_factory=list)
+
 
-def delete_s3_object(bucket_name: str, object_key: str, s3_client: Optional["S3Client"] = None) -> None:
+def delete_s3_object(
+    bucket_name: str,
+    object_key: str,
+    s3_client: Optional["S3Client"] = None,
+    metadata_cache: Optional[S3MetadataCache] = None,
+    if_match: Optional[str] = None,
+) -> None:
     """
     Delete an object from the S3 bucket.
 
     :param bucket_name: Name of the S3 bucket.
     :param object_key: Key of the object to delete.
     :param s3_client: Optional S3 client to use. If not provided, a new client will be created.
+    :param metadata_cache: Optional metadata cache in which to invalidate the object once deleted.
+    :param if_match: Optional ETag the object must have to be deleted. If it does not match, S3
+        raises a 412 error; if the object does not exist, a 404 error.
+    """
+    s3_client = s3_client or boto3.client("s3")
+    try:
+        if if_match:
+            s3_client.delete_object(Bucket=bucket_name, Key=object_key, IfMatch=if_match)
+        else:
+            s3_client.delete_object(Bucket=bucket_name, Key=object_key)
+    finally:
+        if metadata_cache:
+            metadata_cache.invalidate_object(bucket_name, object_key)
+
+
+def delete_s3_objects(
+    bucket_name: str,
+    object_keys: Iterable[str],
+    s3_client: Optional["S3Client"] = None,
+    metadata_cache: Optional[S3MetadataCache] = None,
+    max_concurrency: int = DEFAULT_BULK_DELETE_MAX_CONCURRENCY,
+) -> BulkDeleteResult:
+    """
+    Delete many objects using batched ``delete_objects`` calls, several batches at a time.
+
+    ``object_keys`` is consumed lazily, one batch ahead of the in-flight requests, so it may be
+    a generator over an arbitrarily large listing. Like ``delete_object``, deleting a key that
+    does not exist counts as a success.
+
+    :param bucket_name: Name of the S3 bucket.
+    :param object_keys: Keys of the objects to delete.
+    :param s3_client: Optional S3 client to use. If not provided, a new client will be created.
+    :param metadata_cache: Optional metadata cache in which to invalidate the objects once deleted.
+    :param max_concurrency: Maximum number of ``delete_objects`` calls in flight at once.
+
+    :return: The number of deleted objects and the keys that could not be deleted.
+    """
+    s3_client = s3_client or boto3.client("s3")
+    keys = iter(object_keys)
+    result = BulkDeleteResult()
+
+    def _delete_batch(batch: list[str]) -> list[DeleteFailure]:
+        try:
+            response = s3_client.delete_objects(
+                Bucket=bucket_name,
+                Delete={"Objects": [{"Key": key} for key in batch], "Quiet": True},
+            )
+        except ClientError as error:
+            # the whole request failed, e.g. access denied, so every key in it failed
+            return [
+                DeleteFailure(object_key=key, code=error.response["Error"]["Code"], message=str(error))
+                for key in batch
+            ]
+        finally:
+            if metadata_cache:
+                metadata_cache.invalidate_objects(bucket_name, batch)
+        return [
+            DeleteFailure(object_key=error["Key"], code=error.get("Code", ""), message=error.get("Message", ""))
+            for error in response.get("Errors", [])
+        ]
+
+    def _collect(batch_future: "Future[list[DeleteFailure]]", batch_size: int) -> None:
+        failures = batch_future.result()
+        result.deleted_count += batch_size - len(failures)
+        result.failures.extend(failures)
+
+    with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        in_flight: dict[Future, int] = {}
+        while batch := list(islice(keys, MAX_KEYS_PER_DELETE_OBJECTS_CALL)):
+            # wait for a slot before reading further so at most `max_concurrency` batches are buffered
+            while len(in_flight) >= max_concurrency:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for batch_future in done:
+                    _collect(batch_future, in_flight.pop(batch_future))
+            in_flight[executor.submit(copy_context().run, _delete_batch, batch)] = len(batch)
+        for batch_future in wait(in_flight).done:
+            _collect(batch_future, in_flight[batch_future])
+    return result
+
+
+def delete_s3_objects_by_prefix(
+    bucket_name: str,
+    prefix: str,
+    s3_client: Optional["S3Client"] = None,
+    metadata_cache: Optional[S3MetadataCache] = None,
+    max_concurrency: int = DEFAULT_BULK_DELETE_MAX_CONCURRENCY,
+) -> BulkDeleteResult:
+    """
+    Delete every object under ``prefix``, streaming the listing into batched deletes.
+
+    At most one listing page plus ``max_concurrency`` batches of keys are held in memory.
+
+    :param bucket_name: Name of the S3 bucket.
+    :param prefix: Prefix of the objects to delete.
+    :param s3_client: Optional S3 client to use. If not provided, a new client will be created.
+    :param metadata_cache: Optional metadata cache in which to invalidate the objects once deleted.
+    :param max_concurrency: Maximum number of ``delete_objects`` calls in flight at once.
+
+    :return: The number of deleted objects and the keys that could not be deleted.
     """
     s3_client = s3_client or boto3.client("s3")
-    s3_client.delete_object(Bucket=bucket_name, Key=object_key)
+    return delete_s3_objects(
+        bucket_name=bucket_name,
+        object_keys=iter_s3_object_keys(bucket_name, prefix=prefix, s3_client=s3_client),
+        s3_client=s3_client,
+        metadata_cache=metadata_cache,
+        max_concurrency=max_concurrency,
+    )
@@ -0,0 +1,29 @@
+"""Artificial latency added to S3 calls, so that benchmarks against a local mock reflect real round trips."""
+
+import time
+from functools import partial
+from typing import Any
+
+try:
+    from mypy_boto3_s3 import S3Client
+except ImportError:  # pragma: no cover
+    ...
+
+
+def _sleep_before_send(latency_seconds: float, **_: Any) -> None:
+    """Delay the HTTP request about to be sent; a botocore ``before-send`` event handler."""
+    time.sleep(latency_seconds)
+
+
+def register_s3_latency_injection(s3_client: "S3Client", latency_seconds: float) -> None:
+    """
+    Make every HTTP request sent by ``s3_client`` take at least ``latency_seconds`` longer.
+
+    The delay is added to each attempt, retries included, on the worker thread making the call,
+    like a slow network would. Meant for benchmarks only: never enable it in production.
+
+    :param s3_client: The client to slow down.
+    :param latency_seconds: Seconds to wait before sending each request.
+    """
+    if latency_seconds > 0:
+        s3_client.meta.events.register("before-send.s3", partial(_sleep_before_send, latency_seconds))
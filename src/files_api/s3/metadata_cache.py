@@ -0,0 +1,228 @@
+"""In-process LRU + TTL cache for S3 object metadata and listing pages."""
+
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import (
+    asdict,
+    dataclass,
+)
+from typing import (
+    Any,
+    Callable,
+    Collection,
+    Hashable,
+    Optional,
+)
+
+DEFAULT_METADATA_CACHE_CAPACITY = 10_000
+DEFAULT_METADATA_CACHE_TTL_SECONDS = 5.0
+DEFAULT_METADATA_CACHE_NEGATIVE_TTL_SECONDS = 1.0
+
+_HEAD = "head"
+_LIST = "list"
+
+
+@dataclass
+class CacheStats:
+    """Counters describing how a cache has been used since it was created."""
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    invalidations: int = 0
+
+    def as_dict(self) -> dict[str, int]:
+        """Return the counters as a plain dict, e.g. for exporting as metrics."""
+        return asdict(self)
+
+
+class LRUCache:
+    """
+    Thread-safe, size-bounded LRU cache whose entries expire after a per-entry TTL.
+
+    By default ``capacity`` is a number of entries. Given ``weigh``, it is instead a total weight,
+    e.g. a number of bytes, with each entry weighing ``weigh(value)``; values heavier than the
+    whole capacity are not stored. A capacity of 0 disables the cache: lookups always miss and
+    nothing is stored.
+    """
+
+    def __init__(self, capacity: int, weigh: Optional[Callable[[Any], int]] = None):
+        self.capacity = capacity
+        self.stats = CacheStats()
+        self.weight = 0
+        self._weigh = weigh or (lambda _: 1)
+        self._entries: "OrderedDict[Hashable, tuple[float, Any, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Return the number of entries, including expired ones not yet purged."""
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> tuple[bool, Any]:
+        """
+        Look up ``key``.
+
+        :return: ``(True, value)`` on a hit, ``(False, None)`` on a miss or if the entry expired.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= time.monotonic():
+                self._remove(key)
+                self.stats.expirations += 1
+                entry = None
+            if entry is None:
+                self.stats.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+            return True, entry[1]
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: float) -> None:
+        """Store ``value`` under ``key`` for ``ttl_seconds``, evicting the least recently used entries if full."""
+        weight = self._weigh(value)
+        if self.capacity <= 0 or ttl_seconds <= 0 or weight > self.capacity:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + ttl_seconds, value, weight)
+            self.weight += weight
+            while self.weight > self.capacity:
+                self._remove(next(iter(self._entries)))
+                self.stats.evictions += 1
+
+    def delete_where(self, predicate: Callable[[Hashable], bool]) -> int:
+        """Remove every entry whose key satisfies ``predicate``; return how many were removed."""
+        with self._lock:
+            doomed = [key for key in self._entries if predicate(key)]
+            for key in doomed:
+                self._remove(key)
+            self.stats.invalidations += len(doomed)
+        return len(doomed)
+
+    def delete(self, key: Hashable) -> bool:
+        """Remove the entry stored under ``key``, if any; return whether there was one."""
+        with self._lock:
+            if key not in self._entries:
+                return False
+            self._remove(key)
+            self.stats.invalidations += 1
+        return True
+
+    def _remove(self, key: Hashable) -> None:
+        """Remove an entry known to exist; the lock must be held."""
+        self.weight -= self._entries.pop(key)[2]
+
+
+class S3MetadataCache:
+    """
+    Cache of ``head_object`` results and ``list_objects_v2`` pages, shared by the functions in ``files_api.s3``.
+
+    Missing objects are cached too (negative caching), with their own, usually shorter, TTL.
+    Writes and deletes made through ``files_api.s3`` invalidate the object's metadata and every
+    listing page that could contain it.
+
+    To avoid caching a response that raced with a write, callers read :attr:`generation` before
+    calling S3 and pass it back when storing the result; the result is dropped if an invalidation
+    happened in between.
+
+    Other caches of per-object data, e.g. of object bodies, can subscribe to invalidations with
+    :meth:`add_invalidation_listener` rather than being threaded through every write.
+    """
+
+    def __init__(
+        self,
+        capacity: int = DEFAULT_METADATA_CACHE_CAPACITY,
+        ttl_seconds: float = DEFAULT_METADATA_CACHE_TTL_SECONDS,
+        negative_ttl_seconds: float = DEFAULT_METADATA_CACHE_NEGATIVE_TTL_SECONDS,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self._generations = itertools.count(1)
+        self.generation = 0
+        self._entries = LRUCache(capacity=capacity)
+        self._invalidation_listeners: list[Callable[[str, Collection[str]], None]] = []
+
+    @property
+    def stats(self) -> CacheStats:
+        """Hit, miss, eviction, expiration and invalidation counters."""
+        return self._entries.stats
+
+    @property
+    def entry_count(self) -> int:
+        """Number of cached responses, including expired ones not yet purged."""
+        return len(self._entries)
+
+    def get_head(self, bucket_name: str, object_key: str) -> tuple[bool, Optional[dict]]:
+        """Return ``(True, head_object response or None if missing)`` on a hit, ``(False, None)`` on a miss."""
+        return self._entries.get((_HEAD, bucket_name, object_key))
+
+    def set_head(self, bucket_name: str, object_key: str, head: Optional[dict], generation: int) -> None:
+        """Cache a ``head_object`` response, or None for a missing object, unless invalidated since ``generation``."""
+        if generation != self.generation:
+            return
+        ttl_seconds = self.ttl_seconds if head is not None else self.negative_ttl_seconds
+        self._entries.set((_HEAD, bucket_name, object_key), head, ttl_seconds=ttl_seconds)
+
+    def get_page(  # pylint: disable=too-many-arguments
+        self,
+        bucket_name: str,
+        prefix: Optional[str],
+        page_token: Optional[str],
+        max_keys: int,
+        delimiter: Optional[str] = None,
+    ) -> tuple:
+        """Return ``(True, page)`` on a hit, ``(False, None)`` on a miss."""
+        return self._entries.get((_LIST, bucket_name, prefix, page_token, max_keys, delimiter))
+
+    def set_page(  # pylint: disable=too-many-arguments
+        self,
+        bucket_name: str,
+        prefix: Optional[str],
+        page_token: Optional[str],
+        max_keys: int,
+        page: Any,
+        generation: int,
+        delimiter: Optional[str] = None,
+    ) -> None:
+        """
+        Cache a listing page unless invalidated since ``generation``.
+
+        Pages are keyed by ``prefix`` for first pages and by ``page_token`` for later pages,
+        and by ``delimiter`` for non-recursive listings.
+        """
+        if generation != self.generation:
+            return
+        self._entries.set(
+            (_LIST, bucket_name, prefix, page_token, max_keys, delimiter), page, ttl_seconds=self.ttl_seconds
+        )
+
+    def add_invalidation_listener(self, listener: Callable[[str, Collection[str]], None]) -> None:
+        """Call ``listener(bucket_name, object_keys)`` whenever objects are invalidated."""
+        self._invalidation_listeners.append(listener)
+
+    def invalidate_object(self, bucket_name: str, object_key: str) -> None:
+        """Forget the object's metadata and every listing page of ``bucket_name`` that could include it."""
+        self.invalidate_objects(bucket_name, [object_key])
+
+    def invalidate_objects(self, bucket_name: str, object_keys: Collection[str]) -> None:
+        """Like :meth:`invalidate_object` for many objects at once, in a single pass over the cache."""
+        self.generation = next(self._generations)
+        object_keys = set(object_keys)
+
+        def _is_stale(key: Hashable) -> bool:
+            kind, bucket, *rest = key  # type: ignore[misc]
+            if bucket != bucket_name:
+                return False
+            if kind == _HEAD:
+                return rest[0] in object_keys
+            prefix, page_token = rest[0], rest[1]
+            # continuation tokens are opaque, so any later page might be affected
+            return page_token is not None or any(object_key.startswith(prefix or "") for object_key in object_keys)
+
+        self._entries.delete_where(_is_stale)
+        for listener in self._invalidation_listeners:
+            listener(bucket_name, object_keys)
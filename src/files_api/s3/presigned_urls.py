@@ -0,0 +1,126 @@
+"""Presigned URLs that let clients transfer object bodies directly to and from S3."""
+
+import math
+from dataclasses import dataclass
+from typing import Optional
+
+import boto3
+
+from files_api.s3.write_objects import (
+    DEFAULT_MULTIPART_PART_SIZE_BYTES,
+    MAX_MULTIPART_PARTS,
+    MIN_MULTIPART_PART_SIZE_BYTES,
+)
+
+try:
+    from mypy_boto3_s3 import S3Client
+except ImportError:  # pragma: no cover
+    ...
+
+DEFAULT_PRESIGNED_URL_EXPIRATION_SECONDS = 3600
+# S3 rejects presigned URLs valid for longer than 7 days
+MAX_PRESIGNED_URL_EXPIRATION_SECONDS = 7 * 24 * 3600
+
+
+@dataclass(frozen=True)
+class PresignedMultipartUpload:
+    """A multipart upload created on behalf of a client, with a presigned URL to ``PUT`` each part to."""
+
+    upload_id: str
+    part_size: int
+    part_urls: list[str]
+
+
+def generate_presigned_download_url(
+    bucket_name: str,
+    object_key: str,
+    s3_client: Optional["S3Client"] = None,
+    expires_in: int = DEFAULT_PRESIGNED_URL_EXPIRATION_SECONDS,
+) -> str:
+    """
+    Generate a URL from which anyone holding it can ``GET`` the object, until it expires.
+
+    Signing is done locally, without calling S3, and does not check that the object exists.
+
+    :param bucket_name: Name of the S3 bucket.
+    :param object_key: Key of the object to download.
+    :param s3_client: Optional S3 client to use. If not provided, a new client will be created.
+    :param expires_in: Number of seconds the URL stays valid for.
+
+    :return: The presigned URL.
+    """
+    s3_client = s3_client or boto3.client("s3")
+    return s3_client.generate_presigned_url(
+        "get_object", Params={"Bucket": bucket_name, "Key": object_key}, ExpiresIn=expires_in
+    )
+
+
+def generate_presigned_upload_url(
+    bucket_name: str,
+    object_key: str,
+    content_type: Optional[str] = None,
+    s3_client: Optional["S3Client"] = None,
+    expires_in: int = DEFAULT_PRESIGNED_URL_EXPIRATION_SECONDS,
+) -> str:
+    """
+    Generate a URL to which anyone holding it can ``PUT`` the object's content in one request, until it expires.
+
+    :param bucket_name: Name of the S3 bucket.
+    :param object_key: Key of the object to upload.
+    :param content_type: Optional MIME type of the file. If given, the upload must send the same
+        ``Content-Type`` header, since it is part of the signature.
+    :param s3_client: Optional S3 client to use. If not provided, a new client will be created.
+    :param expires_in: Number of seconds the URL stays valid for.
+
+    :return: The presigned URL.
+    """
+    s3_client = s3_client or boto3.client("s3")
+    params = {"Bucket": bucket_name, "Key": object_key}
+    if content_type:
+        params["ContentType"] = content_type
+    return s3_client.generate_presigned_url("put_object", Params=params, ExpiresIn=expires_in)
+
+
+def create_presigned_multipart_upload(  # pylint: disable=too-many-arguments
+    bucket_name: str,
+    object_key: str,
+    size_bytes: int,
+    content_type: Optional[str] = None,
+    part_size: int = DEFAULT_MULTIPART_PART_SIZE_BYTES,
+    s3_client: Optional["S3Client"] = None,
+    expires_in: int = DEFAULT_PRESIGNED_URL_EXPIRATION_SECONDS,
+) -> PresignedMultipartUpload:
+    """
+    Start a multipart upload and presign an ``upload_part`` URL for each part of a file of ``size_bytes``.
+
+    The client ``PUT``s bytes ``[(n - 1) * part_size, n * part_size)`` of the file to the n-th URL,
+    keeps the ``ETag`` of each response, and then completes the upload with
+    :func:`files_api.s3.write_objects.complete_s3_multipart_upload`.
+
+    :param bucket_name: Name of the S3 bucket.
+    :param object_key: Key of the object to upload.
+    :param size_bytes: Size of the file to upload.
+    :param content_type: Optional MIME type of the file.
+    :param part_size: Preferred size of each part. It is raised if needed to stay within S3's part
+        size and count limits.
+    :param s3_client: Optional S3 client to use. If not provided, a new client will be created.
+    :param expires_in: Number of seconds the part URLs stay valid for.
+
+    :return: The upload ID, actual part size and the presigned URL of every part.
+    """
+    s3_client = s3_client or boto3.client("s3")
+    part_size = max(part_size, MIN_MULTIPART_PART_SIZE_BYTES, math.ceil(size_bytes / MAX_MULTIPART_PARTS))
+    num_parts = max(1, math.ceil(size_bytes / part_size))
+
+    upload_id = s3_client.create_multipart_upload(
+        Bucket=bucket_name, Key=object_key, ContentType=content_type or "application/octet-stream"
+    )["UploadId"]
+    part_urls = [
+        s3_client.generate_presigned_url(
+            "upload_part",
+            Params={"Bucket": bucket_name, "Key": object_key, "UploadId": upload_id, "PartNumber": part_number},
+            ExpiresIn=expires_in,
+        )
+        for part_number in range(1, num_parts + 1)
+    ]
+    return PresignedMultipartUpload(upload_id=upload_id, part_size=part_size, part_urls=part_urls)
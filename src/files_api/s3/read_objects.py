@@ -1,23 +1,67 @@
 """Functions for reading objects from an S3 bucket--the "R" in CRUD."""
 
-from typing import Optional
+import io
+import logging
+import os
+import sys
+from collections import deque
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ThreadPoolExecutor,
+    wait,
+)
+from contextvars import copy_context
+from datetime import datetime
+from typing import (
+    Any,
+    BinaryIO,
+    Iterable,
+    Iterator,
+    Optional,
+)
 
 import boto3
+from botocore.exceptions import ClientError
+
+from files_api.s3.body_cache import (
+    CachedObject,
+    ObjectBodyCache,
+)
+from files_api.s3.metadata_cache import S3MetadataCache
 
 try:
     from mypy_boto3_s3 import S3Client
     from mypy_boto3_s3.type_defs import (
+        CommonPrefixTypeDef,
         GetObjectOutputTypeDef,
+        HeadObjectOutputTypeDef,
         ListObjectsV2OutputTypeDef,
         ObjectTypeDef,
     )
 except ImportError:  # pragma: no cover
     ...
 
+LOGGER = logging.getLogger(__name__)
+
 DEFAULT_MAX_KEYS = 1_000
+DEFAULT_PREFETCH_COUNT = 8
+DEFAULT_PREFETCH_MAX_OBJECT_BYTES = 1024 * 1024
+DEFAULT_METADATA_LOOKUP_MAX_CONCURRENCY = 16
+# a listing page must answer at least this many of the requested keys to beat concurrent head_object calls
+DEFAULT_MIN_KEYS_PER_LISTING_PAGE = 10
+DEFAULT_BODY_CACHE_PREWARM_MAX_CONCURRENCY = 8
+# code points reserved for UTF-16 surrogates, which UTF-8 cannot encode
+_MIN_SURROGATE_CODE_POINT = 0xD800
+_MAX_SURROGATE_CODE_POINT = 0xDFFF
 
 
-def object_exists_in_s3(bucket_name: str, object_key: str, s3_client: Optional["S3Client"] = None) -> bool:
+def object_exists_in_s3(
+    bucket_name: str,
+    object_key: str,
+    s3_client: Optional["S3Client"] = None,
+    metadata_cache: Optional[S3MetadataCache] = None,
+) -> bool:
     """
     Check if an object exists in the S3 bucket using head_object.
 
@@ -25,23 +69,64 @@ def object_exists_in_s3(bucket_name: str, object_key: str, s3_client: Optional["
     :param object_key: Key of the object to check.
     :param s3_client: Optional S3 client to use.
         If not provided, a new client will be created.
+    :param metadata_cache: Optional cache of head_object results to consult and fill.
 
     :return: True if the object exists, False otherwise.
     """
+    return (
+        fetch_s3_object_metadata(
+            bucket_name=bucket_name, object_key=object_key, s3_client=s3_client, metadata_cache=metadata_cache
+        )
+        is not None
+    )
+
+
+def fetch_s3_object_metadata(
+    bucket_name: str,
+    object_key: str,
+    s3_client: Optional["S3Client"] = None,
+    metadata_cache: Optional[S3MetadataCache] = None,
+) -> Optional["HeadObjectOutputTypeDef"]:
+    """
+    Fetch metadata of an object in the S3 bucket using head_object, without opening its body.
+
+    :param bucket_name: Name of the S3 bucket.
+    :param object_key: Key of the object to inspect.
+    :param s3_client: Optional S3 client to use.
+        If not provided, a new client will be created.
+    :param metadata_cache: Optional cache of head_object results to consult and fill.
+        Missing objects are cached as well.
+
+    :return: Metadata of the object, or None if the object does not exist.
+    """
+    if metadata_cache:
+        is_cached, head = metadata_cache.get_head(bucket_name, object_key)
+        if is_cached:
+            return head
+        generation = metadata_cache.generation
+
     s3_client = s3_client or boto3.client("s3")
     try:
-        s3_client.head_object(Bucket=bucket_name, Key=object_key)
-        return True
+        head = s3_client.head_object(Bucket=bucket_name, Key=object_key)
     except s3_client.exceptions.ClientError as error:
-        if error.response["Error"]["Code"] == "404":
-            return False
-        raise error  # pragma: no cover
+        if error.response["Error"]["Code"] != "404":
+            raise error  # pragma: no cover
+        head = None
+
+    if metadata_cache:
+        metadata_cache.set_head(bucket_name, object_key, head, generation=generation)
+    return head
 
 
-def fetch_s3_object(
+def fetch_s3_object(  # pylint: disable=too-many-arguments
     bucket_name: str,
     object_key: str,
     s3_client: Optional["S3Client"] = None,
+    byte_range: Optional[str] = None,
+    if_match: Optional[str] = None,
+    if_unmodified_since: Optional[datetime] = None,
+    if_none_match: Optional[str] = None,
+    if_modified_since: Optional[datetime] = None,
 ) -> "GetObjectOutputTypeDef":
     """
     Fetch metadata of an object in the S3 bucket.
@@ -50,11 +135,159 @@ def fetch_s3_object(
     :param object_key: Key of the object to fetch.
     :param s3_client: Optional S3 client to use.
         If not provided, a new client will be created.
+    :param byte_range: Optional ``Range`` header value, e.g. "bytes=0-1023", to fetch part of the object.
+    :param if_match: Only return the object if its ETag matches, otherwise S3 raises a 412 error.
+    :param if_unmodified_since: Only return the object if it has not been modified since this time,
+        otherwise S3 raises a 412 error.
+    :param if_none_match: Only return the object if its ETag does not match, otherwise S3 raises a 304 error.
+    :param if_modified_since: Only return the object if it has been modified since this time,
+        otherwise S3 raises a 304 error.
 
     :return: Metadata of the object.
     """
     s3_client = s3_client or boto3.client("s3")
-    return s3_client.get_object(Bucket=bucket_name, Key=object_key)
+    get_object_kwargs: dict[str, Any] = {}
+    if byte_range:
+        get_object_kwargs["Range"] = byte_range
+    if if_match:
+        get_object_kwargs["IfMatch"] = if_match
+    if if_unmodified_since:
+        get_object_kwargs["IfUnmodifiedSince"] = if_unmodified_since
+    if if_none_match:
+        get_object_kwargs["IfNoneMatch"] = if_none_match
+    if if_modified_since:
+        get_object_kwargs["IfModifiedSince"] = if_modified_since
+    return s3_client.get_object(Bucket=bucket_name, Key=object_key, **get_object_kwargs)
+
+
+def fetch_s3_object_through_cache(
+    bucket_name: str,
+    object_key: str,
+    body_cache: ObjectBodyCache,
+    s3_client: Optional["S3Client"] = None,
+    metadata_cache: Optional[S3MetadataCache] = None,
+) -> tuple[Optional[CachedObject], Optional["GetObjectOutputTypeDef"]]:
+    """
+    Fetch a whole object through ``body_cache``, downloading its body only if the cached copy is stale.
+
+    A cached body is served without calling S3 if ``metadata_cache`` holds the object's metadata
+    with the same ETag. Otherwise, it is revalidated with a ``get_object`` call conditional on its
+    ETag, which costs no body transfer if S3 answers 304 Not Modified. A stale or missing body is
+    downloaded and, if small enough, stored in the cache.
+
+    Client preconditions are not forwarded to S3: they are evaluated by the caller against the
+    returned object, so that a conditional request can still fill the cache.
+
+    :param bucket_name: Name of the S3 bucket.
+    :param object_key: Key of the object to fetch.
+    :param body_cache: Cache of object bodies to consult and fill.
+    :param s3_client: Optional S3 client to use.
+        If not provided, a new client will be created.
+    :param metadata_cache: Optional cache of head_object results, used to validate cached bodies for free.
+
+    :return: Either the cached object, which the caller must pass to :meth:`ObjectBodyCache.release`
+        once served, and None, or None and the ``get_object`` response of an object too large to
+        cache, whose body the caller must read and close.
+    """
+    cached_object = body_cache.get(bucket_name, object_key)
+    if cached_object is not None and metadata_cache:
+        is_cached, head = metadata_cache.get_head(bucket_name, object_key)
+        if is_cached and head is not None and head["ETag"] == cached_object.etag:
+            body_cache.record_hit(cached_object)
+            return cached_object, None
+
+    s3_client = s3_client or boto3.client("s3")
+    try:
+        response = fetch_s3_object(
+            bucket_name,
+            object_key,
+            s3_client=s3_client,
+            if_none_match=cached_object.etag if cached_object is not None else None,
+        )
+    except ClientError as error:
+        if cached_object is not None and error.response["Error"]["Code"] == "304":
+            body_cache.record_hit(cached_object, revalidated=True)
+            return cached_object, None
+        if cached_object is not None:
+            body_cache.release(cached_object)
+        if error.response["Error"]["Code"] == "NoSuchKey":
+            body_cache.invalidate_objects(bucket_name, [object_key])
+        raise
+
+    if cached_object is not None:
+        body_cache.release(cached_object)
+        body_cache.invalidate_objects(bucket_name, [object_key])
+    body_cache.record_miss()
+    if response["ContentLength"] > body_cache.max_object_bytes:
+        return None, response
+    return body_cache.put(bucket_name, object_key, response), None
+
+
+def prewarm_s3_object_bodies(
+    bucket_name: str,
+    prefix: str,
+    body_cache: ObjectBodyCache,
+    s3_client: Optional["S3Client"] = None,
+    max_concurrency: int = DEFAULT_BODY_CACHE_PREWARM_MAX_CONCURRENCY,
+) -> tuple[int, int]:
+    """
+    Load the body of every object under ``prefix`` that fits in ``body_cache`` into the cache.
+
+    Objects already cached with their listed ETag are skipped. Objects deleted or overwritten since
+    they were listed are skipped too, as :func:`iter_s3_object_bodies` does.
+
+    :param bucket_name: Name of the S3 bucket.
+    :param prefix: Prefix of the objects to cache.
+    :param body_cache: Cache of object bodies to fill.
+    :param s3_client: Optional S3 client to use.
+        If not provided, a new client will be created.
+    :param max_concurrency: Maximum number of concurrent ``get_object`` calls.
+
+    :return: The number of objects cached and their total size in bytes.
+    """
+    s3_client = s3_client or boto3.client("s3")
+
+    def _cache(s3_object: "ObjectTypeDef") -> int:
+        try:
+            response = s3_client.get_object(Bucket=bucket_name, Key=s3_object["Key"], IfMatch=s3_object["ETag"])
+        except ClientError as error:
+            if error.response["Error"]["Code"] not in ("NoSuchKey", "PreconditionFailed", "412"):
+                raise
+            LOGGER.warning("Skipping %s, which changed after it was listed", s3_object["Key"])
+            return 0
+        cached_object = body_cache.put(bucket_name, s3_object["Key"], response)
+        if cached_object is None:
+            response["Body"].close()
+            return 0
+        body_cache.release(cached_object)
+        return 1
+
+    def _is_cached(s3_object: "ObjectTypeDef") -> bool:
+        cached_object = body_cache.get(bucket_name, s3_object["Key"])
+        if cached_object is None:
+            return False
+        body_cache.release(cached_object)
+        return cached_object.etag == s3_object["ETag"]
+
+    cached_count, cached_bytes = 0, 0
+    with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        in_flight: dict[Future, "ObjectTypeDef"] = {}
+        for s3_object in iter_s3_objects(bucket_name, prefix=prefix, s3_client=s3_client):
+            if s3_object["Size"] > body_cache.max_object_bytes or _is_cached(s3_object):
+                continue
+            in_flight[executor.submit(copy_context().run, _cache, s3_object)] = s3_object
+            if len(in_flight) >= max_concurrency:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for cache_future in done:
+                    if cache_future.result():
+                        cached_count += 1
+                        cached_bytes += in_flight[cache_future]["Size"]
+                    del in_flight[cache_future]
+        for cache_future, s3_object in in_flight.items():
+            if cache_future.result():
+                cached_count += 1
+                cached_bytes += s3_object["Size"]
+    return cached_count, cached_bytes
 
 
 def fetch_s3_objects_using_page_token(
@@ -62,6 +295,7 @@ def fetch_s3_objects_using_page_token(
     continuation_token: str,
     max_keys: Optional[int] = None,
     s3_client: Optional["S3Client"] = None,
+    metadata_cache: Optional[S3MetadataCache] = None,
 ) -> tuple[list["ObjectTypeDef"], Optional[str]]:
     """
     Fetch list of object keys and their metadata using a continuation token.
@@ -72,21 +306,33 @@ def fetch_s3_objects_using_page_token(
     :param max_keys: Maximum number of keys to return within this page.
     :param s3_client: Optional S3 client to use.
         If not provided, a new client will be created.
+    :param metadata_cache: Optional cache of listing pages to consult and fill.
 
     :return: Tuple of a list of objects and the next continuation token.
         1. Possibly empty list of objects in the current page.
         2. Next continuation token if there are more pages, otherwise None.
     """
+    max_keys = max_keys or DEFAULT_MAX_KEYS
+    if metadata_cache:
+        is_cached, page = metadata_cache.get_page(bucket_name, None, continuation_token, max_keys)
+        if is_cached:
+            return page
+        generation = metadata_cache.generation
+
     s3_client = s3_client or boto3.client("s3")
 
     response: "ListObjectsV2OutputTypeDef" = s3_client.list_objects_v2(
         Bucket=bucket_name,
         ContinuationToken=continuation_token,
-        MaxKeys=max_keys or DEFAULT_MAX_KEYS,
+        MaxKeys=max_keys,
     )
     files: list["ObjectTypeDef"] = response.get("Contents", [])
     next_continuation_token: str | None = response.get("NextContinuationToken")
 
+    if metadata_cache:
+        metadata_cache.set_page(
+            bucket_name, None, continuation_token, max_keys, (files, next_continuation_token), generation=generation
+        )
     return files, next_continuation_token
 
 
@@ -95,6 +341,7 @@ def fetch_s3_objects_metadata(
     prefix: str = "",
     max_keys: Optional[int] = DEFAULT_MAX_KEYS,
     s3_client: Optional["S3Client"] = None,
+    metadata_cache: Optional[S3MetadataCache] = None,
 ) -> tuple[list["ObjectTypeDef"], Optional[str]]:
     """
     Fetch list of object keys and their metadata.
@@ -104,15 +351,294 @@ def fetch_s3_objects_metadata(
     :param max_keys: Maximum number of keys to return within this page.
     :param s3_client: Optional S3 client to use.
         If not provided, a new client will be created.
+    :param metadata_cache: Optional cache of listing pages to consult and fill.
 
     :return: Tuple of a list of objects and the next continuation token.
         1. Possibly empty list of objects in the current page.
         2. Next continuation token if there are more pages, otherwise None.
     """
+    prefix = prefix or ""
+    if metadata_cache:
+        is_cached, page = metadata_cache.get_page(bucket_name, prefix, None, max_keys)
+        if is_cached:
+            return page
+        generation = metadata_cache.generation
+
     s3_client = s3_client or boto3.client("s3")
 
-    response = s3_client.list_objects_v2(Bucket=bucket_name, Prefix=prefix or "", MaxKeys=max_keys)
+    response = s3_client.list_objects_v2(Bucket=bucket_name, Prefix=prefix, MaxKeys=max_keys)
     files: list["ObjectTypeDef"] = response.get("Contents", [])
     next_page_token: str | None = response.get("NextContinuationToken")
 
+    if metadata_cache:
+        metadata_cache.set_page(bucket_name, prefix, None, max_keys, (files, next_page_token), generation=generation)
     return files, next_page_token
+
+
+def fetch_s3_directory_listing(  # pylint: disable=too-many-arguments
+    bucket_name: str,
+    prefix: str = "",
+    continuation_token: Optional[str] = None,
+    max_keys: int = DEFAULT_MAX_KEYS,
+    delimiter: str = "/",
+    s3_client: Optional["S3Client"] = None,
+    metadata_cache: Optional[S3MetadataCache] = None,
+) -> tuple[list["ObjectTypeDef"], list[str], Optional[str]]:
+    """
+    Fetch one page of the objects and subdirectories directly under ``prefix``, without descending into them.
+
+    S3 groups every key containing ``delimiter`` after ``prefix`` into a single common prefix, so
+    browsing a directory costs one page however many objects its subdirectories hold. ``max_keys``
+    counts objects and common prefixes together, and a continuation token can end on either.
+
+    :param bucket_name: Name of the S3 bucket to list objects from.
+    :param prefix: Prefix of the directory to list, usually ending with ``delimiter``.
+    :param continuation_token: Token for fetching the next page of results, as returned for the
+        previous page. It must be used with the same ``prefix`` and ``delimiter``.
+    :param max_keys: Maximum number of objects and common prefixes to return within this page.
+    :param delimiter: Character that separates directories in keys.
+    :param s3_client: Optional S3 client to use.
+        If not provided, a new client will be created.
+    :param metadata_cache: Optional cache of listing pages to consult and fill.
+
+    :return: Tuple of the objects, the common prefixes, e.g. "photos/2024/", and the next
+        continuation token if there are more pages, otherwise None.
+    """
+    prefix = prefix or ""
+    if metadata_cache:
+        is_cached, page = metadata_cache.get_page(
+            bucket_name, prefix, continuation_token, max_keys, delimiter=delimiter
+        )
+        if is_cached:
+            return page
+        generation = metadata_cache.generation
+
+    s3_client = s3_client or boto3.client("s3")
+    list_kwargs: dict[str, Any] = {"ContinuationToken": continuation_token} if continuation_token else {}
+    response = s3_client.list_objects_v2(
+        Bucket=bucket_name, Prefix=prefix, Delimiter=delimiter, MaxKeys=max_keys, **list_kwargs
+    )
+    common_prefixes: list["CommonPrefixTypeDef"] = response.get("CommonPrefixes", [])
+    page = (
+        response.get("Contents", []),
+        [common_prefix["Prefix"] for common_prefix in common_prefixes],
+        response.get("NextContinuationToken"),
+    )
+
+    if metadata_cache:
+        metadata_cache.set_page(
+            bucket_name, prefix, continuation_token, max_keys, page, generation=generation, delimiter=delimiter
+        )
+    return page
+
+
+def iter_s3_objects(
+    bucket_name: str,
+    prefix: str = "",
+    page_size: int = DEFAULT_MAX_KEYS,
+    s3_client: Optional["S3Client"] = None,
+) -> Iterator["ObjectTypeDef"]:
+    """
+    Lazily yield every object under ``prefix``, fetching one listing page at a time.
+
+    Only one page of objects is held in memory, so arbitrarily large prefixes can be walked.
+
+    :param bucket_name: Name of the S3 bucket to list objects from.
+    :param prefix: Prefix to filter objects by.
+    :param page_size: Number of keys to request per ``list_objects_v2`` call.
+    :param s3_client: Optional S3 client to use.
+        If not provided, a new client will be created.
+    """
+    s3_client = s3_client or boto3.client("s3")
+    paginator = s3_client.get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=bucket_name, Prefix=prefix or "", PaginationConfig={"PageSize": page_size}):
+        yield from page.get("Contents", [])
+
+
+def iter_s3_object_keys(
+    bucket_name: str,
+    prefix: str = "",
+    page_size: int = DEFAULT_MAX_KEYS,
+    s3_client: Optional["S3Client"] = None,
+) -> Iterator[str]:
+    """Lazily yield the key of every object under ``prefix``; see :func:`iter_s3_objects`."""
+    for s3_object in iter_s3_objects(bucket_name, prefix=prefix, page_size=page_size, s3_client=s3_client):
+        yield s3_object["Key"]
+
+
+def iter_s3_object_bodies(
+    bucket_name: str,
+    objects: Iterable["ObjectTypeDef"],
+    s3_client: Optional["S3Client"] = None,
+    prefetch_count: int = DEFAULT_PREFETCH_COUNT,
+    prefetch_max_object_bytes: int = DEFAULT_PREFETCH_MAX_OBJECT_BYTES,
+) -> Iterator[tuple["ObjectTypeDef", BinaryIO, Optional[str]]]:
+    """
+    Yield each listed object with a readable body, fetching up to ``prefetch_count`` objects ahead.
+
+    Bodies of objects no larger than ``prefetch_max_object_bytes`` are downloaded in full by the
+    prefetching workers; larger ones are returned as open streams to be read by the caller. Memory
+    use is therefore bounded by about ``prefetch_count * prefetch_max_object_bytes``.
+
+    Each object is fetched with its listed ETag as a precondition, so the body always matches the
+    listed size. Objects deleted or overwritten since they were listed are skipped.
+
+    :param bucket_name: Name of the S3 bucket.
+    :param objects: Objects to fetch, as listed by :func:`iter_s3_objects`. Consumed lazily.
+    :param s3_client: Optional S3 client to use.
+        If not provided, a new client will be created.
+    :param prefetch_count: Maximum number of objects fetched ahead of the one being yielded.
+    :param prefetch_max_object_bytes: Size up to which prefetched bodies are read into memory.
+
+    :return: The listed object, its body and the ``Content-Encoding`` it is stored with, if any, e.g.
+        "gzip" for an object stored compressed. The caller should close each body once read.
+    """
+    s3_client = s3_client or boto3.client("s3")
+
+    def _fetch(s3_object: "ObjectTypeDef") -> Optional[tuple[BinaryIO, Optional[str]]]:
+        try:
+            response = s3_client.get_object(Bucket=bucket_name, Key=s3_object["Key"], IfMatch=s3_object["ETag"])
+        except ClientError as error:
+            if error.response["Error"]["Code"] not in ("NoSuchKey", "PreconditionFailed", "412"):
+                raise
+            LOGGER.warning("Skipping %s, which changed after it was listed", s3_object["Key"])
+            return None
+        body, content_encoding = response["Body"], response.get("ContentEncoding")
+        if s3_object["Size"] > prefetch_max_object_bytes:
+            return body, content_encoding  # type: ignore[return-value]
+        with body:
+            return io.BytesIO(body.read()), content_encoding
+
+    executor = ThreadPoolExecutor(max_workers=prefetch_count)
+    window: deque[tuple["ObjectTypeDef", Future]] = deque()
+    try:
+        for s3_object in objects:
+            window.append((s3_object, executor.submit(copy_context().run, _fetch, s3_object)))
+            if len(window) > prefetch_count:
+                yield from _pop_fetched_body(window)
+        while window:
+            yield from _pop_fetched_body(window)
+    finally:
+        for _, body_future in window:
+            body_future.cancel()
+        executor.shutdown(wait=True)
+        for _, body_future in window:
+            if body_future.done() and not body_future.cancelled() and body_future.exception() is None:
+                if fetched := body_future.result():
+                    fetched[0].close()
+
+
+def _pop_fetched_body(
+    window: "deque[tuple[ObjectTypeDef, Future]]",
+) -> Iterator[tuple["ObjectTypeDef", BinaryIO, Optional[str]]]:
+    """Wait for the oldest prefetched object and yield it with its body and encoding, unless it was skipped."""
+    s3_object, body_future = window[0]
+    fetched = body_future.result()
+    window.popleft()
+    if fetched is not None:
+        body, content_encoding = fetched
+        yield s3_object, body, content_encoding
+
+
+def fetch_s3_objects_metadata_by_key(  # pylint: disable=too-many-arguments
+    bucket_name: str,
+    object_keys: Iterable[str],
+    s3_client: Optional["S3Client"] = None,
+    metadata_cache: Optional[S3MetadataCache] = None,
+    max_concurrency: int = DEFAULT_METADATA_LOOKUP_MAX_CONCURRENCY,
+    min_keys_per_listing_page: int = DEFAULT_MIN_KEYS_PER_LISTING_PAGE,
+) -> dict[str, Optional["ObjectTypeDef"]]:
+    """
+    Fetch metadata of many specific objects, using as few S3 calls as possible.
+
+    Keys found in ``metadata_cache`` are answered from it. When the rest share a prefix, they are
+    resolved from ``list_objects_v2`` pages under that prefix: since listings are sorted, one page
+    answers, found or missing, every requested key up to its last listed key, and each page starts
+    just before the next unanswered key, skipping unrequested objects in between. Once a page answers
+    fewer than ``min_keys_per_listing_page`` keys, the remaining keys are looked up with concurrent
+    ``head_object`` calls instead.
+
+    :param bucket_name: Name of the S3 bucket.
+    :param object_keys: Keys of the objects to look up.
+    :param s3_client: Optional S3 client to use.
+        If not provided, a new client will be created.
+    :param metadata_cache: Optional cache of head_object results to consult and fill.
+    :param max_concurrency: Maximum number of concurrent ``head_object`` calls.
+    :param min_keys_per_listing_page: Fewest keys a listing page must answer to keep listing.
+
+    :return: Mapping of every requested key to its metadata (with at least ``Key``, ``LastModified``,
+        ``Size`` and ``ETag``), or to None if the object does not exist.
+    """
+    s3_client = s3_client or boto3.client("s3")
+    remaining_keys = sorted(set(object_keys))
+    found: dict[str, Optional["ObjectTypeDef"]] = {}
+
+    if metadata_cache:
+        for object_key in list(remaining_keys):
+            is_cached, head = metadata_cache.get_head(bucket_name, object_key)
+            if is_cached:
+                found[object_key] = _head_to_object(object_key, head)
+                remaining_keys.remove(object_key)
+
+    prefix = os.path.commonprefix(remaining_keys) if remaining_keys else ""
+    while len(remaining_keys) >= min_keys_per_listing_page:
+        response = s3_client.list_objects_v2(
+            Bucket=bucket_name,
+            Prefix=prefix,
+            StartAfter=_key_just_before(remaining_keys[0]),
+            MaxKeys=DEFAULT_MAX_KEYS,
+        )
+        listed = {s3_object["Key"]: s3_object for s3_object in response.get("Contents", [])}
+        last_listed_key = max(listed, default=remaining_keys[0])
+        answered_keys = [
+            object_key
+            for object_key in remaining_keys
+            if not response.get("IsTruncated") or object_key <= last_listed_key
+        ]
+        for object_key in answered_keys:
+            found[object_key] = listed.get(object_key)
+        remaining_keys = [object_key for object_key in remaining_keys if object_key not in found]
+        if len(answered_keys) < min_keys_per_listing_page:
+            break
+
+    def _fetch(object_key: str) -> Optional["ObjectTypeDef"]:
+        head = fetch_s3_object_metadata(bucket_name, object_key, s3_client=s3_client, metadata_cache=metadata_cache)
+        return _head_to_object(object_key, head)
+
+    if remaining_keys:
+        with ThreadPoolExecutor(max_workers=min(max_concurrency, len(remaining_keys))) as executor:
+            head_futures = [executor.submit(copy_context().run, _fetch, object_key) for object_key in remaining_keys]
+            found.update(zip(remaining_keys, (head_future.result() for head_future in head_futures)))
+    return found
+
+
+def _key_just_before(object_key: str) -> str:
+    """
+    Return a string sorting just before ``object_key``, so a listing starting after it begins at ``object_key``.
+
+    S3 sorts keys by their UTF-8 bytes, which is code point order. Decrementing the last character
+    and appending the largest code point leaves only keys starting with the result in between,
+    e.g. "aa" then U+10FFFF for "ab", so that no other "aa..." key is listed. The result must be valid UTF-8
+    itself, so surrogate code points, which cannot be encoded, are skipped.
+    """
+    if not object_key:
+        return ""
+    code_point = ord(object_key[-1]) - 1
+    if code_point < 0:
+        # no string sorts between a key and the key followed by NUL
+        return object_key[:-1]
+    if _MIN_SURROGATE_CODE_POINT <= code_point <= _MAX_SURROGATE_CODE_POINT:
+        code_point = _MIN_SURROGATE_CODE_POINT - 1
+    return object_key[:-1] + chr(code_point) + chr(sys.maxunicode)
+
+
+def _head_to_object(object_key: str, head: Optional["HeadObjectOutputTypeDef"]) -> Optional["ObjectTypeDef"]:
+    """Reshape a ``head_object`` response into the form of a ``list_objects_v2`` entry."""
+    if head is None:
+        return None
+    return {
+        "Key": object_key,
+        "LastModified": head["LastModified"],
+        "Size": head["ContentLength"],
+        "ETag": head["ETag"],
+    }
@@ -1,38 +1,391 @@
 """Functions for writing objects from an S3 bucket--the "C" and "U" in CRUD."""
 
-from typing import Optional
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ThreadPoolExecutor,
+    wait,
+)
+from contextvars import copy_context
+from dataclasses import dataclass
+from typing import (
+    Any,
+    BinaryIO,
+    Callable,
+    Iterable,
+    Iterator,
+    Optional,
+    Union,
+)
 
 import boto3
+from botocore.exceptions import ClientError
+
+from files_api.s3.metadata_cache import S3MetadataCache
 
 try:
     from mypy_boto3_s3 import S3Client
+    from mypy_boto3_s3.type_defs import CompletedPartTypeDef
 except ImportError:  # pragma: no cover
     ...
 
+MIB = 1024 * 1024
+# S3 rejects multipart parts smaller than 5 MiB (except the last one), and uploads with more than 10,000 parts
+MIN_MULTIPART_PART_SIZE_BYTES = 5 * MIB
+MAX_MULTIPART_PARTS = 10_000
+DEFAULT_MULTIPART_THRESHOLD_BYTES = 8 * MIB
+DEFAULT_MULTIPART_PART_SIZE_BYTES = 8 * MIB
+DEFAULT_MULTIPART_MAX_CONCURRENCY = 4
+DEFAULT_BATCH_UPLOAD_MAX_CONCURRENCY = 16
+
+
+@dataclass(frozen=True)
+class ObjectToUpload:
+    """A file to upload as part of a batch with :func:`upload_s3_objects`."""
+
+    object_key: str
+    file_content: Union[bytes, BinaryIO]
+    content_type: Optional[str] = None
+    content_encoding: Optional[str] = None
+
 
-def upload_s3_object(
+@dataclass(frozen=True)
+class UploadResult:
+    """Outcome of uploading one file of a batch; ``created`` is None if the upload failed."""
+
+    object_key: str
+    created: Optional[bool] = None
+    error_code: Optional[str] = None
+    error_message: Optional[str] = None
+
+
+def upload_s3_object(  # pylint: disable=too-many-arguments
     bucket_name: str,
     object_key: str,
-    file_content: bytes,
+    file_content: Union[bytes, BinaryIO],
     content_type: Optional[str] = None,
     s3_client: Optional["S3Client"] = None,
-) -> None:
+    multipart_threshold: int = DEFAULT_MULTIPART_THRESHOLD_BYTES,
+    part_size: int = DEFAULT_MULTIPART_PART_SIZE_BYTES,
+    max_concurrency: int = DEFAULT_MULTIPART_MAX_CONCURRENCY,
+    metadata_cache: Optional[S3MetadataCache] = None,
+    if_match: Optional[str] = None,
+    content_encoding: Optional[str] = None,
+) -> bool:
     """
     Upload a file to an S3 bucket.
 
+    The upload is first attempted as a conditional write (``If-None-Match: *``), so creating a new
+    object costs a single request and whether the object already existed is learned from the
+    response rather than from a separate ``head_object`` call. Overwrites repeat the final request
+    without the condition. If ``if_match`` is given, the object is only overwritten if its current
+    ETag matches; otherwise S3 raises a 412 (or a 404 if the object does not exist).
+
+    Streams are read incrementally. If a stream turns out to hold at least ``multipart_threshold``
+    bytes, it is uploaded with S3 multipart upload, keeping at most ``max_concurrency`` parts in
+    flight, so memory use is bounded by roughly ``part_size * (max_concurrency + 1)`` regardless of
+    the file size. S3 allows at most 10,000 parts, so ``part_size`` caps the largest uploadable object.
+
     :param bucket_name: The name of the S3 bucket.
     :param object_key: path to the object in the S3 bucket.
-    :param file_content: The content of the file to upload.
+    :param file_content: The content of the file to upload, either as bytes or a binary stream.
     :param content_type: The MIME type of the file, e.g. "text/plain" for a text file.
     :param s3_client: An optional boto3 S3 client. If not provided, one will be created.
+    :param multipart_threshold: Size in bytes at or above which multipart upload is used.
+    :param part_size: Size in bytes of each multipart part (all but the last).
+    :param max_concurrency: Maximum number of parts uploaded concurrently.
+    :param metadata_cache: Optional metadata cache in which to invalidate the object once written.
+    :param if_match: Optional ETag the existing object must have for the write to succeed.
+    :param content_encoding: Optional ``Content-Encoding`` to store with the object, e.g. "gzip" if
+        ``file_content`` is already gzip-compressed.
+
+    :return: True if a new object was created, False if an existing object was overwritten.
     """
     s3_client = s3_client or boto3.client(
         "s3"
     )  # Helps us not re-instantiate the client every time we call this function.
-    content_type = content_type or "application/octet-stream"
-    s3_client.put_object(
-        Bucket=bucket_name,
-        Key=object_key,
-        Body=file_content,
-        ContentType=content_type,
+    object_attributes = {"ContentType": content_type or "application/octet-stream"}
+    if content_encoding:
+        object_attributes["ContentEncoding"] = content_encoding
+
+    try:
+        return _upload_s3_object(
+            s3_client=s3_client,
+            bucket_name=bucket_name,
+            object_key=object_key,
+            file_content=file_content,
+            object_attributes=object_attributes,
+            multipart_threshold=multipart_threshold,
+            part_size=part_size,
+            max_concurrency=max_concurrency,
+            if_match=if_match,
+        )
+    finally:
+        if metadata_cache:
+            metadata_cache.invalidate_object(bucket_name, object_key)
+
+
+def upload_s3_objects(
+    bucket_name: str,
+    objects: Iterable[ObjectToUpload],
+    s3_client: Optional["S3Client"] = None,
+    metadata_cache: Optional[S3MetadataCache] = None,
+    max_concurrency: int = DEFAULT_BATCH_UPLOAD_MAX_CONCURRENCY,
+) -> list[UploadResult]:
+    """
+    Upload many files concurrently with a bounded pool of workers.
+
+    ``objects`` is consumed lazily, at most ``max_concurrency`` files ahead of the finished uploads,
+    so it may be a generator reading files from a stream, e.g. the members of a tar archive.
+    Each file is uploaded like :func:`upload_s3_object`, so new files cost a single ``put_object``.
+
+    :param bucket_name: The name of the S3 bucket.
+    :param objects: The files to upload.
+    :param s3_client: An optional boto3 S3 client. If not provided, one will be created.
+    :param metadata_cache: Optional metadata cache in which to invalidate each object once written.
+    :param max_concurrency: Maximum number of files uploaded concurrently.
+
+    :return: One result per file, in the order of ``objects``. A failed upload is reported in its
+        result rather than raised, so one bad file does not abort the rest of the batch.
+    """
+    s3_client = s3_client or boto3.client("s3")
+
+    def _upload(object_to_upload: ObjectToUpload) -> UploadResult:
+        try:
+            created = upload_s3_object(
+                bucket_name=bucket_name,
+                object_key=object_to_upload.object_key,
+                file_content=object_to_upload.file_content,
+                content_type=object_to_upload.content_type,
+                content_encoding=object_to_upload.content_encoding,
+                s3_client=s3_client,
+                metadata_cache=metadata_cache,
+            )
+        except ClientError as error:
+            return UploadResult(
+                object_key=object_to_upload.object_key,
+                error_code=error.response["Error"]["Code"],
+                error_message=str(error),
+            )
+        return UploadResult(object_key=object_to_upload.object_key, created=created)
+
+    results: list[Future] = []
+    with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        in_flight: set[Future] = set()
+        for object_to_upload in objects:
+            # wait for a slot before reading further so at most `max_concurrency` files are buffered
+            while len(in_flight) >= max_concurrency:
+                _, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            upload_future = executor.submit(copy_context().run, _upload, object_to_upload)
+            in_flight.add(upload_future)
+            results.append(upload_future)
+    return [upload_future.result() for upload_future in results]
+
+
+def complete_s3_multipart_upload(  # pylint: disable=too-many-arguments
+    bucket_name: str,
+    object_key: str,
+    upload_id: str,
+    parts: list["CompletedPartTypeDef"],
+    s3_client: Optional["S3Client"] = None,
+    metadata_cache: Optional[S3MetadataCache] = None,
+) -> bool:
+    """
+    Complete a multipart upload whose parts were uploaded by a client, e.g. through presigned URLs.
+
+    Like :func:`upload_s3_object`, the upload is first completed conditionally so that creating a
+    new object costs a single request.
+
+    :param bucket_name: The name of the S3 bucket.
+    :param object_key: path to the object in the S3 bucket.
+    :param upload_id: ID of the multipart upload, as returned when it was created.
+    :param parts: The ``PartNumber`` and ``ETag`` of every uploaded part.
+    :param s3_client: An optional boto3 S3 client. If not provided, one will be created.
+    :param metadata_cache: Optional metadata cache in which to invalidate the object once written.
+
+    :return: True if a new object was created, False if an existing object was overwritten.
+    """
+    s3_client = s3_client or boto3.client("s3")
+    multipart_upload = {"Parts": sorted(parts, key=lambda part: part["PartNumber"])}
+    try:
+        return write_conditionally(
+            lambda **condition: s3_client.complete_multipart_upload(
+                Bucket=bucket_name,
+                Key=object_key,
+                UploadId=upload_id,
+                MultipartUpload=multipart_upload,  # type: ignore[arg-type]
+                **condition,
+            ),
+            if_match=None,
+        )
+    finally:
+        if metadata_cache:
+            metadata_cache.invalidate_object(bucket_name, object_key)
+
+
+def abort_s3_multipart_upload(
+    bucket_name: str,
+    object_key: str,
+    upload_id: str,
+    s3_client: Optional["S3Client"] = None,
+) -> None:
+    """
+    Abort a multipart upload, discarding any parts already uploaded.
+
+    :param bucket_name: The name of the S3 bucket.
+    :param object_key: path to the object in the S3 bucket.
+    :param upload_id: ID of the multipart upload, as returned when it was created.
+    :param s3_client: An optional boto3 S3 client. If not provided, one will be created.
+    """
+    s3_client = s3_client or boto3.client("s3")
+    s3_client.abort_multipart_upload(Bucket=bucket_name, Key=object_key, UploadId=upload_id)
+
+
+def _upload_s3_object(  # pylint: disable=too-many-arguments
+    s3_client: "S3Client",
+    bucket_name: str,
+    object_key: str,
+    file_content: Union[bytes, BinaryIO],
+    object_attributes: dict[str, str],
+    multipart_threshold: int,
+    part_size: int,
+    max_concurrency: int,
+    if_match: Optional[str],
+) -> bool:
+    """Upload with a single conditional ``put_object``, or in parts if the content reaches ``multipart_threshold``."""
+    if isinstance(file_content, (bytes, bytearray)):
+        head = bytes(file_content)
+        stream = None
+    else:
+        head = _read_up_to(file_content, multipart_threshold)
+        stream = file_content
+
+    if len(head) < multipart_threshold:
+        return write_conditionally(
+            lambda **condition: s3_client.put_object(
+                Bucket=bucket_name, Key=object_key, Body=head, **object_attributes, **condition
+            ),
+            if_match=if_match,
+        )
+
+    return _upload_s3_object_in_parts(
+        s3_client=s3_client,
+        bucket_name=bucket_name,
+        object_key=object_key,
+        parts=_iter_parts(head=head, stream=stream, part_size=max(part_size, MIN_MULTIPART_PART_SIZE_BYTES)),
+        object_attributes=object_attributes,
+        max_concurrency=max_concurrency,
+        if_match=if_match,
     )
+
+
+def _upload_s3_object_in_parts(  # pylint: disable=too-many-arguments
+    s3_client: "S3Client",
+    bucket_name: str,
+    object_key: str,
+    parts: Iterator[bytes],
+    object_attributes: dict[str, str],
+    max_concurrency: int,
+    if_match: Optional[str],
+) -> bool:
+    """Upload ``parts`` as a multipart upload with bounded concurrency, aborting it on any failure."""
+    upload_id = s3_client.create_multipart_upload(Bucket=bucket_name, Key=object_key, **object_attributes)["UploadId"]
+
+    def _upload_part(part_number: int, body: bytes) -> "CompletedPartTypeDef":
+        response = s3_client.upload_part(
+            Bucket=bucket_name, Key=object_key, UploadId=upload_id, PartNumber=part_number, Body=body
+        )
+        return {"PartNumber": part_number, "ETag": response["ETag"]}
+
+    executor = ThreadPoolExecutor(max_workers=max_concurrency)
+    in_flight: set[Future] = set()
+    completed_parts: list["CompletedPartTypeDef"] = []
+    try:
+        for part_number, body in enumerate(parts, start=1):
+            # wait for a slot before reading further so at most `max_concurrency` parts are buffered
+            while len(in_flight) >= max_concurrency:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                completed_parts.extend(future.result() for future in done)
+            in_flight.add(executor.submit(copy_context().run, _upload_part, part_number, body))
+        completed_parts.extend(future.result() for future in wait(in_flight).done)
+
+        multipart_upload = {"Parts": sorted(completed_parts, key=lambda part: part["PartNumber"])}
+        return write_conditionally(
+            lambda **condition: s3_client.complete_multipart_upload(
+                Bucket=bucket_name,
+                Key=object_key,
+                UploadId=upload_id,
+                MultipartUpload=multipart_upload,
+                **condition,
+            ),
+            if_match=if_match,
+        )
+    except BaseException:
+        executor.shutdown(wait=True, cancel_futures=True)
+        s3_client.abort_multipart_upload(Bucket=bucket_name, Key=object_key, UploadId=upload_id)
+        raise
+    finally:
+        executor.shutdown(wait=True)
+
+
+def write_conditionally(write: Callable[..., Any], if_match: Optional[str]) -> bool:
+    """
+    Call ``write`` with ``IfMatch=if_match`` if given; otherwise create-or-overwrite.
+
+    Create-or-overwrite calls ``write`` with ``IfNoneMatch="*"``, and again without it if the object
+    already exists, so that creating a new object costs a single request.
+
+    :param write: Makes the S3 call that writes the object, e.g. a ``put_object``, ``copy_object`` or
+        ``complete_multipart_upload`` with every argument but the conditions bound, and accepts
+        ``IfMatch`` or ``IfNoneMatch`` keyword arguments.
+    :param if_match: Optional ETag the existing object must have for the write to succeed.
+
+    :raises botocore.exceptions.ClientError: If the write fails, e.g. with a 412 if ``if_match`` does not hold.
+
+    :return: True if the write created the object, False if it overwrote an existing one.
+    """
+    if if_match:
+        write(IfMatch=if_match)
+        return False
+    try:
+        write(IfNoneMatch="*")
+        return True
+    except ClientError as error:
+        if error.response["Error"]["Code"] not in ("PreconditionFailed", "412"):
+            raise
+    write()
+    return False
+
+
+def _iter_parts(head: bytes, stream: Optional[BinaryIO], part_size: int) -> Iterator[bytes]:
+    """Yield ``part_size`` chunks of ``head`` followed by the rest of ``stream``; only the last may be shorter."""
+    # parts are sliced out of the head in place, since copying the rest of it after each part is quadratic
+    head_view = memoryview(head)
+    offset = 0
+    while len(head_view) - offset >= part_size:
+        part_end = offset + part_size
+        yield bytes(head_view[offset:part_end])
+        offset = part_end
+    buffer = bytes(head_view[offset:])
+    # the buffer holds less than a part here, so each read completes a part unless the stream ends
+    while stream is not None and (chunk := _read_up_to(stream, part_size - len(buffer))):
+        buffer += chunk
+        if len(buffer) < part_size:
+            break
+        yield buffer
+        buffer = b""
+    if buffer:
+        yield buffer
+
+
+def _read_up_to(stream: BinaryIO, num_bytes: int) -> bytes:
+    """Read from ``stream`` until ``num_bytes`` bytes are read or the stream is exhausted."""
+    chunks: list[bytes] = []
+    remaining = num_bytes
+    while remaining > 0:
+        chunk = stream.read(remaining)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b"".join(chunks)
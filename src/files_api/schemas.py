@@ -3,13 +3,16 @@
 import re
 from datetime import datetime
 from typing import (
+    Annotated,
     List,
+    Literal,
     Optional,
 )
 
 from pydantic import (
     BaseModel,
     Field,
+    StringConstraints,
     model_validator,
 )
 from typing_extensions import Self
@@ -18,14 +21,18 @@ DEFAULT_GET_FILES_PAGE_SIZE = 10
 DEFAULT_GET_FILES_MIN_PAGE_SIZE = 10
 DEFAULT_GET_FILES_MAX_PAGE_SIZE = 100
 DEFAULT_GET_FILES_DIRECTORY = ""
+MAX_GET_FILES_METADATA_FILE_PATHS = 1_000
+_VALID_PATH_PATTERN = re.compile(r"^([/a-zA-Z0-9_.-])+(/[a-zA-Z0-9_.-]+)*$")
 
 
 def is_valid_path(value: str) -> bool:
     """Validate minimum and maximum length and regex of a path."""
-    valid_path_patern = r"^([/a-zA-Z0-9_.-])+(/[a-zA-Z0-9_.-]+)*$"
-    if len(value) < 1 or len(value) > 1024 or not re.match(valid_path_patern, value):
-        return False
-    return True
+    return 1 <= len(value) <= 1024 and _VALID_PATH_PATTERN.match(value) is not None
+
+
+def directory_prefix(directory: str) -> str:
+    """Return ``directory`` with a trailing slash, so that it only prefixes the files inside it."""
+    return directory if directory.endswith("/") else directory + "/"
 
 
 class FileMetadata(BaseModel):
@@ -48,6 +55,25 @@ class GetFilesResponse(BaseModel):
 
     files: List[FileMetadata]
     next_page_token: Optional[str]
+    directories: List[str] = Field(
+        default_factory=list,
+        description="Subdirectories of `directory`, e.g. `photos/2024/`; only listed when `recursive` is false.",
+    )
+
+
+class GetFilesMetadataRequest(BaseModel):
+    """Request schema for looking up the metadata of many files at once."""
+
+    file_paths: List[Annotated[str, StringConstraints(min_length=1)]] = Field(
+        min_length=1, max_length=MAX_GET_FILES_METADATA_FILE_PATHS
+    )
+
+
+class GetFilesMetadataResponse(BaseModel):
+    """Response schema for looking up the metadata of many files at once."""
+
+    files: List[FileMetadata]
+    not_found: List[str]
 
 
 class GetFilesQueryParams(BaseModel):
@@ -60,16 +86,33 @@ class GetFilesQueryParams(BaseModel):
     )
     directory: str = DEFAULT_GET_FILES_DIRECTORY
     page_token: Optional[str] = None
+    recursive: bool = True
 
     @model_validator(mode="after")
     def check_page_token_is_mutually_exclusive_with_page_size_and_directory(self) -> Self:
-        """Validate page_token is mutually exclusive with page_size and directory."""
+        """Validate page_token is mutually exclusive with page_size, directory and recursive."""
         if self.page_token:
             get_files_query_params: dict = self.model_dump(exclude_unset=True)
             page_size_set = "page_size" in get_files_query_params.keys()
             directory_set = "directory" in get_files_query_params.keys()
-            if page_size_set or directory_set:
-                raise ValueError("page_token is mutually exclusive with page_size and directory")
+            recursive_set = "recursive" in get_files_query_params.keys()
+            if page_size_set or directory_set or recursive_set:
+                raise ValueError("page_token is mutually exclusive with page_size, directory and recursive")
+        return self
+
+
+class ExportFilesQueryParams(BaseModel):
+    """Query parameters schema for exporting a whole listing."""
+
+    directory: str = DEFAULT_GET_FILES_DIRECTORY
+    recursive: bool = True
+    cursor: Optional[str] = None
+
+    @model_validator(mode="after")
+    def check_cursor_is_mutually_exclusive_with_directory(self) -> Self:
+        """Validate cursor is mutually exclusive with directory and recursive, which it remembers."""
+        if self.cursor and ({"directory", "recursive"} & self.model_fields_set):
+            raise ValueError("cursor is mutually exclusive with directory and recursive")
         return self
 
 
@@ -79,6 +122,120 @@ class DeleteFileResponse(BaseModel):
     message: str
 
 
+class DeleteFilesRequest(BaseModel):
+    """Request schema for deleting many files at once, either by path or by directory."""
+
+    file_paths: Optional[List[str]] = Field(default=None, min_length=1)
+    directory: Optional[str] = Field(default=None, min_length=1)
+
+    @model_validator(mode="after")
+    def check_exactly_one_of_file_paths_and_directory(self) -> Self:
+        """Validate that exactly one of file_paths and directory is set, appending a slash to the directory."""
+        if (self.file_paths is None) == (self.directory is None):
+            raise ValueError("exactly one of file_paths and directory must be set")
+        if self.directory is not None:
+            # so that deleting "photos" leaves "photos2024/" and "photos.txt" alone
+            self.directory = directory_prefix(self.directory)
+        return self
+
+
+class DeleteFileError(BaseModel):
+    """A file that could not be deleted, with the reason reported by S3."""
+
+    file_path: str
+    code: str
+    message: str
+
+
+class DeleteFilesResponse(BaseModel):
+    """Response schema for deleting many files at once."""
+
+    deleted_count: int
+    errors: List[DeleteFileError]
+
+
+class CopyFilesRequest(BaseModel):
+    """
+    Request schema for copying or moving a file, or every file under a directory.
+
+    With `recursive` set, `source` and `destination` are directories, and every file under `source`
+    is copied to the same relative path under `destination`.
+    """
+
+    source: str
+    destination: str
+    recursive: bool = False
+
+    @model_validator(mode="after")
+    def check_for_valid_and_distinct_paths(self) -> Self:
+        """Validate both paths, and that directories do not contain one another."""
+        if not (is_valid_path(self.source) and is_valid_path(self.destination)):
+            raise ValueError("Invalid file path")
+        if self.recursive:
+            self.source, self.destination = directory_prefix(self.source), directory_prefix(self.destination)
+            if self.source.startswith(self.destination) or self.destination.startswith(self.source):
+                raise ValueError("source and destination directories must not contain one another")
+        elif self.source == self.destination:
+            raise ValueError("source and destination must differ")
+        return self
+
+
+class CopyFileError(BaseModel):
+    """A file that could not be copied or moved, with the reason reported by S3."""
+
+    file_path: str
+    code: str
+    message: str
+
+
+class CopyFilesResponse(BaseModel):
+    """Response schema for copying a file or directory."""
+
+    copied_count: int
+    errors: List[CopyFileError]
+
+
+class MoveFilesResponse(BaseModel):
+    """Response schema for moving a file or directory."""
+
+    moved_count: int
+    errors: List[CopyFileError]
+
+
+class PrewarmBodyCacheRequest(BaseModel):
+    """Request schema for loading every file under a directory into the file body cache."""
+
+    directory: str = Field(min_length=1)
+
+    @model_validator(mode="after")
+    def check_and_normalize_directory(self) -> Self:
+        """Validate the directory, and append a slash so that it only matches the files inside it."""
+        if not is_valid_path(self.directory):
+            raise ValueError("Invalid directory")
+        self.directory = directory_prefix(self.directory)
+        return self
+
+
+class PrewarmBodyCacheResponse(BaseModel):
+    """Response schema for pre-warming the file body cache."""
+
+    cached_count: int
+    cached_bytes: int
+
+
+class BodyCacheStatsResponse(BaseModel):
+    """Usage counters of the file body cache since the server started."""
+
+    memory_hits: int
+    disk_hits: int
+    misses: int
+    revalidations: int
+    bytes_saved: int
+    evictions: int
+    invalidations: int
+    hit_rate: float
+
+
 class PutFileResponse(BaseModel):
     """Response schema for uploading a file."""
 
@@ -91,3 +248,94 @@ class PutFileResponse(BaseModel):
         if not is_valid_path(self.file_path):
             raise ValueError("Invalid file path")
         return self
+
+
+class UploadFileResult(BaseModel):
+    """Outcome of uploading one file of a batch."""
+
+    file_path: str
+    status: Literal["created", "overwritten", "failed"]
+    error: Optional[str] = None
+
+
+class UploadFilesResponse(BaseModel):
+    """Response schema for uploading many files at once."""
+
+    files: List[UploadFileResult]
+
+
+class PresignFileRequest(BaseModel):
+    """Request schema for presigning a direct transfer of a file to or from S3."""
+
+    file_path: str
+    operation: Literal["download", "upload"]
+    content_type: Optional[str] = None
+    size_bytes: Optional[int] = Field(default=None, ge=0)
+
+    @model_validator(mode="after")
+    def check_for_valid_path(self) -> Self:
+        """Validate minimum and maximum length and regex of a path."""
+        if not is_valid_path(self.file_path):
+            raise ValueError("Invalid file path")
+        return self
+
+
+class PresignedPart(BaseModel):
+    """A presigned URL to which one part of a multipart upload is sent with `PUT`."""
+
+    part_number: int
+    url: str
+
+
+class PresignFileResponse(BaseModel):
+    """
+    Response schema for presigning a direct transfer of a file to or from S3.
+
+    Downloads and small uploads are a single request to `url`. Uploads of `size_bytes` at or above the
+    multipart threshold instead send each `part_size_bytes` slice of the file to the URL of its part,
+    then complete the upload with the `ETag` of every part.
+    """
+
+    file_path: str
+    method: Literal["GET", "PUT"]
+    expires_at: datetime
+    url: Optional[str] = None
+    upload_id: Optional[str] = None
+    part_size_bytes: Optional[int] = None
+    parts: Optional[List[PresignedPart]] = None
+
+
+class CompletedUploadPart(BaseModel):
+    """A part uploaded to a presigned URL, identified by the `ETag` header S3 returned for it."""
+
+    part_number: int = Field(ge=1)
+    etag: str
+
+
+class CompleteUploadRequest(BaseModel):
+    """Request schema for completing a presigned multipart upload."""
+
+    file_path: str
+    upload_id: str
+    parts: List[CompletedUploadPart] = Field(min_length=1)
+
+    @model_validator(mode="after")
+    def check_for_valid_path(self) -> Self:
+        """Validate minimum and maximum length and regex of a path."""
+        if not is_valid_path(self.file_path):
+            raise ValueError("Invalid file path")
+        return self
+
+
+class AbortUploadRequest(BaseModel):
+    """Request schema for aborting a presigned multipart upload."""
+
+    file_path: str
+    upload_id: str
+
+    @model_validator(mode="after")
+    def check_for_valid_path(self) -> Self:
+        """Validate minimum and maximum length and regex of a path."""
+        if not is_valid_path(self.file_path):
+            raise ValueError("Invalid file path")
+        return self
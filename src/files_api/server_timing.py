@@ -0,0 +1,195 @@
+"""
+``Server-Timing`` response headers breaking the time taken by a request down by phase.
+
+For example ``body;dur=12.1, s3-head;dur=3.2;desc="1 call", s3-put;dur=25.7;desc="1 call",
+serialize;dur=0.3, total;dur=42.5``, in milliseconds, which browsers show in their network panel:
+
+- ``body``: receiving and parsing the request body, up to the route's endpoint being called
+- ``s3-<kind>``: the S3 calls of each kind (``head``, ``get``, ``put``, ``list``, ``delete``, ``copy``
+  or ``other``) that completed before the response started, retries included
+- ``serialize``: from the endpoint returning to the response starting, i.e. building the response
+- ``total``: from the request being received to the response starting
+
+S3 calls are timed by :mod:`files_api.s3.call_tracking`, so :class:`ServerTimingMiddleware` must
+run within :func:`files_api.middleware.add_s3_call_count_header`.
+"""
+
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from functools import wraps
+from ipaddress import (
+    IPv4Network,
+    IPv6Network,
+    ip_address,
+)
+from typing import (
+    Any,
+    Callable,
+    Optional,
+    Sequence,
+    Union,
+)
+
+from fastapi.routing import APIRoute
+from starlette.datastructures import MutableHeaders
+from starlette.types import (
+    ASGIApp,
+    Message,
+    Receive,
+    Scope,
+    Send,
+)
+
+from files_api.s3.call_tracking import (
+    S3CallLog,
+    current_s3_call_log,
+)
+
+SERVER_TIMING_HEADER = "Server-Timing"
+# the kind of each S3 operation made by the API, reported as s3-<kind>; other operations are s3-other
+S3_OPERATION_KINDS = {
+    "HeadObject": "head",
+    "GetObject": "get",
+    "PutObject": "put",
+    "CreateMultipartUpload": "put",
+    "UploadPart": "put",
+    "CompleteMultipartUpload": "put",
+    "AbortMultipartUpload": "put",
+    "ListObjectsV2": "list",
+    "DeleteObject": "delete",
+    "DeleteObjects": "delete",
+    "CopyObject": "copy",
+    "UploadPartCopy": "copy",
+}
+
+
+@dataclass
+class RequestTiming:
+    """When each phase of a request started or ended, in :func:`time.perf_counter` seconds."""
+
+    started_at: float
+    body_started_at: Optional[float] = None
+    body_ended_at: Optional[float] = None
+    endpoint_started_at: Optional[float] = None
+    endpoint_returned_at: Optional[float] = None
+
+
+_CURRENT_REQUEST_TIMING: ContextVar[Optional[RequestTiming]] = ContextVar("current_request_timing", default=None)
+
+
+class ServerTimingRoute(APIRoute):
+    """An API route recording when its endpoint is called and returns, in the request's :class:`RequestTiming`."""
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any):
+        super().__init__(path, _timed_endpoint(endpoint), **kwargs)
+
+
+def _timed_endpoint(endpoint: Callable[..., Any]) -> Callable[..., Any]:
+    # FastAPI reads the signature of the wrapped endpoint, so its parameters and response model are unchanged
+    @wraps(endpoint)
+    async def _endpoint(*args: Any, **kwargs: Any) -> Any:
+        timing = _CURRENT_REQUEST_TIMING.get()
+        if timing is not None:
+            timing.endpoint_started_at = time.perf_counter()
+        try:
+            return await endpoint(*args, **kwargs)
+        finally:
+            if timing is not None:
+                timing.endpoint_returned_at = time.perf_counter()
+
+    return _endpoint
+
+
+def format_server_timing(timing: RequestTiming, s3_call_log: Optional[S3CallLog], ended_at: float) -> str:
+    """
+    Format the value of the ``Server-Timing`` header of a request whose response starts at ``ended_at``.
+
+    :param timing: When the phases of the request started and ended.
+    :param s3_call_log: The S3 calls made by the request, if they were tracked.
+    :param ended_at: When the response started, in :func:`time.perf_counter` seconds.
+    :return: The header's value, with durations in milliseconds.
+    """
+    metrics: list[str] = []
+    if timing.body_started_at is not None:
+        body_ended_at = timing.body_ended_at or ended_at
+        if timing.endpoint_started_at is not None and body_ended_at <= timing.endpoint_started_at:
+            # bodies read before the endpoint is called are parsed by then too, e.g. multipart forms
+            body_ended_at = timing.endpoint_started_at
+        metrics.append(_metric("body", body_ended_at - timing.body_started_at))
+
+    if s3_call_log is not None:
+        seconds_by_kind: dict[str, float] = {}
+        calls_by_kind: dict[str, int] = {}
+        for operation, seconds in list(s3_call_log.durations):
+            kind = S3_OPERATION_KINDS.get(operation, "other")
+            seconds_by_kind[kind] = seconds_by_kind.get(kind, 0) + seconds
+            calls_by_kind[kind] = calls_by_kind.get(kind, 0) + 1
+        for kind, seconds in seconds_by_kind.items():
+            num_calls = calls_by_kind[kind]
+            metrics.append(_metric(f"s3-{kind}", seconds, f"{num_calls} call{'s' if num_calls > 1 else ''}"))
+
+    if timing.endpoint_returned_at is not None:
+        metrics.append(_metric("serialize", ended_at - timing.endpoint_returned_at))
+    metrics.append(_metric("total", ended_at - timing.started_at))
+    return ", ".join(metrics)
+
+
+def _metric(name: str, seconds: float, description: Optional[str] = None) -> str:
+    metric = f"{name};dur={seconds * 1000:.1f}"
+    return f'{metric};desc="{description}"' if description else metric
+
+
+class ServerTimingMiddleware:  # pylint: disable=too-few-public-methods
+    """
+    Add a ``Server-Timing`` header to the responses to callers from ``trusted_networks``, or to every caller if None.
+
+    The header reveals how the API spends its time, so it can be restricted to internal callers.
+    Callers are identified by the address of the connection, i.e. that of the nearest proxy, if any.
+    """
+
+    def __init__(self, app: ASGIApp, trusted_networks: Optional[Sequence[Union[IPv4Network, IPv6Network]]] = None):
+        self.app = app
+        self.trusted_networks = trusted_networks
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Run the app, adding a ``Server-Timing`` header to its response if the caller is trusted."""
+        if scope["type"] != "http" or not self._is_trusted(scope):
+            await self.app(scope, receive, send)
+            return
+
+        timing = RequestTiming(started_at=time.perf_counter())
+        s3_call_log = current_s3_call_log()
+
+        async def _receive() -> Message:
+            received_at = time.perf_counter()
+            message = await receive()
+            if message["type"] == "http.request":
+                if timing.body_started_at is None:
+                    timing.body_started_at = received_at
+                if not message.get("more_body", False):
+                    timing.body_ended_at = time.perf_counter()
+            return message
+
+        async def _send(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(raw=message["headers"]).append(
+                    SERVER_TIMING_HEADER, format_server_timing(timing, s3_call_log, ended_at=time.perf_counter())
+                )
+            await send(message)
+
+        token = _CURRENT_REQUEST_TIMING.set(timing)
+        try:
+            await self.app(scope, _receive, _send)
+        finally:
+            _CURRENT_REQUEST_TIMING.reset(token)
+
+    def _is_trusted(self, scope: Scope) -> bool:
+        if self.trusted_networks is None:
+            return True
+        client = scope.get("client")
+        try:
+            client_address = ip_address(client[0]) if client else None
+        except ValueError:  # e.g. a unix socket, or the test client
+            return False
+        return client_address is not None and any(client_address in network for network in self.trusted_networks)
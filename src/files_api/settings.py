@@ -1,10 +1,76 @@
 """Settings for Files API."""
 
-from pydantic import Field
+from typing import (
+    Literal,
+    Optional,
+)
+
+from pydantic import (
+    Field,
+    IPvAnyNetwork,
+    field_validator,
+    model_validator,
+)
 from pydantic_settings import (
     BaseSettings,
     SettingsConfigDict,
 )
+from typing_extensions import Self
+
+from files_api.broadcast import DEFAULT_BROADCAST_CAPACITY_BYTES
+from files_api.compression import (
+    DEFAULT_COMPRESSION_MIN_SIZE_BYTES,
+    SUPPORTED_CONTENT_ENCODINGS,
+)
+from files_api.list_prefetch import (
+    DEFAULT_LIST_PREFETCH_CAPACITY_BYTES,
+    DEFAULT_LIST_PREFETCH_TTL_SECONDS,
+)
+from files_api.s3.body_cache import (
+    DEFAULT_BODY_CACHE_DISK_CAPACITY_BYTES,
+    DEFAULT_BODY_CACHE_DISK_MAX_OBJECT_BYTES,
+    DEFAULT_BODY_CACHE_MEMORY_MAX_OBJECT_BYTES,
+)
+from files_api.s3.client import (
+    DEFAULT_CONNECT_TIMEOUT_SECONDS,
+    DEFAULT_MAX_POOL_CONNECTIONS,
+    DEFAULT_MAX_RETRY_ATTEMPTS,
+    DEFAULT_READ_TIMEOUT_SECONDS,
+    DEFAULT_RETRY_MODE,
+)
+from files_api.s3.copy_objects import (
+    DEFAULT_BULK_COPY_MAX_CONCURRENCY,
+    DEFAULT_COPY_PART_MAX_CONCURRENCY,
+    DEFAULT_COPY_PART_SIZE_BYTES,
+)
+from files_api.s3.delete_objects import DEFAULT_BULK_DELETE_MAX_CONCURRENCY
+from files_api.s3.metadata_cache import (
+    DEFAULT_METADATA_CACHE_CAPACITY,
+    DEFAULT_METADATA_CACHE_NEGATIVE_TTL_SECONDS,
+    DEFAULT_METADATA_CACHE_TTL_SECONDS,
+)
+from files_api.s3.presigned_urls import (
+    DEFAULT_PRESIGNED_URL_EXPIRATION_SECONDS,
+    MAX_PRESIGNED_URL_EXPIRATION_SECONDS,
+)
+from files_api.s3.read_objects import (
+    DEFAULT_BODY_CACHE_PREWARM_MAX_CONCURRENCY,
+    DEFAULT_METADATA_LOOKUP_MAX_CONCURRENCY,
+    DEFAULT_PREFETCH_COUNT,
+    DEFAULT_PREFETCH_MAX_OBJECT_BYTES,
+)
+from files_api.s3.write_objects import (
+    DEFAULT_BATCH_UPLOAD_MAX_CONCURRENCY,
+    DEFAULT_MULTIPART_MAX_CONCURRENCY,
+    DEFAULT_MULTIPART_PART_SIZE_BYTES,
+    DEFAULT_MULTIPART_THRESHOLD_BYTES,
+    MIN_MULTIPART_PART_SIZE_BYTES,
+)
+from files_api.storage.s3 import DEFAULT_COALESCED_BODY_FANOUT_MAX_BYTES
+from files_api.tracing import (
+    TracesExporter,
+    TracesSampler,
+)
 
 
 class Settings(BaseSettings):
@@ -16,6 +82,118 @@ class Settings(BaseSettings):
     Fast API Settings Docs: https://fastapi.tiangolo.com/advanced/settings/
     """
 
-    s3_bucket_name: str = Field(...)
+    # --- where files are stored: an S3 bucket, or a directory of the local filesystem --- #
+    storage_backend: Literal["s3", "local"] = "s3"
+    s3_bucket_name: Optional[str] = None
+    local_storage_directory: Optional[str] = None
+
+    # --- shared S3 client / connection pool --- #
+    s3_max_pool_connections: int = Field(default=DEFAULT_MAX_POOL_CONNECTIONS, ge=1)
+    s3_connect_timeout_seconds: float = Field(default=DEFAULT_CONNECT_TIMEOUT_SECONDS, gt=0)
+    s3_read_timeout_seconds: float = Field(default=DEFAULT_READ_TIMEOUT_SECONDS, gt=0)
+    s3_max_retry_attempts: int = Field(default=DEFAULT_MAX_RETRY_ATTEMPTS, ge=0)
+    s3_retry_mode: str = DEFAULT_RETRY_MODE
+    s3_tcp_keepalive: bool = True
+    s3_prewarm_connections: int = Field(default=4, ge=0)
+    # benchmarks only: seconds added to every S3 request, so a local mock behaves like a remote S3
+    s3_injected_latency_seconds: float = Field(default=0, ge=0)
+
+    # --- streaming multipart uploads --- #
+    s3_multipart_threshold_bytes: int = Field(default=DEFAULT_MULTIPART_THRESHOLD_BYTES, ge=1)
+    s3_multipart_part_size_bytes: int = Field(
+        default=DEFAULT_MULTIPART_PART_SIZE_BYTES, ge=MIN_MULTIPART_PART_SIZE_BYTES
+    )
+    s3_multipart_max_concurrency: int = Field(default=DEFAULT_MULTIPART_MAX_CONCURRENCY, ge=1)
+
+    # --- batch uploads, metadata lookups and bulk deletes --- #
+    s3_batch_upload_max_concurrency: int = Field(default=DEFAULT_BATCH_UPLOAD_MAX_CONCURRENCY, ge=1)
+    s3_batch_metadata_max_concurrency: int = Field(default=DEFAULT_METADATA_LOOKUP_MAX_CONCURRENCY, ge=1)
+    s3_bulk_delete_max_concurrency: int = Field(default=DEFAULT_BULK_DELETE_MAX_CONCURRENCY, ge=1)
+
+    # --- server-side copies and moves; objects of 5 GiB or more are copied in parts --- #
+    s3_copy_part_size_bytes: int = Field(default=DEFAULT_COPY_PART_SIZE_BYTES, ge=MIN_MULTIPART_PART_SIZE_BYTES)
+    s3_copy_part_max_concurrency: int = Field(default=DEFAULT_COPY_PART_MAX_CONCURRENCY, ge=1)
+    s3_bulk_copy_max_concurrency: int = Field(default=DEFAULT_BULK_COPY_MAX_CONCURRENCY, ge=1)
+
+    # --- directory archive downloads --- #
+    archive_prefetch_count: int = Field(default=DEFAULT_PREFETCH_COUNT, ge=1)
+    archive_prefetch_max_object_bytes: int = Field(default=DEFAULT_PREFETCH_MAX_OBJECT_BYTES, ge=0)
+
+    # --- presigned URLs; downloads of at least the threshold size redirect to S3, None disables --- #
+    presigned_url_expiration_seconds: int = Field(
+        default=DEFAULT_PRESIGNED_URL_EXPIRATION_SECONDS, ge=1, le=MAX_PRESIGNED_URL_EXPIRATION_SECONDS
+    )
+    presigned_redirect_threshold_bytes: Optional[int] = Field(default=None, ge=0)
+
+    # --- gzip/zstd response compression negotiated from Accept-Encoding --- #
+    compress_responses: bool = True
+    compression_min_size_bytes: int = Field(default=DEFAULT_COMPRESSION_MIN_SIZE_BYTES, ge=0)
+    # opt-in: store uploads of compressible media types compressed, with a Content-Encoding, and serve
+    # them as stored to clients that accept the coding; listed sizes are then the compressed sizes
+    upload_content_encoding: Optional[Literal["gzip", "zstd"]] = None
+
+    # --- in-process cache of head_object results and listing pages; capacity 0 disables it --- #
+    metadata_cache_capacity: int = Field(default=DEFAULT_METADATA_CACHE_CAPACITY, ge=0)
+    metadata_cache_ttl_seconds: float = Field(default=DEFAULT_METADATA_CACHE_TTL_SECONDS, ge=0)
+    metadata_cache_negative_ttl_seconds: float = Field(default=DEFAULT_METADATA_CACHE_NEGATIVE_TTL_SECONDS, ge=0)
+
+    # --- read-through cache of file bodies, in memory and on disk; off unless a tier is configured --- #
+    # small bodies are kept in memory, larger ones in files under the disk directory
+    body_cache_memory_capacity_bytes: int = Field(default=0, ge=0)
+    body_cache_memory_max_object_bytes: int = Field(default=DEFAULT_BODY_CACHE_MEMORY_MAX_OBJECT_BYTES, ge=0)
+    body_cache_disk_directory: Optional[str] = None
+    body_cache_disk_capacity_bytes: int = Field(default=DEFAULT_BODY_CACHE_DISK_CAPACITY_BYTES, ge=0)
+    body_cache_disk_max_object_bytes: int = Field(default=DEFAULT_BODY_CACHE_DISK_MAX_OBJECT_BYTES, ge=0)
+    # number of files fetched concurrently by POST /v1/admin/body-cache:prewarm
+    body_cache_prewarm_max_concurrency: int = Field(default=DEFAULT_BODY_CACHE_PREWARM_MAX_CONCURRENCY, ge=1)
+
+    # --- coalescing of concurrent identical reads of a file into one S3 request --- #
+    coalesce_reads: bool = True
+    # coalesced bodies up to this size are read into memory and handed to every caller; larger ones are streamed
+    # to all of them through a buffer of at most coalesced_body_buffer_bytes, which callers falling behind leave
+    coalesced_body_fanout_max_bytes: int = Field(default=DEFAULT_COALESCED_BODY_FANOUT_MAX_BYTES, ge=0)
+    coalesced_body_buffer_bytes: int = Field(default=DEFAULT_BROADCAST_CAPACITY_BYTES, ge=1)
+
+    # --- background prefetch of the next pages of listings; depth 0 disables it --- #
+    # pages are kept until asked for, for up to the TTL, and up to about the capacity in bytes
+    list_prefetch_depth: int = Field(default=0, ge=0)
+    list_prefetch_capacity_bytes: int = Field(default=DEFAULT_LIST_PREFETCH_CAPACITY_BYTES, ge=0)
+    list_prefetch_ttl_seconds: float = Field(default=DEFAULT_LIST_PREFETCH_TTL_SECONDS, gt=0)
+
+    # --- Server-Timing response headers breaking request time down by phase and S3 operation --- #
+    server_timing_enabled: bool = False
+    # only callers from these networks get the header, e.g. ["10.0.0.0/8"]; None means every caller
+    server_timing_trusted_networks: Optional[list[IPvAnyNetwork]] = None
+
+    # --- Prometheus metrics at /metrics; needs the optional prometheus-client package --- #
+    metrics_enabled: bool = True
+
+    # --- OpenTelemetry tracing of requests and S3 calls; needs the optional opentelemetry-sdk package --- #
+    tracing_enabled: bool = False
+    # named as in OTEL_TRACES_SAMPLER; the ratio is that of the traceidratio samplers
+    tracing_sampler: TracesSampler = "parentbased_always_on"
+    tracing_sampler_ratio: float = Field(default=1.0, ge=0, le=1)
+    # "console" prints spans to stdout, "memory" keeps them in app.state.tracing.span_exporter
+    tracing_exporter: TracesExporter = "console"
 
     model_config = SettingsConfigDict(case_sensitive=False)
+
+    @model_validator(mode="after")
+    def check_storage_backend_settings(self) -> Self:
+        """Validate that the chosen storage backend is configured, and supports the other settings."""
+        if self.storage_backend == "s3" and not self.s3_bucket_name:
+            raise ValueError("s3_bucket_name is required with the s3 storage backend")
+        if self.storage_backend == "local":
+            if not self.local_storage_directory:
+                raise ValueError("local_storage_directory is required with the local storage backend")
+            if self.upload_content_encoding:
+                raise ValueError("upload_content_encoding is not supported by the local storage backend")
+        return self
+
+    @field_validator("upload_content_encoding")
+    @classmethod
+    def check_content_encoding_is_supported(cls, value: Optional[str]) -> Optional[str]:
+        """Validate that the coding can be produced, i.e. that `zstandard` is installed for zstd."""
+        if value is not None and value not in SUPPORTED_CONTENT_ENCODINGS:
+            raise ValueError(f"{value} compression requires the optional `zstandard` package")
+        return value
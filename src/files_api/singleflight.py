@@ -0,0 +1,121 @@
+"""Coalescing of concurrent identical calls into one, so that a burst of requests for a key costs one S3 call."""
+
+import asyncio
+from dataclasses import (
+    asdict,
+    dataclass,
+    field,
+)
+from typing import (
+    Awaitable,
+    Callable,
+    Generic,
+    Hashable,
+    Optional,
+    TypeVar,
+)
+
+R = TypeVar("R")
+T = TypeVar("T")
+
+
+@dataclass
+class SingleFlightStats:
+    """Counters describing how a :class:`SingleFlight` has been used since it was created."""
+
+    # calls actually made
+    flights: int = 0
+    # calls answered with the result of a call already in flight
+    coalesced: int = 0
+
+    def as_dict(self) -> dict[str, int]:
+        """Return the counters as a plain dict, e.g. for exporting as metrics."""
+        return asdict(self)
+
+
+@dataclass
+class _Flight:
+    """A call in flight, and the futures of the callers waiting for its result, the first one included."""
+
+    waiters: list[asyncio.Future] = field(default_factory=list)
+    # referenced here so that the event loop, which only keeps weak references to tasks, cannot drop it
+    task: Optional[asyncio.Task] = None
+
+
+class SingleFlight(Generic[T]):
+    """
+    Collapse concurrent calls with the same key into one in-flight call whose result every caller gets.
+
+    A call joins the flight of its key if one is in flight, or starts one otherwise; once a flight
+    lands, the next call with its key starts a new one. A call joining a flight gets its result
+    even if the data changed since the flight started, e.g. a read joining a read started before a
+    write: callers for which that is stale should put a counter bumped by such changes in their keys.
+
+    Results that cannot be handed to several callers as they are, e.g. a stream that can only be
+    read once, are split with a ``share`` function called once the flight lands, with the number
+    of callers still waiting. The call runs in a task of its own, in a copy of the context of the
+    caller that started it, so it completes even if that caller is cancelled.
+    """
+
+    def __init__(self) -> None:
+        self.stats = SingleFlightStats()
+        self._flights: dict[Hashable, _Flight] = {}
+
+    async def do(
+        self,
+        key: Hashable,
+        call: Callable[[], Awaitable[R]],
+        share: Callable[[R, int], list[T]],
+    ) -> T:
+        """
+        Return this caller's share of the result of ``call``, made once for every concurrent caller with ``key``.
+
+        :param key: Identifies calls returning the same result, e.g. ``("head", object_key)``.
+        :param call: Makes the call, if no call with ``key`` is in flight.
+        :param share: Splits the result of ``call`` into one value per waiting caller, given their number,
+            which is 0 if they were all cancelled, in which case the result should be disposed of.
+        :return: This caller's share of the result. Errors raised by ``call`` are raised to every caller.
+        """
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = self._flights[key] = _Flight()
+            self.stats.flights += 1
+            flight.task = asyncio.get_running_loop().create_task(self._fly(key, flight, call, share))
+        else:
+            self.stats.coalesced += 1
+        waiter = asyncio.get_running_loop().create_future()
+        flight.waiters.append(waiter)
+        return await waiter
+
+    async def _fly(
+        self,
+        key: Hashable,
+        flight: _Flight,
+        call: Callable[[], Awaitable[R]],
+        share: Callable[[R, int], list[T]],
+    ) -> None:
+        try:
+            result = await call()
+        except asyncio.CancelledError:
+            self._land(key, flight)
+            for waiter in flight.waiters:
+                waiter.cancel()
+            raise
+        except Exception as error:  # pylint: disable=broad-exception-caught
+            for waiter in self._land(key, flight):
+                waiter.set_exception(error)
+            return
+        waiters = self._land(key, flight)
+        # the shares are handed out without yielding to the event loop, so no caller can see a partial split
+        for waiter, value in zip(waiters, share(result, len(waiters))):
+            waiter.set_result(value)
+
+    def _land(self, key: Hashable, flight: _Flight) -> list[asyncio.Future]:
+        """End a flight, returning the futures of the callers still waiting for it."""
+        del self._flights[key]
+        return [waiter for waiter in flight.waiters if not waiter.done()]
+
+
+def share_immutable(result: R, num_callers: int) -> list[R]:
+    """Share a result that every caller can use as it is, e.g. a frozen dataclass; a ``share`` function."""
+    return [result] * num_callers
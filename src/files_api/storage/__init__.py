@@ -0,0 +1,8 @@
+"""
+Storage backends holding the files served by the API.
+
+The core file routes (upload, metadata, download, delete and listing) talk to a
+:class:`~files_api.storage.base.StorageBackend` rather than to S3 directly, so the same API can
+run on S3 or, e.g. on edge nodes and for benchmarks, on a local directory. Which one is used is
+chosen with ``Settings.storage_backend``.
+"""
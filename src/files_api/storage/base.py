@@ -0,0 +1,239 @@
+"""The interface shared by storage backends, and the types they exchange with the routes."""
+
+from abc import (
+    ABC,
+    abstractmethod,
+)
+from dataclasses import dataclass
+from datetime import datetime
+from typing import (
+    AsyncIterator,
+    BinaryIO,
+    Callable,
+    Iterator,
+    Optional,
+)
+
+from starlette.concurrency import iterate_in_threadpool
+
+from files_api.ranges import (
+    ByteRange,
+    IfRangeCondition,
+)
+
+DEFAULT_CONTENT_TYPE = "application/octet-stream"
+DEFAULT_LIST_MAX_KEYS = 1_000
+DEFAULT_CHUNK_SIZE_BYTES = 64 * 1024
+
+
+class StorageError(Exception):
+    """Base class of the errors raised by storage backends for expected failures."""
+
+
+class InvalidRequestError(StorageError):
+    """The request cannot be served by this backend, e.g. a key it cannot store or a malformed page token."""
+
+
+class ObjectNotFoundError(StorageError):
+    """The requested file does not exist."""
+
+
+class PreconditionFailedError(StorageError):
+    """An ``If-Match`` style precondition of a write or delete did not hold."""
+
+
+class NotModifiedError(StorageError):
+    """The client's copy of the file is current, per ``If-None-Match`` or ``If-Modified-Since``."""
+
+    def __init__(self, etag: Optional[str] = None, last_modified: Optional[str] = None):
+        super().__init__("Not modified")
+        self.etag = etag
+        self.last_modified = last_modified
+
+
+class RangeNotSatisfiableError(StorageError):
+    """The requested byte range lies outside of the file."""
+
+    def __init__(self, size: Optional[int] = None):
+        super().__init__("Requested range not satisfiable")
+        self.size = size
+
+
+@dataclass(frozen=True)
+class ObjectInfo:
+    """
+    Metadata of a stored file.
+
+    ``content_type`` is only known to :meth:`StorageBackend.head` and :meth:`StorageBackend.get`;
+    listings leave it as None.
+    """
+
+    key: str
+    size: int
+    etag: str
+    last_modified: datetime
+    content_type: Optional[str] = None
+    content_encoding: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class ObjectListing:
+    """One page of a listing, with the subdirectories found if it was made with a delimiter."""
+
+    objects: list[ObjectInfo]
+    directories: list[str]
+    next_page_token: Optional[str] = None
+
+
+@dataclass
+class StoredObject:  # pylint: disable=too-many-instance-attributes
+    """
+    A file, or a byte range of it, fetched by :meth:`StorageBackend.get`.
+
+    Exactly one of ``path``, ``content`` and ``body`` holds the bytes: ``path`` names a local file
+    holding the whole file, which can be sent with ``sendfile``; ``content`` holds them in memory;
+    ``body`` streams them. ``release`` must be called once the bytes have been sent or discarded.
+    """
+
+    info: ObjectInfo
+    content_length: int
+    content_range: Optional[str] = None
+    path: Optional[str] = None
+    content: Optional[bytes] = None
+    body: Optional[AsyncIterator[bytes]] = None
+    release: Optional[Callable[[], None]] = None
+
+    async def iter_bytes(self, chunk_size: int = DEFAULT_CHUNK_SIZE_BYTES) -> AsyncIterator[bytes]:
+        """Iterate over the bytes, whichever way they are held, then release them."""
+        try:
+            if self.body is not None:
+                async for chunk in self.body:
+                    yield chunk
+            elif self.content is not None:
+                yield self.content
+            elif self.path is not None:
+                async for chunk in iter_file_chunks(self.path, 0, self.content_length, chunk_size):
+                    yield chunk
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        """Release the bytes, e.g. a file held by a cache; idempotent."""
+        release, self.release = self.release, None
+        if release is not None:
+            release()
+
+
+class StorageBackend(ABC):
+    """
+    Where files are stored: reads, writes, deletes and listings of files by key.
+
+    Expected failures are raised as :class:`StorageError` subclasses, so routes can answer them
+    with the same HTTP status whichever backend is used.
+    """
+
+    @abstractmethod
+    async def exists(self, key: str) -> bool:
+        """Return whether a file is stored under ``key``."""
+
+    @abstractmethod
+    async def head(self, key: str) -> Optional[ObjectInfo]:
+        """Return the metadata of the file stored under ``key``, or None if there is none."""
+
+    @abstractmethod
+    async def get(  # pylint: disable=too-many-arguments
+        self,
+        key: str,
+        byte_range: Optional[ByteRange] = None,
+        if_range: Optional[IfRangeCondition] = None,
+        if_none_match: Optional[str] = None,
+        if_modified_since: Optional[datetime] = None,
+    ) -> StoredObject:
+        """
+        Fetch a file, or a byte range of it.
+
+        :param key: Key of the file to fetch.
+        :param byte_range: Optional range of bytes to fetch instead of the whole file.
+        :param if_range: Only honor ``byte_range`` if the file still matches this validator;
+            otherwise the whole file is returned.
+        :param if_none_match: Raise :class:`NotModifiedError` if the file's ETag matches.
+        :param if_modified_since: Raise :class:`NotModifiedError` if the file is unchanged since this time.
+            Ignored if ``if_none_match`` is given.
+
+        :raises ObjectNotFoundError: If there is no such file.
+        :raises RangeNotSatisfiableError: If ``byte_range`` lies outside of the file.
+        """
+
+    @abstractmethod
+    async def put(
+        self,
+        key: str,
+        content: BinaryIO,
+        content_type: Optional[str] = None,
+        content_encoding: Optional[str] = None,
+        if_match: Optional[str] = None,
+    ) -> bool:
+        """
+        Store a file, streaming ``content`` rather than reading it into memory.
+
+        :param key: Key to store the file under.
+        :param content: Readable stream of the file's bytes.
+        :param content_type: Media type of the file.
+        :param content_encoding: Coding the bytes are compressed with, if any.
+        :param if_match: Only overwrite the file if its ETag matches.
+
+        :raises PreconditionFailedError: If ``if_match`` is given and the file is missing or has another ETag.
+
+        :return: True if the file was created, False if an existing file was overwritten.
+        """
+
+    @abstractmethod
+    async def delete(self, key: str, if_match: Optional[str] = None) -> None:
+        """
+        Delete a file; deleting a missing file is not an error unless ``if_match`` is given.
+
+        :raises PreconditionFailedError: If ``if_match`` is given and the file is missing or has another ETag.
+        """
+
+    @abstractmethod
+    async def list(
+        self,
+        prefix: str = "",
+        page_token: Optional[str] = None,
+        max_keys: int = DEFAULT_LIST_MAX_KEYS,
+        delimiter: Optional[str] = None,
+        next_page_max_keys: Optional[int] = None,
+    ) -> ObjectListing:
+        """
+        List one page of the files whose keys start with ``prefix``, in key order.
+
+        :param prefix: Prefix of the keys to list.
+        :param page_token: Token of the page to list, as returned for the previous page. Backends
+            may require the same ``prefix`` and ``delimiter`` as the first page, except in recursive
+            listings, whose page tokens are self-contained.
+        :param max_keys: Maximum number of files and subdirectories to return.
+        :param delimiter: If given, keys containing it after ``prefix`` are grouped into subdirectories,
+            returned in :attr:`ObjectListing.directories` rather than listed.
+        :param next_page_max_keys: The ``max_keys`` the next page will be asked for with, if not
+            ``max_keys``; a hint for backends prefetching the next page, which others ignore.
+        """
+
+    def close(self) -> None:
+        """Release the backend's resources, e.g. connection pools, on shutdown."""
+
+
+async def iter_file_chunks(
+    path: str, start: int, length: int, chunk_size: int = DEFAULT_CHUNK_SIZE_BYTES
+) -> AsyncIterator[bytes]:
+    """Read ``length`` bytes of a local file from offset ``start``, a chunk at a time on a worker thread."""
+
+    def _read_chunks() -> Iterator[bytes]:
+        with open(path, "rb") as file:
+            file.seek(start)
+            remaining = length
+            while remaining > 0 and (chunk := file.read(min(chunk_size, remaining))):
+                remaining -= len(chunk)
+                yield chunk
+
+    async for chunk in iterate_in_threadpool(_read_chunks()):
+        yield chunk
@@ -0,0 +1,306 @@
+"""Storage backend keeping files in a directory of the local filesystem."""
+
+import base64
+import binascii
+import json
+import mimetypes
+import os
+import shutil
+import stat
+import threading
+import uuid
+from datetime import (
+    datetime,
+    timezone,
+)
+from typing import (
+    BinaryIO,
+    Iterator,
+    Optional,
+)
+
+from starlette.concurrency import run_in_threadpool
+
+from files_api.conditional import (
+    format_http_date,
+    is_not_modified,
+)
+from files_api.ranges import (
+    ByteRange,
+    IfRangeCondition,
+)
+from files_api.storage.base import (
+    DEFAULT_CHUNK_SIZE_BYTES,
+    DEFAULT_CONTENT_TYPE,
+    DEFAULT_LIST_MAX_KEYS,
+    InvalidRequestError,
+    NotModifiedError,
+    ObjectInfo,
+    ObjectListing,
+    ObjectNotFoundError,
+    PreconditionFailedError,
+    RangeNotSatisfiableError,
+    StorageBackend,
+    StoredObject,
+    iter_file_chunks,
+)
+
+# uploads are written here first, then renamed into place, so readers never see a partial file
+TEMPORARY_DIRECTORY_NAME = ".files-api-tmp"
+DEFAULT_WRITE_BUFFER_SIZE_BYTES = 1024 * 1024
+
+
+class LocalStorageBackend(StorageBackend):
+    """
+    Files stored as regular files under ``root_directory``, one per key, with "/" separating directories.
+
+    Whole files are returned by path, so routes can send them with ``sendfile``. Uploads are streamed
+    to a temporary file and renamed into place, which makes every write atomic. ETags are derived
+    from each file's modification time and size, like most web servers do, and content types from
+    file name extensions, since plain files have nowhere to store them; stored content codings are
+    not supported.
+
+    Unlike S3, a key cannot name both a file and a directory, e.g. "a" and "a/b"; writes that would
+    need both are rejected with :class:`InvalidRequestError`. Conditional writes are serialized
+    within one process only.
+    """
+
+    def __init__(self, root_directory: str, chunk_size: int = DEFAULT_CHUNK_SIZE_BYTES):
+        self.root_directory = os.path.realpath(root_directory)
+        self.chunk_size = chunk_size
+        self._temporary_directory = os.path.join(self.root_directory, TEMPORARY_DIRECTORY_NAME)
+        os.makedirs(self._temporary_directory, exist_ok=True)
+        self._write_lock = threading.Lock()
+
+    async def exists(self, key: str) -> bool:
+        """Return whether a file is stored under ``key``."""
+        return await self.head(key) is not None
+
+    async def head(self, key: str) -> Optional[ObjectInfo]:
+        """Return the metadata of the file stored under ``key``, or None if there is none."""
+        return await run_in_threadpool(self._head, key)
+
+    async def get(  # pylint: disable=too-many-arguments
+        self,
+        key: str,
+        byte_range: Optional[ByteRange] = None,
+        if_range: Optional[IfRangeCondition] = None,
+        if_none_match: Optional[str] = None,
+        if_modified_since: Optional[datetime] = None,
+    ) -> StoredObject:
+        """Fetch a file by path, or a byte range of it as a stream, evaluating the preconditions like S3 does."""
+        info = await self.head(key)
+        if info is None:
+            raise ObjectNotFoundError(key)
+        if is_not_modified(
+            etag=info.etag,
+            last_modified=info.last_modified,
+            if_none_match=if_none_match,
+            if_modified_since=if_modified_since,
+        ):
+            raise NotModifiedError(etag=info.etag, last_modified=format_http_date(info.last_modified))
+        if byte_range is not None and if_range is not None and not _matches_if_range(info, if_range):
+            byte_range = None
+        if byte_range is None:
+            return StoredObject(info=info, content_length=info.size, path=self._path(key))
+
+        resolved_range = byte_range.resolve(info.size)
+        if resolved_range is None:
+            raise RangeNotSatisfiableError(info.size)
+        start, end = resolved_range
+        return StoredObject(
+            info=info,
+            content_length=end - start + 1,
+            content_range=f"bytes {start}-{end}/{info.size}",
+            body=iter_file_chunks(self._path(key), start, end - start + 1, self.chunk_size),
+        )
+
+    async def put(  # pylint: disable=too-many-arguments
+        self,
+        key: str,
+        content: BinaryIO,
+        content_type: Optional[str] = None,
+        content_encoding: Optional[str] = None,
+        if_match: Optional[str] = None,
+    ) -> bool:
+        """Stream ``content`` to a temporary file, then rename it into place; ``content_type`` is not stored."""
+        if content_encoding:
+            raise InvalidRequestError("Stored content codings are not supported by local storage")
+        return await run_in_threadpool(self._put, key, content, if_match)
+
+    async def delete(self, key: str, if_match: Optional[str] = None) -> None:
+        """Delete a file, and the directories it leaves empty, as S3 has no empty directories."""
+        await run_in_threadpool(self._delete, key, if_match)
+
+    async def list(
+        self,
+        prefix: str = "",
+        page_token: Optional[str] = None,
+        max_keys: int = DEFAULT_LIST_MAX_KEYS,
+        delimiter: Optional[str] = None,
+        next_page_max_keys: Optional[int] = None,  # pylint: disable=unused-argument
+    ) -> ObjectListing:
+        """
+        List one page of files by walking the directory tree in key order.
+
+        Page tokens hold the prefix, delimiter and last key listed, so every page token is self-contained.
+        Only "/" is supported as a delimiter.
+        """
+        if page_token:
+            prefix, delimiter, start_after = _decode_page_token(page_token)
+        else:
+            start_after = ""
+        if delimiter not in (None, "/"):
+            raise InvalidRequestError("Local storage only supports '/' as a delimiter")
+        return await run_in_threadpool(self._list, prefix or "", start_after, max_keys, delimiter)
+
+    def _path(self, key: str) -> str:
+        """Return the path of the file for ``key``, rejecting keys that would escape the root directory."""
+        # NUL cannot appear in a path, and os functions raise ValueError on it
+        if "\x00" in key or any(segment in (".", "..") for segment in key.split("/")):
+            raise InvalidRequestError(f"Invalid key: {key!r}")
+        path = os.path.realpath(os.path.join(self.root_directory, key.lstrip("/")))
+        if os.path.commonpath([path, self.root_directory]) != self.root_directory or path == self.root_directory:
+            raise InvalidRequestError(f"Invalid key: {key}")
+        if os.path.commonpath([path, self._temporary_directory]) == self._temporary_directory:
+            raise InvalidRequestError(f"Invalid key: {key}")
+        return path
+
+    def _head(self, key: str) -> Optional[ObjectInfo]:
+        try:
+            stat_result = os.stat(self._path(key))
+        except (FileNotFoundError, NotADirectoryError, InvalidRequestError):
+            return None
+        if not stat.S_ISREG(stat_result.st_mode):
+            return None
+        return _to_object_info(key, stat_result, with_content_type=True)
+
+    def _put(self, key: str, content: BinaryIO, if_match: Optional[str]) -> bool:
+        path = self._path(key)
+        temporary_path = os.path.join(self._temporary_directory, uuid.uuid4().hex)
+        try:
+            with open(temporary_path, "wb") as file:
+                shutil.copyfileobj(content, file, DEFAULT_WRITE_BUFFER_SIZE_BYTES)
+            with self._write_lock:
+                current = self._head(key)
+                if if_match and (current is None or not _etag_equals(if_match, current.etag)):
+                    raise PreconditionFailedError(key)
+                try:
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    os.replace(temporary_path, path)
+                except (FileExistsError, IsADirectoryError, NotADirectoryError) as error:
+                    raise InvalidRequestError(f"{key} conflicts with an existing file or directory") from error
+            return current is None
+        finally:
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+
+    def _delete(self, key: str, if_match: Optional[str]) -> None:
+        path = self._path(key)
+        with self._write_lock:
+            current = self._head(key)
+            if if_match and (current is None or not _etag_equals(if_match, current.etag)):
+                raise PreconditionFailedError(key)
+            if current is None:
+                return
+            os.remove(path)
+            directory = os.path.dirname(path)
+            while directory != self.root_directory:
+                try:
+                    os.rmdir(directory)
+                except OSError:
+                    break
+                directory = os.path.dirname(directory)
+
+    def _list(self, prefix: str, start_after: str, max_keys: int, delimiter: Optional[str]) -> ObjectListing:
+        objects: list[ObjectInfo] = []
+        directories: list[str] = []
+        last_key = start_after
+        entries = self._iter_entries(prefix, start_after, recursive=delimiter is None)
+        for key, stat_result in entries:
+            if len(objects) + len(directories) == max_keys:
+                next_page_token = _encode_page_token(prefix, delimiter, last_key)
+                return ObjectListing(objects=objects, directories=directories, next_page_token=next_page_token)
+            if stat_result is None:
+                directories.append(key)
+            else:
+                objects.append(_to_object_info(key, stat_result))
+            last_key = key
+        return ObjectListing(objects=objects, directories=directories)
+
+    def _iter_entries(
+        self, prefix: str, start_after: str, recursive: bool
+    ) -> Iterator[tuple[str, Optional[os.stat_result]]]:
+        """
+        Yield ``(key, stat)`` for every file whose key starts with ``prefix`` and sorts after ``start_after``.
+
+        Unless ``recursive``, subdirectories are yielded instead of their files, as ``(key + "/", None)``.
+        Entries are yielded in the lexicographic order of their keys, which is S3's order.
+        """
+        directory_key = prefix.rpartition("/")[0]
+        yield from self._iter_directory(directory_key + "/" if directory_key else "", prefix, start_after, recursive)
+
+    def _iter_directory(
+        self, directory_key: str, prefix: str, start_after: str, recursive: bool
+    ) -> Iterator[tuple[str, Optional[os.stat_result]]]:
+        directory_path = os.path.join(self.root_directory, directory_key)
+        try:
+            with os.scandir(directory_path) as scanned:
+                dir_entries = [entry for entry in scanned if entry.name != TEMPORARY_DIRECTORY_NAME]
+        except (FileNotFoundError, NotADirectoryError):
+            return
+        # a directory's keys all start with its name and a "/", which must be part of the sort key
+        keyed_entries = sorted(
+            (directory_key + entry.name + ("/" if entry.is_dir(follow_symlinks=False) else ""), entry)
+            for entry in dir_entries
+        )
+        for key, entry in keyed_entries:
+            if not (key.startswith(prefix) or prefix.startswith(key)):
+                continue
+            if not key.endswith("/"):
+                if key > start_after and key.startswith(prefix) and entry.is_file(follow_symlinks=False):
+                    yield key, entry.stat(follow_symlinks=False)
+            elif not recursive and key.startswith(prefix) and len(key) > len(prefix):
+                if key > start_after and not start_after.startswith(key):
+                    yield key, None
+            elif start_after < key or start_after.startswith(key):
+                # skip subtrees whose every key sorts before start_after
+                yield from self._iter_directory(key, prefix, start_after, recursive)
+
+
+def _to_object_info(key: str, stat_result: os.stat_result, with_content_type: bool = False) -> ObjectInfo:
+    """Describe a file from its ``stat``; its content type is guessed from its name."""
+    return ObjectInfo(
+        key=key,
+        size=stat_result.st_size,
+        etag=f'"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"',
+        last_modified=datetime.fromtimestamp(stat_result.st_mtime, tz=timezone.utc),
+        content_type=(mimetypes.guess_type(key)[0] or DEFAULT_CONTENT_TYPE) if with_content_type else None,
+    )
+
+
+def _matches_if_range(info: ObjectInfo, if_range: IfRangeCondition) -> bool:
+    """Whether the file still matches an ``If-Range`` validator, i.e. whether to honor the range."""
+    if if_range.etag:
+        return if_range.etag == info.etag
+    if if_range.last_modified:
+        return info.last_modified.replace(microsecond=0) <= if_range.last_modified
+    return False
+
+
+def _etag_equals(if_match: str, etag: str) -> bool:
+    """Strong comparison of an ``If-Match`` ETag, as S3 does."""
+    return if_match.strip() == etag
+
+
+def _encode_page_token(prefix: str, delimiter: Optional[str], start_after: str) -> str:
+    payload = json.dumps({"p": prefix, "d": delimiter, "a": start_after}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def _decode_page_token(page_token: str) -> tuple[str, Optional[str], str]:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(page_token))
+        return str(payload["p"]), payload["d"], str(payload["a"])
+    except (binascii.Error, ValueError, KeyError, TypeError) as error:
+        raise InvalidRequestError("Invalid page token") from error
@@ -0,0 +1,565 @@
+"""Storage backend keeping files in an S3 bucket, on top of ``files_api.async_s3``."""
+
+from dataclasses import dataclass
+from datetime import datetime
+from functools import partial
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    BinaryIO,
+    Callable,
+    Hashable,
+    List,
+    NoReturn,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+from botocore.exceptions import ClientError
+from starlette.concurrency import run_in_threadpool
+
+from files_api.async_s3.delete_objects import delete_s3_object
+from files_api.async_s3.read_objects import (
+    fetch_s3_directory_listing,
+    fetch_s3_object,
+    fetch_s3_object_metadata,
+    fetch_s3_object_through_cache,
+    fetch_s3_objects_metadata,
+    fetch_s3_objects_using_page_token,
+    iter_s3_object_body,
+    object_exists_in_s3,
+)
+from files_api.async_s3.write_objects import upload_s3_object
+from files_api.broadcast import (
+    DEFAULT_BROADCAST_CAPACITY_BYTES,
+    BroadcastBody,
+)
+from files_api.conditional import (
+    format_http_date,
+    is_not_modified,
+    strip_weak_etag_prefixes,
+)
+from files_api.list_prefetch import (
+    DEFAULT_LIST_PREFETCH_CAPACITY_BYTES,
+    DEFAULT_LIST_PREFETCH_TTL_SECONDS,
+    ListPrefetcher,
+)
+from files_api.ranges import (
+    ByteRange,
+    IfRangeCondition,
+)
+from files_api.s3.body_cache import (
+    CachedObject,
+    ObjectBodyCache,
+)
+from files_api.s3.metadata_cache import S3MetadataCache
+from files_api.s3.write_objects import (
+    DEFAULT_MULTIPART_MAX_CONCURRENCY,
+    DEFAULT_MULTIPART_PART_SIZE_BYTES,
+    DEFAULT_MULTIPART_THRESHOLD_BYTES,
+    MIB,
+)
+from files_api.singleflight import (
+    SingleFlight,
+    share_immutable,
+)
+from files_api.storage.base import (
+    DEFAULT_LIST_MAX_KEYS,
+    NotModifiedError,
+    ObjectInfo,
+    ObjectListing,
+    ObjectNotFoundError,
+    PreconditionFailedError,
+    RangeNotSatisfiableError,
+    StorageBackend,
+    StoredObject,
+)
+
+try:
+    from mypy_boto3_s3 import S3Client
+    from mypy_boto3_s3.type_defs import (
+        GetObjectOutputTypeDef,
+        ObjectTypeDef,
+    )
+except ImportError:  # pragma: no cover
+    ...
+
+DEFAULT_COALESCED_BODY_FANOUT_MAX_BYTES = 1 * MIB
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+@dataclass
+class _FetchedObject:
+    """A ``get_object`` response whose body was read into ``content`` if it was small enough to fan out."""
+
+    response: "GetObjectOutputTypeDef"
+    content: Optional[bytes] = None
+
+
+class S3StorageBackend(StorageBackend):  # pylint: disable=too-many-instance-attributes
+    """
+    Files stored as objects of an S3 bucket, read and written through the app's shared client and caches.
+
+    Whole-file reads go through ``body_cache`` when one is given; see
+    :func:`files_api.s3.read_objects.fetch_s3_object_through_cache`.
+
+    Unless ``coalesce_reads`` is False, concurrent identical reads, i.e. lookups of the same key or
+    GETs of the same key, range and preconditions, are collapsed into one S3 request, so that a
+    burst of requests for a popular file costs one S3 read. A read never joins one started before a
+    write that has returned since, so it sees every write completed before it. Fetched bodies of
+    at most ``coalesced_body_fanout_max_bytes`` are read into memory and handed to every caller;
+    larger ones are streamed to all of them through a :class:`files_api.broadcast.BroadcastBody`
+    of ``coalesced_body_buffer_bytes``, and callers lagging further behind fetch the rest themselves.
+
+    With a ``list_prefetch_depth`` above 0, serving a listing page prefetches the next pages in the
+    background, with a :class:`files_api.list_prefetch.ListPrefetcher` that writes made through
+    ``metadata_cache`` invalidate.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        bucket_name: str,
+        s3_client: "S3Client",
+        metadata_cache: Optional[S3MetadataCache] = None,
+        body_cache: Optional[ObjectBodyCache] = None,
+        multipart_threshold: int = DEFAULT_MULTIPART_THRESHOLD_BYTES,
+        part_size: int = DEFAULT_MULTIPART_PART_SIZE_BYTES,
+        max_concurrency: int = DEFAULT_MULTIPART_MAX_CONCURRENCY,
+        coalesce_reads: bool = True,
+        coalesced_body_fanout_max_bytes: int = DEFAULT_COALESCED_BODY_FANOUT_MAX_BYTES,
+        coalesced_body_buffer_bytes: int = DEFAULT_BROADCAST_CAPACITY_BYTES,
+        list_prefetch_depth: int = 0,
+        list_prefetch_capacity_bytes: int = DEFAULT_LIST_PREFETCH_CAPACITY_BYTES,
+        list_prefetch_ttl_seconds: float = DEFAULT_LIST_PREFETCH_TTL_SECONDS,
+    ):
+        self.bucket_name = bucket_name
+        self.s3_client = s3_client
+        self.metadata_cache = metadata_cache
+        self.body_cache = body_cache
+        self.multipart_threshold = multipart_threshold
+        self.part_size = part_size
+        self.max_concurrency = max_concurrency
+        self.read_coalescer: Optional[SingleFlight] = SingleFlight() if coalesce_reads else None
+        # bumped once each write or delete made through this backend returns
+        self._writes = 0
+        self.coalesced_body_fanout_max_bytes = coalesced_body_fanout_max_bytes
+        self.coalesced_body_buffer_bytes = coalesced_body_buffer_bytes
+        self.list_prefetcher: Optional[ListPrefetcher] = None
+        if list_prefetch_depth > 0:
+            list_prefetcher = self.list_prefetcher = ListPrefetcher(
+                depth=list_prefetch_depth,
+                capacity_bytes=list_prefetch_capacity_bytes,
+                ttl_seconds=list_prefetch_ttl_seconds,
+            )
+            if metadata_cache is not None:
+                metadata_cache.add_invalidation_listener(lambda *_: list_prefetcher.invalidate())
+
+    async def exists(self, key: str) -> bool:
+        """Return whether an object is stored under ``key``, using a cached ``head_object`` result if any."""
+        exists = partial(
+            object_exists_in_s3,
+            bucket_name=self.bucket_name,
+            object_key=key,
+            s3_client=self.s3_client,
+            metadata_cache=self.metadata_cache,
+        )
+        return await self._coalesce(("exists", key), exists, share_immutable)
+
+    async def head(self, key: str) -> Optional[ObjectInfo]:
+        """Return the metadata of the object stored under ``key``, or None if there is none."""
+        return await self._coalesce(("head", key), partial(self._head, key), share_immutable)
+
+    async def _head(self, key: str) -> Optional[ObjectInfo]:
+        head_object_response = await fetch_s3_object_metadata(
+            bucket_name=self.bucket_name, object_key=key, s3_client=self.s3_client, metadata_cache=self.metadata_cache
+        )
+        if head_object_response is None:
+            return None
+        return ObjectInfo(
+            key=key,
+            size=head_object_response["ContentLength"],
+            etag=head_object_response["ETag"],
+            last_modified=head_object_response["LastModified"],
+            content_type=head_object_response["ContentType"],
+            content_encoding=head_object_response.get("ContentEncoding"),
+        )
+
+    async def get(  # pylint: disable=too-many-arguments
+        self,
+        key: str,
+        byte_range: Optional[ByteRange] = None,
+        if_range: Optional[IfRangeCondition] = None,
+        if_none_match: Optional[str] = None,
+        if_modified_since: Optional[datetime] = None,
+    ) -> StoredObject:
+        """
+        Fetch an object, or a byte range of it, letting S3 evaluate the preconditions.
+
+        Whole objects are fetched through the body cache, if any, in which case the preconditions
+        are evaluated here so that conditional requests can still fill the cache.
+        """
+        if self.body_cache is not None and byte_range is None:
+            stored_object = await self._coalesce(
+                ("get", key), partial(self._fetch_through_cache, key), partial(self._share_through_cache, key)
+            )
+            if is_not_modified(
+                etag=stored_object.info.etag,
+                last_modified=stored_object.info.last_modified,
+                if_none_match=if_none_match,
+                if_modified_since=if_modified_since,
+            ):
+                stored_object.close()
+                raise NotModifiedError(
+                    etag=stored_object.info.etag, last_modified=format_http_date(stored_object.info.last_modified)
+                )
+            return stored_object
+
+        conditions = (byte_range, if_range, if_none_match, if_modified_since)
+        return await self._coalesce(
+            ("get", key, *conditions), partial(self._fetch, key, *conditions), partial(self._share_fetched, key)
+        )
+
+    async def _fetch(  # pylint: disable=too-many-arguments
+        self,
+        key: str,
+        byte_range: Optional[ByteRange],
+        if_range: Optional[IfRangeCondition],
+        if_none_match: Optional[str],
+        if_modified_since: Optional[datetime],
+    ) -> _FetchedObject:
+        """Fetch an object, or a byte range of it, letting S3 evaluate the preconditions."""
+        fetch_kwargs: dict[str, Any] = {
+            "bucket_name": self.bucket_name,
+            "object_key": key,
+            "s3_client": self.s3_client,
+            # If-Modified-Since is ignored when If-None-Match is present (RFC 9110)
+            "if_none_match": strip_weak_etag_prefixes(if_none_match),
+            "if_modified_since": None if if_none_match else if_modified_since,
+        }
+        try:
+            try:
+                # If-Range is checked by S3 in the same call: a changed object fails the precondition
+                get_object_response = await fetch_s3_object(
+                    **fetch_kwargs,
+                    byte_range=byte_range.to_header() if byte_range else None,
+                    if_match=if_range.etag if if_range else None,
+                    if_unmodified_since=if_range.last_modified if if_range else None,
+                )
+            except ClientError as error:
+                if error.response["Error"]["Code"] not in ("PreconditionFailed", "412"):
+                    raise
+                # the file changed since the client's copy, so If-Range says to send all of it
+                get_object_response = await fetch_s3_object(**fetch_kwargs)
+        except ClientError as error:
+            _raise_for_get_object_error(error)
+        return await self._read_small_body(get_object_response)
+
+    async def _fetch_through_cache(self, key: str) -> tuple[Optional[CachedObject], Optional[_FetchedObject]]:
+        """Fetch a whole object through the body cache."""
+        try:
+            cached_object, get_object_response = await fetch_s3_object_through_cache(
+                bucket_name=self.bucket_name,
+                object_key=key,
+                body_cache=self.body_cache,  # type: ignore[arg-type]
+                s3_client=self.s3_client,
+                metadata_cache=self.metadata_cache,
+            )
+        except ClientError as error:
+            _raise_for_get_object_error(error)
+        if cached_object is None:
+            return None, await self._read_small_body(get_object_response)  # type: ignore[arg-type]
+        return cached_object, None
+
+    async def _read_small_body(self, get_object_response: "GetObjectOutputTypeDef") -> _FetchedObject:
+        """Read the body of a fetched object if small enough to fan out, so that it can be shared however many wait."""
+        if self.read_coalescer is None or get_object_response["ContentLength"] > self.coalesced_body_fanout_max_bytes:
+            return _FetchedObject(response=get_object_response)
+        with get_object_response["Body"] as body:
+            return _FetchedObject(response=get_object_response, content=await run_in_threadpool(body.read))
+
+    async def put(  # pylint: disable=too-many-arguments
+        self,
+        key: str,
+        content: BinaryIO,
+        content_type: Optional[str] = None,
+        content_encoding: Optional[str] = None,
+        if_match: Optional[str] = None,
+    ) -> bool:
+        """Upload an object, in parts if it is large; see :func:`files_api.s3.write_objects.upload_s3_object`."""
+        try:
+            return await _map_precondition_failures(
+                upload_s3_object(
+                    bucket_name=self.bucket_name,
+                    object_key=key,
+                    file_content=content,
+                    content_type=content_type,
+                    content_encoding=content_encoding,
+                    s3_client=self.s3_client,
+                    multipart_threshold=self.multipart_threshold,
+                    part_size=self.part_size,
+                    max_concurrency=self.max_concurrency,
+                    metadata_cache=self.metadata_cache,
+                    if_match=if_match,
+                )
+            )
+        finally:
+            self._writes += 1
+
+    async def delete(self, key: str, if_match: Optional[str] = None) -> None:
+        """Delete an object; S3 checks ``if_match`` itself."""
+        try:
+            await _map_precondition_failures(
+                delete_s3_object(
+                    bucket_name=self.bucket_name,
+                    object_key=key,
+                    s3_client=self.s3_client,
+                    metadata_cache=self.metadata_cache,
+                    if_match=if_match,
+                )
+            )
+        finally:
+            self._writes += 1
+
+    async def list(
+        self,
+        prefix: str = "",
+        page_token: Optional[str] = None,
+        max_keys: int = DEFAULT_LIST_MAX_KEYS,
+        delimiter: Optional[str] = None,
+        next_page_max_keys: Optional[int] = None,
+    ) -> ObjectListing:
+        """
+        List one page of objects with ``list_objects_v2``, or take it from the pages prefetched, if any.
+
+        ``page_token`` is S3's continuation token. It does not remember the prefix and delimiter, so
+        listings with a delimiter must pass them again.
+        """
+        if self.list_prefetcher is None:
+            return await self._list(prefix, page_token, max_keys, delimiter)
+
+        listing = (
+            await self.list_prefetcher.take(_listing_page_key(prefix, max_keys, delimiter, page_token))
+            if page_token
+            else None
+        )
+        if listing is None:
+            listing = await self._list(prefix, page_token, max_keys, delimiter)
+        if listing.next_page_token:
+            # the following pages are asked for alike, so they are all prefetched with the next page's max_keys
+            next_page_max_keys = next_page_max_keys or max_keys
+            self.list_prefetcher.prefetch(
+                key_of=partial(_listing_page_key, prefix, next_page_max_keys, delimiter),
+                list_page=partial(self._list, prefix, max_keys=next_page_max_keys, delimiter=delimiter),
+                page_token=listing.next_page_token,
+            )
+        return listing
+
+    async def _list(
+        self,
+        prefix: str,
+        page_token: Optional[str],
+        max_keys: int,
+        delimiter: Optional[str],
+    ) -> ObjectListing:
+        directories: list[str] = []
+        if delimiter:
+            objects, directories, next_page_token = await fetch_s3_directory_listing(
+                bucket_name=self.bucket_name,
+                prefix=prefix,
+                continuation_token=page_token,
+                max_keys=max_keys,
+                delimiter=delimiter,
+                s3_client=self.s3_client,
+                metadata_cache=self.metadata_cache,
+            )
+        elif page_token:
+            objects, next_page_token = await fetch_s3_objects_using_page_token(
+                bucket_name=self.bucket_name,
+                continuation_token=page_token,
+                max_keys=max_keys,
+                s3_client=self.s3_client,
+                metadata_cache=self.metadata_cache,
+            )
+        else:
+            objects, next_page_token = await fetch_s3_objects_metadata(
+                bucket_name=self.bucket_name,
+                prefix=prefix,
+                max_keys=max_keys,
+                s3_client=self.s3_client,
+                metadata_cache=self.metadata_cache,
+            )
+        return ObjectListing(
+            objects=[_to_object_info(s3_object) for s3_object in objects],
+            directories=directories,
+            next_page_token=next_page_token,
+        )
+
+    def close(self) -> None:
+        """Stop prefetching, close the body cache, deleting its files, and the S3 client's connection pool."""
+        if self.list_prefetcher is not None:
+            self.list_prefetcher.close()
+        if self.body_cache is not None:
+            self.body_cache.close()
+        self.s3_client.close()
+
+    async def _coalesce(
+        self, flight_key: Tuple[Hashable, ...], call: Callable[[], Awaitable[R]], share: Callable[[R, int], List[T]]
+    ) -> T:
+        """Make ``call``, or join the identical call in flight, unless reads are not coalesced."""
+        if self.read_coalescer is None:
+            return share(await call(), 1)[0]
+        # a flight started before a write returned may miss it, so reads started since must not join it;
+        # writes made through ``files_api.s3`` with the metadata cache, e.g. batch copies, bump its generation
+        write_generation = (self._writes, self.metadata_cache.generation if self.metadata_cache else 0)
+        return await self.read_coalescer.do((*flight_key, write_generation), call, share)
+
+    def _share_through_cache(
+        self, key: str, fetched: tuple[Optional[CachedObject], Optional[_FetchedObject]], num_callers: int
+    ) -> List[StoredObject]:
+        """Share an object fetched through the body cache, retaining a cached object once per caller."""
+        cached_object, fetched_object = fetched
+        if cached_object is None:
+            return self._share_fetched(key, fetched_object, num_callers)  # type: ignore[arg-type]
+        body_cache: ObjectBodyCache = self.body_cache  # type: ignore[assignment]
+        if num_callers == 0:
+            body_cache.release(cached_object)
+        for _ in range(num_callers - 1):
+            body_cache.retain(cached_object)
+        return [_cached_to_stored_object(key, cached_object, body_cache) for _ in range(num_callers)]
+
+    def _share_fetched(self, key: str, fetched_object: _FetchedObject, num_callers: int) -> List[StoredObject]:
+        """Share a fetched object: its body as read, as it streams for one caller, or through a broadcast."""
+        response = fetched_object.response
+        if fetched_object.content is not None:
+            return [_to_stored_object(key, response, content=fetched_object.content) for _ in range(num_callers)]
+        if num_callers <= 1:
+            if num_callers == 0:
+                response["Body"].close()
+            return [_to_stored_object(key, response)] * num_callers
+
+        body = response["Body"]
+        first_byte, last_byte = _content_range_bounds(response)
+        broadcast = BroadcastBody(
+            source=iter_s3_object_body(body),  # type: ignore[arg-type]
+            close_source=body.close,
+            fetch_rest=partial(self._fetch_rest, key, response["ETag"], first_byte, last_byte),
+            num_readers=num_callers,
+            capacity_bytes=self.coalesced_body_buffer_bytes,
+        )
+        return [
+            _to_stored_object(key, response, body=reader.chunks, release=reader.close) for reader in broadcast.readers
+        ]
+
+    async def _fetch_rest(  # pylint: disable=too-many-arguments
+        self, key: str, etag: str, first_byte: int, last_byte: int, offset: int
+    ) -> AsyncIterator[bytes]:
+        """Stream the bytes of an object from ``first_byte + offset``, for a reader detached from a broadcast."""
+        get_object_response = await fetch_s3_object(
+            bucket_name=self.bucket_name,
+            object_key=key,
+            s3_client=self.s3_client,
+            byte_range=f"bytes={first_byte + offset}-{last_byte}",
+            if_match=etag,
+        )
+        async for chunk in iter_s3_object_body(get_object_response["Body"]):  # type: ignore[arg-type]
+            yield chunk
+
+
+def _listing_page_key(prefix: str, max_keys: int, delimiter: Optional[str], page_token: Optional[str]) -> Hashable:
+    """Identify the listing page asked for by a call to :meth:`S3StorageBackend.list`."""
+    # without a delimiter, continuation tokens remember the prefix, so later calls need not pass it again
+    return (prefix if delimiter else None, page_token, max_keys, delimiter)
+
+
+def _to_object_info(s3_object: "ObjectTypeDef") -> ObjectInfo:
+    """Convert a ``list_objects_v2`` entry."""
+    return ObjectInfo(
+        key=s3_object["Key"], size=s3_object["Size"], etag=s3_object["ETag"], last_modified=s3_object["LastModified"]
+    )
+
+
+def _to_stored_object(
+    key: str,
+    get_object_response: "GetObjectOutputTypeDef",
+    content: Optional[bytes] = None,
+    body: Optional[AsyncIterator[bytes]] = None,
+    release: Optional[Callable[[], None]] = None,
+) -> StoredObject:
+    """Wrap a ``get_object`` response, streaming its body unless its ``content`` or another ``body`` is given."""
+    if content is None and body is None:
+        body = iter_s3_object_body(get_object_response["Body"])  # type: ignore[arg-type]
+        release = get_object_response["Body"].close
+    return StoredObject(
+        info=ObjectInfo(
+            key=key,
+            size=get_object_response["ContentLength"],
+            etag=get_object_response["ETag"],
+            last_modified=get_object_response["LastModified"],
+            content_type=get_object_response["ContentType"],
+            content_encoding=get_object_response.get("ContentEncoding"),
+        ),
+        content_length=get_object_response["ContentLength"],
+        content_range=get_object_response.get("ContentRange"),
+        content=content,
+        body=body,
+        release=release,
+    )
+
+
+def _content_range_bounds(get_object_response: "GetObjectOutputTypeDef") -> tuple[int, int]:
+    """Return the first and last byte of the object sent in a ``get_object`` response."""
+    content_range = get_object_response.get("ContentRange")
+    if content_range is None:
+        return 0, get_object_response["ContentLength"] - 1
+    # e.g. "bytes 0-1023/4096"
+    first_byte, last_byte = content_range.removeprefix("bytes ").split("/")[0].split("-")
+    return int(first_byte), int(last_byte)
+
+
+def _cached_to_stored_object(key: str, cached_object: CachedObject, body_cache: ObjectBodyCache) -> StoredObject:
+    """Wrap an object served by the body cache, releasing it back to the cache once sent."""
+    return StoredObject(
+        info=ObjectInfo(
+            key=key,
+            size=cached_object.content_length,
+            etag=cached_object.etag,
+            last_modified=cached_object.last_modified,
+            content_type=cached_object.content_type,
+            content_encoding=cached_object.content_encoding,
+        ),
+        content_length=cached_object.content_length,
+        path=cached_object.path,
+        content=cached_object.content,
+        release=partial(body_cache.release, cached_object),
+    )
+
+
+def _raise_for_get_object_error(error: ClientError) -> NoReturn:
+    """Translate a ``get_object`` error into the matching :class:`StorageError`, re-raising unexpected errors."""
+    error_code = error.response["Error"]["Code"]
+    if error_code == "NoSuchKey":
+        raise ObjectNotFoundError(error_code) from error
+    if error_code == "304":
+        response_headers = error.response["ResponseMetadata"].get("HTTPHeaders", {})
+        raise NotModifiedError(
+            etag=response_headers.get("etag"), last_modified=response_headers.get("last-modified")
+        ) from error
+    if error_code == "InvalidRange":
+        actual_object_size = error.response["Error"].get("ActualObjectSize")
+        raise RangeNotSatisfiableError(int(actual_object_size) if actual_object_size else None) from error
+    raise error
+
+
+async def _map_precondition_failures(s3_call: Awaitable[T]) -> T:
+    """Await a conditional S3 write, translating failed ``If-Match`` conditions into :class:`PreconditionFailedError`."""
+    try:
+        return await s3_call
+    except ClientError as error:
+        # S3 answers 404 instead of 412 when the object to match does not exist
+        if error.response["Error"]["Code"] in ("PreconditionFailed", "412", "NoSuchKey"):
+            raise PreconditionFailedError(error.response["Error"]["Code"]) from error
+        raise
@@ -0,0 +1,239 @@
+"""
+OpenTelemetry tracing of the files API.
+
+Each HTTP request gets a server span, continuing the trace of its W3C ``traceparent`` header if
+any, with child spans for receiving its body, for each S3 API call made while answering it, and
+for streaming the response body. The spans of one app go to a tracer provider of its own, sampled
+and exported as configured in :class:`files_api.settings.Settings`.
+
+Requires the optional ``opentelemetry-sdk`` package, e.g. ``pip install s3-files-api[tracing]``.
+"""
+
+from typing import (
+    Any,
+    Literal,
+    Optional,
+)
+
+from starlette.datastructures import Headers
+from starlette.types import (
+    ASGIApp,
+    Message,
+    Receive,
+    Scope,
+    Send,
+)
+
+try:
+    from opentelemetry import trace
+    from opentelemetry.sdk.resources import (
+        SERVICE_NAME,
+        Resource,
+    )
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import (
+        ConsoleSpanExporter,
+        SimpleSpanProcessor,
+        SpanExporter,
+    )
+    from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+    from opentelemetry.sdk.trace.sampling import (
+        ALWAYS_OFF,
+        ALWAYS_ON,
+        ParentBased,
+        Sampler,
+        TraceIdRatioBased,
+    )
+    from opentelemetry.trace import (
+        Span,
+        SpanKind,
+        StatusCode,
+    )
+    from opentelemetry.trace.propagation.tracecontext import TraceContextTextMapPropagator
+except ImportError:  # pragma: no cover
+    TracerProvider = None  # type: ignore[assignment,misc]
+
+try:
+    from mypy_boto3_s3 import S3Client
+except ImportError:  # pragma: no cover
+    ...
+
+SERVICE_NAME_VALUE = "files-api"
+# the names of the samplers of the OTEL_TRACES_SAMPLER environment variable of OpenTelemetry SDKs
+TracesSampler = Literal[
+    "always_on",
+    "always_off",
+    "traceidratio",
+    "parentbased_always_on",
+    "parentbased_always_off",
+    "parentbased_traceidratio",
+]
+TracesExporter = Literal["console", "memory"]
+# key under which a call's span is kept in botocore's per-call context
+_S3_CALL_CONTEXT_KEY = "files_api_tracing_span"
+
+
+def is_tracing_supported() -> bool:
+    """Whether the optional ``opentelemetry-sdk`` package is installed."""
+    return TracerProvider is not None
+
+
+def create_sampler(name: TracesSampler, ratio: float) -> "Sampler":
+    """
+    Create the sampler called ``name`` in the ``OTEL_TRACES_SAMPLER`` environment variable of OpenTelemetry SDKs.
+
+    :param name: The sampler; the ``parentbased_`` ones follow the sampling decision of an incoming ``traceparent``.
+    :param ratio: The fraction of traces kept by the ``traceidratio`` samplers, ignored by the others.
+    :return: The sampler.
+    """
+    root_sampler_name = name.removeprefix("parentbased_")
+    root_sampler = {"always_on": ALWAYS_ON, "always_off": ALWAYS_OFF}.get(root_sampler_name) or TraceIdRatioBased(
+        ratio
+    )
+    return ParentBased(root_sampler) if name.startswith("parentbased_") else root_sampler
+
+
+class Tracing:
+    """
+    The tracer of one app, from a tracer provider of its own so that several apps can live in one process.
+
+    Spans are exported as soon as they end, to stdout as JSON with the ``console`` exporter, or kept
+    in :attr:`span_exporter` with the ``memory`` one, for tests and local debugging.
+    """
+
+    def __init__(
+        self,
+        sampler: TracesSampler = "parentbased_always_on",
+        sampler_ratio: float = 1.0,
+        exporter: TracesExporter = "console",
+    ):
+        self.span_exporter: SpanExporter = InMemorySpanExporter() if exporter == "memory" else ConsoleSpanExporter()
+        self.tracer_provider = TracerProvider(
+            sampler=create_sampler(sampler, sampler_ratio),
+            resource=Resource.create({SERVICE_NAME: SERVICE_NAME_VALUE}),
+        )
+        self.tracer_provider.add_span_processor(SimpleSpanProcessor(self.span_exporter))
+        self.tracer = self.tracer_provider.get_tracer(__name__)
+        self.propagator = TraceContextTextMapPropagator()
+
+    def shutdown(self) -> None:
+        """Export the spans not exported yet and stop tracing."""
+        self.tracer_provider.shutdown()
+
+
+class TracingMiddleware:  # pylint: disable=too-few-public-methods
+    """
+    Trace HTTP requests, continuing the trace of their W3C ``traceparent`` header if any.
+
+    The request span is named after the route's path template once routed, e.g.
+    ``GET /v1/files/{file_path:path}``, and is current while the app runs, so that the spans
+    of S3 calls are its children. It lasts until the last byte of the response is sent.
+    """
+
+    def __init__(self, app: ASGIApp, tracing: Tracing):
+        self.app = app
+        self.tracing = tracing
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Run the app in a span of the request, with child spans for receiving and sending bodies."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        tracer = self.tracing.tracer
+        method = scope["method"]
+        span = tracer.start_span(
+            method,
+            context=self.tracing.propagator.extract(Headers(scope=scope)),
+            kind=SpanKind.SERVER,
+            attributes={"http.request.method": method, "url.path": scope["path"], "url.scheme": scope["scheme"]},
+        )
+        request_span_context = trace.set_span_in_context(span)
+        request_body_span: Optional[Span] = None
+        response_body_span: Optional[Span] = None
+        status_code = 500
+
+        async def _receive() -> Message:
+            nonlocal request_body_span
+            message = await receive()
+            if message["type"] == "http.request":
+                if request_body_span is None:
+                    request_body_span = tracer.start_span("receive request body", context=request_span_context)
+                if not message.get("more_body", False):
+                    request_body_span.end()
+            return message
+
+        async def _send(message: Message) -> None:
+            nonlocal status_code, response_body_span
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                if response_body_span is None:
+                    response_body_span = tracer.start_span("send response body", context=request_span_context)
+                await send(message)
+                if not message.get("more_body", False):
+                    response_body_span.end()
+                return
+            await send(message)
+
+        try:
+            with trace.use_span(span, record_exception=True, set_status_on_exception=True):
+                await self.app(scope, _receive, _send)
+        finally:
+            # body spans are still open if the app failed, or the client disconnected, mid-body
+            for body_span in (request_body_span, response_body_span):
+                if body_span is not None and body_span.is_recording():
+                    body_span.end()
+            route_path = getattr(scope.get("route"), "path", None)
+            if route_path is not None:
+                span.update_name(f"{method} {route_path}")
+                span.set_attribute("http.route", route_path)
+            span.set_attribute("http.response.status_code", status_code)
+            if status_code >= 500:
+                span.set_status(StatusCode.ERROR)
+            span.end()
+
+
+def register_s3_tracing(s3_client: "S3Client", tracing: Tracing) -> None:
+    """
+    Trace every API call made by ``s3_client`` while a request is traced, with botocore event hooks.
+
+    Each call gets one span, retries included, as a child of the span current on the calling
+    thread; the S3 helpers run their calls with a copy of the caller's context, so that is the
+    request's span. Calls made outside of a request, e.g. when warming the connection pool, are not traced.
+    """
+
+    def _before_parameter_build(model: Any, params: dict, context: dict, **_: Any) -> None:
+        if not trace.get_current_span().get_span_context().is_valid:
+            return
+        attributes = {"rpc.system": "aws-api", "rpc.service": "S3", "rpc.method": model.name}
+        if "Bucket" in params:
+            attributes["aws.s3.bucket"] = params["Bucket"]
+        if "Key" in params:
+            attributes["aws.s3.key"] = params["Key"]
+        context[_S3_CALL_CONTEXT_KEY] = tracing.tracer.start_span(
+            f"S3.{model.name}", kind=SpanKind.CLIENT, attributes=attributes
+        )
+
+    def _after_call(
+        context: dict, parsed: Optional[dict] = None, exception: Optional[Exception] = None, **_: Any
+    ) -> None:
+        span: Optional[Span] = context.pop(_S3_CALL_CONTEXT_KEY, None)
+        if span is None:
+            return
+        response_metadata = parsed.get("ResponseMetadata", {}) if parsed else {}
+        status = response_metadata.get("HTTPStatusCode")
+        if status is not None:
+            span.set_attribute("http.response.status_code", status)
+        if "RequestId" in response_metadata:
+            span.set_attribute("aws.request_id", response_metadata["RequestId"])
+        span.set_attribute("aws.retries", context.get("retries", {}).get("attempt", 1) - 1)
+        if exception is not None:
+            span.record_exception(exception)
+        if status is None or status >= 400:
+            span.set_status(StatusCode.ERROR)
+        span.end()
+
+    s3_client.meta.events.register("before-parameter-build.s3", _before_parameter_build)
+    s3_client.meta.events.register("after-call.s3", _after_call)
+    s3_client.meta.events.register("after-call-error.s3", _after_call)
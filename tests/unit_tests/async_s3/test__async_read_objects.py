@@ -0,0 +1,59 @@
+"""Test cases for `async_s3.read_objects`."""
+
+import asyncio
+
+import boto3
+import pytest
+
+from files_api.async_s3.read_objects import (
+    fetch_s3_object,
+    fetch_s3_objects_metadata,
+    fetch_s3_objects_using_page_token,
+    iter_s3_object_body,
+    object_exists_in_s3,
+)
+from tests.consts import (
+    TEST_BUCKET_NAME,
+    TEST_OBJECT_KEY,
+)
+
+
+@pytest.mark.anyio
+async def test_object_exists_in_s3(mocked_aws: None):  # pylint: disable=unused-argument
+    """Assert that `object_exists_in_s3` can be awaited and concurrent checks run side by side."""
+    s3_client = boto3.client("s3")
+    s3_client.put_object(Bucket=TEST_BUCKET_NAME, Key=TEST_OBJECT_KEY, Body="test content")
+
+    results = await asyncio.gather(
+        object_exists_in_s3(TEST_BUCKET_NAME, TEST_OBJECT_KEY, s3_client=s3_client),
+        object_exists_in_s3(TEST_BUCKET_NAME, "missing.txt", s3_client=s3_client),
+    )
+    assert results == [True, False]
+
+
+@pytest.mark.anyio
+async def test_fetch_s3_object_and_iterate_body(mocked_aws: None):  # pylint: disable=unused-argument
+    """Assert that an object body can be consumed asynchronously in chunks."""
+    s3_client = boto3.client("s3")
+    s3_client.put_object(Bucket=TEST_BUCKET_NAME, Key=TEST_OBJECT_KEY, Body=b"0123456789")
+
+    response = await fetch_s3_object(TEST_BUCKET_NAME, TEST_OBJECT_KEY, s3_client=s3_client)
+    chunks = [chunk async for chunk in iter_s3_object_body(response["Body"], chunk_size=4)]
+    assert chunks == [b"0123", b"4567", b"89"]
+
+
+@pytest.mark.anyio
+async def test_pagination(mocked_aws: None):  # pylint: disable=unused-argument
+    """Assert that the async listing functions paginate like their sync counterparts."""
+    s3_client = boto3.client("s3")
+    for i in range(1, 4):
+        s3_client.put_object(Bucket=TEST_BUCKET_NAME, Key=f"file{i}.txt", Body=f"content {i}")
+
+    files, next_page_token = await fetch_s3_objects_metadata(TEST_BUCKET_NAME, max_keys=2, s3_client=s3_client)
+    assert [file["Key"] for file in files] == ["file1.txt", "file2.txt"]
+
+    files, next_page_token = await fetch_s3_objects_using_page_token(
+        TEST_BUCKET_NAME, next_page_token, max_keys=2, s3_client=s3_client
+    )
+    assert [file["Key"] for file in files] == ["file3.txt"]
+    assert next_page_token is None
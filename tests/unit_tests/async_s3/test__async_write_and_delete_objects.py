@@ -0,0 +1,26 @@
+"""Test cases for `async_s3.write_objects` and `async_s3.delete_objects`."""
+
+import boto3
+import pytest
+
+from files_api.async_s3.delete_objects import delete_s3_object
+from files_api.async_s3.read_objects import object_exists_in_s3
+from files_api.async_s3.write_objects import upload_s3_object
+from tests.consts import (
+    TEST_BUCKET_NAME,
+    TEST_OBJECT_KEY,
+)
+
+
+@pytest.mark.anyio
+async def test_upload_then_delete_s3_object(mocked_aws: None):  # pylint: disable=unused-argument
+    """Assert that objects can be uploaded and deleted through the async API."""
+    s3_client = boto3.client("s3")
+
+    await upload_s3_object(TEST_BUCKET_NAME, TEST_OBJECT_KEY, b"Hello, World!", "text/plain", s3_client=s3_client)
+    response = s3_client.get_object(Bucket=TEST_BUCKET_NAME, Key=TEST_OBJECT_KEY)
+    assert response["ContentType"] == "text/plain"
+    assert response["Body"].read() == b"Hello, World!"
+
+    await delete_s3_object(TEST_BUCKET_NAME, TEST_OBJECT_KEY, s3_client=s3_client)
+    assert not await object_exists_in_s3(TEST_BUCKET_NAME, TEST_OBJECT_KEY, s3_client=s3_client)
@@ -0,0 +1,141 @@
+"""Test cases for `s3.body_cache` and reading objects through it."""
+
+import os
+from pathlib import Path
+
+import boto3
+import pytest
+from botocore.exceptions import ClientError
+
+from files_api.s3.body_cache import ObjectBodyCache
+from files_api.s3.call_tracking import (
+    register_s3_call_tracking,
+    track_s3_calls,
+)
+from files_api.s3.metadata_cache import S3MetadataCache
+from files_api.s3.read_objects import (
+    fetch_s3_object_metadata,
+    fetch_s3_object_through_cache,
+    prewarm_s3_object_bodies,
+)
+from tests.consts import TEST_BUCKET_NAME
+
+
+def _put(key: str, body: bytes) -> dict:
+    """Upload ``body`` and return the ``get_object`` response for it, as the cache is filled from."""
+    s3_client = boto3.client("s3")
+    s3_client.put_object(Bucket=TEST_BUCKET_NAME, Key=key, Body=body, ContentType="text/plain")
+    return s3_client.get_object(Bucket=TEST_BUCKET_NAME, Key=key)
+
+
+# pylint: disable=unused-argument
+def test_body_cache_tiers(mocked_aws: None, tmp_path: Path):
+    """Assert that small bodies are kept in memory, larger ones on disk, and the rest not at all."""
+    cache = ObjectBodyCache(
+        memory_capacity_bytes=100, memory_max_object_bytes=10, disk_directory=str(tmp_path), disk_max_object_bytes=50
+    )
+    small = cache.put(TEST_BUCKET_NAME, "small.txt", _put("small.txt", b"tiny"))
+    large = cache.put(TEST_BUCKET_NAME, "large.txt", _put("large.txt", b"x" * 30))
+    assert cache.put(TEST_BUCKET_NAME, "huge.txt", _put("huge.txt", b"x" * 51)) is None
+
+    assert small.content == b"tiny" and small.path is None
+    assert large.content is None and Path(large.path).read_bytes() == b"x" * 30
+    assert large.content_type == "text/plain"
+    assert cache.get(TEST_BUCKET_NAME, "small.txt") == small
+    assert cache.get(TEST_BUCKET_NAME, "huge.txt") is None
+
+    cache.close()
+    assert not list(tmp_path.iterdir())
+
+
+# pylint: disable=unused-argument
+def test_body_cache_keeps_evicted_files_until_released(mocked_aws: None, tmp_path: Path):
+    """Assert that the disk tier stays within capacity, deleting evicted files once nobody reads them."""
+    cache = ObjectBodyCache(memory_capacity_bytes=0, disk_directory=str(tmp_path), disk_capacity_bytes=50)
+    first = cache.put(TEST_BUCKET_NAME, "a.txt", _put("a.txt", b"a" * 30))
+    second = cache.put(TEST_BUCKET_NAME, "b.txt", _put("b.txt", b"b" * 30))
+    cache.release(second)
+
+    assert cache.get(TEST_BUCKET_NAME, "a.txt") is None
+    assert cache.disk_bytes == 30
+    assert cache.stats.evictions == 1
+    assert os.path.exists(first.path)  # still being sent
+    cache.release(first)
+    assert not os.path.exists(first.path)
+
+    cache.invalidate_objects(TEST_BUCKET_NAME, ["b.txt"])
+    assert not os.path.exists(second.path)
+    assert cache.disk_bytes == 0
+    assert cache.stats.invalidations == 1
+
+
+# pylint: disable=unused-argument
+def test_fetch_s3_object_through_cache(mocked_aws: None):
+    """Assert that cached bodies are validated by ETag, for free when the metadata cache knows it."""
+    s3_client = boto3.client("s3")
+    register_s3_call_tracking(s3_client)
+    body_cache = ObjectBodyCache(memory_capacity_bytes=1024)
+    metadata_cache = S3MetadataCache()
+    s3_client.put_object(Bucket=TEST_BUCKET_NAME, Key="file.txt", Body=b"v1")
+
+    def _fetch():
+        cached_object, response = fetch_s3_object_through_cache(
+            TEST_BUCKET_NAME, "file.txt", body_cache=body_cache, s3_client=s3_client, metadata_cache=metadata_cache
+        )
+        assert response is None
+        body_cache.release(cached_object)
+        return cached_object.content
+
+    with track_s3_calls() as calls:
+        assert _fetch() == b"v1"  # miss
+        assert _fetch() == b"v1"  # revalidated with a conditional get_object
+        fetch_s3_object_metadata(TEST_BUCKET_NAME, "file.txt", s3_client=s3_client, metadata_cache=metadata_cache)
+        assert _fetch() == b"v1"  # validated by the cached head_object
+    assert calls.operations == ["GetObject", "GetObject", "HeadObject"]
+    assert body_cache.stats.as_dict() == {
+        "memory_hits": 2,
+        "disk_hits": 0,
+        "misses": 1,
+        "revalidations": 1,
+        "bytes_saved": 4,
+        "evictions": 0,
+        "invalidations": 0,
+        "hit_rate": 2 / 3,
+    }
+
+    # an overwrite made behind the API's back is caught by the revalidation
+    s3_client.put_object(Bucket=TEST_BUCKET_NAME, Key="file.txt", Body=b"v2")
+    metadata_cache.invalidate_object(TEST_BUCKET_NAME, "file.txt")
+    assert _fetch() == b"v2"
+
+    s3_client.delete_object(Bucket=TEST_BUCKET_NAME, Key="file.txt")
+    with pytest.raises(ClientError):
+        _fetch()
+    assert body_cache.get(TEST_BUCKET_NAME, "file.txt") is None
+
+
+# pylint: disable=unused-argument
+def test_fetch_s3_object_through_cache__too_large(mocked_aws: None):
+    """Assert that objects too large to cache are returned as a response to stream."""
+    body_cache = ObjectBodyCache(memory_capacity_bytes=1024, memory_max_object_bytes=4)
+    _put("big.txt", b"too large")
+
+    cached_object, response = fetch_s3_object_through_cache(TEST_BUCKET_NAME, "big.txt", body_cache=body_cache)
+    assert cached_object is None
+    assert response["Body"].read() == b"too large"
+    assert body_cache.stats.misses == 1
+
+
+# pylint: disable=unused-argument
+def test_prewarm_s3_object_bodies(mocked_aws: None, tmp_path: Path):
+    """Assert that pre-warming caches every object under the prefix that fits, once."""
+    body_cache = ObjectBodyCache(
+        memory_capacity_bytes=1024, memory_max_object_bytes=4, disk_directory=str(tmp_path), disk_max_object_bytes=8
+    )
+    for key, body in [("dir/a.txt", b"a"), ("dir/b.txt", b"bbbbbb"), ("dir/c.txt", b"c" * 9), ("other.txt", b"o")]:
+        _put(key, body)
+
+    assert prewarm_s3_object_bodies(TEST_BUCKET_NAME, "dir/", body_cache=body_cache, max_concurrency=2) == (2, 7)
+    assert prewarm_s3_object_bodies(TEST_BUCKET_NAME, "dir/", body_cache=body_cache) == (0, 0)
+    assert body_cache.get(TEST_BUCKET_NAME, "other.txt") is None
+    assert body_cache.get(TEST_BUCKET_NAME, "dir/b.txt").path is not None
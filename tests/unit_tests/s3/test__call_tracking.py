@@ -0,0 +1,27 @@
+"""Test cases for `s3.call_tracking`."""
+
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+
+from files_api.s3.call_tracking import track_s3_calls
+from files_api.s3.client import create_s3_client
+from tests.consts import (
+    TEST_BUCKET_NAME,
+    TEST_OBJECT_KEY,
+)
+
+
+def test_track_s3_calls(mocked_aws: None):  # pylint: disable=unused-argument
+    """Assert that calls are recorded only while tracking, including calls made from copied contexts."""
+    s3_client = create_s3_client()
+    s3_client.list_objects_v2(Bucket=TEST_BUCKET_NAME)
+
+    with track_s3_calls() as call_log:
+        s3_client.put_object(Bucket=TEST_BUCKET_NAME, Key=TEST_OBJECT_KEY, Body=b"content")
+        with ThreadPoolExecutor() as executor:
+            executor.submit(copy_context().run, s3_client.head_object, Bucket=TEST_BUCKET_NAME, Key=TEST_OBJECT_KEY)
+
+    s3_client.delete_object(Bucket=TEST_BUCKET_NAME, Key=TEST_OBJECT_KEY)
+    assert call_log.operations == ["PutObject", "HeadObject"]
+    assert call_log.count == 2
+    assert [operation for operation, _ in call_log.durations] == ["PutObject", "HeadObject"]
@@ -0,0 +1,40 @@
+"""Test cases for `s3.client`."""
+
+from fastapi.testclient import TestClient
+
+from files_api.s3.client import (
+    create_s3_client,
+    prewarm_s3_connections,
+)
+from tests.consts import TEST_BUCKET_NAME
+
+
+def test_create_s3_client_applies_config(mocked_aws: None):  # pylint: disable=unused-argument
+    """Assert that `create_s3_client` configures the connection pool, timeouts and retries."""
+    s3_client = create_s3_client(max_pool_connections=7, connect_timeout=1.5, read_timeout=9, max_retry_attempts=2)
+
+    config = s3_client.meta.config
+    assert config.max_pool_connections == 7
+    assert config.connect_timeout == 1.5
+    assert config.read_timeout == 9
+    assert config.retries["total_max_attempts"] == 3  # botocore counts the initial attempt
+    assert config.tcp_keepalive is True
+
+
+def test_prewarm_s3_connections(mocked_aws: None):  # pylint: disable=unused-argument
+    """Assert that pre-warming issues one probe per connection and tolerates a missing bucket."""
+    s3_client = create_s3_client()
+
+    assert prewarm_s3_connections(s3_client, TEST_BUCKET_NAME, num_connections=3) == 3
+    assert prewarm_s3_connections(s3_client, "non-existent-bucket", num_connections=2) == 0
+    assert prewarm_s3_connections(s3_client, TEST_BUCKET_NAME, num_connections=0) == 0
+
+
+def test_app_shares_one_s3_client(client: TestClient):
+    """Assert that the app lifespan stores a single S3 client that is reused across requests."""
+    s3_client = client.app.state.s3_client
+
+    client.put("/v1/files/file.txt", files={"file_content": ("file.txt", b"content", "text/plain")})
+    client.get("/v1/files/file.txt")
+
+    assert client.app.state.s3_client is s3_client
@@ -0,0 +1,179 @@
+"""Tests for the `copy_objects` module in the `s3` package."""
+
+import os
+
+import boto3
+import pytest
+from botocore.exceptions import ClientError
+
+from files_api.s3 import copy_objects
+from files_api.s3.call_tracking import (
+    register_s3_call_tracking,
+    track_s3_calls,
+)
+from files_api.s3.copy_objects import (
+    BulkCopyResult,
+    copy_s3_object,
+    copy_s3_objects_by_prefix,
+    move_s3_object,
+    move_s3_objects_by_prefix,
+)
+from files_api.s3.metadata_cache import S3MetadataCache
+from files_api.s3.read_objects import (
+    fetch_s3_object_metadata,
+    iter_s3_object_keys,
+)
+from files_api.s3.write_objects import MIN_MULTIPART_PART_SIZE_BYTES
+from tests.fixtures.mocked_aws import TEST_BUCKET_NAME
+
+
+# pylint: disable=unused-argument
+def test__copy_s3_object(mocked_aws: None):
+    """Assert that a small object is copied with one `copy_object` call, keeping its content type."""
+    s3_client = boto3.client("s3")
+    register_s3_call_tracking(s3_client)
+    s3_client.put_object(Bucket=TEST_BUCKET_NAME, Key="src.txt", Body=b"Hello, World!", ContentType="text/plain")
+    head = s3_client.head_object(Bucket=TEST_BUCKET_NAME, Key="src.txt")
+
+    with track_s3_calls() as calls:
+        assert copy_s3_object(
+            TEST_BUCKET_NAME,
+            "src.txt",
+            "dst.txt",
+            s3_client=s3_client,
+            source_etag=head["ETag"],
+            source_size=head["ContentLength"],
+        )
+    assert calls.operations == ["CopyObject"]
+
+    response = s3_client.get_object(Bucket=TEST_BUCKET_NAME, Key="dst.txt")
+    assert response["ContentType"] == "text/plain"
+    assert response["Body"].read() == b"Hello, World!"
+
+    # without a known size and ETag, the source is looked up first
+    with track_s3_calls() as calls:
+        copy_s3_object(TEST_BUCKET_NAME, "src.txt", "dst.txt", s3_client=s3_client)
+    assert calls.operations[0] == "HeadObject"
+
+
+# pylint: disable=unused-argument
+def test__copy_s3_object__in_parts(mocked_aws: None):
+    """Assert that objects at or above the threshold are copied with parallel `upload_part_copy` calls."""
+    s3_client = boto3.client("s3")
+    register_s3_call_tracking(s3_client)
+    file_content = os.urandom(2 * MIN_MULTIPART_PART_SIZE_BYTES + 123)
+    s3_client.put_object(Bucket=TEST_BUCKET_NAME, Key="big.bin", Body=file_content, ContentType="image/png")
+
+    with track_s3_calls() as calls:
+        assert copy_s3_object(
+            TEST_BUCKET_NAME,
+            "big.bin",
+            "copy.bin",
+            s3_client=s3_client,
+            multipart_threshold=MIN_MULTIPART_PART_SIZE_BYTES,
+            part_size=MIN_MULTIPART_PART_SIZE_BYTES,
+            max_concurrency=2,
+        )
+    assert calls.operations.count("UploadPartCopy") == 3
+    assert "GetObject" not in calls.operations and "PutObject" not in calls.operations
+
+    response = s3_client.get_object(Bucket=TEST_BUCKET_NAME, Key="copy.bin")
+    assert response["ETag"].endswith('-3"')
+    assert response["ContentType"] == "image/png"
+    assert response["Body"].read() == file_content
+    assert not s3_client.list_multipart_uploads(Bucket=TEST_BUCKET_NAME).get("Uploads")
+
+
+# pylint: disable=unused-argument
+def test__copy_s3_object__missing_source(mocked_aws: None):
+    """Assert that copying a missing object raises a 404 and writes nothing."""
+    s3_client = boto3.client("s3")
+    with pytest.raises(ClientError) as error:
+        copy_s3_object(TEST_BUCKET_NAME, "missing.txt", "dst.txt", s3_client=s3_client)
+    assert error.value.response["Error"]["Code"] == "404"
+    assert "Contents" not in s3_client.list_objects_v2(Bucket=TEST_BUCKET_NAME)
+
+
+# pylint: disable=unused-argument
+def test__move_s3_object(mocked_aws: None):
+    """Assert that moving an object copies it, deletes the source and invalidates the cache for both keys."""
+    s3_client = boto3.client("s3")
+    metadata_cache = S3MetadataCache()
+    s3_client.put_object(Bucket=TEST_BUCKET_NAME, Key="src.txt", Body=b"data")
+    assert (
+        fetch_s3_object_metadata(TEST_BUCKET_NAME, "dst.txt", s3_client=s3_client, metadata_cache=metadata_cache)
+        is None
+    )
+
+    assert move_s3_object(TEST_BUCKET_NAME, "src.txt", "dst.txt", s3_client=s3_client, metadata_cache=metadata_cache)
+
+    assert list(iter_s3_object_keys(TEST_BUCKET_NAME, s3_client=s3_client)) == ["dst.txt"]
+    assert fetch_s3_object_metadata(TEST_BUCKET_NAME, "dst.txt", s3_client=s3_client, metadata_cache=metadata_cache)
+
+
+# pylint: disable=unused-argument
+def test__move_s3_object__keeps_overwritten_source(mocked_aws: None):
+    """Assert that a source overwritten since it was looked up is not deleted."""
+    s3_client = boto3.client("s3")
+    s3_client.put_object(Bucket=TEST_BUCKET_NAME, Key="src.txt", Body=b"old")
+    stale_etag = s3_client.head_object(Bucket=TEST_BUCKET_NAME, Key="src.txt")["ETag"]
+    s3_client.put_object(Bucket=TEST_BUCKET_NAME, Key="src.txt", Body=b"new")
+
+    with pytest.raises(ClientError) as error:
+        move_s3_object(
+            TEST_BUCKET_NAME, "src.txt", "dst.txt", s3_client=s3_client, source_etag=stale_etag, source_size=3
+        )
+    assert error.value.response["Error"]["Code"] in ("PreconditionFailed", "412")
+    assert s3_client.get_object(Bucket=TEST_BUCKET_NAME, Key="src.txt")["Body"].read() == b"new"
+
+
+# pylint: disable=unused-argument
+def test__copy_and_move_s3_objects_by_prefix(mocked_aws: None):
+    """Assert that every object under a prefix is copied, then moved, to the same relative key."""
+    s3_client = boto3.client("s3")
+    for key in ["dir/a.txt", "dir/sub/b.txt", "dir2/c.txt"]:
+        s3_client.put_object(Bucket=TEST_BUCKET_NAME, Key=key, Body=key.encode())
+
+    result = copy_s3_objects_by_prefix(TEST_BUCKET_NAME, "dir/", "copy/", s3_client=s3_client, max_concurrency=1)
+    assert result == BulkCopyResult(copied_count=2)
+
+    result = move_s3_objects_by_prefix(TEST_BUCKET_NAME, "copy/", "moved/", s3_client=s3_client)
+    assert result == BulkCopyResult(copied_count=2)
+    assert list(iter_s3_object_keys(TEST_BUCKET_NAME, s3_client=s3_client)) == [
+        "dir/a.txt",
+        "dir/sub/b.txt",
+        "dir2/c.txt",
+        "moved/a.txt",
+        "moved/sub/b.txt",
+    ]
+    body = s3_client.get_object(Bucket=TEST_BUCKET_NAME, Key="moved/sub/b.txt")["Body"].read()
+    assert body == b"dir/sub/b.txt"
+
+    with pytest.raises(ValueError):
+        copy_s3_objects_by_prefix(TEST_BUCKET_NAME, "dir/", "dir/sub/", s3_client=s3_client)
+
+
+# pylint: disable=unused-argument
+@pytest.mark.parametrize("delete_source", [False, True])
+def test__copy_s3_objects_by_prefix__passes_part_settings(
+    mocked_aws: None, monkeypatch: pytest.MonkeyPatch, delete_source: bool
+):
+    """Assert that objects copied by prefix are copied with the given part size and concurrency, if copied in parts."""
+    s3_client = boto3.client("s3")
+    s3_client.put_object(Bucket=TEST_BUCKET_NAME, Key="dir/a.txt", Body=b"a")
+    transfers: list[dict] = []
+    transfer_name = "move_s3_object" if delete_source else "copy_s3_object"
+    monkeypatch.setattr(copy_objects, transfer_name, lambda **kwargs: transfers.append(kwargs) or True)
+
+    transfer_by_prefix = move_s3_objects_by_prefix if delete_source else copy_s3_objects_by_prefix
+    transfer_by_prefix(
+        TEST_BUCKET_NAME,
+        "dir/",
+        "copy/",
+        s3_client=s3_client,
+        part_size=2 * MIN_MULTIPART_PART_SIZE_BYTES,
+        part_max_concurrency=3,
+    )
+    assert [(transfer["part_size"], transfer["max_concurrency"]) for transfer in transfers] == [
+        (2 * MIN_MULTIPART_PART_SIZE_BYTES, 3)
+    ]
@@ -1,8 +1,19 @@
 """Test cases for `s3.delete_objects`."""
 
 import boto3
+import pytest
 
-from files_api.s3.delete_objects import delete_s3_object
+from files_api.s3 import delete_objects
+from files_api.s3.call_tracking import (
+    register_s3_call_tracking,
+    track_s3_calls,
+)
+from files_api.s3.delete_objects import (
+    BulkDeleteResult,
+    delete_s3_object,
+    delete_s3_objects,
+    delete_s3_objects_by_prefix,
+)
 from files_api.s3.read_objects import object_exists_in_s3
 from files_api.s3.write_objects import upload_s3_object
 from tests.consts import (
@@ -35,3 +46,45 @@ def test_delete_nonexistent_s3_object(mocked_aws: None):
     assert not object_exists_in_s3(TEST_BUCKET_NAME, object_key)
     assert not object_exists_in_s3(TEST_BUCKET_NAME, object_key)
     assert not object_exists_in_s3(TEST_BUCKET_NAME, object_key)
+
+
+# pylint: disable=unused-argument
+def test_delete_s3_objects_in_batches(mocked_aws: None, monkeypatch: pytest.MonkeyPatch):
+    """Assert that `delete_s3_objects` splits keys into `delete_objects` batches and counts deletions."""
+    monkeypatch.setattr(delete_objects, "MAX_KEYS_PER_DELETE_OBJECTS_CALL", 2)
+    s3_client = boto3.client("s3")
+    register_s3_call_tracking(s3_client)
+    object_keys = [f"dir/file-{index}.txt" for index in range(5)]
+    for object_key in object_keys:
+        upload_s3_object(TEST_BUCKET_NAME, object_key, file_content=b"data", s3_client=s3_client)
+
+    with track_s3_calls() as s3_call_log:
+        result = delete_s3_objects(TEST_BUCKET_NAME, iter(object_keys), s3_client=s3_client, max_concurrency=2)
+
+    assert result == BulkDeleteResult(deleted_count=5, failures=[])
+    assert s3_call_log.operations == ["DeleteObjects"] * 3
+    assert not any(object_exists_in_s3(TEST_BUCKET_NAME, object_key) for object_key in object_keys)
+
+
+# pylint: disable=unused-argument
+def test_delete_s3_objects_by_prefix(mocked_aws: None, monkeypatch: pytest.MonkeyPatch):
+    """Assert that `delete_s3_objects_by_prefix` deletes only the objects under the prefix."""
+    monkeypatch.setattr(delete_objects, "MAX_KEYS_PER_DELETE_OBJECTS_CALL", 2)
+    for object_key in ["dir/a.txt", "dir/b.txt", "dir/sub/c.txt", "other/d.txt"]:
+        upload_s3_object(TEST_BUCKET_NAME, object_key, file_content=b"data")
+
+    result = delete_s3_objects_by_prefix(TEST_BUCKET_NAME, prefix="dir/")
+
+    assert result.deleted_count == 3
+    assert not object_exists_in_s3(TEST_BUCKET_NAME, "dir/sub/c.txt")
+    assert object_exists_in_s3(TEST_BUCKET_NAME, "other/d.txt")
+
+
+# pylint: disable=unused-argument
+def test_delete_s3_objects_reports_failures(mocked_aws: None):
+    """Assert that `delete_s3_objects` reports every key of a batch whose request failed, instead of raising."""
+    result = delete_s3_objects("nonexistent-bucket", ["a.txt", "b.txt"])
+
+    assert result.deleted_count == 0
+    assert [failure.object_key for failure in result.failures] == ["a.txt", "b.txt"]
+    assert {failure.code for failure in result.failures} == {"NoSuchBucket"}
@@ -0,0 +1,141 @@
+"""Test cases for `s3.metadata_cache`."""
+
+import boto3
+import pytest
+
+from files_api.s3.delete_objects import delete_s3_object
+from files_api.s3.metadata_cache import (
+    LRUCache,
+    S3MetadataCache,
+)
+from files_api.s3.read_objects import (
+    fetch_s3_object_metadata,
+    fetch_s3_objects_metadata,
+)
+from files_api.s3.write_objects import upload_s3_object
+from tests.consts import (
+    TEST_BUCKET_NAME,
+    TEST_OBJECT_KEY,
+)
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> list[float]:
+    """Replace the cache's monotonic clock with one the test advances by hand."""
+    now = [1000.0]
+    monkeypatch.setattr("files_api.s3.metadata_cache.time.monotonic", lambda: now[0])
+    return now
+
+
+def test_lru_cache_evicts_least_recently_used():
+    """Assert that the cache stays within capacity by evicting the least recently used entry."""
+    cache = LRUCache(capacity=2)
+    cache.set("a", 1, ttl_seconds=60)
+    cache.set("b", 2, ttl_seconds=60)
+    assert cache.get("a") == (True, 1)  # "b" is now the least recently used
+
+    cache.set("c", 3, ttl_seconds=60)
+    assert cache.get("b") == (False, None)
+    assert cache.get("c") == (True, 3)
+    assert len(cache) == 2
+    assert cache.stats.as_dict() == {"hits": 2, "misses": 1, "evictions": 1, "expirations": 0, "invalidations": 0}
+
+
+def test_lru_cache_expires_entries(clock: list[float]):
+    """Assert that entries are dropped once their TTL has passed."""
+    cache = LRUCache(capacity=10)
+    cache.set("a", 1, ttl_seconds=5)
+
+    clock[0] += 4
+    assert cache.get("a") == (True, 1)
+    clock[0] += 2
+    assert cache.get("a") == (False, None)
+    assert cache.stats.expirations == 1
+
+
+def test_lru_cache_with_zero_capacity_is_disabled():
+    """Assert that a capacity of 0 stores nothing."""
+    cache = LRUCache(capacity=0)
+    cache.set("a", 1, ttl_seconds=60)
+    assert cache.get("a") == (False, None)
+
+
+def test_lru_cache_weighs_entries():
+    """Assert that a weighed cache bounds the total weight of its entries and skips overweight values."""
+    cache = LRUCache(capacity=10, weigh=len)
+    cache.set("a", b"aaaa", ttl_seconds=60)
+    cache.set("b", b"bbbb", ttl_seconds=60)
+    cache.set("c", b"cccc", ttl_seconds=60)
+    assert cache.get("a") == (False, None)
+    assert cache.weight == 8
+
+    cache.set("b", b"b", ttl_seconds=60)  # replacing an entry replaces its weight
+    assert cache.weight == 5
+    cache.set("big", b"x" * 11, ttl_seconds=60)
+    assert cache.get("big") == (False, None)
+    assert cache.delete("c") and not cache.delete("c")
+    assert cache.weight == 1
+
+
+def test_metadata_cache_negative_ttl(clock: list[float]):
+    """Assert that missing objects are cached with the negative TTL."""
+    cache = S3MetadataCache(ttl_seconds=10, negative_ttl_seconds=1)
+    cache.set_head(TEST_BUCKET_NAME, "missing.txt", None, generation=cache.generation)
+    cache.set_head(TEST_BUCKET_NAME, TEST_OBJECT_KEY, {"ContentLength": 1}, generation=cache.generation)
+
+    assert cache.get_head(TEST_BUCKET_NAME, "missing.txt") == (True, None)
+    clock[0] += 2
+    assert cache.get_head(TEST_BUCKET_NAME, "missing.txt") == (False, None)
+    assert cache.get_head(TEST_BUCKET_NAME, TEST_OBJECT_KEY) == (True, {"ContentLength": 1})
+
+
+def test_metadata_cache_invalidation():
+    """Assert that invalidating a key drops its metadata, pages that may list it, and racing writes."""
+    cache = S3MetadataCache()
+    generation = cache.generation
+    cache.set_head(TEST_BUCKET_NAME, "dir/a.txt", {"ContentLength": 1}, generation=generation)
+    cache.set_page(TEST_BUCKET_NAME, "dir/", None, 10, ([], None), generation=generation)
+    cache.set_page(TEST_BUCKET_NAME, "other/", None, 10, ([], None), generation=generation)
+    cache.set_page(TEST_BUCKET_NAME, None, "token", 10, ([], None), generation=generation)
+
+    cache.invalidate_object(TEST_BUCKET_NAME, "dir/a.txt")
+
+    assert cache.get_head(TEST_BUCKET_NAME, "dir/a.txt") == (False, None)
+    assert cache.get_page(TEST_BUCKET_NAME, "dir/", None, 10) == (False, None)
+    assert cache.get_page(TEST_BUCKET_NAME, None, "token", 10) == (False, None)
+    assert cache.get_page(TEST_BUCKET_NAME, "other/", None, 10) == (True, ([], None))
+
+    # listeners hear about every invalidation
+    invalidated: list[tuple[str, set]] = []
+    cache.add_invalidation_listener(lambda bucket_name, object_keys: invalidated.append((bucket_name, object_keys)))
+    cache.invalidate_objects(TEST_BUCKET_NAME, ["dir/b.txt"])
+    assert invalidated == [(TEST_BUCKET_NAME, {"dir/b.txt"})]
+
+    # a result fetched before the invalidation must not be cached afterwards
+    cache.set_head(TEST_BUCKET_NAME, "dir/a.txt", {"ContentLength": 1}, generation=generation)
+    assert cache.get_head(TEST_BUCKET_NAME, "dir/a.txt") == (False, None)
+
+
+def test_s3_functions_use_and_invalidate_cache(mocked_aws: None):  # pylint: disable=unused-argument
+    """Assert that reads are served from the cache and writes and deletes through `files_api.s3` invalidate it."""
+    s3_client = boto3.client("s3")
+    cache = S3MetadataCache()
+
+    assert fetch_s3_object_metadata(TEST_BUCKET_NAME, TEST_OBJECT_KEY, s3_client, metadata_cache=cache) is None
+    upload_s3_object(TEST_BUCKET_NAME, TEST_OBJECT_KEY, b"content", s3_client=s3_client, metadata_cache=cache)
+    head = fetch_s3_object_metadata(TEST_BUCKET_NAME, TEST_OBJECT_KEY, s3_client, metadata_cache=cache)
+    assert head["ContentLength"] == len(b"content")
+
+    # changes made behind the cache's back are not seen until invalidation
+    s3_client.delete_object(Bucket=TEST_BUCKET_NAME, Key=TEST_OBJECT_KEY)
+    assert fetch_s3_object_metadata(TEST_BUCKET_NAME, TEST_OBJECT_KEY, s3_client, metadata_cache=cache) == head
+    files, _ = fetch_s3_objects_metadata(TEST_BUCKET_NAME, s3_client=s3_client, metadata_cache=cache)
+    assert files == []
+
+    upload_s3_object(TEST_BUCKET_NAME, TEST_OBJECT_KEY, b"content", s3_client=s3_client, metadata_cache=cache)
+    files, _ = fetch_s3_objects_metadata(TEST_BUCKET_NAME, s3_client=s3_client, metadata_cache=cache)
+    assert [file["Key"] for file in files] == [TEST_OBJECT_KEY]
+
+    delete_s3_object(TEST_BUCKET_NAME, TEST_OBJECT_KEY, s3_client=s3_client, metadata_cache=cache)
+    assert fetch_s3_object_metadata(TEST_BUCKET_NAME, TEST_OBJECT_KEY, s3_client, metadata_cache=cache) is None
+    assert cache.stats.hits == 1
@@ -0,0 +1,42 @@
+"""Test cases for `s3.presigned_urls`."""
+
+import requests
+
+from files_api.s3.presigned_urls import (
+    create_presigned_multipart_upload,
+    generate_presigned_download_url,
+    generate_presigned_upload_url,
+)
+from files_api.s3.write_objects import (
+    MAX_MULTIPART_PARTS,
+    MIB,
+    MIN_MULTIPART_PART_SIZE_BYTES,
+)
+from tests.consts import (
+    TEST_BUCKET_NAME,
+    TEST_OBJECT_KEY,
+)
+
+
+# pylint: disable=unused-argument
+def test_presigned_upload_then_download(mocked_aws: None):
+    """Assert that content uploaded to a presigned PUT URL can be read back from a presigned GET URL."""
+    upload_url = generate_presigned_upload_url(TEST_BUCKET_NAME, TEST_OBJECT_KEY, content_type="text/plain")
+    assert requests.put(upload_url, data=b"Hello", headers={"Content-Type": "text/plain"}, timeout=5).ok
+
+    download_url = generate_presigned_download_url(TEST_BUCKET_NAME, TEST_OBJECT_KEY, expires_in=60)
+    response = requests.get(download_url, timeout=5)
+    assert response.content == b"Hello"
+    assert response.headers["Content-Type"] == "text/plain"
+
+
+# pylint: disable=unused-argument
+def test_presigned_multipart_upload_part_sizes(mocked_aws: None):
+    """Assert that part sizes respect S3's minimum part size and maximum part count."""
+    upload = create_presigned_multipart_upload(TEST_BUCKET_NAME, TEST_OBJECT_KEY, size_bytes=12 * MIB, part_size=1)
+    assert upload.part_size == MIN_MULTIPART_PART_SIZE_BYTES
+    assert len(upload.part_urls) == 3
+
+    huge_size = MAX_MULTIPART_PARTS * MIN_MULTIPART_PART_SIZE_BYTES * 2
+    upload = create_presigned_multipart_upload(TEST_BUCKET_NAME, TEST_OBJECT_KEY, size_bytes=huge_size)
+    assert len(upload.part_urls) == MAX_MULTIPART_PARTS
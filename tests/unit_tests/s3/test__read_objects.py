@@ -4,12 +4,21 @@ import boto3
 import boto3.exceptions
 import pytest
 
+from files_api.s3.call_tracking import (
+    register_s3_call_tracking,
+    track_s3_calls,
+)
 from files_api.s3.read_objects import (
     fetch_s3_object,
+    fetch_s3_object_metadata,
     fetch_s3_objects_metadata,
+    fetch_s3_objects_metadata_by_key,
     fetch_s3_objects_using_page_token,
+    iter_s3_object_bodies,
+    iter_s3_objects,
     object_exists_in_s3,
 )
+from files_api.s3.write_objects import upload_s3_object
 from tests.consts import (
     TEST_BUCKET_NAME,
     TEST_OBJECT_KEY,
@@ -29,6 +38,33 @@ def test_object_exists_in_s3(mocked_aws: None):  # pylint: disable=unused-argume
     assert not exists_in_s3
 
 
+@pytest.mark.parametrize(
+    "last_char, sibling_suffix",
+    [
+        ("b", "az"),
+        # the code point before U+E000 is a surrogate, which cannot be sent to S3
+        ("\ue000", "\ud7ffz"),
+    ],
+)
+def test_fetch_s3_objects_metadata_by_key_lists_from_the_first_requested_key(
+    mocked_aws: None, last_char: str, sibling_suffix: str
+):  # pylint: disable=unused-argument
+    """Assert that listing pages start right at the first requested key, skipping the keys sorting just before it."""
+    s3_client = boto3.client("s3")
+    listed_keys: list[str] = []
+    s3_client.meta.events.register(
+        "after-call.s3.ListObjectsV2",
+        lambda parsed, **_: listed_keys.extend(s3_object["Key"] for s3_object in parsed.get("Contents", [])),
+    )
+    requested_keys = [f"dir/file-{index:02}{last_char}" for index in range(10)]
+    for object_key in [*requested_keys, f"dir/file-00{sibling_suffix}"]:
+        upload_s3_object(TEST_BUCKET_NAME, object_key, file_content=b"x", s3_client=s3_client)
+
+    found = fetch_s3_objects_metadata_by_key(TEST_BUCKET_NAME, requested_keys, s3_client=s3_client)
+    assert all(found[object_key] is not None for object_key in requested_keys)
+    assert listed_keys == requested_keys
+
+
 # pylint: disable=unused-argument
 def test_fetch_s3_object(mocked_aws: None):
     """Assert that `fetch_s3_object` returns the correct object from an S3 bucket."""
@@ -148,3 +184,56 @@ def test_raises_error_when_bucket_does_not_exist(mocked_aws: None):
     with pytest.raises(Exception):
         fetch_s3_objects_using_page_token("non-existent-bucket", "token")
         fetch_s3_objects_using_page_token("non-existent-bucket", "token")
+
+
+def test_fetch_s3_object_metadata(mocked_aws: None):  # pylint: disable=unused-argument
+    """Assert that `fetch_s3_object_metadata` returns head_object metadata, or None for a missing object."""
+    s3_client = boto3.client("s3")
+    s3_client.put_object(Bucket=TEST_BUCKET_NAME, Key=TEST_OBJECT_KEY, Body="test content", ContentType="text/plain")
+
+    metadata = fetch_s3_object_metadata(TEST_BUCKET_NAME, TEST_OBJECT_KEY)
+    assert metadata["ContentLength"] == len("test content")
+    assert metadata["ContentType"] == "text/plain"
+    assert fetch_s3_object_metadata(TEST_BUCKET_NAME, "missing.txt") is None
+
+
+# pylint: disable=unused-argument
+def test_fetch_s3_objects_metadata_by_key(mocked_aws: None):
+    """Assert that keys sharing a prefix are resolved from listing pages, and scattered keys with heads."""
+    s3_client = boto3.client("s3")
+    register_s3_call_tracking(s3_client)
+    for index in range(30):
+        upload_s3_object(TEST_BUCKET_NAME, f"dir/file-{index:02}.txt", file_content=b"x" * index, s3_client=s3_client)
+    requested_keys = [f"dir/file-{index:02}.txt" for index in range(0, 30, 2)] + ["dir/missing.txt"]
+
+    with track_s3_calls() as s3_call_log:
+        found = fetch_s3_objects_metadata_by_key(TEST_BUCKET_NAME, requested_keys, s3_client=s3_client)
+    assert s3_call_log.operations == ["ListObjectsV2"]
+    assert found["dir/missing.txt"] is None
+    assert found["dir/file-04.txt"]["Size"] == 4
+
+    with track_s3_calls() as s3_call_log:
+        found = fetch_s3_objects_metadata_by_key(
+            TEST_BUCKET_NAME, ["dir/file-01.txt", "missing.txt"], s3_client=s3_client
+        )
+    assert s3_call_log.operations == ["HeadObject", "HeadObject"]
+    assert found["dir/file-01.txt"]["Size"] == 1
+    assert found["missing.txt"] is None
+
+
+# pylint: disable=unused-argument
+def test_iter_s3_object_bodies(mocked_aws: None):
+    """Assert that bodies are yielded in listing order, and objects changed since listing are skipped."""
+    for index in range(5):
+        upload_s3_object(TEST_BUCKET_NAME, f"dir/{index}.txt", file_content=b"x" * (index * 10))
+    listed_objects = list(iter_s3_objects(TEST_BUCKET_NAME, prefix="dir/"))
+    upload_s3_object(TEST_BUCKET_NAME, "dir/3.txt", file_content=b"changed")
+
+    fetched = [
+        (s3_object["Key"], body.read())
+        for s3_object, body, _ in iter_s3_object_bodies(
+            TEST_BUCKET_NAME, listed_objects, prefetch_count=2, prefetch_max_object_bytes=20
+        )
+    ]
+
+    assert fetched == [(f"dir/{index}.txt", b"x" * (index * 10)) for index in (0, 1, 2, 4)]
@@ -1,8 +1,19 @@
 """Tests for the `write_objects` module in the `s3` package."""
 
+import io
+import os
+
 import boto3
+import pytest
 
-from files_api.s3.write_objects import upload_s3_object
+from files_api.s3.write_objects import (
+    MIN_MULTIPART_PART_SIZE_BYTES,
+    ObjectToUpload,
+    UploadResult,
+    upload_s3_object,
+    upload_s3_objects,
+)
+from tests.consts import TEST_OBJECT_KEY
 from tests.fixtures.mocked_aws import TEST_BUCKET_NAME
 
 
@@ -14,12 +25,13 @@ def test__upload_s3_object(mocked_aws: None):
     file_content = b"Hello, World!"
     content_type = "text/plain"
 
-    upload_s3_object(
+    created = upload_s3_object(
         bucket_name=TEST_BUCKET_NAME,
         object_key=object_key,
         file_content=file_content,
         content_type=content_type,
     )
+    assert created
 
     s3_client = boto3.client("s3")
 
@@ -27,3 +39,138 @@ def test__upload_s3_object(mocked_aws: None):
     response = s3_client.get_object(Bucket=TEST_BUCKET_NAME, Key=object_key)
     assert response["ContentType"] == content_type
     assert response["Body"].read() == file_content
+
+
+# pylint: disable=unused-argument
+def test__upload_s3_object__multipart_from_stream(mocked_aws: None):
+    """Assert that a stream at or above the threshold is uploaded in parts and reassembled intact."""
+    part_size = MIN_MULTIPART_PART_SIZE_BYTES
+    file_content = os.urandom(2 * part_size + 123)
+
+    upload_s3_object(
+        bucket_name=TEST_BUCKET_NAME,
+        object_key=TEST_OBJECT_KEY,
+        file_content=io.BytesIO(file_content),
+        multipart_threshold=part_size,
+        part_size=part_size,
+        max_concurrency=2,
+    )
+
+    s3_client = boto3.client("s3")
+    response = s3_client.get_object(Bucket=TEST_BUCKET_NAME, Key=TEST_OBJECT_KEY)
+    assert response["ETag"].endswith('-3"')  # multipart ETags carry the part count
+    assert response["ContentType"] == "application/octet-stream"
+    assert response["Body"].read() == file_content
+
+    # overwriting reuses the uploaded parts and reports that the object already existed
+    assert not upload_s3_object(
+        bucket_name=TEST_BUCKET_NAME,
+        object_key=TEST_OBJECT_KEY,
+        file_content=io.BytesIO(file_content[::-1]),
+        multipart_threshold=part_size,
+        part_size=part_size,
+    )
+    response = s3_client.get_object(Bucket=TEST_BUCKET_NAME, Key=TEST_OBJECT_KEY)
+    assert response["Body"].read() == file_content[::-1]
+    assert not s3_client.list_multipart_uploads(Bucket=TEST_BUCKET_NAME).get("Uploads")
+
+
+# pylint: disable=unused-argument
+def test__upload_s3_object__multipart_from_bytes(mocked_aws: None):
+    """Assert that bytes spanning several parts are uploaded in parts and reassembled intact."""
+    part_size = MIN_MULTIPART_PART_SIZE_BYTES
+    file_content = os.urandom(3 * part_size + 1)
+
+    upload_s3_object(
+        bucket_name=TEST_BUCKET_NAME,
+        object_key=TEST_OBJECT_KEY,
+        file_content=file_content,
+        multipart_threshold=part_size,
+        part_size=part_size,
+    )
+
+    response = boto3.client("s3").get_object(Bucket=TEST_BUCKET_NAME, Key=TEST_OBJECT_KEY)
+    assert response["ETag"].endswith('-4"')
+    assert response["Body"].read() == file_content
+
+
+# pylint: disable=unused-argument
+def test__upload_s3_object__overwrite(mocked_aws: None):
+    """Assert that `upload_s3_object` reports whether it created or overwrote the object."""
+    assert upload_s3_object(bucket_name=TEST_BUCKET_NAME, object_key=TEST_OBJECT_KEY, file_content=b"first")
+    assert not upload_s3_object(bucket_name=TEST_BUCKET_NAME, object_key=TEST_OBJECT_KEY, file_content=b"second")
+
+    s3_client = boto3.client("s3")
+    response = s3_client.get_object(Bucket=TEST_BUCKET_NAME, Key=TEST_OBJECT_KEY)
+    assert response["Body"].read() == b"second"
+
+
+# pylint: disable=unused-argument
+def test__upload_s3_object__small_stream_uses_single_put(mocked_aws: None):
+    """Assert that a stream below the threshold is uploaded with a single `put_object`."""
+    upload_s3_object(
+        bucket_name=TEST_BUCKET_NAME,
+        object_key=TEST_OBJECT_KEY,
+        file_content=io.BytesIO(b"Hello, World!"),
+        multipart_threshold=MIN_MULTIPART_PART_SIZE_BYTES,
+    )
+
+    s3_client = boto3.client("s3")
+    response = s3_client.get_object(Bucket=TEST_BUCKET_NAME, Key=TEST_OBJECT_KEY)
+    assert "-" not in response["ETag"]
+    assert response["Body"].read() == b"Hello, World!"
+
+
+class _FailingStream(io.RawIOBase):
+    """A stream that yields some bytes and then fails, like a dropped client connection."""
+
+    def __init__(self, num_good_bytes: int):
+        self._remaining = num_good_bytes
+
+    def read(self, size: int = -1) -> bytes:
+        if self._remaining <= 0:
+            raise ConnectionError("client went away")
+        num_bytes = min(size, self._remaining)
+        self._remaining -= num_bytes
+        return b"x" * num_bytes
+
+
+# pylint: disable=unused-argument
+def test__upload_s3_object__aborts_multipart_on_failure(mocked_aws: None):
+    """Assert that a failed multipart upload is aborted and no object is created."""
+    with pytest.raises(ConnectionError):
+        upload_s3_object(
+            bucket_name=TEST_BUCKET_NAME,
+            object_key=TEST_OBJECT_KEY,
+            file_content=_FailingStream(num_good_bytes=MIN_MULTIPART_PART_SIZE_BYTES + 1),
+            multipart_threshold=MIN_MULTIPART_PART_SIZE_BYTES,
+            part_size=MIN_MULTIPART_PART_SIZE_BYTES,
+        )
+
+    s3_client = boto3.client("s3")
+    assert not s3_client.list_multipart_uploads(Bucket=TEST_BUCKET_NAME).get("Uploads")
+    assert "Contents" not in s3_client.list_objects_v2(Bucket=TEST_BUCKET_NAME)
+
+
+# pylint: disable=unused-argument
+def test__upload_s3_objects(mocked_aws: None):
+    """Assert that `upload_s3_objects` uploads every file and reports each result in order."""
+    upload_s3_object(TEST_BUCKET_NAME, "b.txt", file_content=b"old")
+    objects = (ObjectToUpload(object_key=f"{name}.txt", file_content=name.encode()) for name in "abcde")
+
+    results = upload_s3_objects(TEST_BUCKET_NAME, objects, max_concurrency=2)
+
+    assert [result.object_key for result in results] == [f"{name}.txt" for name in "abcde"]
+    assert [result.created for result in results] == [True, False, True, True, True]
+    s3_client = boto3.client("s3")
+    assert s3_client.get_object(Bucket=TEST_BUCKET_NAME, Key="b.txt")["Body"].read() == b"b"
+
+
+# pylint: disable=unused-argument
+def test__upload_s3_objects__reports_failures(mocked_aws: None):
+    """Assert that a failed upload is reported in its result rather than raised."""
+    results = upload_s3_objects("nonexistent-bucket", [ObjectToUpload(object_key="a.txt", file_content=b"a")])
+
+    assert results == [
+        UploadResult(object_key="a.txt", error_code="NoSuchBucket", error_message=results[0].error_message)
+    ]
@@ -0,0 +1,125 @@
+"""Test cases for `storage.local`."""
+
+import io
+from pathlib import Path
+
+import pytest
+
+from files_api.ranges import (
+    ByteRange,
+    IfRangeCondition,
+)
+from files_api.storage.base import (
+    InvalidRequestError,
+    NotModifiedError,
+    ObjectNotFoundError,
+    PreconditionFailedError,
+    RangeNotSatisfiableError,
+)
+from files_api.storage.local import LocalStorageBackend
+
+
+async def _read(storage: LocalStorageBackend, key: str, **get_kwargs) -> bytes:
+    stored_object = await storage.get(key, **get_kwargs)
+    return b"".join([chunk async for chunk in stored_object.iter_bytes()])
+
+
+@pytest.mark.anyio
+async def test_put_get_and_delete(tmp_path: Path):
+    """Assert that files round-trip through the filesystem and are read by path unless a range is asked for."""
+    storage = LocalStorageBackend(str(tmp_path))
+
+    assert await storage.put("dir/file.txt", io.BytesIO(b"hello world")) is True
+    assert await storage.put("dir/file.txt", io.BytesIO(b"hello, world")) is False
+    assert (tmp_path / "dir" / "file.txt").read_bytes() == b"hello, world"
+
+    info = await storage.head("dir/file.txt")
+    assert info.size == 12 and info.content_type == "text/plain"
+    assert await storage.exists("dir/file.txt")
+    assert not await storage.exists("dir")
+
+    stored_object = await storage.get("dir/file.txt")
+    assert stored_object.path == str(tmp_path / "dir" / "file.txt")
+    assert await _read(storage, "dir/file.txt", byte_range=ByteRange(start=None, end=5)) == b"world"
+    stored_object = await storage.get("dir/file.txt", byte_range=ByteRange(start=7, end=None))
+    assert stored_object.content_range == "bytes 7-11/12" and stored_object.path is None
+
+    await storage.delete("dir/file.txt")
+    assert not (tmp_path / "dir").exists()  # empty directories are removed with their last file
+    with pytest.raises(ObjectNotFoundError):
+        await storage.get("dir/file.txt")
+    await storage.delete("dir/file.txt")  # deleting a missing file is not an error
+
+
+@pytest.mark.anyio
+async def test_conditional_requests(tmp_path: Path):
+    """Assert that preconditions are evaluated against the mtime-and-size ETag."""
+    storage = LocalStorageBackend(str(tmp_path))
+    await storage.put("file.txt", io.BytesIO(b"v1"))
+    etag = (await storage.head("file.txt")).etag
+
+    with pytest.raises(NotModifiedError) as error:
+        await storage.get("file.txt", if_none_match=etag)
+    assert error.value.etag == etag
+    with pytest.raises(RangeNotSatisfiableError) as range_error:
+        await storage.get("file.txt", byte_range=ByteRange(start=5, end=None))
+    assert range_error.value.size == 2
+
+    stale = IfRangeCondition(etag='"stale"')
+    assert (
+        await storage.get("file.txt", byte_range=ByteRange(start=1, end=None), if_range=stale)
+    ).content_range is None
+
+    with pytest.raises(PreconditionFailedError):
+        await storage.put("file.txt", io.BytesIO(b"v2"), if_match='"stale"')
+    with pytest.raises(PreconditionFailedError):
+        await storage.delete("missing.txt", if_match=etag)
+    assert await storage.put("file.txt", io.BytesIO(b"v2"), if_match=etag) is False
+    with pytest.raises(InvalidRequestError):
+        await storage.put("file.txt", io.BytesIO(b"v2"), content_encoding="gzip")
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize(
+    "key", ["../outside.txt", "dir/../../outside.txt", "./file.txt", ".files-api-tmp/file.txt", "a\x00b"]
+)
+async def test_keys_cannot_escape_the_root_directory(tmp_path: Path, key: str):
+    """Assert that keys naming files outside of the root directory, in its temporary directory, or no file, are rejected."""
+    storage = LocalStorageBackend(str(tmp_path / "root"))
+    with pytest.raises(InvalidRequestError):
+        await storage.put(key, io.BytesIO(b"nope"))
+    assert await storage.head(key) is None
+    with pytest.raises(InvalidRequestError):
+        await storage.delete(key)
+
+
+@pytest.mark.anyio
+async def test_list(tmp_path: Path):
+    """Assert that listings are paginated in S3's key order, recursively or by directory."""
+    storage = LocalStorageBackend(str(tmp_path))
+    keys = ["a.txt", "dir/b.txt", "dir/sub/c.txt", "dir-2/d.txt", "dir/sub/e.txt", "z.txt"]
+    for key in keys:
+        await storage.put(key, io.BytesIO(key.encode()))
+
+    listed, page_token = [], None
+    while True:
+        listing = await storage.list(page_token=page_token, max_keys=2)
+        listed += [object_info.key for object_info in listing.objects]
+        if not (page_token := listing.next_page_token):
+            break
+    assert listed == sorted(keys)
+
+    listing = await storage.list(prefix="dir/", max_keys=10)
+    assert [object_info.key for object_info in listing.objects] == ["dir/b.txt", "dir/sub/c.txt", "dir/sub/e.txt"]
+
+    listing = await storage.list(prefix="dir", delimiter="/", max_keys=1)
+    assert (listing.objects, listing.directories) == ([], ["dir-2/"])
+    listing = await storage.list(page_token=listing.next_page_token, max_keys=1)
+    assert listing.directories == ["dir/"] and listing.next_page_token is None
+
+    listing = await storage.list(prefix="dir/", delimiter="/")
+    assert [object_info.key for object_info in listing.objects] == ["dir/b.txt"]
+    assert listing.directories == ["dir/sub/"]
+
+    with pytest.raises(InvalidRequestError):
+        await storage.list(page_token="not a page token")
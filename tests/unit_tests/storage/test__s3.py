@@ -0,0 +1,148 @@
+"""Test cases for `storage.s3`."""
+
+import asyncio
+import io
+from typing import Optional
+
+import pytest
+
+from files_api.s3.call_tracking import track_s3_calls
+from files_api.s3.client import create_s3_client
+from files_api.s3.metadata_cache import S3MetadataCache
+from files_api.storage.s3 import S3StorageBackend
+from tests.consts import (
+    TEST_BUCKET_NAME,
+    TEST_OBJECT_KEY,
+)
+
+CONTENT = bytes(range(256)) * 64
+
+
+async def _read(storage: S3StorageBackend, key: str) -> bytes:
+    stored_object = await storage.get(key)
+    try:
+        return b"".join([chunk async for chunk in stored_object.iter_bytes()])
+    finally:
+        stored_object.close()
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("coalesced_body_fanout_max_bytes", [len(CONTENT), 0])
+async def test_concurrent_reads_are_coalesced(
+    mocked_aws: None, coalesced_body_fanout_max_bytes: int
+):  # pylint: disable=unused-argument
+    """Assert that concurrent reads of a file make one S3 call each, whether the body is fanned out or broadcast."""
+    storage = S3StorageBackend(
+        TEST_BUCKET_NAME, create_s3_client(), coalesced_body_fanout_max_bytes=coalesced_body_fanout_max_bytes
+    )
+    await storage.put(TEST_OBJECT_KEY, io.BytesIO(CONTENT))
+
+    with track_s3_calls() as call_log:
+        heads = await asyncio.gather(*[storage.head(TEST_OBJECT_KEY) for _ in range(5)])
+        bodies = await asyncio.gather(*[_read(storage, TEST_OBJECT_KEY) for _ in range(5)])
+
+    assert {head.size for head in heads if head is not None} == {len(CONTENT)}
+    assert bodies == [CONTENT] * 5
+    assert call_log.operations == ["HeadObject", "GetObject"]
+    assert storage.read_coalescer is not None
+    assert storage.read_coalescer.stats.as_dict() == {"flights": 2, "coalesced": 8}
+
+
+@pytest.mark.anyio
+async def test_reads_are_not_coalesced_if_disabled(mocked_aws: None):  # pylint: disable=unused-argument
+    """Assert that every read makes its own S3 call when coalescing is disabled."""
+    storage = S3StorageBackend(TEST_BUCKET_NAME, create_s3_client(), coalesce_reads=False)
+    await storage.put(TEST_OBJECT_KEY, io.BytesIO(CONTENT))
+
+    with track_s3_calls() as call_log:
+        bodies = await asyncio.gather(*[_read(storage, TEST_OBJECT_KEY) for _ in range(3)])
+
+    assert bodies == [CONTENT] * 3
+    assert call_log.operations == ["GetObject"] * 3
+    assert storage.read_coalescer is None
+
+
+@pytest.mark.anyio
+async def test_reads_started_after_a_write_do_not_join_reads_started_before_it(
+    mocked_aws: None,
+):  # pylint: disable=unused-argument
+    """Assert that a read started once a write returned sees it, even if a read started before it is still in flight."""
+    storage = S3StorageBackend(TEST_BUCKET_NAME, create_s3_client())
+    await storage.put(TEST_OBJECT_KEY, io.BytesIO(CONTENT))
+    head, head_fetched, release_head = storage._head, asyncio.Event(), asyncio.Event()
+
+    async def _slow_first_head(key: str):
+        info = await head(key)
+        if not head_fetched.is_set():
+            head_fetched.set()
+            # held in flight with the old metadata until released
+            await release_head.wait()
+        return info
+
+    storage._head = _slow_first_head  # type: ignore[method-assign]
+    stale_head = asyncio.ensure_future(storage.head(TEST_OBJECT_KEY))
+    await head_fetched.wait()
+    await storage.put(TEST_OBJECT_KEY, io.BytesIO(CONTENT * 2))
+    fresh_head = asyncio.ensure_future(storage.head(TEST_OBJECT_KEY))
+    await asyncio.sleep(0)
+    release_head.set()
+
+    assert (await stale_head).size == len(CONTENT)  # type: ignore[union-attr]
+    assert (await fresh_head).size == len(CONTENT) * 2  # type: ignore[union-attr]
+    assert storage.read_coalescer is not None
+    assert storage.read_coalescer.stats.as_dict() == {"flights": 2, "coalesced": 0}
+
+
+@pytest.mark.anyio
+async def test_slow_coalesced_readers_fetch_the_rest_of_the_body(mocked_aws: None):  # pylint: disable=unused-argument
+    """Assert that a reader falling too far behind the others fetches the rest of the body with a ranged GET."""
+    storage = S3StorageBackend(
+        TEST_BUCKET_NAME, create_s3_client(), coalesced_body_fanout_max_bytes=0, coalesced_body_buffer_bytes=1
+    )
+    await storage.put(TEST_OBJECT_KEY, io.BytesIO(CONTENT))
+
+    with track_s3_calls() as call_log:
+        fast_object, slow_object = await asyncio.gather(*[storage.get(TEST_OBJECT_KEY) for _ in range(2)])
+        fast_body = b"".join([chunk async for chunk in fast_object.iter_bytes()])
+        slow_body = b"".join([chunk async for chunk in slow_object.iter_bytes()])
+        fast_object.close()
+        slow_object.close()
+
+    assert fast_body == slow_body == CONTENT
+    assert call_log.operations == ["GetObject", "GetObject"]
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("delimiter", [None, "/"])
+async def test_next_listing_pages_are_prefetched(
+    mocked_aws: None, delimiter: Optional[str]
+):  # pylint: disable=unused-argument
+    """Assert that the next page of a listing is served without an S3 call, until a write invalidates it."""
+    storage = S3StorageBackend(
+        TEST_BUCKET_NAME, create_s3_client(), metadata_cache=S3MetadataCache(capacity=0), list_prefetch_depth=1
+    )
+    for index in range(5):
+        await storage.put(f"dir/file-{index}.txt", io.BytesIO(b"content"))
+
+    first_page = await storage.list(prefix="dir/", max_keys=2, delimiter=delimiter)
+    await asyncio.sleep(0.1)
+    with track_s3_calls() as call_log:
+        # listings without a delimiter need not repeat their prefix
+        second_page = await storage.list(
+            prefix="dir/" if delimiter else "", page_token=first_page.next_page_token, max_keys=2, delimiter=delimiter
+        )
+    assert [info.key for info in second_page.objects] == ["dir/file-2.txt", "dir/file-3.txt"]
+    assert call_log.operations == []
+
+    await asyncio.sleep(0.1)
+    await storage.put("dir/file-5.txt", io.BytesIO(b"content"))
+    with track_s3_calls() as call_log:
+        third_page = await storage.list(
+            prefix="dir/", page_token=second_page.next_page_token, max_keys=2, delimiter=delimiter
+        )
+    assert [info.key for info in third_page.objects] == ["dir/file-4.txt", "dir/file-5.txt"]
+    assert call_log.operations == ["ListObjectsV2"]
+
+    assert storage.list_prefetcher is not None
+    assert storage.list_prefetcher.stats.as_dict() == {"prefetches": 2, "hits": 1, "wasted": 1}
+    storage.close()
@@ -0,0 +1,84 @@
+"""Unit tests for reading and streaming archives."""
+
+import io
+import zipfile
+from datetime import (
+    datetime,
+    timezone,
+)
+
+import pytest
+
+from files_api.archives import (
+    ArchiveMember,
+    iter_archive_chunks,
+    iter_tar_archive,
+)
+
+LAST_MODIFIED = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def _members(contents: dict[str, bytes]) -> list[ArchiveMember]:
+    return [
+        ArchiveMember(name=name, size=len(content), last_modified=LAST_MODIFIED, content=io.BytesIO(content))
+        for name, content in contents.items()
+    ]
+
+
+@pytest.mark.parametrize("archive_format", ["tar", "tar.gz"])
+def test_iter_archive_chunks_writes_tar_archives(archive_format):
+    """Assert that streamed tar archives hold every member, and can be read back as uploads."""
+    contents = {"a.txt": b"a" * 200_000, "sub/b.txt": b"b"}
+    archive = b"".join(iter_archive_chunks(_members(contents), archive_format, max_buffered_chunks=2))
+
+    uploads = list(iter_tar_archive(io.BytesIO(archive), directory="dir/"))
+    assert {upload.object_key: upload.file_content.read() for upload in uploads} == {  # type: ignore[union-attr]
+        f"dir/{name}": content for name, content in contents.items()
+    }
+
+
+def test_iter_tar_archive_spools_large_members_to_disk():
+    """Assert that members above the spool size are kept on disk rather than in memory."""
+    contents = {"large.bin": b"l" * 200_000, "small.txt": b"s"}
+    archive = b"".join(iter_archive_chunks(_members(contents), "tar"))
+
+    uploads = list(iter_tar_archive(io.BytesIO(archive), spool_max_memory_bytes=1024))
+    # pylint: disable-next=protected-access
+    assert [upload.file_content._rolled for upload in uploads] == [True, False]  # type: ignore[union-attr]
+    assert {upload.object_key: upload.file_content.read() for upload in uploads} == contents  # type: ignore[union-attr]
+
+
+def test_iter_archive_chunks_writes_zip_archives():
+    """Assert that streamed zip archives hold every member with its timestamp."""
+    contents = {"a.txt": b"a" * 200_000, "sub/b.txt": b"b"}
+    archive = b"".join(iter_archive_chunks(_members(contents), "zip"))
+
+    with zipfile.ZipFile(io.BytesIO(archive)) as zip_file:
+        assert {name: zip_file.read(name) for name in zip_file.namelist()} == contents
+        assert zip_file.getinfo("a.txt").date_time == (2024, 1, 1, 0, 0, 0)
+
+
+def test_iter_archive_chunks_stops_writing_when_closed_early():
+    """Assert that closing the stream early stops the writer and closes the remaining members."""
+
+    def _iter_members():
+        try:
+            for index in range(1_000):
+                yield from _members({f"{index}.txt": b"x" * 100_000})
+        finally:
+            closed.append(True)
+
+    closed: list[bool] = []
+    chunks = iter_archive_chunks(_iter_members(), "tar", max_buffered_chunks=1)
+    next(chunks)
+    chunks.close()
+
+    assert closed == [True]
+
+
+def test_iter_archive_chunks_raises_writer_errors():
+    """Assert that an error while writing the archive is raised to the consumer."""
+    member = ArchiveMember(name="a.txt", size=10, last_modified=LAST_MODIFIED, content=io.BytesIO(b"short"))
+
+    with pytest.raises(OSError, match="unexpected end of data"):
+        b"".join(iter_archive_chunks([member], "tar"))
@@ -0,0 +1,107 @@
+"""Test cases for `broadcast`."""
+
+import asyncio
+from typing import AsyncIterator
+
+import pytest
+
+from files_api.broadcast import (
+    BroadcastBody,
+    BroadcastReader,
+)
+
+BODY = bytes(range(100))
+CHUNK_SIZE = 10
+
+
+class _Source:
+    """The chunks of `BODY`, counting how many were pulled, optionally failing after some."""
+
+    def __init__(self, fail_after_chunks: int = len(BODY)):
+        self.pulled_chunks = 0
+        self.closed = False
+        self._fail_after_chunks = fail_after_chunks
+
+    async def iter_chunks(self) -> AsyncIterator[bytes]:
+        for chunk in [BODY[start:][:CHUNK_SIZE] for start in range(0, len(BODY), CHUNK_SIZE)]:
+            if self.pulled_chunks == self._fail_after_chunks:
+                raise ConnectionError("connection reset")
+            self.pulled_chunks += 1
+            await asyncio.sleep(0)
+            yield chunk
+
+    def close(self) -> None:
+        self.closed = True
+
+
+async def _fetch_rest(fetched_offsets: list, offset: int) -> AsyncIterator[bytes]:
+    fetched_offsets.append(offset)
+    yield BODY[offset:]
+
+
+async def _read(reader: BroadcastReader, pause_every_chunk: bool = False) -> bytes:
+    chunks = []
+    try:
+        async for chunk in reader.chunks:
+            chunks.append(chunk)
+            if pause_every_chunk:
+                await asyncio.sleep(0.001)
+    finally:
+        reader.close()
+    return b"".join(chunks)
+
+
+def _broadcast(source: _Source, fetched_offsets: list, num_readers: int, capacity_bytes: int) -> BroadcastBody:
+    return BroadcastBody(
+        source=source.iter_chunks(),
+        close_source=source.close,
+        fetch_rest=lambda offset: _fetch_rest(fetched_offsets, offset),
+        num_readers=num_readers,
+        capacity_bytes=capacity_bytes,
+    )
+
+
+@pytest.mark.anyio
+async def test_readers_share_one_read_of_the_source():
+    """Assert that every reader gets the whole body, while the source is read once."""
+    source, fetched_offsets = _Source(), []
+    broadcast = _broadcast(source, fetched_offsets, num_readers=3, capacity_bytes=len(BODY))
+
+    assert await asyncio.gather(*[_read(reader) for reader in broadcast.readers]) == [BODY] * 3
+    assert source.pulled_chunks == len(BODY) // CHUNK_SIZE
+    assert fetched_offsets == []
+
+
+@pytest.mark.anyio
+async def test_slow_readers_are_detached_when_the_buffer_is_full():
+    """Assert that a reader falling a full buffer behind fetches the rest itself, without holding back the others."""
+    source, fetched_offsets = _Source(), []
+    fast_reader, slow_reader = _broadcast(source, fetched_offsets, num_readers=2, capacity_bytes=30).readers
+
+    assert await _read(fast_reader) == BODY
+    assert await _read(slow_reader) == BODY
+    assert source.pulled_chunks == len(BODY) // CHUNK_SIZE
+    assert fetched_offsets == [0]
+
+
+@pytest.mark.anyio
+async def test_readers_fetch_the_rest_if_the_source_fails():
+    """Assert that readers fall back to fetching the rest of the body if the source fails mid-way."""
+    source, fetched_offsets = _Source(fail_after_chunks=4), []
+    broadcast = _broadcast(source, fetched_offsets, num_readers=2, capacity_bytes=len(BODY))
+
+    assert await asyncio.gather(*[_read(reader) for reader in broadcast.readers]) == [BODY] * 2
+    assert fetched_offsets == [40, 40]
+
+
+@pytest.mark.anyio
+async def test_source_is_closed_once_every_reader_is_closed():
+    """Assert that the source is released as soon as no reader needs it, even if some never started reading."""
+    source, fetched_offsets = _Source(), []
+    first_reader, second_reader = _broadcast(source, fetched_offsets, num_readers=2, capacity_bytes=len(BODY)).readers
+
+    assert await first_reader.chunks.__anext__() == BODY[:CHUNK_SIZE]
+    first_reader.close()
+    assert not source.closed
+    second_reader.close()
+    assert source.closed and fetched_offsets == []
@@ -0,0 +1,94 @@
+"""Unit tests for content-coding negotiation and streaming compression."""
+
+import gzip
+import io
+
+import pytest
+import zstandard
+
+from files_api.compression import (
+    CompressingReader,
+    accepts_content_encoding,
+    is_compressible,
+    iter_decompressed,
+    negotiate_content_encoding,
+    new_compressor,
+)
+
+
+@pytest.mark.parametrize(
+    "accept_encoding, expected",
+    [
+        (None, None),
+        ("", None),
+        ("identity", None),
+        ("gzip", "gzip"),
+        ("gzip, deflate, br, zstd", "zstd"),  # equally acceptable, so the preferred coding wins
+        ("gzip;q=1.0, zstd;q=0.5", "gzip"),
+        ("zstd;q=0, gzip", "gzip"),
+        ("*", "zstd"),
+        ("*, zstd;q=0", "gzip"),
+        ("gzip;q=bogus", None),
+    ],
+)
+def test_negotiate_content_encoding(accept_encoding, expected):
+    """Assert that the client's most preferred coding is chosen, honoring q-values and wildcards."""
+    assert negotiate_content_encoding(accept_encoding) == expected
+
+
+def test_accepts_content_encoding():
+    """Assert that a coding is acceptable if listed, or covered by a wildcard, with a non-zero q-value."""
+    assert accepts_content_encoding("GZIP, br", "gzip")
+    assert accepts_content_encoding("*", "zstd")
+    assert not accepts_content_encoding("gzip;q=0", "gzip")
+    assert not accepts_content_encoding(None, "gzip")
+
+
+@pytest.mark.parametrize(
+    "media_type, expected",
+    [
+        ("text/csv; charset=utf-8", True),
+        ("application/json", True),
+        ("application/x-ndjson", True),
+        ("image/png", False),
+        ("application/gzip", False),
+        (None, False),
+    ],
+)
+def test_is_compressible(media_type, expected):
+    """Assert that text-like media types are compressed and already-compressed ones are not."""
+    assert is_compressible(media_type) == expected
+
+
+@pytest.mark.parametrize("coding", ["gzip", "zstd"])
+def test_compressing_reader(coding):
+    """Assert that a compressing reader yields a complete stream, however it is read."""
+    content = b"id,name\n" + b"".join(f"{index},name-{index}\n".encode() for index in range(10_000))
+    reader = CompressingReader(io.BytesIO(content), coding, chunk_size=1000)
+
+    chunks = []
+    while chunk := reader.read(777):
+        assert len(chunk) <= 777
+        chunks.append(chunk)
+    compressed = b"".join(chunks)
+
+    assert len(compressed) < len(content) / 4
+    if coding == "gzip":
+        assert gzip.decompress(compressed) == content
+    else:
+        assert zstandard.ZstdDecompressor().decompressobj().decompress(compressed) == content
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("coding", ["gzip", "zstd"])
+async def test_iter_decompressed(coding):
+    """Assert that a compressed stream is decompressed chunk by chunk."""
+    content = b"hello, world\n" * 1000
+    compressor = new_compressor(coding)
+    compressed = compressor.compress(content) + compressor.flush()
+
+    async def _chunks():
+        for chunk in io.BytesIO(compressed):
+            yield chunk
+
+    assert b"".join([chunk async for chunk in iter_decompressed(_chunks(), coding)]) == content
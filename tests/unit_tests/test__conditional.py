@@ -0,0 +1,60 @@
+"""Unit tests for the HTTP validator and conditional request helpers."""
+
+from datetime import (
+    datetime,
+    timezone,
+)
+
+import pytest
+
+from files_api.conditional import (
+    etag_matches,
+    format_http_date,
+    is_not_modified,
+    parse_http_date,
+)
+
+ETAG = '"abc123"'
+LAST_MODIFIED = datetime(2024, 1, 1, 12, 0, 0, 500_000, tzinfo=timezone.utc)
+
+
+def test_http_date_round_trip():
+    """Formatting then parsing an HTTP date drops only sub-second precision."""
+    header = format_http_date(LAST_MODIFIED)
+    assert header == "Mon, 01 Jan 2024 12:00:00 GMT"
+    assert parse_http_date(header) == LAST_MODIFIED.replace(microsecond=0)
+
+
+@pytest.mark.parametrize("value", [None, "", "not a date"])
+def test_parse_http_date_ignores_missing_or_malformed_values(value):
+    """Missing and malformed dates parse to None rather than raising."""
+    assert parse_http_date(value) is None
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        ('"abc123"', True),
+        ('W/"abc123"', True),
+        ('"other", "abc123"', True),
+        ("*", True),
+        ('"other"', False),
+        (None, False),
+    ],
+)
+def test_etag_matches(header, expected):
+    """Lists of ETags are compared weakly, and `*` matches any ETag."""
+    assert etag_matches(header, ETAG) is expected
+
+
+def test_is_not_modified():
+    """304 decisions follow RFC 9110 precedence between the two headers."""
+    unchanged_since = parse_http_date("Mon, 01 Jan 2024 12:00:00 GMT")
+    changed_since = parse_http_date("Mon, 01 Jan 2024 11:59:59 GMT")
+
+    assert is_not_modified(ETAG, LAST_MODIFIED, if_none_match=ETAG, if_modified_since=None)
+    assert is_not_modified(ETAG, LAST_MODIFIED, if_none_match=None, if_modified_since=unchanged_since)
+    assert not is_not_modified(ETAG, LAST_MODIFIED, if_none_match=None, if_modified_since=changed_since)
+    assert not is_not_modified(ETAG, LAST_MODIFIED, if_none_match=None, if_modified_since=None)
+    # If-None-Match takes precedence over If-Modified-Since
+    assert not is_not_modified(ETAG, LAST_MODIFIED, if_none_match='"other"', if_modified_since=unchanged_since)
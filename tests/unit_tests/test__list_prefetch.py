@@ -0,0 +1,105 @@
+"""Test cases for `list_prefetch`."""
+
+import asyncio
+from datetime import (
+    datetime,
+    timezone,
+)
+from typing import Optional
+
+import pytest
+
+from files_api.list_prefetch import (
+    ListPrefetcher,
+    estimate_listing_bytes,
+)
+from files_api.storage.base import (
+    ObjectInfo,
+    ObjectListing,
+)
+
+NUM_PAGES = 5
+
+
+class _Listing:
+    """A listing of ``NUM_PAGES`` pages of one file each, whose page tokens are the page numbers."""
+
+    def __init__(self) -> None:
+        self.listed_tokens: list[str] = []
+
+    async def list_page(self, page_token: str) -> ObjectListing:
+        self.listed_tokens.append(page_token)
+        await asyncio.sleep(0)
+        page = int(page_token)
+        info = ObjectInfo(key=f"file-{page}", size=1, etag='"etag"', last_modified=datetime.now(timezone.utc))
+        next_page_token: Optional[str] = str(page + 1) if page + 1 < NUM_PAGES else None
+        return ObjectListing(objects=[info], directories=[], next_page_token=next_page_token)
+
+
+async def _settle() -> None:
+    for _ in range(50):
+        await asyncio.sleep(0)
+
+
+def _key_of(page_token: str) -> tuple:
+    return ("listing", page_token)
+
+
+@pytest.mark.anyio
+async def test_next_pages_are_prefetched_up_to_depth():
+    """Assert that serving a page prefetches the next ones, which are taken once, each fetched once."""
+    listing, prefetcher = _Listing(), ListPrefetcher(depth=2)
+
+    prefetcher.prefetch(_key_of, listing.list_page, "1")
+    await _settle()
+    assert listing.listed_tokens == ["1", "2"]
+
+    page = await prefetcher.take(_key_of("1"))
+    assert page is not None and page.objects[0].key == "file-1"
+    assert await prefetcher.take(_key_of("1")) is None
+
+    # as the caller does once it serves page 1
+    prefetcher.prefetch(_key_of, listing.list_page, "2")
+    await _settle()
+    assert listing.listed_tokens == ["1", "2", "3"]
+    assert prefetcher.stats.as_dict() == {"prefetches": 3, "hits": 1, "wasted": 0}
+
+
+@pytest.mark.anyio
+async def test_pages_being_prefetched_are_awaited():
+    """Assert that a page asked for while being prefetched is awaited rather than listed again."""
+    listing, prefetcher = _Listing(), ListPrefetcher(depth=1)
+
+    prefetcher.prefetch(_key_of, listing.list_page, "1")
+    await asyncio.sleep(0)
+    page = await prefetcher.take(_key_of("1"))
+    assert page is not None and page.next_page_token == "2"
+    assert listing.listed_tokens == ["1"]
+    assert prefetcher.stats.hits == 1
+
+
+@pytest.mark.anyio
+async def test_unused_pages_are_dropped():
+    """Assert that prefetched pages are dropped once invalidated, expired or evicted, and counted as wasted."""
+    listing = _Listing()
+    prefetcher = ListPrefetcher(depth=3)
+    prefetcher.prefetch(_key_of, listing.list_page, "1")
+    await _settle()
+    prefetcher.invalidate()
+    assert await prefetcher.take(_key_of("1")) is None
+    assert prefetcher.stats.wasted == 3 and prefetcher.weight == 0
+
+    prefetcher = ListPrefetcher(depth=1, ttl_seconds=0.01)
+    prefetcher.prefetch(_key_of, listing.list_page, "1")
+    await _settle()
+    await asyncio.sleep(0.02)
+    assert await prefetcher.take(_key_of("1")) is None
+    assert prefetcher.stats.wasted == 1
+
+    page_bytes = estimate_listing_bytes(await listing.list_page("1"))
+    prefetcher = ListPrefetcher(depth=3, capacity_bytes=page_bytes * 3 // 2)
+    prefetcher.prefetch(_key_of, listing.list_page, "1")
+    await _settle()
+    assert await prefetcher.take(_key_of("2")) is None
+    assert await prefetcher.take(_key_of("3")) is not None
+    assert prefetcher.stats.as_dict() == {"prefetches": 3, "hits": 1, "wasted": 2}
@@ -0,0 +1,64 @@
+"""Test cases for `listing_export`."""
+
+import io
+import json
+from pathlib import Path
+
+import pytest
+
+from files_api.listing_export import (
+    iter_listing_ndjson,
+    list_export_page,
+)
+from files_api.page_tokens import (
+    ExportCursor,
+    decode_export_cursor,
+)
+from files_api.storage.local import LocalStorageBackend
+
+PAGE_SIZE = 2
+
+
+async def _export(storage: LocalStorageBackend, cursor: ExportCursor) -> list[dict]:
+    first_page = await list_export_page(storage, cursor, page_size=PAGE_SIZE)
+    chunks = [chunk async for chunk in iter_listing_ndjson(storage, cursor, first_page, page_size=PAGE_SIZE)]
+    return [json.loads(line) for line in b"".join(chunks).decode().splitlines()]
+
+
+@pytest.mark.anyio
+async def test_export_pages_through_the_whole_listing(tmp_path: Path):
+    """Assert that every file is exported, each page followed by a cursor from which the export resumes."""
+    storage = LocalStorageBackend(str(tmp_path))
+    for index in range(5):
+        await storage.put(f"dir/file-{index}.txt", io.BytesIO(b"content"))
+
+    lines = await _export(storage, ExportCursor(page_token="", directory="dir/", recursive=True))
+    assert [line.get("file_path") for line in lines] == [
+        "dir/file-0.txt",
+        "dir/file-1.txt",
+        None,
+        "dir/file-2.txt",
+        "dir/file-3.txt",
+        None,
+        "dir/file-4.txt",
+        None,
+    ]
+    assert lines[0]["size_bytes"] == len(b"content") and "last_modified" in lines[0]
+    assert lines[-1] == {"cursor": None}
+
+    cursor = decode_export_cursor(lines[2]["cursor"])
+    assert cursor is not None
+    resumed_lines = await _export(storage, cursor)
+    assert resumed_lines == lines[3:]
+
+
+@pytest.mark.anyio
+async def test_non_recursive_export_lists_directories(tmp_path: Path):
+    """Assert that a non-recursive export writes subdirectories as lines of their own."""
+    storage = LocalStorageBackend(str(tmp_path))
+    await storage.put("dir/file.txt", io.BytesIO(b"content"))
+    await storage.put("dir/sub/file.txt", io.BytesIO(b"content"))
+
+    lines = await _export(storage, ExportCursor(page_token="", directory="dir/", recursive=False))
+    assert [line for line in lines if "file_path" not in line] == [{"directory": "dir/sub/"}, {"cursor": None}]
+    assert [line["file_path"] for line in lines if "file_path" in line] == ["dir/file.txt"]
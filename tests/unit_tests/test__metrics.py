@@ -0,0 +1,142 @@
+"""Test cases for the Prometheus metrics served at `/metrics`."""
+
+import time
+from typing import (
+    Iterator,
+    Optional,
+)
+
+import boto3
+from botocore.awsrequest import (
+    AWSPreparedRequest,
+    AWSResponse,
+)
+from fastapi import status
+from fastapi.testclient import TestClient
+from prometheus_client.parser import text_string_to_metric_families
+
+from files_api.main import create_app
+from files_api.metrics import (
+    Metrics,
+    register_s3_metrics,
+)
+from files_api.settings import Settings
+from tests.consts import TEST_BUCKET_NAME
+
+FILE_ROUTE = "/v1/files/{file_path:path}"
+
+
+def _scrape(client: TestClient) -> dict:
+    """Return every sample served at `/metrics`, keyed by name and then by their sorted label values."""
+    response = client.get("/metrics")
+    assert response.status_code == status.HTTP_200_OK
+    samples: dict = {}
+    for family in text_string_to_metric_families(response.text):
+        for sample in family.samples:
+            samples.setdefault(sample.name, {})[tuple(sorted(sample.labels.items()))] = sample.value
+    return samples
+
+
+def test_metrics(client: TestClient):
+    """Asserts that requests, S3 calls, bytes and cache counters are measured."""
+    client.put("/v1/files/file.txt", files={"file_content": ("file.txt", b"hello", "text/plain")})
+    client.get("/v1/files/file.txt")
+    client.head("/v1/files/missing.txt")
+    client.get("/no/such/route")
+
+    samples = _scrape(client)
+    requests = samples["files_api_http_request_duration_seconds_count"]
+    assert requests[(("method", "PUT"), ("route", FILE_ROUTE), ("status", "201"))] == 1
+    assert requests[(("method", "GET"), ("route", FILE_ROUTE), ("status", "200"))] == 1
+    assert requests[(("method", "HEAD"), ("route", FILE_ROUTE), ("status", "404"))] == 1
+    assert requests[(("method", "GET"), ("route", "<unmatched>"), ("status", "404"))] == 1
+    assert samples["files_api_http_response_bytes_total"][(("route", FILE_ROUTE),)] >= len(b"hello")
+    assert samples["files_api_http_request_bytes_total"][(("route", FILE_ROUTE),)] > len(b"hello")
+    assert samples["files_api_http_requests_in_flight"][()] == 1  # the scrape itself
+
+    s3_calls = samples["files_api_s3_request_duration_seconds_count"]
+    assert s3_calls[(("operation", "put_object"), ("status", "200"))] == 1
+    assert s3_calls[(("operation", "get_object"), ("status", "200"))] == 1
+    assert s3_calls[(("operation", "head_object"), ("status", "404"))] == 1
+    assert samples["files_api_metadata_cache_misses_total"][()] >= 1
+
+
+def test_metrics_disabled(mocked_aws: None):  # pylint: disable=unused-argument
+    """Asserts that `/metrics` is not served when metrics are disabled."""
+    settings = Settings(s3_bucket_name=TEST_BUCKET_NAME, metrics_enabled=False)
+    with TestClient(create_app(settings)) as client:
+        assert client.get("/metrics").status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_body_cache_metrics(mocked_aws: None, tmp_path):  # pylint: disable=unused-argument
+    """Asserts that the file body cache's counters and size are exported when it is enabled."""
+    settings = Settings(
+        s3_bucket_name=TEST_BUCKET_NAME, body_cache_memory_capacity_bytes=1024, body_cache_disk_directory=str(tmp_path)
+    )
+    with TestClient(create_app(settings)) as client:
+        client.put("/v1/files/file.txt", files={"file_content": ("file.txt", b"hello", "text/plain")})
+        client.get("/v1/files/file.txt")
+        client.get("/v1/files/file.txt")
+
+        samples = _scrape(client)
+        assert samples["files_api_body_cache_misses_total"][()] == 1
+        assert samples["files_api_body_cache_memory_hits_total"][()] == 1
+        assert samples["files_api_body_cache_size_bytes"][(("tier", "memory"),)] == 5
+
+
+def test_list_prefetch_metrics(mocked_aws: None):  # pylint: disable=unused-argument
+    """Asserts that listing pages served from the prefetched ones are counted as hits."""
+    settings = Settings(s3_bucket_name=TEST_BUCKET_NAME, list_prefetch_depth=1, metadata_cache_capacity=0)
+    with TestClient(create_app(settings)) as client:
+        for index in range(25):
+            client.put(f"/v1/files/file-{index}.txt", files={"file_content": ("file.txt", b"hello", "text/plain")})
+        first_page = client.get("/v1/files", params={"page_size": 20}).json()
+        time.sleep(0.2)  # the next page is prefetched on the app's event loop, in the background
+        # pages after the first one have the default size, and are prefetched as such
+        second_page = client.get("/v1/files", params={"page_token": first_page["next_page_token"]}).json()
+        assert len(second_page["files"]) == 5
+
+        samples = _scrape(client)
+        assert samples["files_api_list_prefetch_prefetches_total"][()] == 1
+        assert samples["files_api_list_prefetch_hits_total"][()] == 1
+        assert samples["files_api_list_prefetch_wasted_total"][()] == 0
+        assert (
+            samples["files_api_s3_request_duration_seconds_count"][
+                (("operation", "list_objects_v2"), ("status", "200"))
+            ]
+            == 2
+        )
+
+
+def test_s3_retries_are_counted(mocked_aws: None):  # pylint: disable=unused-argument
+    """Asserts that a call retried after a throttling error is timed once, and its retry counted."""
+    s3_client = boto3.client("s3")
+    metrics = Metrics(create_app(Settings(s3_bucket_name=TEST_BUCKET_NAME)))
+    register_s3_metrics(s3_client, metrics)
+    throttled_attempts = []
+
+    def _throttle_first_attempt(request: AWSPreparedRequest, **_) -> Optional[AWSResponse]:
+        if throttled_attempts:
+            return None
+        throttled_attempts.append(request)
+        return AWSResponse(request.url, status.HTTP_503_SERVICE_UNAVAILABLE, {}, _EmptyBody())
+
+    s3_client.meta.events.register_first("before-send.s3", _throttle_first_attempt)
+    s3_client.list_objects_v2(Bucket=TEST_BUCKET_NAME)
+
+    assert (
+        metrics.registry.get_sample_value("files_api_s3_request_retries_total", {"operation": "list_objects_v2"}) == 1
+    )
+    assert (
+        metrics.registry.get_sample_value(
+            "files_api_s3_request_duration_seconds_count", {"operation": "list_objects_v2", "status": "200"}
+        )
+        == 1
+    )
+
+
+class _EmptyBody:  # pylint: disable=too-few-public-methods
+    """The raw body of a mocked botocore response."""
+
+    def stream(self, **_) -> Iterator[bytes]:
+        yield b""
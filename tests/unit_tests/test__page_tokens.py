@@ -0,0 +1,47 @@
+"""Unit tests for encoding and decoding listing page tokens."""
+
+import pytest
+
+from files_api.page_tokens import (
+    DirectoryPageToken,
+    ExportCursor,
+    decode_directory_page_token,
+    decode_export_cursor,
+    encode_directory_page_token,
+    encode_export_cursor,
+)
+
+
+def test_directory_page_token_round_trip():
+    """Assert that a directory page token decodes to what was encoded."""
+    page_token = DirectoryPageToken(continuation_token="abc+/=", directory="photos/2024/", page_size=25)
+    assert decode_directory_page_token(encode_directory_page_token(page_token)) == page_token
+
+
+@pytest.mark.parametrize("value", ["1ZBgN2ZhDp0z+KfTbR3n7Q==", "dir1.not-base64!", "dir1.e30="])
+def test_decode_directory_page_token_ignores_other_tokens(value):
+    """Assert that raw S3 continuation tokens and malformed tokens are not mistaken for directory page tokens."""
+    assert decode_directory_page_token(value) is None
+
+
+@pytest.mark.parametrize("directory", ["../", "photos/../..", "./", "bad name?/"])
+def test_decode_directory_page_token_rejects_invalid_directories(directory):
+    """Assert that tokens carrying a directory no listing could have been asked for are not decoded."""
+    page_token = DirectoryPageToken(continuation_token="abc", directory=directory, page_size=10)
+    assert decode_directory_page_token(encode_directory_page_token(page_token)) is None
+
+
+@pytest.mark.parametrize("page_size", [0, 9, 101, 1_000_000])
+def test_decode_directory_page_token_rejects_out_of_range_page_sizes(page_size):
+    """Assert that tokens asking for a page size outside of what `GET /v1/files` accepts are not decoded."""
+    page_token = DirectoryPageToken(continuation_token="abc", directory="photos/", page_size=page_size)
+    assert decode_directory_page_token(encode_directory_page_token(page_token)) is None
+
+
+def test_export_cursor_round_trip():
+    """Assert that an export cursor decodes to what was encoded, and is not mistaken for a directory page token."""
+    cursor = ExportCursor(page_token="abc+/=", directory="photos/", recursive=False)
+    value = encode_export_cursor(cursor)
+    assert decode_export_cursor(value) == cursor
+    assert decode_directory_page_token(value) is None
+    assert decode_export_cursor("exp1.e30=") is None
@@ -0,0 +1,69 @@
+"""Unit tests for parsing `Range` and `If-Range` headers."""
+
+from datetime import (
+    datetime,
+    timezone,
+)
+
+import pytest
+
+from files_api.ranges import (
+    ByteRange,
+    IfRangeCondition,
+    parse_if_range_header,
+    parse_range_header,
+)
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        ("bytes=0-99", ByteRange(start=0, end=99)),
+        ("bytes=100-", ByteRange(start=100, end=None)),
+        ("bytes=-500", ByteRange(start=None, end=500)),
+        (None, None),
+        ("bytes=-", None),
+        ("bytes=10-5", None),
+        ("bytes=0-1,5-9", None),  # multi-range is not supported; serve the whole file
+        ("items=0-9", None),
+        ("garbage", None),
+    ],
+)
+def test_parse_range_header(header, expected):
+    """Assert that single byte ranges are parsed and unsupported ranges are ignored."""
+    assert parse_range_header(header) == expected
+
+
+def test_byte_range_to_header():
+    """Assert that byte ranges round-trip to the header format used by S3."""
+    assert ByteRange(start=0, end=99).to_header() == "bytes=0-99"
+    assert ByteRange(start=100, end=None).to_header() == "bytes=100-"
+    assert ByteRange(start=None, end=500).to_header() == "bytes=-500"
+
+
+@pytest.mark.parametrize(
+    "byte_range, expected",
+    [
+        (ByteRange(start=0, end=3), (0, 3)),
+        (ByteRange(start=5, end=500), (5, 9)),
+        (ByteRange(start=5, end=None), (5, 9)),
+        (ByteRange(start=None, end=3), (7, 9)),
+        (ByteRange(start=None, end=50), (0, 9)),
+        (ByteRange(start=10, end=None), None),
+        (ByteRange(start=None, end=0), None),
+    ],
+)
+def test_byte_range_resolve(byte_range, expected):
+    """Assert that ranges are clipped to the size of a 10 byte file as S3 does, or rejected if outside of it."""
+    assert byte_range.resolve(10) == expected
+
+
+def test_parse_if_range_header():
+    """Assert that `If-Range` accepts strong ETags and dates, and never matches weak ETags or bad dates."""
+    assert parse_if_range_header(None) is None
+    assert parse_if_range_header('"abc"') == IfRangeCondition(etag='"abc"')
+    assert parse_if_range_header('W/"abc"') == IfRangeCondition()
+    assert parse_if_range_header("not a date") == IfRangeCondition()
+    assert parse_if_range_header("Thu, 01 Jan 2022 00:00:00 GMT") == IfRangeCondition(
+        last_modified=datetime(2022, 1, 1, tzinfo=timezone.utc)
+    )
@@ -0,0 +1,31 @@
+"""Test cases for `responses`."""
+
+import json
+from datetime import (
+    datetime,
+    timezone,
+)
+
+from files_api.responses import FastJSONResponse
+from files_api.schemas import (
+    FileMetadata,
+    GetFilesResponse,
+)
+
+
+def test_fast_json_response_renders_models_as_pydantic_does():
+    """Assert that models are rendered to the same compact JSON as their own serializer produces."""
+    response_model = GetFilesResponse.model_construct(
+        files=[
+            FileMetadata.model_construct(
+                file_path="dir/file.txt", last_modified=datetime(2024, 1, 1, tzinfo=timezone.utc), size_bytes=5
+            )
+        ],
+        next_page_token=None,
+        directories=["dir/sub/"],
+    )
+
+    response = FastJSONResponse(response_model)
+    assert response.body == response_model.model_dump_json().encode()
+    assert json.loads(response.body)["files"][0]["last_modified"] == "2024-01-01T00:00:00Z"
+    assert response.headers["Content-Type"] == "application/json"
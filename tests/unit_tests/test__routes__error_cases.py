@@ -1,8 +1,13 @@
 """Unit tests for the API error cases."""
 
+import pytest
 from fastapi import status
 from fastapi.testclient import TestClient
 
+from files_api.page_tokens import (
+    DirectoryPageToken,
+    encode_directory_page_token,
+)
 from files_api.schemas import DEFAULT_GET_FILES_MAX_PAGE_SIZE
 from tests.consts import TEST_BUCKET_NAME
 from tests.utils import delete_s3_bucket
@@ -52,6 +57,30 @@ def test_get_files_page_token_is_mutually_exclusive_with_page_size_and_directory
     assert "mutually exclusive" in str(response.json())
 
 
+@pytest.mark.parametrize(
+    "page_token",
+    [
+        "dir1.garbage",
+        encode_directory_page_token(DirectoryPageToken(continuation_token="", directory="", page_size=100_000)),
+        encode_directory_page_token(DirectoryPageToken(continuation_token="", directory="../", page_size=10)),
+    ],
+)
+def test_get_files_with_bad_page_token(client: TestClient, page_token: str):
+    """Test that malformed or forged directory page tokens are rejected rather than forwarded to S3."""
+    response = client.get("/v1/files", params={"page_token": page_token})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json()["detail"] == "Invalid page token"
+
+
+def test_export_files_with_bad_cursor(client: TestClient):
+    """Test that exports reject malformed cursors, and cursors combined with the parameters they remember."""
+    response = client.get("/v1/files:export", params={"cursor": "not-a-cursor"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    response = client.get("/v1/files:export", params={"cursor": "not-a-cursor", "directory": "dir/"})
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
 def test_unforeseen_500_error(client: TestClient):
     """Test that the API returns a 500 error when an unforeseen error occurs."""
     # delete the S3 bucket and all objects inside
@@ -61,3 +90,93 @@ def test_unforeseen_500_error(client: TestClient):
     response = client.get("/v1/files")
     assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
     assert response.json() == {"detail": "Internal server error"}
+
+
+def test_get_file_unsatisfiable_range(client: TestClient):
+    """Test that the API returns a 416 error when the requested range starts beyond the end of the file."""
+    client.put("/v1/files/file.txt", files={"file_content": ("file.txt", b"0123456789", "text/plain")})
+
+    response = client.get("/v1/files/file.txt", headers={"Range": "bytes=100-200"})
+    assert response.status_code == status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE
+    assert response.headers["Content-Range"].startswith("bytes */")
+
+
+def test_conditional_writes_with_stale_etag(client: TestClient):
+    """Test that PUT and DELETE return 412 when `If-Match` does not match the current file."""
+    upload = {"file_content": ("file.txt", b"0123456789", "text/plain")}
+    client.put("/v1/files/file.txt", files=upload)
+
+    response = client.put("/v1/files/file.txt", files=upload, headers={"If-Match": '"stale"'})
+    assert response.status_code == status.HTTP_412_PRECONDITION_FAILED
+    response = client.delete("/v1/files/file.txt", headers={"If-Match": '"stale"'})
+    assert response.status_code == status.HTTP_412_PRECONDITION_FAILED
+    assert client.head("/v1/files/file.txt").status_code == status.HTTP_200_OK
+
+    # `If-Match: *` requires the file to exist
+    response = client.put("/v1/files/missing.txt", files=upload, headers={"If-Match": "*"})
+    assert response.status_code == status.HTTP_412_PRECONDITION_FAILED
+    response = client.delete("/v1/files/missing.txt", headers={"If-Match": "*"})
+    assert response.status_code == status.HTTP_412_PRECONDITION_FAILED
+    response = client.delete("/v1/files/missing.txt", headers={"If-Match": '"abc"'})
+    assert response.status_code == status.HTTP_412_PRECONDITION_FAILED
+
+
+def test_delete_files_requires_exactly_one_of_file_paths_and_directory(client: TestClient):
+    """Test that bulk delete rejects requests naming both, or neither, of file_paths and directory."""
+    response = client.post("/v1/files:delete", json={})
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+    response = client.post("/v1/files:delete", json={"file_paths": ["a.txt"], "directory": "dir/"})
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+def test_upload_files_with_bad_input(client: TestClient):
+    """Test that batch upload rejects empty requests and invalid archives, and reports invalid paths per file."""
+    response = client.post("/v1/files:upload", data={"directory": "dir/"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    response = client.post("/v1/files:upload", files={"archive": ("archive.tar", b"not a tar", "application/x-tar")})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    response = client.post("/v1/files:upload", files=[("files", ("bad name?.txt", b"data", "text/plain"))])
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["files"] == [
+        {"file_path": "bad name?.txt", "status": "failed", "error": "Invalid file path"}
+    ]
+
+
+def test_complete_and_abort_upload_with_invalid_file_path(client: TestClient):
+    """Test that completing or aborting a multipart upload rejects invalid file paths like every other request."""
+    part = {"part_number": 1, "etag": '"etag"'}
+    response = client.post(
+        "/v1/files:complete-upload", json={"file_path": "bad name?.txt", "upload_id": "id", "parts": [part]}
+    )
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+    response = client.post("/v1/files:abort-upload", json={"file_path": "bad name?.txt", "upload_id": "id"})
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+def test_presigned_transfers_of_unknown_files_and_uploads(client: TestClient):
+    """Test that presigning a missing file's download, or aborting an unknown upload, returns 404."""
+    response = client.post("/v1/files:presign", json={"file_path": "missing.txt", "operation": "download"})
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    response = client.post("/v1/files:abort-upload", json={"file_path": "file.txt", "upload_id": "unknown"})
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_copy_files_with_missing_or_overlapping_paths(client: TestClient):
+    """Test that copying a missing file is a 404 and copying a directory into itself is rejected."""
+    response = client.post("/v1/files:copy", json={"source": "missing.txt", "destination": "copy.txt"})
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert response.json() == {"detail": "File not found"}
+
+    response = client.post("/v1/files:move", json={"source": "missing.txt", "destination": "moved.txt"})
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    response = client.post("/v1/files:copy", json={"source": "dir", "destination": "dir/sub", "recursive": True})
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+    response = client.post("/v1/files:copy", json={"source": "a.txt", "destination": "a.txt"})
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
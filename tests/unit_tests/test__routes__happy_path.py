@@ -1,8 +1,19 @@
 """Unit tests for the happy path scenarios of the API routes."""
 
+import gzip
+import io
+import json
+import tarfile
+
+import boto3
+import requests
 from fastapi import status
 from fastapi.testclient import TestClient
 
+from files_api.main import create_app
+from files_api.settings import Settings
+from tests.consts import TEST_BUCKET_NAME
+
 # Constants
 TEST_FILE_PATH = "test_file.txt"
 TEST_FILE_CONTENT = b"Hello, World!"
@@ -36,6 +47,24 @@ def test_upload_file(client: TestClient):
     }
 
 
+def test_export_files(client: TestClient):
+    """Asserts that every file under a directory is streamed as NDJSON, ending with a null cursor."""
+    for i in range(3):
+        client.put(
+            f"/v1/files/dir/file{i}.txt",
+            files={"file_content": (f"file{i}.txt", TEST_FILE_CONTENT, TEST_FILE_CONTENT_TYPE)},
+        )
+    client.put("/v1/files/other.txt", files={"file_content": ("other.txt", TEST_FILE_CONTENT, TEST_FILE_CONTENT_TYPE)})
+
+    response = client.get("/v1/files:export", params={"directory": "dir/"})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["Content-Type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["file_path"] for line in lines[:-1]] == ["dir/file0.txt", "dir/file1.txt", "dir/file2.txt"]
+    assert lines[0]["size_bytes"] == len(TEST_FILE_CONTENT)
+    assert lines[-1] == {"cursor": None}
+
+
 def test_list_files_with_pagination(client: TestClient):
     """Asserts that files can be listed with pagination."""
     for i in range(15):
@@ -50,6 +79,18 @@ def test_list_files_with_pagination(client: TestClient):
     assert "next_page_token" in data
 
 
+def test_list_files_serializes_listed_keys_as_they_are(client: TestClient):
+    """Asserts that listed files are returned as stored, even with keys the API would not accept for uploads."""
+    boto3.client("s3").put_object(Bucket=TEST_BUCKET_NAME, Key="dir/file with spaces.txt", Body=TEST_FILE_CONTENT)
+
+    response = client.get("/v1/files")
+    assert response.status_code == status.HTTP_200_OK
+    (file_metadata,) = response.json()["files"]
+    assert file_metadata["file_path"] == "dir/file with spaces.txt"
+    assert file_metadata["size_bytes"] == len(TEST_FILE_CONTENT)
+    assert file_metadata["last_modified"].endswith("Z")
+
+
 def test_list_files_with_pagination_and_page_token(client: TestClient):  # pylint: disable=unused-argument
     """Asserts that files can be listed with pagination and page token."""
     ...  # pylint: disable=W2301
@@ -98,3 +139,541 @@ def test_delete_file(client: TestClient):
     assert response.status_code == status.HTTP_200_OK
     # Assert empty response body
     assert response.content == b""
+
+
+def test_get_file_range(client: TestClient):
+    """Asserts that byte ranges are answered with 206 and the matching slice of the file."""
+    client.put(
+        f"/v1/files/{TEST_FILE_PATH}",
+        files={"file_content": (TEST_FILE_PATH, TEST_FILE_CONTENT, TEST_FILE_CONTENT_TYPE)},
+    )
+    file_size = len(TEST_FILE_CONTENT)
+
+    response = client.get(f"/v1/files/{TEST_FILE_PATH}", headers={"Range": "bytes=0-4"})
+    assert response.status_code == status.HTTP_206_PARTIAL_CONTENT
+    assert response.content == TEST_FILE_CONTENT[:5]
+    assert response.headers["Content-Range"] == f"bytes 0-4/{file_size}"
+    assert response.headers["Accept-Ranges"] == "bytes"
+
+    # suffix range: the last 6 bytes
+    response = client.get(f"/v1/files/{TEST_FILE_PATH}", headers={"Range": "bytes=-6"})
+    assert response.status_code == status.HTTP_206_PARTIAL_CONTENT
+    assert response.content == TEST_FILE_CONTENT[-6:]
+
+    # If-Range with a stale ETag falls back to the full file
+    response = client.get(f"/v1/files/{TEST_FILE_PATH}", headers={"Range": "bytes=0-4", "If-Range": '"stale"'})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.content == TEST_FILE_CONTENT
+
+    # If-Range with a date after the upload still serves the range
+    response = client.get(
+        f"/v1/files/{TEST_FILE_PATH}",
+        headers={"Range": "bytes=0-4", "If-Range": "Fri, 01 Jan 2100 00:00:00 GMT"},
+    )
+    assert response.status_code == status.HTTP_206_PARTIAL_CONTENT
+    assert response.content == TEST_FILE_CONTENT[:5]
+
+    response = client.head(f"/v1/files/{TEST_FILE_PATH}")
+    assert response.headers["Accept-Ranges"] == "bytes"
+
+
+def test_routes_make_a_single_s3_call(client: TestClient):
+    """Asserts the number of S3 round trips each route makes, as reported in `X-S3-Call-Count`."""
+    upload = {"file_content": (TEST_FILE_PATH, TEST_FILE_CONTENT, TEST_FILE_CONTENT_TYPE)}
+
+    assert client.put(f"/v1/files/{TEST_FILE_PATH}", files=upload).headers["X-S3-Call-Count"] == "1"
+    assert client.head(f"/v1/files/{TEST_FILE_PATH}").headers["X-S3-Call-Count"] == "1"
+    assert client.get(f"/v1/files/{TEST_FILE_PATH}").headers["X-S3-Call-Count"] == "1"
+    assert client.get("/v1/files/missing.txt").headers["X-S3-Call-Count"] == "1"
+    assert client.get("/v1/files").headers["X-S3-Call-Count"] == "1"
+
+    # overwriting retries the conditional create without its condition
+    assert client.put(f"/v1/files/{TEST_FILE_PATH}", files=upload).headers["X-S3-Call-Count"] == "2"
+    # S3 does not report whether a deleted key existed, so DELETE probes with head_object first
+    assert client.delete(f"/v1/files/{TEST_FILE_PATH}").headers["X-S3-Call-Count"] == "2"
+
+
+def test_metadata_is_served_from_cache(client: TestClient):
+    """Asserts that repeated HEAD and list requests are answered from the metadata cache until a write."""
+    upload = {"file_content": (TEST_FILE_PATH, TEST_FILE_CONTENT, TEST_FILE_CONTENT_TYPE)}
+    client.put(f"/v1/files/{TEST_FILE_PATH}", files=upload)
+
+    assert client.head(f"/v1/files/{TEST_FILE_PATH}").headers["X-S3-Call-Count"] == "1"
+    assert client.head(f"/v1/files/{TEST_FILE_PATH}").headers["X-S3-Call-Count"] == "0"
+    assert client.head("/v1/files/missing.txt").headers["X-S3-Call-Count"] == "1"
+    assert client.head("/v1/files/missing.txt").status_code == status.HTTP_404_NOT_FOUND
+    assert client.get("/v1/files").headers["X-S3-Call-Count"] == "1"
+    assert client.get("/v1/files").headers["X-S3-Call-Count"] == "0"
+
+    client.put("/v1/files/missing.txt", files=upload)
+    assert client.head("/v1/files/missing.txt").status_code == status.HTTP_200_OK
+    assert len(client.get("/v1/files").json()["files"]) == 2
+
+
+def test_conditional_get_and_head(client: TestClient):
+    """Asserts that GET and HEAD answer 304 when the client's copy is still current."""
+    upload = {"file_content": (TEST_FILE_PATH, TEST_FILE_CONTENT, TEST_FILE_CONTENT_TYPE)}
+    client.put(f"/v1/files/{TEST_FILE_PATH}", files=upload)
+
+    response = client.get(f"/v1/files/{TEST_FILE_PATH}")
+    etag, last_modified = response.headers["ETag"], response.headers["Last-Modified"]
+    assert client.head(f"/v1/files/{TEST_FILE_PATH}").headers["ETag"] == etag
+
+    for method in (client.get, client.head):
+        response = method(f"/v1/files/{TEST_FILE_PATH}", headers={"If-None-Match": etag})
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response.content == b""
+        assert response.headers["ETag"] == etag
+
+        response = method(f"/v1/files/{TEST_FILE_PATH}", headers={"If-Modified-Since": last_modified})
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+        response = method(f"/v1/files/{TEST_FILE_PATH}", headers={"If-None-Match": '"stale"'})
+        assert response.status_code == status.HTTP_200_OK
+
+    response = client.get(
+        f"/v1/files/{TEST_FILE_PATH}", headers={"If-Modified-Since": "Sat, 01 Jan 2000 00:00:00 GMT"}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.content == TEST_FILE_CONTENT
+
+
+def test_conditional_put_and_delete(client: TestClient):
+    """Asserts that PUT and DELETE only go through when `If-Match` matches the current file."""
+    upload = {"file_content": (TEST_FILE_PATH, TEST_FILE_CONTENT, TEST_FILE_CONTENT_TYPE)}
+    client.put(f"/v1/files/{TEST_FILE_PATH}", files=upload)
+    etag = client.head(f"/v1/files/{TEST_FILE_PATH}").headers["ETag"]
+
+    updated = {"file_content": (TEST_FILE_PATH, b"updated content", TEST_FILE_CONTENT_TYPE)}
+    response = client.put(f"/v1/files/{TEST_FILE_PATH}", files=updated, headers={"If-Match": etag})
+    assert response.status_code == status.HTTP_200_OK
+    new_etag = client.head(f"/v1/files/{TEST_FILE_PATH}").headers["ETag"]
+    assert new_etag != etag
+
+    response = client.put(f"/v1/files/{TEST_FILE_PATH}", files=upload, headers={"If-Match": "*"})
+    assert response.status_code == status.HTTP_200_OK
+    assert client.get(f"/v1/files/{TEST_FILE_PATH}").content == TEST_FILE_CONTENT
+
+    response = client.delete(f"/v1/files/{TEST_FILE_PATH}", headers={"If-Match": etag})
+    assert response.status_code == status.HTTP_200_OK
+    assert client.head(f"/v1/files/{TEST_FILE_PATH}").status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_delete_files(client: TestClient):
+    """Asserts that many files can be deleted at once, by path or by directory."""
+    for file_path in ["dir/a.txt", "dir/b.txt", "dir/sub/c.txt", "keep.txt"]:
+        client.put(f"/v1/files/{file_path}", files={"file_content": (file_path, b"data", "text/plain")})
+
+    response = client.post("/v1/files:delete", json={"file_paths": ["dir/a.txt", "missing.txt"]})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {"deleted_count": 2, "errors": []}
+
+    response = client.post("/v1/files:delete", json={"directory": "dir/"})
+    assert response.json() == {"deleted_count": 2, "errors": []}
+
+    assert [file["file_path"] for file in client.get("/v1/files").json()["files"]] == ["keep.txt"]
+
+
+def test_delete_files_by_directory_spares_siblings_with_the_same_prefix(client: TestClient):
+    """Asserts that deleting a directory named without a trailing slash only deletes the files inside it."""
+    for file_path in ["photos/a.txt", "photos2024/b.txt", "photos.txt"]:
+        client.put(f"/v1/files/{file_path}", files={"file_content": (file_path, b"data", "text/plain")})
+
+    response = client.post("/v1/files:delete", json={"directory": "photos"})
+    assert response.json() == {"deleted_count": 1, "errors": []}
+
+    assert [file["file_path"] for file in client.get("/v1/files").json()["files"]] == [
+        "photos.txt",
+        "photos2024/b.txt",
+    ]
+
+
+def test_copy_and_move_files(client: TestClient):
+    """Asserts that files and directories can be copied and moved without re-uploading them."""
+    for file_path in ["dir/a.txt", "dir/sub/b.txt", "dir2/c.txt"]:
+        client.put(f"/v1/files/{file_path}", files={"file_content": (file_path, file_path.encode(), "text/plain")})
+
+    response = client.post("/v1/files:copy", json={"source": "dir/a.txt", "destination": "a-copy.txt"})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {"copied_count": 1, "errors": []}
+    response = client.get("/v1/files/a-copy.txt")
+    assert response.content == b"dir/a.txt"
+    assert response.headers["Content-Type"].startswith("text/plain")
+
+    response = client.post("/v1/files:move", json={"source": "dir", "destination": "moved", "recursive": True})
+    assert response.json() == {"moved_count": 2, "errors": []}
+
+    file_paths = [file["file_path"] for file in client.get("/v1/files").json()["files"]]
+    assert file_paths == ["a-copy.txt", "dir2/c.txt", "moved/a.txt", "moved/sub/b.txt"]
+
+
+def test_upload_files(client: TestClient):
+    """Asserts that many files can be uploaded at once, as multipart parts and as a tar archive."""
+    client.put("/v1/files/batch/a.txt", files={"file_content": ("a.txt", b"old", "text/plain")})
+
+    archive = io.BytesIO()
+    with tarfile.open(fileobj=archive, mode="w:gz") as tar:
+        for name, content in [("c.txt", b"c"), ("sub/d.txt", b"d")]:
+            tar_info = tarfile.TarInfo(name)
+            tar_info.size = len(content)
+            tar.addfile(tar_info, io.BytesIO(content))
+
+    response = client.post(
+        "/v1/files:upload",
+        data={"directory": "batch/"},
+        files=[
+            ("files", ("a.txt", b"new", "text/plain")),
+            ("files", ("b.txt", b"b", "text/plain")),
+            ("archive", ("archive.tar.gz", archive.getvalue(), "application/gzip")),
+        ],
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["files"] == [
+        {"file_path": "batch/a.txt", "status": "overwritten", "error": None},
+        {"file_path": "batch/b.txt", "status": "created", "error": None},
+        {"file_path": "batch/c.txt", "status": "created", "error": None},
+        {"file_path": "batch/sub/d.txt", "status": "created", "error": None},
+    ]
+    assert client.get("/v1/files/batch/a.txt").content == b"new"
+    assert client.get("/v1/files/batch/sub/d.txt").content == b"d"
+    assert client.head("/v1/files/batch/c.txt").headers["Content-Type"] == "text/plain"
+
+
+def test_upload_files_into_a_directory_without_a_trailing_slash(client: TestClient):
+    """Asserts that files uploaded into `directory` land inside it even if it does not end with a slash."""
+    archive = io.BytesIO()
+    with tarfile.open(fileobj=archive, mode="w") as tar:
+        tar_info = tarfile.TarInfo("b.txt")
+        tar_info.size = 1
+        tar.addfile(tar_info, io.BytesIO(b"b"))
+
+    response = client.post(
+        "/v1/files:upload",
+        data={"directory": "batch"},
+        files=[
+            ("files", ("a.txt", b"a", "text/plain")),
+            ("archive", ("archive.tar", archive.getvalue(), "application/x-tar")),
+        ],
+    )
+    assert [file["file_path"] for file in response.json()["files"]] == ["batch/a.txt", "batch/b.txt"]
+    assert client.get("/v1/files/batch/a.txt").content == b"a"
+
+
+def test_upload_files_reports_the_files_uploaded_before_an_archive_is_cut_short(client: TestClient):
+    """Asserts that the files read out of a truncated archive are uploaded and reported, along with the archive."""
+    archive = io.BytesIO()
+    with tarfile.open(fileobj=archive, mode="w") as tar:
+        for name in ["a.txt", "b.txt"]:
+            tar_info = tarfile.TarInfo(name)
+            tar_info.size = 10_000
+            tar.addfile(tar_info, io.BytesIO(b"x" * 10_000))
+    truncated_archive = archive.getvalue()[:15_000]
+
+    response = client.post(
+        "/v1/files:upload",
+        data={"directory": "batch/"},
+        files=[("archive", ("archive.tar", truncated_archive, "application/x-tar"))],
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["files"] == [
+        {"file_path": "batch/a.txt", "status": "created", "error": None},
+        {"file_path": "archive.tar", "status": "failed", "error": "Invalid tar archive"},
+    ]
+    assert client.get("/v1/files/batch/a.txt").content == b"x" * 10_000
+    assert client.head("/v1/files/batch/b.txt").status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_get_files_metadata(client: TestClient):
+    """Asserts that the metadata of many files can be looked up at once, with missing files reported separately."""
+    for file_path in ["a.txt", "dir/b.txt"]:
+        client.put(f"/v1/files/{file_path}", files={"file_content": (file_path, b"data", "text/plain")})
+
+    response = client.post("/v1/files:metadata", json={"file_paths": ["dir/b.txt", "missing.txt", "a.txt"]})
+    assert response.status_code == status.HTTP_200_OK
+    assert [file["file_path"] for file in response.json()["files"]] == ["dir/b.txt", "a.txt"]
+    assert response.json()["files"][0]["size_bytes"] == 4
+    assert response.json()["not_found"] == ["missing.txt"]
+
+
+def test_get_files_archive(client: TestClient):
+    """Asserts that a directory can be downloaded as a single streamed archive."""
+    for file_path in ["photos/a.jpg", "photos/trip/b.jpg", "other.txt"]:
+        client.put(f"/v1/files/{file_path}", files={"file_content": (file_path, file_path.encode(), "image/jpeg")})
+
+    response = client.get("/v1/files:archive", params={"directory": "photos/", "format": "tar.gz"})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["Content-Type"] == "application/gzip"
+    assert response.headers["Content-Disposition"] == 'attachment; filename="photos.tar.gz"'
+    with tarfile.open(fileobj=io.BytesIO(response.content)) as tar:
+        assert {member.name: tar.extractfile(member).read() for member in tar} == {
+            "a.jpg": b"photos/a.jpg",
+            "trip/b.jpg": b"photos/trip/b.jpg",
+        }
+
+
+def test_presigned_upload_and_download(client: TestClient):
+    """Asserts that files can be transferred directly to and from S3 with presigned URLs."""
+    response = client.post("/v1/files:presign", json={"file_path": TEST_FILE_PATH, "operation": "upload"})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["method"] == "PUT"
+    assert requests.put(response.json()["url"], data=TEST_FILE_CONTENT, timeout=5).ok
+
+    response = client.post("/v1/files:presign", json={"file_path": TEST_FILE_PATH, "operation": "download"})
+    assert response.json()["method"] == "GET"
+    assert requests.get(response.json()["url"], timeout=5).content == TEST_FILE_CONTENT
+
+
+def test_presigned_multipart_upload(mocked_aws: None):  # pylint: disable=unused-argument
+    """Asserts that large files are uploaded with a presigned URL per part, then completed through the API."""
+    with TestClient(create_app(Settings(s3_bucket_name=TEST_BUCKET_NAME, s3_multipart_threshold_bytes=4))) as client:
+        response = client.post(
+            "/v1/files:presign", json={"file_path": TEST_FILE_PATH, "operation": "upload", "size_bytes": 13}
+        )
+        presigned_upload = response.json()
+        assert len(presigned_upload["parts"]) == 1
+
+        part_response = requests.put(presigned_upload["parts"][0]["url"], data=TEST_FILE_CONTENT, timeout=5)
+        response = client.post(
+            "/v1/files:complete-upload",
+            json={
+                "file_path": TEST_FILE_PATH,
+                "upload_id": presigned_upload["upload_id"],
+                "parts": [{"part_number": 1, "etag": part_response.headers["ETag"]}],
+            },
+        )
+        assert response.status_code == status.HTTP_201_CREATED
+        assert client.get(f"/v1/files/{TEST_FILE_PATH}").content == TEST_FILE_CONTENT
+
+
+def test_large_downloads_redirect_to_s3(mocked_aws: None):  # pylint: disable=unused-argument
+    """Asserts that files at or above the redirect threshold are served by redirecting to a presigned URL."""
+    settings = Settings(s3_bucket_name=TEST_BUCKET_NAME, presigned_redirect_threshold_bytes=10)
+    with TestClient(create_app(settings), follow_redirects=False) as client:
+        client.put("/v1/files/small.txt", files={"file_content": ("small.txt", b"small", "text/plain")})
+        client.put("/v1/files/large.txt", files={"file_content": ("large.txt", b"large" * 10, "text/plain")})
+
+        assert client.get("/v1/files/small.txt").content == b"small"
+        response = client.get("/v1/files/large.txt")
+        assert response.status_code == status.HTTP_307_TEMPORARY_REDIRECT
+        assert requests.get(response.headers["Location"], timeout=5).content == b"large" * 10
+
+
+def test_list_files_non_recursively(client: TestClient):
+    """Asserts that non-recursive listings return subdirectories separately, with page tokens spanning both."""
+    for file_path in ["photos/a.jpg", "photos/b.jpg", "photos/2023/c.jpg", "photos/2024/d.jpg", "photos/2024/e/f.jpg"]:
+        client.put(f"/v1/files/{file_path}", files={"file_content": (file_path, b"data", "image/jpeg")})
+
+    response = client.get("/v1/files", params={"directory": "photos/", "recursive": False, "page_size": 10})
+    assert response.json()["directories"] == ["photos/2023/", "photos/2024/"]
+    assert [file["file_path"] for file in response.json()["files"]] == ["photos/a.jpg", "photos/b.jpg"]
+    assert response.json()["next_page_token"] is None
+
+    # 12 entries paged 10 at a time: the token must keep the directory and the delimiter
+    for index in range(8):
+        client.put(f"/v1/files/photos/z{index}.jpg", files={"file_content": ("z.jpg", b"data", "image/jpeg")})
+    response = client.get("/v1/files", params={"directory": "photos/", "recursive": False, "page_size": 10})
+    assert len(response.json()["files"]) + len(response.json()["directories"]) == 10
+
+    response = client.get("/v1/files", params={"page_token": response.json()["next_page_token"]})
+    assert response.status_code == status.HTTP_200_OK
+    assert [file["file_path"] for file in response.json()["files"]] == ["photos/z6.jpg", "photos/z7.jpg"]
+    assert response.json()["next_page_token"] is None
+
+    # recursive listings page with raw S3 continuation tokens
+    response = client.get("/v1/files", params={"directory": "photos/", "page_size": 10})
+    response = client.get("/v1/files", params={"page_token": response.json()["next_page_token"]})
+    assert len(response.json()["files"]) == 3
+    assert response.json()["directories"] == []
+
+
+def test_compressed_responses(client: TestClient):
+    """Asserts that downloads and listings are compressed with the coding the client prefers."""
+    csv_content = b"id,name\n" + b"".join(f"{index},name-{index}\n".encode() for index in range(1000))
+    client.put("/v1/files/data.csv", files={"file_content": ("data.csv", csv_content, "text/csv")})
+    client.put("/v1/files/image.png", files={"file_content": ("image.png", b"\x89PNG" * 1000, "image/png")})
+
+    response = client.get("/v1/files/data.csv", headers={"Accept-Encoding": "gzip, zstd"})
+    assert response.headers["Content-Encoding"] == "zstd"
+    assert response.headers["Vary"] == "Accept-Encoding"
+    assert response.headers["ETag"].startswith('W/"')
+    assert response.content == csv_content  # decompressed by the test client
+    response = client.get("/v1/files/data.csv", headers={"If-None-Match": response.headers["ETag"]})
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    response = client.get("/v1/files/data.csv", headers={"Accept-Encoding": "identity"})
+    assert "Content-Encoding" not in response.headers
+    assert response.headers["Content-Length"] == str(len(csv_content))
+
+    response = client.get("/v1/files/data.csv", headers={"Accept-Encoding": "gzip", "Range": "bytes=0-9"})
+    assert response.status_code == status.HTTP_206_PARTIAL_CONTENT
+    assert "Content-Encoding" not in response.headers
+
+    response = client.get("/v1/files/image.png", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in response.headers
+
+    response = client.get("/v1/files", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Vary"] == "Accept-Encoding"
+    assert "Content-Encoding" not in response.headers  # too small to be worth compressing
+
+    client.post("/v1/files:upload", files=[("files", (f"{index}.txt", b"x", "text/plain")) for index in range(30)])
+    response = client.get("/v1/files", params={"page_size": 100}, headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert len(response.json()["files"]) == 32
+
+
+def test_conditional_put_and_delete_with_the_etag_of_a_compressed_download(client: TestClient):
+    """Asserts that the weak `ETag` of a compressed download is accepted in `If-Match` by PUT and DELETE."""
+    csv_content = b"id,name\n" + b"".join(f"{index},name-{index}\n".encode() for index in range(1000))
+    client.put("/v1/files/data.csv", files={"file_content": ("data.csv", csv_content, "text/csv")})
+    weak_etag = client.get("/v1/files/data.csv", headers={"Accept-Encoding": "gzip"}).headers["ETag"]
+    assert weak_etag.startswith('W/"')
+
+    updated = {"file_content": ("data.csv", csv_content + b"1000,name-1000\n", "text/csv")}
+    response = client.put("/v1/files/data.csv", files=updated, headers={"If-Match": weak_etag})
+    assert response.status_code == status.HTTP_200_OK
+    response = client.delete("/v1/files/data.csv", headers={"If-Match": weak_etag})
+    assert response.status_code == status.HTTP_412_PRECONDITION_FAILED
+
+    weak_etag = client.get("/v1/files/data.csv", headers={"Accept-Encoding": "gzip"}).headers["ETag"]
+    response = client.delete("/v1/files/data.csv", headers={"If-Match": weak_etag})
+    assert response.status_code == status.HTTP_200_OK
+    assert client.head("/v1/files/data.csv").status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_compressed_storage(mocked_aws: None):  # pylint: disable=unused-argument
+    """Asserts that uploads can be stored compressed and are served as stored or decompressed."""
+    settings = Settings(s3_bucket_name=TEST_BUCKET_NAME, upload_content_encoding="gzip")
+    csv_content = b"id,name\n" + b"".join(f"{index},name-{index}\n".encode() for index in range(1000))
+    with TestClient(create_app(settings)) as client:
+        client.put("/v1/files/data.csv", files={"file_content": ("data.csv", csv_content, "text/csv")})
+        client.post("/v1/files:upload", files=[("files", ("image.png", b"\x89PNG", "image/png"))])
+
+        stored_object = boto3.client("s3").get_object(Bucket=TEST_BUCKET_NAME, Key="data.csv")
+        assert stored_object["ContentEncoding"] == "gzip"
+        assert stored_object["ContentLength"] < len(csv_content) / 2
+        assert "ContentEncoding" not in boto3.client("s3").head_object(Bucket=TEST_BUCKET_NAME, Key="image.png")
+
+        # stored bytes are passed through to clients that accept them, byte ranges included
+        response = client.get("/v1/files/data.csv", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert response.headers["Content-Length"] == str(stored_object["ContentLength"])
+        assert response.content == csv_content
+        response = client.head("/v1/files/data.csv", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["Content-Encoding"] == "gzip"
+
+        # and decompressed, whole, for clients that don't
+        response = client.get("/v1/files/data.csv", headers={"Accept-Encoding": "identity", "Range": "bytes=0-9"})
+        assert response.status_code == status.HTTP_200_OK
+        assert "Content-Encoding" not in response.headers
+        assert response.content == csv_content
+        response = client.head("/v1/files/data.csv", headers={"Accept-Encoding": "identity"})
+        assert "Content-Encoding" not in response.headers
+
+        # archives hold files as stored, under their compressed file name
+        response = client.get("/v1/files:archive", params={"directory": "", "format": "tar"})
+        with tarfile.open(fileobj=io.BytesIO(response.content)) as tar:
+            assert sorted(tar.getnames()) == ["data.csv.gz", "image.png"]
+            assert gzip.decompress(tar.extractfile("data.csv.gz").read()) == csv_content
+
+
+def test_body_cache(mocked_aws: None, tmp_path):  # pylint: disable=unused-argument
+    """Asserts that file bodies are served from the cache until they are written, and can be pre-warmed."""
+    settings = Settings(
+        s3_bucket_name=TEST_BUCKET_NAME,
+        body_cache_memory_capacity_bytes=1024,
+        body_cache_memory_max_object_bytes=16,
+        body_cache_disk_directory=str(tmp_path),
+    )
+    with TestClient(create_app(settings)) as client:
+        client.put("/v1/files/small.txt", files={"file_content": ("small.txt", b"small", "text/plain")})
+        client.put("/v1/files/dir/large.bin", files={"file_content": ("large.bin", b"x" * 100, "image/png")})
+
+        # pre-warming fills both tiers
+        response = client.post("/v1/admin/body-cache:prewarm", json={"directory": "dir"})
+        assert response.json() == {"cached_count": 1, "cached_bytes": 100}
+
+        response = client.get("/v1/files/small.txt")
+        assert response.content == b"small"
+        etag = response.headers["ETag"]
+        # a cached body is revalidated with S3, or not at all while its metadata is cached
+        response = client.get("/v1/files/small.txt")
+        assert response.content == b"small"
+        assert response.headers["ETag"] == etag
+        assert response.headers["X-S3-Call-Count"] == "1"
+        client.head("/v1/files/small.txt")
+        response = client.get("/v1/files/small.txt")
+        assert response.content == b"small"
+        assert response.headers["X-S3-Call-Count"] == "0"
+        response = client.get("/v1/files/small.txt", headers={"If-None-Match": etag})
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+        response = client.get("/v1/files/dir/large.bin")
+        assert response.content == b"x" * 100
+        assert response.headers["Content-Length"] == "100"
+        assert response.headers["Content-Type"] == "image/png"
+
+        # writes and deletes invalidate cached bodies
+        client.put("/v1/files/small.txt", files={"file_content": ("small.txt", b"changed", "text/plain")})
+        assert client.get("/v1/files/small.txt").content == b"changed"
+        client.delete("/v1/files/dir/large.bin")
+        assert client.get("/v1/files/dir/large.bin").status_code == status.HTTP_404_NOT_FOUND
+
+        # byte ranges bypass the cache
+        response = client.get("/v1/files/small.txt", headers={"Range": "bytes=0-1"})
+        assert response.status_code == status.HTTP_206_PARTIAL_CONTENT
+        assert response.content == b"ch"
+
+        stats = client.get("/v1/admin/body-cache").json()
+        assert stats["memory_hits"] == 3 and stats["disk_hits"] == 1
+        assert stats["revalidations"] == 2
+        assert stats["bytes_saved"] == 115
+        assert stats["invalidations"] == 2
+
+
+def test_local_storage_backend(tmp_path):
+    """Asserts that the core file routes work the same on local storage, and S3-only routes answer 501."""
+    settings = Settings(storage_backend="local", local_storage_directory=str(tmp_path))
+    with TestClient(create_app(settings)) as client:
+        response = client.put(
+            "/v1/files/dir/file.txt", files={"file_content": ("file.txt", b"0123456789", "text/plain")}
+        )
+        assert response.status_code == status.HTTP_201_CREATED
+        assert (tmp_path / "dir" / "file.txt").read_bytes() == b"0123456789"
+
+        response = client.head("/v1/files/dir/file.txt")
+        etag = response.headers["ETag"]
+        assert response.headers["Content-Length"] == "10"
+        assert response.headers["Content-Type"].startswith("text/plain")
+
+        response = client.get("/v1/files/dir/file.txt")
+        assert response.content == b"0123456789"
+        assert response.headers["ETag"] == etag
+        response = client.get("/v1/files/dir/file.txt", headers={"Range": "bytes=-3"})
+        assert response.status_code == status.HTTP_206_PARTIAL_CONTENT
+        assert response.content == b"789"
+        assert response.headers["Content-Range"] == "bytes 7-9/10"
+        response = client.get("/v1/files/dir/file.txt", headers={"Range": "bytes=20-"})
+        assert response.status_code == status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE
+        assert response.headers["Content-Range"] == "bytes */10"
+        response = client.get("/v1/files/dir/file.txt", headers={"If-None-Match": etag})
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+        client.put("/v1/files/other.txt", files={"file_content": ("other.txt", b"other", "text/plain")})
+        assert [file["file_path"] for file in client.get("/v1/files").json()["files"]] == ["dir/file.txt", "other.txt"]
+        response = client.get("/v1/files", params={"recursive": False})
+        assert response.json()["directories"] == ["dir/"]
+        assert [file["file_path"] for file in response.json()["files"]] == ["other.txt"]
+
+        response = client.delete("/v1/files/dir/file.txt", headers={"If-Match": '"stale"'})
+        assert response.status_code == status.HTTP_412_PRECONDITION_FAILED
+        assert client.delete("/v1/files/dir/file.txt", headers={"If-Match": etag}).status_code == status.HTTP_200_OK
+        assert client.get("/v1/files/dir/file.txt").status_code == status.HTTP_404_NOT_FOUND
+
+        # no file can be named with a NUL byte
+        for method in ("GET", "HEAD", "DELETE"):
+            assert client.request(method, "/v1/files/a%00b").status_code == status.HTTP_404_NOT_FOUND
+        response = client.put("/v1/files/a%00b", files={"file_content": ("a", b"a", "text/plain")})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+        response = client.post("/v1/files:delete", json={"file_paths": ["other.txt"]})
+        assert response.status_code == status.HTTP_501_NOT_IMPLEMENTED
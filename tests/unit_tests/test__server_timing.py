@@ -0,0 +1,76 @@
+"""Test cases for the `Server-Timing` response header."""
+
+import re
+
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+
+from files_api.main import create_app
+from files_api.middleware import S3_CALL_COUNT_HEADER
+from files_api.s3.call_tracking import S3CallLog
+from files_api.server_timing import (
+    SERVER_TIMING_HEADER,
+    RequestTiming,
+    format_server_timing,
+)
+from files_api.settings import Settings
+from tests.consts import TEST_BUCKET_NAME
+
+
+def _metric_names(server_timing: str) -> list[str]:
+    return [metric.split(";")[0] for metric in server_timing.split(", ")]
+
+
+def test_server_timing(mocked_aws: None):  # pylint: disable=unused-argument
+    """Asserts that responses break their time down into body parsing, S3 calls by kind and serialization."""
+    settings = Settings(s3_bucket_name=TEST_BUCKET_NAME, server_timing_enabled=True)
+    with TestClient(create_app(settings)) as client:
+        response = client.put("/v1/files/file.txt", files={"file_content": ("file.txt", b"hello", "text/plain")})
+        assert response.status_code == status.HTTP_201_CREATED
+        assert _metric_names(response.headers[SERVER_TIMING_HEADER]) == ["body", "s3-put", "serialize", "total"]
+        assert re.search(r's3-put;dur=\d+\.\d;desc="1 call"', response.headers[SERVER_TIMING_HEADER])
+
+        response = client.get("/v1/files/file.txt")
+        assert _metric_names(response.headers[SERVER_TIMING_HEADER]) == ["s3-get", "serialize", "total"]
+        assert response.headers[S3_CALL_COUNT_HEADER] == "1"
+
+        response = client.get("/no/such/route")
+        assert _metric_names(response.headers[SERVER_TIMING_HEADER]) == ["total"]
+
+
+def test_server_timing_disabled(client: TestClient):
+    """Asserts that responses have no `Server-Timing` header by default."""
+    assert SERVER_TIMING_HEADER not in client.get("/v1/files").headers
+
+
+@pytest.mark.parametrize(
+    "client_host, expect_header", [("10.1.2.3", True), ("192.168.0.1", False), ("testclient", False)]
+)
+def test_server_timing_trusted_networks(
+    mocked_aws: None, client_host: str, expect_header: bool  # pylint: disable=unused-argument
+):
+    """Asserts that only callers from the trusted networks get the header."""
+    settings = Settings(
+        s3_bucket_name=TEST_BUCKET_NAME, server_timing_enabled=True, server_timing_trusted_networks=["10.0.0.0/8"]
+    )
+    with TestClient(create_app(settings), client=(client_host, 50000)) as client:
+        assert (SERVER_TIMING_HEADER in client.get("/v1/files").headers) == expect_header
+
+
+def test_format_server_timing():
+    """Asserts that S3 calls are summed by kind, and that bodies parsed before the endpoint count until it is called."""
+    s3_call_log = S3CallLog()
+    s3_call_log.durations = [
+        ("HeadObject", 0.002),
+        ("HeadObject", 0.003),
+        ("ListObjectsV2", 0.01),
+        ("GetBucketAcl", 1),
+    ]
+    timing = RequestTiming(
+        started_at=1.0, body_started_at=1.0, body_ended_at=1.01, endpoint_started_at=1.02, endpoint_returned_at=1.05
+    )
+    assert format_server_timing(timing, s3_call_log, ended_at=1.06) == (
+        'body;dur=20.0, s3-head;dur=5.0;desc="2 calls", s3-list;dur=10.0;desc="1 call", '
+        's3-other;dur=1000.0;desc="1 call", serialize;dur=10.0, total;dur=60.0'
+    )
@@ -0,0 +1,62 @@
+"""Test cases for `singleflight`."""
+
+import asyncio
+
+import pytest
+
+from files_api.singleflight import (
+    SingleFlight,
+    share_immutable,
+)
+
+
+@pytest.mark.anyio
+async def test_concurrent_calls_are_coalesced():
+    """Assert that concurrent calls with the same key make one call, and that later calls make another."""
+    single_flight: SingleFlight = SingleFlight()
+    calls = []
+
+    async def _call(key: str) -> str:
+        calls.append(key)
+        await asyncio.sleep(0.01)
+        return key.upper()
+
+    results = await asyncio.gather(
+        *[single_flight.do("a", lambda: _call("a"), share_immutable) for _ in range(5)],
+        single_flight.do("b", lambda: _call("b"), share_immutable),
+    )
+    assert results == ["A"] * 5 + ["B"]
+    assert calls == ["a", "b"]
+    assert single_flight.stats.as_dict() == {"flights": 2, "coalesced": 4}
+
+    assert await single_flight.do("a", lambda: _call("a"), share_immutable) == "A"
+    assert calls == ["a", "b", "a"]
+
+
+@pytest.mark.anyio
+async def test_results_are_shared_between_waiting_callers():
+    """Assert that the result is split between the callers still waiting, and errors raised to each of them."""
+    single_flight: SingleFlight = SingleFlight()
+    shares = []
+
+    def _share(result: list, num_callers: int) -> list:
+        shares.append(num_callers)
+        return [[*result, index] for index in range(num_callers)]
+
+    async def _call() -> list:
+        await asyncio.sleep(0.01)
+        return ["result"]
+
+    cancelled = asyncio.ensure_future(single_flight.do("key", _call, _share))
+    waiting = [asyncio.ensure_future(single_flight.do("key", _call, _share)) for _ in range(2)]
+    await asyncio.sleep(0)
+    cancelled.cancel()
+    assert sorted(await asyncio.gather(*waiting)) == [["result", 0], ["result", 1]]
+    assert shares == [2]
+
+    async def _fail() -> list:
+        await asyncio.sleep(0.01)
+        raise ValueError("no luck")
+
+    results = await asyncio.gather(*[single_flight.do("key", _fail, _share) for _ in range(3)], return_exceptions=True)
+    assert [str(result) for result in results] == ["no luck"] * 3
@@ -0,0 +1,96 @@
+"""Test cases for the OpenTelemetry tracing of requests and S3 calls."""
+
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+from opentelemetry.sdk.trace.sampling import (
+    Decision,
+    ParentBased,
+    TraceIdRatioBased,
+)
+
+from files_api.main import create_app
+from files_api.metrics import MetricsMiddleware
+from files_api.settings import Settings
+from files_api.tracing import (
+    TracingMiddleware,
+    create_sampler,
+)
+from tests.consts import TEST_BUCKET_NAME
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+PARENT_SPAN_ID = "00f067aa0ba902b7"
+
+
+def test_tracing(mocked_aws: None):  # pylint: disable=unused-argument
+    """Asserts that requests continue the incoming trace, with child spans for S3 calls and body streaming."""
+    settings = Settings(s3_bucket_name=TEST_BUCKET_NAME, tracing_enabled=True, tracing_exporter="memory")
+    with TestClient(create_app(settings)) as client:
+        span_exporter = client.app.state.tracing.span_exporter
+        assert span_exporter.get_finished_spans() == ()  # warming the connection pool is not traced
+
+        client.put("/v1/files/file.txt", files={"file_content": ("file.txt", b"hello", "text/plain")})
+        upload_spans = [span.name for span in span_exporter.get_finished_spans()]
+        assert upload_spans[:2] == ["receive request body", "S3.PutObject"]
+        span_exporter.clear()
+        response = client.get("/v1/files/file.txt", headers={"traceparent": f"00-{TRACE_ID}-{PARENT_SPAN_ID}-01"})
+        assert response.status_code == status.HTTP_200_OK
+
+        spans = {span.name: span for span in span_exporter.get_finished_spans()}
+        request_span = spans["GET /v1/files/{file_path:path}"]
+        assert format(request_span.context.trace_id, "032x") == TRACE_ID
+        assert format(request_span.parent.span_id, "016x") == PARENT_SPAN_ID
+        assert request_span.attributes["http.route"] == "/v1/files/{file_path:path}"
+        assert request_span.attributes["http.response.status_code"] == status.HTTP_200_OK
+
+        s3_span = spans["S3.GetObject"]
+        assert s3_span.parent.span_id == request_span.context.span_id
+        assert s3_span.attributes["aws.s3.key"] == "file.txt"
+        assert s3_span.attributes["http.response.status_code"] == status.HTTP_200_OK
+        assert spans["send response body"].parent.span_id == request_span.context.span_id
+
+        span_exporter.clear()
+        client.head("/v1/files/missing.txt")
+        spans = {span.name: span for span in span_exporter.get_finished_spans()}
+        assert not spans["S3.HeadObject"].status.is_ok
+        assert spans["HEAD /v1/files/{file_path:path}"].status.is_unset
+
+
+def test_unsampled_requests_are_not_exported(mocked_aws: None):  # pylint: disable=unused-argument
+    """Asserts that the sampling decision of the incoming trace is followed by the default sampler."""
+    settings = Settings(s3_bucket_name=TEST_BUCKET_NAME, tracing_enabled=True, tracing_exporter="memory")
+    with TestClient(create_app(settings)) as client:
+        client.get("/v1/files", headers={"traceparent": f"00-{TRACE_ID}-{PARENT_SPAN_ID}-00"})
+        assert client.app.state.tracing.span_exporter.get_finished_spans() == ()
+
+
+def test_metrics_middleware_wraps_the_tracing_middleware():
+    """Assert that the metrics middleware stays outermost when tracing is enabled, so that it times tracing too."""
+    settings = Settings(
+        s3_bucket_name=TEST_BUCKET_NAME, tracing_enabled=True, tracing_exporter="memory", metrics_enabled=True
+    )
+    middleware_classes = [middleware.cls for middleware in create_app(settings).user_middleware]
+    assert middleware_classes[:2] == [MetricsMiddleware, TracingMiddleware]
+
+
+@pytest.mark.parametrize(
+    "name, expected_root_decision",
+    [
+        ("always_on", Decision.RECORD_AND_SAMPLE),
+        ("always_off", Decision.DROP),
+        ("parentbased_always_on", Decision.RECORD_AND_SAMPLE),
+        ("parentbased_always_off", Decision.DROP),
+    ],
+)
+def test_create_sampler(name: str, expected_root_decision: Decision):
+    """Asserts that samplers are created from their OTEL_TRACES_SAMPLER names."""
+    sampler = create_sampler(name, ratio=0.5)
+    assert isinstance(sampler, ParentBased) == name.startswith("parentbased_")
+    assert sampler.should_sample(parent_context=None, trace_id=1, name="span").decision == expected_root_decision
+
+
+def test_create_ratio_sampler():
+    """Asserts that the ratio is given to the traceidratio samplers."""
+    assert create_sampler("traceidratio", ratio=0.25).rate == 0.25
+    assert isinstance(create_sampler("parentbased_traceidratio", ratio=0.25), ParentBased)
+    assert not isinstance(create_sampler("parentbased_traceidratio", ratio=0.25), TraceIdRatioBased)